@@ -1,20 +1,105 @@
-from flask import Flask, request, jsonify, render_template, send_file
+from flask import Flask, Response, request, render_template, abort, stream_with_context
 from config_generator import NetworkConfigGenerator
-import io
-import json
+from serialization import dumps_document
+from compression import compressed, streamed_response
+from static_assets import StaticAssets, IMMUTABLE_CACHE, REVALIDATE_CACHE
+from catalog import Catalog
+from live_validation import SessionStore, PatchError
+from jobs import JobManager
+from artifact_store import ArtifactStore
+from config_history import ConfigHistory
+from ipam import Ipam, IpamError
+from fleet import FleetRegistry, FleetValidator
+from fanout import FanoutRenderer
+from meraki_templates import TemplatePlanner, DEFAULT_PREFIX
+from vendors.capabilities import recommend, site_requirements
+from vendors.registry import vendor_registry
+from batch_validation import BatchValidator
+from site_schema import SCHEMA_PATH
+import os
+import queue
 
-app = Flask(__name__)
-generator = NetworkConfigGenerator()
+# Los assets se sirven desde memoria con hash en la URL (ver /assets)
+app = Flask(__name__, static_folder=None)
+app.config['COMPRESS_MIN_SIZE'] = int(os.environ.get('COMPRESS_MIN_SIZE', 1024))
+app.config['COMPRESS_LEVEL'] = int(os.environ.get('COMPRESS_LEVEL', 6))
+# ARTIFACTS_DIR activa el archivo deduplicado de cada configuración generada
+artifacts_dir = os.environ.get('ARTIFACTS_DIR')
+artifact_store = ArtifactStore(artifacts_dir) if artifacts_dir else None
+# IPAM_DB activa la asignación de subredes LAN y pools DHCP por cliente
+ipam = Ipam(os.environ['IPAM_DB']) if os.environ.get('IPAM_DB') else None
+# FLEET_DB activa la revisión de subredes superpuestas entre sitios del cliente
+fleet = FleetRegistry(os.environ['FLEET_DB']) if os.environ.get('FLEET_DB') else None
+generator = NetworkConfigGenerator(artifact_store=artifact_store, ipam=ipam, fleet=fleet)
+# HISTORY_DB activa el historial de revisiones por sitio
+history = ConfigHistory(os.environ['HISTORY_DB']) if os.environ.get('HISTORY_DB') else None
+validation_sessions = SessionStore()
+# Comparativas multi-vendor: el pool de procesos se crea con el primer sitio grande
+fanout = FanoutRenderer(generator)
+# Trabajos en lote: estado en SQLite y generación en procesos locales
+jobs = JobManager(
+    os.environ.get('JOBS_DB', os.path.join(app.root_path, 'jobs.db')),
+    concurrency=int(os.environ.get('JOBS_CONCURRENCY', 4)),
+    default_timeout=float(os.environ.get('JOBS_TIMEOUT', 3600)),
+    outputs=tuple(generator.OUTPUTS),
+    artifacts_dir=artifacts_dir
+)
+
+assets = StaticAssets(os.path.join(app.root_path, 'static'))
+app.jinja_env.globals['asset_url'] = assets.url
+# El catálogo también se publica como asset con hash para que la UI lo cachee
+catalog = Catalog()
+catalog_asset = assets.add('catalog.json', catalog.body, 'application/json',
+                           digest=catalog.version)
+# Esquema del documento del sitio, para validar del lado del cliente
+with open(SCHEMA_PATH, 'rb') as fh:
+    site_schema_asset = assets.add('site.schema.json', fh.read(), 'application/schema+json')
+# La página no tiene datos por request: se renderiza y comprime una sola vez
+with app.app_context():
+    index_page = assets.add('index.html', render_template('index.html').encode('utf-8'))
+
+def json_response(payload, status: int = 200) -> Response:
+    """Serializa la respuesta con la capa común (compacta, una sola pasada)"""
+    return Response(dumps_document(payload), status=status, mimetype='application/json')
+
+def flag_arg(name: str) -> bool:
+    """Lee un flag booleano de la query (?name=1/true/yes)"""
+    return request.args.get(name, '').lower() in ('1', 'true', 'yes')
+
+def pretty_arg():
+    """Lee ?pretty=1/0; None deja el valor por defecto del formato de salida"""
+    value = request.args.get('pretty')
+    if value is None:
+        return None
+    return value.lower() in ('1', 'true', 'yes')
 
 @app.route('/')
 def index():
-    """Página principal con formulario"""
-    return render_template('index.html')
+    """Página principal con formulario (precomprimida, se revalida por ETag)"""
+    return assets.response(index_page, cache_control=REVALIDATE_CACHE)
+
+@app.route('/assets/<filename>')
+def static_asset(filename):
+    """Assets con hash de contenido: caché de larga duración"""
+    asset = assets.get(filename)
+    if asset is None:
+        abort(404)
+    return assets.response(asset)
+
+@app.route('/api/catalog', methods=['GET'])
+def get_catalog():
+    """Vendors, modelos, políticas, zonas horarias y límites en un solo payload"""
+    return assets.response(catalog_asset, cache_control=REVALIDATE_CACHE)
+
+@app.route('/api/schema/site', methods=['GET'])
+def get_site_schema():
+    """JSON Schema del documento de entrada (solo forma; los valores los revisa el validador)"""
+    return assets.response(site_schema_asset, cache_control=REVALIDATE_CACHE)
 
 @app.route('/api/vendors', methods=['GET'])
 def get_vendors():
     """Lista de vendors soportados"""
-    return jsonify({
+    return json_response({
         'vendors': generator.get_supported_vendors()
     })
 
@@ -23,32 +108,133 @@ def get_models(vendor):
     """Lista de modelos para un vendor"""
     models = generator.get_supported_models(vendor)
     if models:
-        return jsonify({'vendor': vendor, 'models': models})
-    return jsonify({'error': f'Vendor {vendor} no encontrado'}), 404
+        return json_response({'vendor': vendor, 'models': models})
+    return json_response({'error': f'Vendor {vendor} no encontrado'}, 404)
 
 @app.route('/api/generate', methods=['POST'])
+@compressed
 def generate_config():
-    """Genera configuración"""
+    """
+    Genera configuración (?output=plan para la lista de operaciones de API,
+    ?allocate=1 para completar las LAN sin IP desde el IPAM)
+    """
     try:
         params = request.json
         if not params:
-            return jsonify({'error': 'No se recibieron parámetros'}), 400
+            return json_response({'error': 'No se recibieron parámetros'}, 400)
+        
+        output = request.args.get('output', 'text')
+        if output not in generator.OUTPUTS:
+            return json_response({'error': f"output '{output}' no es válido. Opciones: {', '.join(generator.OUTPUTS)}"}, 400)
         
-        result = generator.generate(params)
-        return jsonify(result)
+        result = generator.generate(params, output=output, pretty=pretty_arg(),
+                                    serialized_payloads=True,
+                                    analyze=flag_arg('analyze'), allocate=flag_arg('allocate'))
+        if history is not None and result['success'] and result['config']:
+            # Sin cliente no hay clave de historial (como en fleet)
+            customer = params['site_info'].get('customer')
+            if customer:
+                result['revision'] = history.add(customer, result['site_name'], result['config'],
+                                                 result['vendor'])
+        return json_response(result)
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
+
+@app.route('/api/generate/fanout', methods=['POST'])
+@compressed
+def generate_fanout():
+    """
+    Genera un sitio para varios vendors a la vez, validándolo una sola vez
+    
+    Body: {"site": {...}, "vendors": [...], "models": {vendor: modelo},
+    "output": "text" | "plan" | "both"}; vendors por defecto son todos.
+    """
+    params = request.json
+    if not isinstance(params, dict) or not isinstance(params.get('site'), dict):
+        return json_response({'error': "Se requiere 'site' (documento del sitio)"}, 400)
+    try:
+        result = fanout.render(params['site'], vendors=params.get('vendors'),
+                               models=params.get('models'), output=params.get('output', 'both'))
+    except ValueError as e:
+        return json_response({'error': str(e)}, 400)
+    return json_response(result)
+
+@app.route('/api/meraki/templates', methods=['POST'])
+@compressed
+def meraki_templates():
+    """
+    Agrupa una flota Meraki en plantillas de configuración
+    
+    Body: {"sites": [...], "prefix": "EngIA"}. Retorna las plantillas (una
+    por combinación de políticas), el plan de cada sitio (ajustes, bind y
+    overrides) y el reporte de llamadas de API contra el modo por red.
+    """
+    params = request.json
+    if not isinstance(params, dict) or not isinstance(params.get('sites'), list):
+        return json_response({'error': "Se requiere 'sites' (lista de sitios)"}, 400)
+    prefix = params.get('prefix', DEFAULT_PREFIX)
+    if not isinstance(prefix, str) or not prefix:
+        return json_response({'error': "'prefix' debe ser un texto no vacío"}, 400)
+    result = TemplatePlanner(generator, prefix).plan(params['sites'])
+    return json_response(result, 200 if result['success'] else 400)
+
+@app.route('/api/sizing', methods=['POST'])
+def size_site():
+    """
+    Recomienda el modelo más chico que cubre el sitio
+    
+    Body: documento del sitio. Se dimensiona por WAN, VLAN, scopes DHCP y el
+    bandwidth_mbps sumado de las WAN, con el throughput de la plantilla de
+    políticas (advanced usa el de IPS/AV). ?vendors=a,b elige los vendors
+    (por defecto el del sitio o, si no tiene, todos) y ?sessions=N exige
+    sesiones concurrentes.
+    """
+    params = request.json
+    if not isinstance(params, dict):
+        return json_response({'error': 'Se requiere el documento del sitio'}, 400)
+    names = vendor_registry.names()
+    if request.args.get('vendors'):
+        vendors = [v.strip().lower() for v in request.args['vendors'].split(',') if v.strip()]
+    else:
+        device = params.get('device') if isinstance(params.get('device'), dict) else {}
+        site_vendor = str(device.get('vendor') or '').lower()
+        vendors = [site_vendor] if site_vendor in vendor_registry else names
+    unknown = [v for v in vendors if v not in vendor_registry]
+    if unknown:
+        return json_response({'error': f"Vendor inválido '{unknown[0]}'. Opciones: {', '.join(names)}"}, 400)
+    sessions = request.args.get('sessions')
+    if sessions is not None:
+        try:
+            sessions = int(sessions)
+        except ValueError:
+            return json_response({'error': 'sessions debe ser un entero'}, 400)
+    requirements = site_requirements(params)
+    return json_response({
+        'requirements': requirements,
+        'vendors': [recommend(vendor, requirements, sessions) for vendor in dict.fromkeys(vendors)],
+    })
 
 @app.route('/api/download', methods=['POST'])
+@compressed
 def download_config():
-    """Descarga configuración como archivo"""
+    """
+    Descarga configuración como archivo
+    
+    El texto se envía en streaming por secciones (comprimido al vuelo), sin
+    armar la configuración completa: en sitios con miles de VLAN son megas.
+    """
     try:
         params = request.json
-        result = generator.generate(params)
+        output = request.args.get('output', 'text')
+        if output not in ('text', 'plan'):
+            return json_response({'error': f"output '{output}' no es válido. Opciones: text, plan"}, 400)
+        
+        result = generator.generate(params, output=output, pretty=pretty_arg(),
+                                    serialized_payloads=True, stream=output == 'text')
         
         if not result['success']:
-            return jsonify(result), 400
+            return json_response(result, 400)
         
         # Determinar extensión según vendor
         extensions = {
@@ -61,43 +247,325 @@ def download_config():
         vendor = result.get('vendor', 'generic')
         ext = extensions.get(vendor.lower(), '.txt')
         site_name = result.get('site_name', 'config').replace(' ', '_')
-        filename = f"{site_name}_{vendor}{ext}"
         
-        # Crear archivo en memoria
-        buffer = io.BytesIO()
-        buffer.write(result['config'].encode('utf-8'))
-        buffer.seek(0)
+        if output == 'plan':
+            filename = f"{site_name}_{vendor}_plan.json"
+            # Respuesta en memoria (no send_file) para poder comprimirla
+            response = Response(dumps_document(result['plan']), mimetype='application/json')
+        else:
+            filename = f"{site_name}_{vendor}{ext}"
+            response = streamed_response(result['chunks'], 'text/plain', request.headers.get('Accept-Encoding'),
+                                         level=app.config['COMPRESS_LEVEL'])
         
-        response = send_file(
-            buffer,
-            as_attachment=True,
-            download_name=filename,
-            mimetype='text/plain'
-        )
         # Agregar header para que el frontend pueda leer el nombre sugerido si es necesario
         response.headers["Content-Disposition"] = f"attachment; filename={filename}"
         return response
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @app.route('/api/validate', methods=['POST'])
 def validate_params():
-    """Valida parámetros sin generar config"""
+    """Valida parámetros sin generar config (?fail_fast=1 se detiene en el primer error)"""
     try:
         params = request.json
         if not params:
-            return jsonify({'error': 'No se recibieron parámetros'}), 400
+            return json_response({'error': 'No se recibieron parámetros'}, 400)
         
-        is_valid, errors, warnings = generator.validator.validate_all(params)
-        return jsonify({
+        is_valid, errors, warnings = generator.validator.validate_all(params, fail_fast=flag_arg('fail_fast'))
+        return json_response({
             'valid': is_valid,
             'errors': errors,
             'warnings': warnings
         })
         
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
+
+@app.route('/api/validate/fleet', methods=['POST'])
+def validate_fleet():
+    """Revisa subredes superpuestas entre una lista de sitios ({"sites": [...]})"""
+    params = request.json
+    if not isinstance(params, dict) or not isinstance(params.get('sites'), list):
+        return json_response({'error': "Se requiere 'sites' (lista de sitios)"}, 400)
+    
+    is_valid, errors, warnings = FleetValidator().validate(params['sites'])
+    return json_response({
+        'valid': is_valid,
+        'errors': errors,
+        'warnings': warnings
+    })
+
+@app.route('/api/validate/batch', methods=['POST'])
+def validate_batch():
+    """
+    Valida una lista de sitios de una vez ({"sites": [...]}), un resultado por sitio
+    
+    ?fail_fast=1 reporta solo el primer error de cada sitio (pre-filtrado).
+    """
+    params = request.json
+    if not isinstance(params, dict) or not isinstance(params.get('sites'), list):
+        return json_response({'error': "Se requiere 'sites' (lista de sitios)"}, 400)
+    
+    results = BatchValidator().validate_many(params['sites'], fail_fast=flag_arg('fail_fast'))
+    return json_response({
+        'valid': all(is_valid for is_valid, _, _ in results),
+        'results': [
+            {'valid': is_valid, 'errors': errors, 'warnings': warnings}
+            for is_valid, errors, warnings in results
+        ]
+    })
+
+@app.route('/api/fleet/<customer>', methods=['GET'])
+def get_fleet(customer):
+    """Sitios registrados del cliente y las superposiciones entre ellos"""
+    if fleet is None:
+        return json_response({'error': 'El registro de flota no está habilitado (FLEET_DB)'}, 404)
+    errors, warnings = fleet.overlaps(customer)
+    return json_response({
+        'customer': customer,
+        'sites': fleet.sites(customer),
+        'errors': errors,
+        'warnings': warnings
+    })
+
+@app.route('/api/fleet/<customer>/sites/<site>', methods=['DELETE'])
+def remove_fleet_site(customer, site):
+    """Da de baja un sitio de la flota (libera sus subredes para otros sitios)"""
+    if fleet is None:
+        return json_response({'error': 'El registro de flota no está habilitado (FLEET_DB)'}, 404)
+    if not fleet.remove(customer, site):
+        return json_response({'error': f'Sitio {site} no registrado'}, 404)
+    return Response(status=204)
+
+@app.route('/api/validate/sessions', methods=['POST'])
+def create_validation_session():
+    """Abre una sesión de validación en vivo con el documento inicial"""
+    params = request.json
+    if params is None:
+        return json_response({'error': 'No se recibieron parámetros'}, 400)
+    
+    session = validation_sessions.create(params)
+    return json_response({'session_id': session.id, **session.snapshot()}, 201)
+
+@app.route('/api/validate/sessions/<session_id>', methods=['PATCH'])
+def patch_validation_session(session_id):
+    """Aplica cambios (JSON Patch) y retorna solo el delta de errores/advertencias"""
+    session = validation_sessions.get(session_id)
+    if session is None:
+        return json_response({'error': f'Sesión {session_id} no encontrada'}, 404)
+    
+    try:
+        with session.lock:
+            delta = session.apply_patch(request.json)
+    except PatchError as e:
+        return json_response({'error': str(e)}, 400)
+    return json_response(delta, 400 if 'error' in delta else 200)
+
+@app.route('/api/validate/sessions/<session_id>', methods=['DELETE'])
+def delete_validation_session(session_id):
+    """Cierra una sesión de validación"""
+    if not validation_sessions.delete(session_id):
+        return json_response({'error': f'Sesión {session_id} no encontrada'}, 404)
+    return Response(status=204)
+
+@app.route('/api/validate/sessions/<session_id>/events', methods=['GET'])
+def validation_session_events(session_id):
+    """Server-Sent Events con el estado inicial y cada delta de la sesión"""
+    session = validation_sessions.get(session_id)
+    if session is None:
+        return json_response({'error': f'Sesión {session_id} no encontrada'}, 404)
+    
+    subscriber = queue.Queue()
+    with session.lock:
+        snapshot = session.snapshot()
+        session.subscribers.append(subscriber)
+    
+    def stream():
+        try:
+            yield b'event: snapshot\ndata: ' + dumps_document(snapshot) + b'\n\n'
+            while True:
+                try:
+                    delta = subscriber.get(timeout=15)
+                except queue.Empty:
+                    yield b': keepalive\n\n'
+                    continue
+                yield b'event: delta\ndata: ' + dumps_document(delta) + b'\n\n'
+        finally:
+            session.subscribers.remove(subscriber)
+    
+    response = Response(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/artifacts/<artifact_id>', methods=['GET'])
+@compressed
+def get_artifact(artifact_id):
+    """Configuración archivada (el id es el hash de su contenido)"""
+    if artifact_store is None:
+        return json_response({'error': 'El almacén de artefactos no está habilitado (ARTIFACTS_DIR)'}, 404)
+    content = artifact_store.get(artifact_id)
+    if content is None:
+        return json_response({'error': f'Artefacto {artifact_id} no encontrado'}, 404)
+    
+    response = Response(content, mimetype='text/plain')
+    # Direccionado por contenido: nunca cambia
+    response.set_etag(artifact_id)
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE
+    return response.make_conditional(request)
+
+@app.route('/api/history/<customer>/<site>', methods=['GET'])
+def get_history(customer, site):
+    """Revisiones guardadas de un sitio"""
+    if history is None:
+        return json_response({'error': 'El historial no está habilitado (HISTORY_DB)'}, 404)
+    revisions = history.revisions(customer, site)
+    if not revisions:
+        return json_response({'error': f'Sitio {site} de {customer} sin historial'}, 404)
+    return json_response({'customer': customer, 'site': site, 'revisions': revisions})
+
+@app.route('/api/history/<customer>/<site>/<int:revision>', methods=['GET'])
+@compressed
+def get_history_revision(customer, site, revision):
+    """Configuración de una revisión"""
+    if history is None:
+        return json_response({'error': 'El historial no está habilitado (HISTORY_DB)'}, 404)
+    content = history.get(customer, site, revision)
+    if content is None:
+        return json_response({'error': f'Revisión {revision} de {site} ({customer}) no encontrada'}, 404)
+    return Response(content, mimetype='text/plain')
+
+@app.route('/api/history/<customer>/<site>/diff', methods=['GET'])
+@compressed
+def get_history_diff(customer, site):
+    """Diff unificado entre dos revisiones (?from=1&to=5)"""
+    if history is None:
+        return json_response({'error': 'El historial no está habilitado (HISTORY_DB)'}, 404)
+    try:
+        from_revision = int(request.args['from'])
+        to_revision = int(request.args['to'])
+    except (KeyError, ValueError):
+        return json_response({'error': "Se requieren los parámetros enteros 'from' y 'to'"}, 400)
+    
+    diff = history.diff(customer, site, from_revision, to_revision)
+    if diff is None:
+        return json_response({'error': f'Revisión no encontrada para {site} ({customer})'}, 404)
+    return Response(diff, mimetype='text/plain')
+
+@app.route('/api/ipam/<customer>', methods=['GET'])
+def get_ipam_pools(customer):
+    """Superredes del cliente y su utilización"""
+    if ipam is None:
+        return json_response({'error': 'El IPAM no está habilitado (IPAM_DB)'}, 404)
+    return json_response({'customer': customer, 'pools': ipam.pools(customer)})
+
+@app.route('/api/ipam/<customer>/pools', methods=['POST'])
+def add_ipam_pool(customer):
+    """Registra una superred ({"cidr": "10.0.0.0/8"})"""
+    if ipam is None:
+        return json_response({'error': 'El IPAM no está habilitado (IPAM_DB)'}, 404)
+    params = request.json
+    if not isinstance(params, dict) or not params.get('cidr'):
+        return json_response({'error': "Se requiere 'cidr'"}, 400)
+    try:
+        return json_response(ipam.add_pool(customer, params['cidr']), 201)
+    except IpamError as e:
+        return json_response({'error': str(e)}, 409)
+
+@app.route('/api/ipam/<customer>/allocations', methods=['POST'])
+def allocate_subnets(customer):
+    """
+    Asigna subredes: un pedido {"site", "vlan", "prefix_length"|"hosts"} o
+    varios en {"items": [...]} (en una sola transacción)
+    """
+    if ipam is None:
+        return json_response({'error': 'El IPAM no está habilitado (IPAM_DB)'}, 404)
+    params = request.json
+    if not isinstance(params, dict):
+        return json_response({'error': 'No se recibieron parámetros'}, 400)
+    items = params.get('items', [params])
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return json_response({'error': "'items' debe ser una lista de pedidos"}, 400)
+    try:
+        allocations = ipam.allocate_many(customer, items)
+    except IpamError as e:
+        return json_response({'error': str(e)}, 409)
+    if 'items' in params:
+        return json_response({'customer': customer, 'allocations': allocations})
+    return json_response(allocations[0])
+
+@app.route('/api/ipam/<customer>/sites/<site>', methods=['GET'])
+def get_site_allocations(customer, site):
+    """Subredes asignadas a un sitio"""
+    if ipam is None:
+        return json_response({'error': 'El IPAM no está habilitado (IPAM_DB)'}, 404)
+    return json_response({'customer': customer, 'site': site,
+                          'allocations': ipam.site_allocations(customer, site)})
+
+@app.route('/api/ipam/<customer>/sites/<site>', methods=['DELETE'])
+def release_site_allocations(customer, site):
+    """Libera las subredes del sitio (?vlan=20 para una sola)"""
+    if ipam is None:
+        return json_response({'error': 'El IPAM no está habilitado (IPAM_DB)'}, 404)
+    released = ipam.release(customer, site, request.args.get('vlan'))
+    if not released:
+        return json_response({'error': f'{site} no tiene subredes asignadas'}, 404)
+    return Response(status=204)
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Encola la generación de una lista de sitios y retorna el id del trabajo"""
+    params = request.json
+    if not isinstance(params, dict):
+        return json_response({'error': 'No se recibieron parámetros'}, 400)
+    
+    try:
+        job_id = jobs.submit(
+            params.get('sites'),
+            customer=params.get('customer'),
+            output=params.get('output', 'text'),
+            timeout=params.get('timeout_seconds')
+        )
+    except (TypeError, ValueError) as e:
+        return json_response({'error': str(e)}, 400)
+    # El scheduler arranca con el primer trabajo (y retoma los pendientes)
+    jobs.start()
+    response = json_response(jobs.status(job_id), 202)
+    response.headers['Location'] = f'/api/jobs/{job_id}'
+    return response
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Estado y progreso de un trabajo"""
+    jobs.start()
+    status = jobs.status(job_id)
+    if status is None:
+        return json_response({'error': f'Trabajo {job_id} no encontrado'}, 404)
+    return json_response(status)
+
+@app.route('/api/jobs/<job_id>/results', methods=['GET'])
+@compressed
+def get_job_results(job_id):
+    """Resultados paginados (?offset=0&limit=50)"""
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        return json_response({'error': 'offset y limit deben ser enteros'}, 400)
+    
+    page = jobs.results(job_id, offset=offset, limit=limit)
+    if page is None:
+        return json_response({'error': f'Trabajo {job_id} no encontrado'}, 404)
+    return json_response(page)
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancela un trabajo (los sitios ya generados conservan su resultado)"""
+    status = jobs.cancel(job_id)
+    if status is None:
+        return json_response({'error': f'Trabajo {job_id} no encontrado'}, 404)
+    return json_response(status)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5005)
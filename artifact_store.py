@@ -0,0 +1,209 @@
+"""Almacén de configuraciones generadas direccionado por contenido.
+
+Cada configuración se guarda como sus config_sections: cada sección es un
+archivo nombrado por su sha256 y se escribe una sola vez aunque aparezca en
+miles de sitios (p. ej. las políticas basic/standard/advanced). La
+configuración es un manifiesto con la lista de hashes; su id es el hash del
+manifiesto, así que dos configuraciones idénticas comparten artefacto.
+
+Estructura en disco:
+    <root>/sections/ab/abcdef...   contenido de la sección (UTF-8)
+    <root>/manifests/12/1234...    manifiesto JSON
+
+La lectura reensambla la configuración desde las secciones mapeadas en
+memoria (mmap); gc() elimina las secciones que ningún manifiesto referencia.
+"""
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+SEPARATOR = "\n"
+
+
+class ArtifactStore:
+    """Secciones deduplicadas por sha256 y manifiestos que las referencian"""
+
+    def __init__(self, root: str, max_open_sections: int = 256):
+        self.root = root
+        self.sections_dir = os.path.join(root, "sections")
+        self.manifests_dir = os.path.join(root, "manifests")
+        os.makedirs(self.sections_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        # Secciones mapeadas más usadas (las de políticas se repiten en casi todo)
+        self.max_open_sections = max_open_sections
+        self._maps: "OrderedDict[str, mmap.mmap]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- Rutas ---
+
+    @staticmethod
+    def _path(directory: str, digest: str) -> str:
+        return os.path.join(directory, digest[:2], digest)
+
+    @staticmethod
+    def _write_once(path: str, data: bytes) -> bool:
+        """Escribe data de forma atómica si el archivo no existe; True si lo creó"""
+        if os.path.exists(path):
+            # Se renueva el mtime para que un gc() concurrente no la considere huérfana
+            os.utime(path)
+            return False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, path)
+        return True
+
+    # --- Escritura ---
+
+    def put(self, sections: List[str], vendor: Optional[str] = None,
+            site_name: Optional[str] = None) -> str:
+        """Guarda las secciones de una configuración y retorna el id del artefacto"""
+        hashes = []
+        size = 0
+        for section in sections:
+            data = section.encode("utf-8")
+            digest = hashlib.sha256(data).hexdigest()
+            self._write_once(self._path(self.sections_dir, digest), data)
+            hashes.append(digest)
+            size += len(data)
+        size += len(SEPARATOR) * max(0, len(sections) - 1)
+
+        manifest = {
+            "vendor": vendor,
+            "site_name": site_name,
+            "separator": SEPARATOR,
+            "size": size,
+            "sections": hashes,
+        }
+        data = json.dumps(manifest, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        artifact_id = hashlib.sha256(data).hexdigest()
+        self._write_once(self._path(self.manifests_dir, artifact_id), data)
+        return artifact_id
+
+    # --- Lectura ---
+
+    def manifest(self, artifact_id: str) -> Optional[dict]:
+        """Manifiesto de un artefacto (None si no existe o el id es inválido)"""
+        if len(artifact_id) != 64 or any(c not in "0123456789abcdef" for c in artifact_id):
+            return None
+        try:
+            with open(self._path(self.manifests_dir, artifact_id), "rb") as fh:
+                return json.loads(fh.read())
+        except FileNotFoundError:
+            return None
+
+    def _section(self, digest: str) -> bytes:
+        """Contenido de una sección, leído desde su mapeo en memoria"""
+        with self._lock:
+            mapped = self._maps.get(digest)
+            if mapped is not None:
+                self._maps.move_to_end(digest)
+                return mapped[:]
+            with open(self._path(self.sections_dir, digest), "rb") as fh:
+                if os.fstat(fh.fileno()).st_size == 0:
+                    return b""
+                mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[digest] = mapped
+            if len(self._maps) > self.max_open_sections:
+                self._maps.popitem(last=False)[1].close()
+            return mapped[:]
+
+    def iter_chunks(self, artifact_id: str) -> Iterator[bytes]:
+        """Recorre la configuración por trozos (para respuestas en streaming)"""
+        manifest = self.manifest(artifact_id)
+        if manifest is None:
+            raise KeyError(artifact_id)
+        separator = manifest["separator"].encode("utf-8")
+        for position, digest in enumerate(manifest["sections"]):
+            if position:
+                yield separator
+            yield self._section(digest)
+
+    def read(self, artifact_id: str) -> bytes:
+        """Configuración completa reensamblada"""
+        return b"".join(self.iter_chunks(artifact_id))
+
+    def get(self, artifact_id: str) -> Optional[str]:
+        """Configuración completa como texto (None si no existe)"""
+        try:
+            return self.read(artifact_id).decode("utf-8")
+        except KeyError:
+            return None
+
+    # --- Mantenimiento ---
+
+    def _files(self, directory: str) -> Iterator[str]:
+        for prefix in os.listdir(directory):
+            subdir = os.path.join(directory, prefix)
+            if os.path.isdir(subdir):
+                for name in os.listdir(subdir):
+                    if not name.endswith(".tmp"):
+                        yield os.path.join(subdir, name)
+
+    def delete(self, artifact_id: str) -> bool:
+        """Elimina un manifiesto; sus secciones se liberan en el próximo gc()"""
+        if self.manifest(artifact_id) is None:
+            return False
+        os.remove(self._path(self.manifests_dir, artifact_id))
+        return True
+
+    def gc(self, grace_seconds: float = 300) -> Dict[str, int]:
+        """
+        Elimina secciones que ningún manifiesto referencia
+
+        Las secciones más nuevas que grace_seconds se conservan: pueden
+        pertenecer a un put() en curso cuyo manifiesto aún no se escribió.
+        """
+        referenced = set()
+        for path in self._files(self.manifests_dir):
+            with open(path, "rb") as fh:
+                referenced.update(json.loads(fh.read())["sections"])
+
+        cutoff = time.time() - grace_seconds
+        removed = freed = 0
+        for path in self._files(self.sections_dir):
+            digest = os.path.basename(path)
+            if digest in referenced:
+                continue
+            stat = os.stat(path)
+            if stat.st_mtime > cutoff:
+                continue
+            with self._lock:
+                mapped = self._maps.pop(digest, None)
+                if mapped is not None:
+                    mapped.close()
+            os.remove(path)
+            removed += 1
+            freed += stat.st_size
+        return {"referenced_sections": len(referenced), "removed_sections": removed, "freed_bytes": freed}
+
+    def stats(self) -> Dict[str, float]:
+        """Tamaño lógico (configuraciones completas) vs. físico (secciones únicas)"""
+        artifacts = logical = 0
+        for path in self._files(self.manifests_dir):
+            with open(path, "rb") as fh:
+                logical += json.loads(fh.read())["size"]
+            artifacts += 1
+        sections = stored = 0
+        for path in self._files(self.sections_dir):
+            sections += 1
+            stored += os.path.getsize(path)
+        return {
+            "artifacts": artifacts,
+            "sections": sections,
+            "logical_bytes": logical,
+            "stored_bytes": stored,
+            "dedup_ratio": round(logical / stored, 2) if stored else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            for mapped in self._maps.values():
+                mapped.close()
+            self._maps.clear()
@@ -0,0 +1,509 @@
+"""Validación en lote de la flota con columnas de direcciones IPv4.
+
+ConfigValidator revisa cada campo de cada sitio con una llamada de Python
+(ipaddress.ip_address, la máscara como string de bits, etc.). Para
+validar miles de sitios de una vez, BatchValidator junta las interfaces
+WAN y LAN de todos los sitios en columnas: IP, máscara, gateway y rango
+DHCP se convierten a uint32 con NumPy (el texto se interpreta como una
+matriz de caracteres) y las reglas se evalúan para todas las filas a la
+vez:
+
+    máscara contigua        ~m & (~m + 1) == 0
+    misma subred            (a & m) == (b & m)
+    dirección de red        ip == ip & m         (solo si el prefijo < 31)
+    dirección de broadcast  ip == ip | ~m
+
+Los mensajes se arman solo para las filas con errores y son exactamente
+los de ConfigValidator.validate_all, en el mismo orden. La pasada
+estructural (site_schema) corre antes, sitio por sitio, y los documentos
+mal formados se descartan sin entrar a las columnas. Los sitios con
+valores fuera del caso común (IPv6, tipos no string, máscaras con
+espacios, entradas que no son dict...) se validan con ConfigValidator,
+igual que cuando NumPy no está instalado (NumPy está en requirements.txt;
+sin él el resultado es el mismo, solo más lento). Un error inesperado al
+validar un sitio se reporta como error de ese sitio, sin afectar al resto
+del lote.
+"""
+from typing import Dict, List, Tuple
+
+from site_schema import structural_errors
+from traffic_classes import WAN_RATE_FIELDS
+from validators import ConfigValidator
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende del entorno
+    np = None
+
+# Códigos por fila (0 = sin error)
+MISSING, INVALID, DUPLICATE, NOT_SAME = 1, 2, 3, 4
+NETWORK, BROADCAST = 1, 2
+_RESERVED = {NETWORK: 'red', BROADCAST: 'broadcast'}
+
+_WIDTH = 16  # 15 caracteres de "255.255.255.255" + terminador
+
+
+def parse_ipv4_column(values: List[str]) -> Dict[str, "np.ndarray"]:
+    """
+    Interpreta una columna de strings como IPv4 en notación punteada
+
+    Retorna arrays por fila:
+        value    dirección como uint32 (octetos > 255 se recortan)
+        dotted   cuatro grupos de 1 a 3 dígitos separados por puntos
+        valid    dotted y dirección IPv4 válida (octetos <= 255, sin ceros
+                 a la izquierda; el mismo criterio que ipaddress)
+        small    dotted y todos los octetos <= 255
+        canonical  sin ceros a la izquierda en ningún octeto
+        long     el texto no entra en la matriz (más de 15 caracteres)
+        empty    texto vacío
+    """
+    rows = len(values)
+    try:
+        chars = np.array(values, dtype=f"S{_WIDTH}").view(np.uint8).reshape(rows, _WIDTH)
+    except UnicodeEncodeError:
+        # Algún texto no ASCII (nunca es una IPv4): se interpreta por code points
+        chars = np.array(values, dtype=f"U{_WIDTH}").view(np.uint32).reshape(rows, _WIDTH)
+    is_nul = chars == 0
+    is_dot = chars == 46
+    # Solo dígitos y puntos, sin caracteres después del primer terminador
+    stray = ~((chars >= 48) & (chars <= 57) | is_dot | is_nul)
+    stray[:, :-1] |= is_nul[:, :-1] & ~is_nul[:, 1:]
+    clean = ~_any_per_row(stray)
+    length = _WIDTH - np.count_nonzero(is_nul, axis=1)
+    # NumPy descarta los NUL finales: el largo debe coincidir con el del texto
+    sizes = np.fromiter(map(len, values), dtype=np.int64, count=rows)
+    clean &= sizes == length
+
+    # Horner por columna sobre la matriz transpuesta (cada columna es contigua)
+    columns = np.ascontiguousarray(chars.T).astype(np.int32)
+    value = np.zeros(rows, dtype=np.uint32)
+    current = np.zeros(rows, dtype=np.int32)
+    digits = np.zeros(rows, dtype=np.int32)
+    groups = np.zeros(rows, dtype=np.int32)
+    bad_group = np.zeros(rows, dtype=bool)
+    leading_zero = np.zeros(rows, dtype=bool)
+    big = np.zeros(rows, dtype=bool)
+    first_zero = np.zeros(rows, dtype=bool)
+    ended = np.zeros(rows, dtype=bool)
+    for column in columns:
+        code = column - 48
+        digit = (code >= 0) & (code <= 9)
+        starts_group = digit & (digits == 0)
+        first_zero = (first_zero & ~starts_group) | (starts_group & (code == 0))
+        current = np.minimum(np.where(digit, current * 10 + code, current), 1000)
+        digits += digit
+        # Fin de grupo: un punto o el primer terminador de la fila
+        nul = column == 0
+        closes = (column == 46) | (nul & ~ended)
+        ended |= nul
+        bad_group |= closes & ((digits == 0) | (digits > 3))
+        leading_zero |= closes & first_zero & (digits > 1)
+        big |= closes & (current > 255)
+        value = np.where(closes, value * np.uint32(256) + np.minimum(current, 255).astype(np.uint32), value)
+        groups += closes
+        open_group = ~closes
+        current *= open_group
+        digits *= open_group
+        if ended.all():
+            break
+
+    dotted = clean & (groups == 4) & ~bad_group & is_nul[:, -1]
+    small = dotted & ~big
+    return {
+        'value': value.astype(np.uint32),
+        'dotted': dotted,
+        'valid': small & ~leading_zero,
+        'small': small,
+        'canonical': ~leading_zero,
+        'long': ~is_nul[:, -1],
+        'empty': sizes == 0,
+    }
+
+
+def _any_per_row(flags: "np.ndarray") -> "np.ndarray":
+    """np.any(flags, axis=1) para una matriz bool de _WIDTH columnas, leída de a 8 bytes"""
+    words = np.ascontiguousarray(flags).view(np.uint64)
+    return (words[:, 0] | words[:, 1]) != 0
+
+
+class _Column:
+    """Un campo de dirección de todas las filas: texto, presencia y valores"""
+
+    def __init__(self, raw: list, mask: bool = False):
+        self.raw = raw
+        texts = [v if type(v) is str else '' for v in raw]
+        parsed = parse_ipv4_column(texts)
+        self.present = ~parsed['empty']
+        # Valores truthy que no son string (ipaddress acepta enteros)
+        self.unsafe = np.zeros(len(raw), dtype=bool)
+        for i, v in enumerate(raw):
+            if v is not None and type(v) is not str and v:
+                self.present[i] = self.unsafe[i] = True
+        self.value = parsed['value']
+        self.valid = parsed['valid'] & self.present
+        self.canonical = parsed['canonical']
+        if mask:
+            # int() acepta espacios, signos y octetos > 255: se delegan al validador
+            self.unsafe |= self.present & ~parsed['small']
+        else:
+            # Un texto que no es IPv4 punteada solo podría ser IPv6 válida
+            for i in np.flatnonzero(self.present & ~parsed['dotted']):
+                if ':' in texts[i]:
+                    self.unsafe[i] = True
+
+
+def _reserved(ip: "np.ndarray", mask: "np.ndarray", applies: "np.ndarray") -> "np.ndarray":
+    """NETWORK/BROADCAST donde ip es esa dirección de su subred (prefijo < 31)"""
+    inverse = ~mask
+    host_bits = applies & (inverse >= 3)
+    code = np.zeros(len(ip), dtype=np.int8)
+    code[host_bits & (ip == (ip & mask))] = NETWORK
+    code[host_bits & (ip == (ip | inverse))] = BROADCAST
+    return code
+
+
+def _first_seen_duplicates(site: "np.ndarray", key: "np.ndarray", eligible: "np.ndarray") -> "np.ndarray":
+    """Filas elegibles cuya clave ya apareció antes en el mismo sitio"""
+    duplicate = np.zeros(len(key), dtype=bool)
+    rows = np.flatnonzero(eligible)
+    if len(rows) < 2:
+        return duplicate
+    combined = (site[rows].astype(np.uint64) << np.uint64(32)) | key[rows].astype(np.uint64)
+    order = np.lexsort((rows, combined))
+    repeated = combined[order[1:]] == combined[order[:-1]]
+    duplicate[rows[order[1:]][repeated]] = True
+    return duplicate
+
+
+class BatchValidator:
+    """Valida muchos sitios a la vez; mismo resultado que ConfigValidator.validate_all"""
+
+    def __init__(self):
+        self.validator = ConfigValidator()
+
+    def validate_many(self, sites: List[dict], fail_fast: bool = False,
+                      capabilities: bool = True) -> List[Tuple[bool, List[str], List[str]]]:
+        """Resultado de validate_all(params, fail_fast, capabilities) para cada sitio, en orden"""
+        if np is None:
+            return [self._validate_one(params, fail_fast, capabilities) for params in sites]
+
+        fallback = set()
+        rejected: Dict[int, Tuple[bool, List[str], List[str]]] = {}
+        wan_rows, wan_site, lan_rows, lan_site = [], [], [], []
+        for idx, params in enumerate(sites):
+            structural = structural_errors(params, fail_fast)
+            if structural:
+                rejected[idx] = (False, structural, [])
+                fallback.add(idx)
+                continue
+            if not isinstance(params, dict):
+                fallback.add(idx)
+                continue
+            wans = params.get('wan_interfaces', [])
+            lans = params.get('lan_interfaces', [])
+            if (wans and not isinstance(wans, list)) or (lans and not isinstance(lans, list)) \
+                    or not all(isinstance(w, dict) for w in wans or ()) \
+                    or not all(isinstance(l, dict) for l in lans or ()):
+                fallback.add(idx)
+                continue
+            for wan in wans or ():
+                wan_rows.append(wan)
+                wan_site.append(idx)
+            for lan in lans or ():
+                lan_rows.append(lan)
+                lan_site.append(idx)
+
+        try:
+            wan_messages, primary = self._wan_messages(wan_rows, np.array(wan_site, dtype=np.int64), fallback)
+            lan_messages = self._lan_messages(lan_rows, np.array(lan_site, dtype=np.int64), fallback)
+            service_messages = self._service_messages(sites, fallback)
+        except Exception:
+            # Las columnas mezclan todos los sitios: si fallan, cada sitio se
+            # valida por separado y el error queda solo en el que lo provoca
+            wan_messages, primary, lan_messages, service_messages = {}, set(), {}, {}
+            fallback.update(range(len(sites)))
+
+        results = []
+        for idx, params in enumerate(sites):
+            if idx in rejected:
+                results.append(rejected[idx])
+            elif idx in fallback:
+                results.append(self._validate_one(params, fail_fast, capabilities))
+            else:
+                try:
+                    results.append(self._site_result(params, wan_messages.get(idx, ()), idx in primary,
+                                                     lan_messages.get(idx, ()), service_messages.get(idx, ()),
+                                                     fail_fast, capabilities))
+                except Exception as e:
+                    results.append(self._internal_error(e))
+        return results
+
+    def _validate_one(self, params: dict, fail_fast: bool,
+                      capabilities: bool) -> Tuple[bool, List[str], List[str]]:
+        """validate_all de un sitio; un error inesperado queda como error del sitio"""
+        try:
+            return self.validator.validate_all(params, fail_fast, capabilities)
+        except Exception as e:
+            return self._internal_error(e)
+
+    @staticmethod
+    def _internal_error(error: Exception) -> Tuple[bool, List[str], List[str]]:
+        return False, [f"Error interno al validar el sitio: {error}"], []
+
+    def _site_result(self, params: dict, wan_messages, has_primary: bool, lan_messages, service_messages,
+                     fail_fast: bool, capabilities: bool) -> Tuple[bool, List[str], List[str]]:
+        """Resultado de un sitio con los mensajes de las columnas y las demás secciones"""
+        validator = self.validator
+        validator.errors = errors = []
+        validator.warnings = warnings = []
+        validator._validate_site_info(params.get('site_info', {}))
+        validator._validate_device(params.get('device', {}))
+
+        wans = params.get('wan_interfaces', [])
+        if not wans:
+            errors.append("Al menos una interfaz WAN es requerida")
+        else:
+            errors.extend(wan_messages)
+            validator._validate_wan_primary(len(wans), has_primary)
+
+        if not params.get('lan_interfaces', []):
+            warnings.append("No hay interfaces LAN configuradas")
+        else:
+            errors.extend(lan_messages)
+
+        errors.extend(service_messages)
+        validator._validate_policy_template(params.get('policy_template', 'basic'))
+        validator._validate_custom_policy(params.get('policy_template', 'basic'), params.get('custom_policy'))
+        validator._validate_sdwan(params.get('sdwan'))
+        if capabilities:
+            validator._validate_model_capabilities(params.get('device', {}), wans,
+                                                   params.get('lan_interfaces', []),
+                                                   params.get('policy_template', 'basic'))
+        if fail_fast and errors:
+            return False, errors[:1], []
+        return len(errors) == 0, errors, warnings
+
+    def validate(self, params: dict, fail_fast: bool = False,
+                 capabilities: bool = True) -> Tuple[bool, List[str], List[str]]:
+        return self.validate_many([params], fail_fast, capabilities)[0]
+
+    # --- WAN ---
+
+    def _wan_messages(self, rows: List[dict], site: "np.ndarray",
+                      fallback: set) -> Tuple[Dict[int, List[str]], set]:
+        """Mensajes por sitio y sitios con alguna WAN 'primary'"""
+        if not rows:
+            return {}, set()
+        ip = _Column([r.get('ip_address') for r in rows])
+        mask = _Column([r.get('subnet_mask') for r in rows], mask=True)
+        gw = _Column([r.get('gateway') for r in rows])
+        primary = set(site[np.array([r.get('priority') == 'primary' for r in rows], dtype=bool)].tolist())
+        fallback.update(site[ip.unsafe | mask.unsafe | gw.unsafe].tolist())
+
+        ip_error = np.zeros(len(rows), dtype=np.int8)
+        ip_error[~ip.present] = MISSING
+        ip_error[ip.present & ~ip.valid] = INVALID
+        duplicate = _first_seen_duplicates(site, ip.value, ip.valid)
+        ip_error[duplicate] = DUPLICATE
+
+        contiguous = self._contiguous(mask.value)
+        mask_error = np.zeros(len(rows), dtype=np.int8)
+        mask_error[~mask.present] = MISSING
+        mask_error[mask.present & ~contiguous] = INVALID
+        ip_reserved = _reserved(ip.value, mask.value,
+                                mask.present & contiguous & ip.valid & mask.canonical)
+
+        gw_error = np.zeros(len(rows), dtype=np.int8)
+        gw_error[~gw.present] = MISSING
+        gw_error[gw.present & ~gw.valid] = INVALID
+        checked = gw.valid & ip.present & mask.present
+        same = ip.valid & ((ip.value & mask.value) == (gw.value & mask.value))
+        gw_error[checked & ~same] = NOT_SAME
+        gw_reserved = _reserved(gw.value, mask.value, checked & same & contiguous & mask.canonical)
+
+        bad_rates = {field: np.array([bool(bw) and (not isinstance(bw, (int, float)) or bw <= 0)
+                                      for bw in (r.get(field) for r in rows)], dtype=bool)
+                     for field in WAN_RATE_FIELDS}
+
+        messages: Dict[int, List[str]] = {}
+        with_errors = (ip_error | mask_error | ip_reserved | gw_error | gw_reserved).astype(bool)
+        for bad in bad_rates.values():
+            with_errors |= bad
+        # Posición de cada fila dentro de la lista de su sitio
+        positions = self._positions(site)
+        for row in np.flatnonzero(with_errors).tolist():
+            prefix = f"wan_interfaces[{positions[row]}]"
+            out = messages.setdefault(int(site[row]), [])
+            code = ip_error[row]
+            if code == MISSING:
+                out.append(f"{prefix}.ip_address es requerido")
+            elif code == INVALID:
+                out.append(f"{prefix}.ip_address '{ip.raw[row]}' no es válida")
+            elif code == DUPLICATE:
+                out.append(f"{prefix}.ip_address '{ip.raw[row]}' está duplicada")
+            code = mask_error[row]
+            if code == MISSING:
+                out.append(f"{prefix}.subnet_mask es requerido")
+            elif code == INVALID:
+                out.append(f"{prefix}.subnet_mask '{mask.raw[row]}' no es válida")
+            elif ip_reserved[row]:
+                out.append(f"{prefix}.ip_address '{ip.raw[row]}' es la dirección de "
+                           f"{_RESERVED[ip_reserved[row]]} de la subred")
+            code = gw_error[row]
+            if code == MISSING:
+                out.append(f"{prefix}.gateway es requerido")
+            elif code == INVALID:
+                out.append(f"{prefix}.gateway '{gw.raw[row]}' no es válida")
+            elif code == NOT_SAME:
+                out.append(f"{prefix}.gateway '{gw.raw[row]}' no está en la misma subred que la IP")
+            elif gw_reserved[row]:
+                out.append(f"{prefix}.gateway '{gw.raw[row]}' es la dirección de "
+                           f"{_RESERVED[gw_reserved[row]]} de la subred")
+            for field, bad in bad_rates.items():
+                if bad[row]:
+                    out.append(f"{prefix}.{field} debe ser un número positivo")
+        return messages, primary
+
+    # --- LAN ---
+
+    def _lan_messages(self, rows: List[dict], site: "np.ndarray", fallback: set) -> Dict[int, List[str]]:
+        if not rows:
+            return {}
+        ip = _Column([r.get('ip_address') for r in rows])
+        mask = _Column([r.get('subnet_mask') for r in rows], mask=True)
+        dhcp = np.array([bool(r.get('dhcp_enabled')) for r in rows], dtype=bool)
+        start = _Column([r.get('dhcp_range_start') for r in rows])
+        end = _Column([r.get('dhcp_range_end') for r in rows])
+        vlans = [r.get('vlan_id') for r in rows]
+        vlan_present = np.array([v is not None for v in vlans], dtype=bool)
+        vlan_valid = np.array([type(v) is int and 1 <= v <= 4094 for v in vlans], dtype=bool)
+        vlan_value = np.array([v if type(v) is int and 1 <= v <= 4094 else 0 for v in vlans], dtype=np.int64)
+        # bool es int para isinstance (True pasa como VLAN 1): se delega al validador
+        vlan_unsafe = np.array([type(v) is bool for v in vlans], dtype=bool)
+        fallback.update(site[ip.unsafe | mask.unsafe | vlan_unsafe
+                             | (dhcp & (start.unsafe | end.unsafe))].tolist())
+
+        ip_error = np.zeros(len(rows), dtype=np.int8)
+        ip_error[~ip.present] = MISSING
+        ip_error[ip.present & ~ip.valid] = INVALID
+
+        contiguous = self._contiguous(mask.value)
+        mask_error = np.zeros(len(rows), dtype=np.int8)
+        mask_error[~mask.present] = MISSING
+        mask_error[mask.present & ~contiguous] = INVALID
+        ip_reserved = _reserved(ip.value, mask.value,
+                                mask.present & contiguous & ip.valid & mask.canonical)
+
+        vlan_error = np.zeros(len(rows), dtype=np.int8)
+        vlan_error[vlan_present & ~vlan_valid] = INVALID
+        vlan_error[_first_seen_duplicates(site, vlan_value, vlan_valid)] = DUPLICATE
+
+        ranged = dhcp & ip.present & mask.present & start.present & end.present
+        range_errors = []
+        for column in (start, end):
+            same = column.valid & ip.valid & ((column.value & mask.value) == (ip.value & mask.value))
+            error = np.zeros(len(rows), dtype=np.int8)
+            error[ranged & ~same] = NOT_SAME
+            reserved = _reserved(column.value, mask.value, ranged & same & contiguous & mask.canonical)
+            range_errors.append((column, error, reserved))
+        missing_range = dhcp & ~(start.present & end.present)
+
+        with_errors = (ip_error | mask_error | ip_reserved | vlan_error).astype(bool) | missing_range
+        for _, error, reserved in range_errors:
+            with_errors |= (error | reserved).astype(bool)
+
+        messages: Dict[int, List[str]] = {}
+        positions = self._positions(site)
+        for row in np.flatnonzero(with_errors).tolist():
+            prefix = f"lan_interfaces[{positions[row]}]"
+            out = messages.setdefault(int(site[row]), [])
+            code = ip_error[row]
+            if code == MISSING:
+                out.append(f"{prefix}.ip_address es requerido")
+            elif code == INVALID:
+                out.append(f"{prefix}.ip_address '{ip.raw[row]}' no es válida")
+            code = mask_error[row]
+            if code == MISSING:
+                out.append(f"{prefix}.subnet_mask es requerido")
+            elif code == INVALID:
+                out.append(f"{prefix}.subnet_mask '{mask.raw[row]}' no es válida")
+            elif ip_reserved[row]:
+                out.append(f"{prefix}.ip_address '{ip.raw[row]}' es la dirección de "
+                           f"{_RESERVED[ip_reserved[row]]} de la subred")
+            code = vlan_error[row]
+            if code == INVALID:
+                out.append(f"{prefix}.vlan_id debe estar entre 1 y 4094")
+            elif code == DUPLICATE:
+                out.append(f"{prefix}.vlan_id {vlans[row]} está duplicado")
+            if dhcp[row]:
+                if not start.present[row]:
+                    out.append(f"{prefix}.dhcp_range_start es requerido cuando DHCP está habilitado")
+                if not end.present[row]:
+                    out.append(f"{prefix}.dhcp_range_end es requerido cuando DHCP está habilitado")
+                for field, (column, error, reserved) in zip(('dhcp_range_start', 'dhcp_range_end'),
+                                                            range_errors):
+                    if error[row] == NOT_SAME:
+                        out.append(f"{prefix}.{field} no está en la misma subred")
+                    elif reserved[row]:
+                        out.append(f"{prefix}.{field} '{column.raw[row]}' es la dirección de "
+                                   f"{_RESERVED[reserved[row]]} de la subred")
+        return messages
+
+    # --- Servicios ---
+
+    def _service_messages(self, sites: List[dict], fallback: set) -> Dict[int, List[str]]:
+        """DNS/NTP: las IPv4 válidas se resuelven en columna, el resto con el validador"""
+        values, owners = [], []
+        for idx, params in enumerate(sites):
+            if idx in fallback:
+                continue
+            services = params.get('services', {})
+            if not isinstance(services, dict):
+                fallback.add(idx)
+                continue
+            for key in ('dns_servers', 'ntp_servers'):
+                servers = services.get(key, [])
+                if not isinstance(servers, list):
+                    fallback.add(idx)
+                    break
+                for position, server in enumerate(servers):
+                    values.append(server)
+                    owners.append((idx, key, position))
+        if not values:
+            return {}
+
+        texts = [v if type(v) is str else '' for v in values]
+        valid_ip = parse_ipv4_column(texts)['valid']
+        validator = self.validator
+        messages: Dict[int, List[str]] = {}
+        for row in np.flatnonzero(~valid_ip).tolist():
+            server = values[row]
+            idx, key, position = owners[row]
+            if idx in fallback:
+                continue
+            try:
+                # Para strings el orden no cambia el resultado y el regex es más barato
+                if type(server) is str and validator._is_valid_hostname(server):
+                    continue
+                if validator._is_valid_ip(server) or validator._is_valid_hostname(server):
+                    continue
+            except TypeError:
+                fallback.add(idx)  # el validador propaga el error; se reproduce allí
+                continue
+            messages.setdefault(idx, []).append(f"services.{key}[{position}] '{server}' no es válido")
+        return messages
+
+    # --- Helpers ---
+
+    @staticmethod
+    def _contiguous(mask: "np.ndarray") -> "np.ndarray":
+        """Máscaras de la forma 1...10...0"""
+        inverse = (~mask).astype(np.uint64)
+        return (inverse & (inverse + np.uint64(1))) == 0
+
+    @staticmethod
+    def _positions(site: "np.ndarray") -> "np.ndarray":
+        """Índice de cada fila dentro de su sitio (las filas vienen agrupadas por sitio)"""
+        rows = np.arange(len(site))
+        starts = np.flatnonzero(np.r_[True, site[1:] != site[:-1]])
+        return rows - np.repeat(starts, np.diff(np.r_[starts, len(site)]))
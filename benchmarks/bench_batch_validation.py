@@ -0,0 +1,89 @@
+"""Compara la validación sitio por sitio con la validación en lote de una flota.
+
+Uso:
+    python benchmarks/bench_batch_validation.py [--sites 50000] [--invalid 0.05]
+
+Cada sitio parte de sample_site() con direcciones únicas y dos LAN; una
+fracción (--invalid) recibe un error típico: máscara no contigua, gateway
+fuera de la subred, rango DHCP ajeno o la IP de red como dirección de la
+interfaz. Se mide ConfigValidator.validate_all sobre una muestra (se
+extrapola) y BatchValidator.validate_many sobre la flota completa, y se
+verifica que ambos den el mismo resultado en la muestra.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_validation import BatchValidator, np  # noqa: E402
+from sample_site import sample_site  # noqa: E402
+from validators import ConfigValidator  # noqa: E402
+
+
+def _site(n, rng, invalid):
+    site = sample_site("fortinet", "FortiGate 60F")
+    a, b = (n >> 8) & 0xFF, n & 0xFF
+    site["site_info"]["name"] = f"SITE-{n:06d}"
+    site["wan_interfaces"] = [
+        {"interface_name": "wan1", "ip_address": f"100.{a}.{b}.2", "subnet_mask": "255.255.255.252",
+         "gateway": f"100.{a}.{b}.1", "bandwidth_mbps": 100, "isp_name": "ISP1", "priority": "primary"},
+        {"interface_name": "wan2", "ip_address": f"172.{16 + (n >> 16)}.{a}.{b}", "subnet_mask": "255.255.0.0",
+         "gateway": f"172.{16 + (n >> 16)}.0.1", "bandwidth_mbps": 50, "isp_name": "ISP2", "priority": "secondary"},
+    ]
+    site["lan_interfaces"] = [
+        {"interface_name": f"lan{i}", "ip_address": f"10.{a}.{b}.{64 * i + 1}", "subnet_mask": "255.255.255.192",
+         "vlan_id": 10 + i, "vlan_name": f"VLAN{10 + i}", "dhcp_enabled": True,
+         "dhcp_range_start": f"10.{a}.{b}.{64 * i + 20}", "dhcp_range_end": f"10.{a}.{b}.{64 * i + 60}"}
+        for i in range(2)
+    ]
+    if rng.random() < invalid:
+        error = rng.randrange(4)
+        if error == 0:
+            site["wan_interfaces"][0]["subnet_mask"] = "255.0.255.0"
+        elif error == 1:
+            site["wan_interfaces"][0]["gateway"] = "8.8.8.8"
+        elif error == 2:
+            site["lan_interfaces"][1]["dhcp_range_end"] = "192.168.1.10"
+        else:
+            site["lan_interfaces"][0]["ip_address"] = f"10.{a}.{b}.0"
+    return site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=50000)
+    parser.add_argument("--invalid", type=float, default=0.05)
+    parser.add_argument("--sample", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    sites = [_site(n, rng, args.invalid) for n in range(args.sites)]
+    records = sum(len(s["wan_interfaces"]) + len(s["lan_interfaces"]) for s in sites)
+    sample = sites[:min(args.sample, len(sites))]
+    print(f"sitios: {len(sites)}  registros WAN/LAN: {records}  numpy: {'sí' if np is not None else 'no'}")
+
+    validator = ConfigValidator()
+    start = time.perf_counter()
+    scalar = [validator.validate_all(s) for s in sample]
+    scalar_s = (time.perf_counter() - start) * len(sites) / len(sample)
+
+    batch = BatchValidator()
+    start = time.perf_counter()
+    results = batch.validate_many(sites)
+    batch_s = time.perf_counter() - start
+
+    invalid = sum(1 for is_valid, _, _ in results if not is_valid)
+    print(f"sitios inválidos: {invalid}  misma salida que validate_all (muestra): "
+          f"{'sí' if results[:len(sample)] == scalar else 'NO'}")
+    print(f"sitio por sitio: {scalar_s:.2f} s (extrapolado)  {records / scalar_s / 1e6:.3f} M registros/s")
+    print(f"en lote:         {batch_s:.2f} s  {records / batch_s / 1e6:.3f} M registros/s  "
+          f"({scalar_s / batch_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
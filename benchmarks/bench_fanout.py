@@ -0,0 +1,70 @@
+"""Compara generar un sitio vendor por vendor con el fan-out multi-vendor.
+
+Uso:
+    python benchmarks/bench_fanout.py [--lans 2,64,512,2000] [--workers N]
+
+Para cada tamaño (cantidad de LAN) se mide: /api/generate una vez por
+vendor (cada llamada re-valida), el fan-out en línea y el fan-out con el
+pool de procesos, junto al tiempo del vendor más lento. Con un solo CPU el
+pool no puede bajar de la suma de los vendors.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_generator import NetworkConfigGenerator  # noqa: E402
+from fanout import FanoutRenderer, vendor_params  # noqa: E402
+from sample_site import sample_site  # noqa: E402
+
+
+def _best(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lans", default="2,64,512,2000")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    generator = NetworkConfigGenerator()
+    vendors = generator.get_supported_vendors()
+    models = {v: generator.get_supported_models(v)[0] for v in vendors}
+    inline = FanoutRenderer(generator, inline_max_interfaces=10 ** 9)
+    pooled = FanoutRenderer(generator, max_workers=args.workers or len(vendors), inline_max_interfaces=0)
+    pooled.render(sample_site(lans=1))  # arranque de los workers fuera de la medición
+    print(f"CPUs: {os.cpu_count()}  workers: {pooled.max_workers}  vendors: {', '.join(vendors)}")
+
+    for lans in (int(n) for n in args.lans.split(",")):
+        site = sample_site(lans=lans)
+
+        def sequential():
+            for vendor in vendors:
+                output = "both" if "plan" in generator.VENDOR_CLASSES[vendor].SUPPORTED_OUTPUTS else "text"
+                generator.generate(vendor_params(site, vendor, models[vendor]), output=output)
+
+        sequential_ms, _ = _best(sequential, args.repeat)
+        inline_ms, result = _best(lambda: inline.render(site), args.repeat)
+        pooled_ms, _ = _best(lambda: pooled.render(site), args.repeat)
+        slowest = max(summary["render_ms"] for summary in result["vendors"])
+        # Los vendors sin un modelo que soporte el sitio se reportan sin generarse
+        generated = sum(1 for summary in result["vendors"] if summary["success"])
+        print(f"LAN {lans:5d}  vendor por vendor: {sequential_ms:7.1f} ms  fan-out en línea: {inline_ms:7.1f} ms  "
+              f"fan-out con pool: {pooled_ms:7.1f} ms  vendor más lento: {slowest:6.1f} ms  "
+              f"generados: {generated}/{len(vendors)}")
+    pooled.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Tamaño y tiempo de la configuración FortiGate según la cantidad de VLAN.
+
+Uso:
+    python benchmarks/bench_fortinet_cli.py [--lans 10,200,2000] [--wans 4]
+
+Para cada tamaño se mide render() (sin validación), los bytes de la salida
+y cuántos bloques `config` tiene: con el constructor por tablas hay uno por
+tabla sin importar la cantidad de VLAN.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_generator import NetworkConfigGenerator  # noqa: E402
+from sample_site import sample_site  # noqa: E402
+
+
+def _site(lans, wans):
+    site = sample_site("fortinet", "FortiGate 600F", lans=lans)
+    site["wan_interfaces"] = [
+        {"interface_name": f"wan{i + 1}", "ip_address": f"100.64.{i}.2", "subnet_mask": "255.255.255.0",
+         "gateway": f"100.64.{i}.1", "bandwidth_mbps": 100, "priority": "primary" if i == 0 else "secondary"}
+        for i in range(wans)
+    ]
+    return site
+
+
+def _best(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lans", default="10,200,2000")
+    parser.add_argument("--wans", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    generator = NetworkConfigGenerator()
+    for lans in (int(n) for n in args.lans.split(",")):
+        site = _site(lans, args.wans)
+        elapsed, result = _best(lambda: generator.render(site), args.repeat)
+        config = result["config"]
+        blocks = sum(1 for line in config.splitlines() if line.lstrip().startswith("config "))
+        print(f"LAN {lans:5d}  render: {elapsed:7.1f} ms  salida: {len(config.encode('utf-8')) / 1024:8.1f} KiB  "
+              f"bloques config: {blocks:5d}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Aplica el plan REST de FortiGate contra el FortiGate simulado y lo verifica.
+
+Uso:
+    python benchmarks/bench_fortios_rest.py [--lans 10,200,1000] [--latency-ms 2] [--jitter-ms 4] [--workers 4]
+
+Para cada tamaño se genera la salida 'plan' de un FortiGate, se aplica con
+FortiOSExecutor (sesión compartida, en serie y con --workers en paralelo
+dentro de cada tabla) y con una conexión nueva por pedido, como referencia.
+Después se compara cada objeto guardado en el equipo simulado con su
+payload, que las tablas de políticas quedaron en el orden del plan, y se
+vuelve a aplicar el plan (todos los POST pasan a PUT). --latency-ms simula
+lo que tarda el equipo en confirmar cada objeto y --jitter-ms una demora al
+azar por pedido, para que los pedidos en paralelo terminen desordenados.
+"""
+import argparse
+import os
+import sys
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_generator import NetworkConfigGenerator  # noqa: E402
+from fortios_executor import FortiOSExecutor  # noqa: E402
+from mock_fortigate import CMDB_PREFIX, MockFortiGate  # noqa: E402
+from sample_site import sample_site  # noqa: E402
+from serialization import dumps  # noqa: E402
+from vendors.fortios_rest import ORDERED_TABLES, cmdb_path, mkey_value  # noqa: E402
+
+
+def _verify(mock, plan) -> int:
+    """Objetos del plan que el equipo simulado no guardó tal cual"""
+    mismatches = 0
+    for op in plan:
+        table = op["target"][len(CMDB_PREFIX):]
+        stored = mock.get(table, mkey_value(op["payload"])[1] if op["method"] == "POST" else None)
+        mismatches += stored != op["payload"]
+    return mismatches
+
+
+def _misordered(mock, plan) -> list:
+    """Tablas de políticas cuyas entradas no quedaron en el orden del plan"""
+    tables = []
+    for table in sorted(ORDERED_TABLES):
+        target = cmdb_path(table)
+        expected = [str(mkey_value(op["payload"])[1]) for op in plan
+                    if op["method"] == "POST" and op["target"] == target]
+        if mock.keys(target[len(CMDB_PREFIX):]) != expected:
+            tables.append(table)
+    return tables
+
+
+def _per_request(base_url, token, plan):
+    # Referencia: una conexión por pedido (sin sesión)
+    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+    for op in plan:
+        requests.request(op["method"], base_url + op["target"], data=dumps(op["payload"], False), headers=headers)
+
+
+def _run(plan, latency_ms, jitter_ms, workers=None, token="mock-token"):
+    mock = MockFortiGate(token, latency_ms, jitter_ms=jitter_ms)
+    base_url = mock.start()
+    try:
+        start = time.perf_counter()
+        if workers is None:
+            _per_request(base_url, token, plan)
+            report = None
+        else:
+            with FortiOSExecutor(base_url, token, max_workers=workers) as executor:
+                report = executor.apply(plan)
+                elapsed = (time.perf_counter() - start) * 1000
+                again = executor.apply(plan)
+                return elapsed, mock.connections, report, again, _verify(mock, plan), _misordered(mock, plan)
+        return ((time.perf_counter() - start) * 1000, mock.connections, report, None, _verify(mock, plan),
+                _misordered(mock, plan))
+    finally:
+        mock.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lans", default="10,200,1000")
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--jitter-ms", type=float, default=4.0)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    generator = NetworkConfigGenerator()
+    for lans in (int(n) for n in args.lans.split(",")):
+        result = generator.render(sample_site("fortinet", "FortiGate 600F", lans=lans), output="plan")
+        plan = result["plan"]
+        print(f"LAN {lans:5d}  operaciones: {len(plan)}")
+        baseline_ms, connections, _, _, _, _ = _run(plan, args.latency_ms, args.jitter_ms)
+        print(f"  conexión por pedido:      {baseline_ms:8.1f} ms  conexiones: {connections}")
+        for workers in dict.fromkeys((1, args.workers)):
+            elapsed, connections, report, again, mismatches, misordered = _run(plan, args.latency_ms,
+                                                                                args.jitter_ms, workers)
+            print(f"  sesión, {workers} en paralelo:    {elapsed:8.1f} ms  conexiones: {connections}  "
+                  f"aplicadas: {report['applied']}  errores: {len(report['errors'])}  "
+                  f"distintas del plan: {mismatches}  fuera de orden: {', '.join(misordered) or 'ninguna'}  "
+                  f"reaplicado: {again['updated']} PUT, "
+                  f"{len(again['errors'])} errores")
+
+
+if __name__ == "__main__":
+    main()
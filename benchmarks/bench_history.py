@@ -0,0 +1,133 @@
+"""Mide espacio y tiempos de lectura/diff del historial de configuraciones.
+
+Uso:
+    python benchmarks/bench_history.py [--sites 200] [--revisions 50] [--large-lans 250,1000,4000]
+
+Cada sitio parte de una configuración aleatoria (vendor, política, WAN/LAN)
+y en cada revisión recibe un cambio pequeño: ancho de banda, una LAN más o
+menos, DNS o plantilla de políticas. Se extrapola el espacio a 10k sitios ×
+100 revisiones.
+
+Sitios grandes: un FortiGate con --large-lans LAN (hasta 4094 VLAN, como en
+bench_scale) recibe un cambio de rango DHCP y después el mismo contenido
+otra vez; se mide cuánto tarda add() (delta incluido, sin la generación),
+que corre dentro de /api/generate.
+"""
+import argparse
+import copy
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_generator import NetworkConfigGenerator  # noqa: E402
+from config_history import ConfigHistory  # noqa: E402
+from sample_site import SAMPLE_SITE, sample_site  # noqa: E402
+
+POLICIES = ["basic", "standard", "advanced"]
+
+
+def _lan(i):
+    return {"interface_name": f"lan{i}", "ip_address": f"10.{i}.0.1", "subnet_mask": "255.255.255.0",
+            "vlan_id": 100 + i, "vlan_name": f"VLAN{100 + i}", "dhcp_enabled": True,
+            "dhcp_range_start": f"10.{i}.0.100", "dhcp_range_end": f"10.{i}.0.200"}
+
+
+def _mutate(site, rng):
+    change = rng.randrange(4)
+    if change == 0:
+        site["wan_interfaces"][0]["bandwidth_mbps"] = rng.choice([50, 100, 200, 500, 1000])
+    elif change == 1:
+        if len(site["lan_interfaces"]) > 1 and rng.random() < 0.4:
+            site["lan_interfaces"].pop()
+        else:
+            site["lan_interfaces"].append(_lan(len(site["lan_interfaces"]) + 1))
+    elif change == 2:
+        site["services"]["dns_servers"] = rng.choice([["8.8.8.8", "8.8.4.4"], ["1.1.1.1", "1.0.0.1"]])
+    else:
+        site["policy_template"] = rng.choice(POLICIES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=200)
+    parser.add_argument("--revisions", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--large-lans", default="250,1000,4000",
+                        help="tamaños de sitio grande, separados por coma")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    generator = NetworkConfigGenerator()
+    vendors = {v: generator.get_supported_models(v)[0] for v in generator.get_supported_vendors()}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ConfigHistory(os.path.join(tmp, "history.db"))
+        start = time.perf_counter()
+        for n in range(args.sites):
+            vendor = rng.choice(list(vendors))
+            site = sample_site(vendor, vendors[vendor])
+            site["site_info"]["name"] = f"SITE-{n:05d}"
+            site["policy_template"] = rng.choice(POLICIES)
+            for _ in range(args.revisions):
+                # Solo cambios que el modelo acepta (p. ej. Bigleaf admite un solo scope DHCP)
+                while True:
+                    candidate = copy.deepcopy(site)
+                    _mutate(candidate, rng)
+                    result = generator.generate(candidate)
+                    if result["success"]:
+                        site = candidate
+                        break
+                history.add(site["site_info"]["customer"], site["site_info"]["name"], result["config"], vendor)
+        write_s = time.perf_counter() - start
+
+        stats = history.stats()
+        per_revision = stats["stored_bytes"] / stats["revisions"]
+        print(f"revisiones: {stats['revisions']}  original: {stats['logical_bytes'] / 1e6:.1f} MB  "
+              f"almacenado: {stats['stored_bytes'] / 1e6:.2f} MB  ratio: {stats['ratio']}x")
+        print(f"bytes/revisión: {per_revision:.0f}  "
+              f"10k sitios × 100 rev ≈ {per_revision * 1e6 / 1e9:.2f} GB (sin índices)")
+        print(f"escritura: {write_s / stats['revisions'] * 1000:.2f} ms/rev (incluye generación)")
+
+        # Lecturas y diffs en frío: se vacía el caché antes de cada operación
+        samples = [(f"SITE-{rng.randrange(args.sites):05d}", rng.randint(1, args.revisions))
+                   for _ in range(500)]
+        start = time.perf_counter()
+        customer = SAMPLE_SITE["site_info"]["customer"]
+        for site, revision in samples:
+            history._cache.clear()
+            history.get(customer, site, revision)
+        read_ms = (time.perf_counter() - start) / len(samples) * 1000
+        start = time.perf_counter()
+        for site, revision in samples:
+            history._cache.clear()
+            history.diff(customer, site, rng.randint(1, args.revisions), revision)
+        diff_ms = (time.perf_counter() - start) / len(samples) * 1000
+        print(f"lectura en frío: {read_ms:.2f} ms  diff en frío: {diff_ms:.2f} ms")
+
+        for lans in (int(n) for n in args.large_lans.split(",")):
+            site = sample_site("fortinet", "FortiGate 600F", lans=lans)
+            site["site_info"]["name"] = f"LARGE-{lans}"
+            # El modelo admite 1024 scopes DHCP
+            for lan in site["lan_interfaces"][1000:]:
+                lan["dhcp_enabled"] = False
+            first = generator.generate(site)["config"]
+            site["lan_interfaces"][lans // 4]["dhcp_range_end"] = \
+                site["lan_interfaces"][lans // 4]["dhcp_range_end"].replace(".200", ".150")
+            changed = generator.generate(site)["config"]
+            timings = []
+            for content in (first, changed, changed):
+                start = time.perf_counter()
+                history.add(customer, site["site_info"]["name"], content, "fortinet")
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"sitio grande {lans:5d} LAN ({len(changed.splitlines()):6d} líneas)  alta: {timings[0]:7.1f} ms  "
+                  f"cambio DHCP: {timings[1]:7.1f} ms  mismo contenido: {timings[2]:7.1f} ms")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
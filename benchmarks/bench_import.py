@@ -0,0 +1,55 @@
+"""Mide el tiempo de import en frío del generador.
+
+Uso:
+    python benchmarks/bench_import.py [--runs 20]
+
+Cada corrida lanza un intérprete nuevo con ``-X importtime`` y toma el tiempo
+acumulado de ``config_generator`` (incluye validators y el registro de vendors).
+También reporta cuánto cuesta cargar un vendor bajo demanda.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _cumulative_us(statement: str, module: str) -> int:
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    for line in proc.stderr.splitlines():
+        parts = [p.strip() for p in line.split('|')]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    return 0
+
+
+def _first_use_us(vendor: str) -> int:
+    statement = (
+        'import time, config_generator; t = time.perf_counter(); '
+        f'config_generator.vendor_registry["{vendor}"]; '
+        'print(int((time.perf_counter() - t) * 1e6))'
+    )
+    proc = subprocess.run([sys.executable, '-c', statement], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    return int(proc.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    cold = [_cumulative_us('import config_generator', 'config_generator') for _ in range(args.runs)]
+    vendor = [_first_use_us('fortinet') for _ in range(args.runs)]
+
+    print(f"import config_generator : mediana {statistics.median(cold) / 1000:.2f} ms ({args.runs} corridas)")
+    print(f"carga de un vendor      : mediana {statistics.median(vendor) / 1000:.2f} ms (fortinet)")
+
+
+if __name__ == '__main__':
+    main()
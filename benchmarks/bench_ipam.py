@@ -0,0 +1,65 @@
+"""Mide el tiempo de asignar subredes LAN para una flota completa.
+
+Uso:
+    python benchmarks/bench_ipam.py [--sites 50000] [--vlans 2]
+
+Un cliente con la superred 10.0.0.0/8 recibe, por sitio, una LAN de datos
+/24 y VLANs adicionales de tamaños variados (/26 a /28). Se mide la
+asignación en lote (una transacción), la reconstrucción del índice al
+reabrir la base y pedidos individuales sobre la flota ya asignada.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ipam import Ipam  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", type=int, default=50000)
+    parser.add_argument("--vlans", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    requests = []
+    for n in range(args.sites):
+        requests.append({"site": f"SITE-{n:05d}", "vlan": 10, "prefix_length": 24})
+        for vlan in range(1, args.vlans):
+            requests.append({"site": f"SITE-{n:05d}", "vlan": 10 + vlan,
+                             "prefix_length": rng.choice([26, 27, 28])})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "ipam.db")
+        ipam = Ipam(path)
+        ipam.add_pool("Customer", "10.0.0.0/8")
+        start = time.perf_counter()
+        ipam.allocate_many("Customer", requests)
+        bulk_s = time.perf_counter() - start
+        pool = ipam.pools("Customer")[0]
+        print(f"asignaciones: {pool['allocations']}  en lote: {bulk_s:.2f} s  "
+              f"utilización: {pool['utilization'] * 100:.1f}%")
+        ipam.close()
+
+        # Reabrir: el índice se reconstruye reservando las asignaciones guardadas
+        ipam = Ipam(path)
+        start = time.perf_counter()
+        ipam.pools("Customer")
+        print(f"reconstrucción del índice: {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        for n in range(1000):
+            ipam.allocate("Customer", f"NEW-{n:04d}", 10, prefix_length=rng.choice([24, 26, 28]))
+        single_ms = (time.perf_counter() - start) / 1000 * 1000
+        print(f"pedido individual (con commit): {single_ms:.2f} ms")
+        ipam.close()
+
+
+if __name__ == "__main__":
+    main()
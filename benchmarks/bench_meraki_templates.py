@@ -0,0 +1,74 @@
+"""Llamadas de Dashboard API de una flota Meraki con y sin plantillas.
+
+Uso:
+    python benchmarks/bench_meraki_templates.py [--sites 10,100,1000] [--profiles 2] [--lans 4]
+
+Cada sitio tiene su propio direccionamiento (WAN y VLAN) y rota entre las
+plantillas de políticas y --profiles perfiles de ancho de banda de las WAN.
+El ancho de banda va en los límites de uplink, que quedan como override del
+sitio, así que los sitios de un mismo nivel comparten plantilla sea cual sea
+su perfil. Se reportan las llamadas del modo por red, las del modo con
+plantillas y el tiempo de TemplatePlanner.plan.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config_generator import NetworkConfigGenerator  # noqa: E402
+from meraki_templates import TemplatePlanner  # noqa: E402
+from sample_site import sample_site  # noqa: E402
+from validators import ConfigValidator  # noqa: E402
+
+BANDWIDTH_PROFILES = ((100, 50), (500, 100), (1000, 1000), (50, 20))
+# 'custom' requiere un custom_policy por sitio
+POLICIES = [policy for policy in ConfigValidator.VALID_POLICIES if policy != "custom"]
+
+
+def _site(idx, profiles, lans):
+    site = sample_site("meraki", "MX85")
+    site["site_info"]["name"] = f"SITE-{idx + 1:04d}"
+    site["policy_template"] = POLICIES[idx % len(POLICIES)]
+    bandwidths = BANDWIDTH_PROFILES[(idx // len(POLICIES)) % profiles]
+    for wan, octet, bandwidth in zip(site["wan_interfaces"], (200, 201), bandwidths):
+        wan["ip_address"] = f"{octet}.{idx // 64 % 256}.{idx % 64 * 4}.2"
+        wan["gateway"] = f"{octet}.{idx // 64 % 256}.{idx % 64 * 4}.1"
+        wan["bandwidth_mbps"] = bandwidth
+    site["lan_interfaces"] = [
+        {"interface_name": f"lan{i}", "ip_address": f"10.{idx // 16 % 256}.{idx % 16 * 16 + i}.1",
+         "subnet_mask": "255.255.255.0", "vlan_id": 10 + i, "vlan_name": f"VLAN{10 + i}", "dhcp_enabled": True,
+         "dhcp_range_start": f"10.{idx // 16 % 256}.{idx % 16 * 16 + i}.100",
+         "dhcp_range_end": f"10.{idx // 16 % 256}.{idx % 16 * 16 + i}.200"}
+        for i in range(lans)
+    ]
+    return site
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sites", default="10,100,1000")
+    parser.add_argument("--profiles", type=int, default=2)
+    parser.add_argument("--lans", type=int, default=4)
+    args = parser.parse_args()
+    profiles = max(1, min(args.profiles, len(BANDWIDTH_PROFILES)))
+
+    planner = TemplatePlanner(NetworkConfigGenerator())
+    for count in (int(n) for n in args.sites.split(",")):
+        sites = [_site(idx, profiles, args.lans) for idx in range(count)]
+        start = time.perf_counter()
+        result = planner.plan(sites)
+        elapsed = (time.perf_counter() - start) * 1000
+        if not result["success"]:
+            print(f"{count} sitios: {result['errors'][0]}")
+            continue
+        report = result["report"]
+        print(f"{count:5d} sitios  plantillas: {report['templates']:3d}  "
+              f"por red: {report['per_network_calls']:7d}  con plantillas: {report['template_calls']:7d}  "
+              f"ahorro: {report['saved_calls']:6d} ({report['reduction_pct']:.1f}%)  plan: {elapsed:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Costo por VLAN de validar y generar sitios grandes en cada vendor.
+
+Uso:
+    python benchmarks/bench_scale.py [--lans 256,1024,4094] [--vendors fortinet,meraki]
+
+Cada LAN es una VLAN con su scope DHCP (hasta 4094, el máximo de 802.1Q).
+Se usa el modelo más grande de cada vendor y se mide BatchValidator (la
+validación de los sitios grandes), render() de texto y, si el vendor la
+tiene, la salida 'plan' serializada. Que los µs por VLAN se mantengan al
+crecer el sitio indica costo lineal. Cuando el sitio excede al modelo se
+muestra el error del límite (el render se mide igual, sin validar).
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from batch_validation import BatchValidator  # noqa: E402
+from config_generator import NetworkConfigGenerator  # noqa: E402
+from fanout import vendor_params  # noqa: E402
+from sample_site import sample_site  # noqa: E402
+from vendors.capabilities import MODEL_CAPABILITIES  # noqa: E402
+
+
+def _best(fn, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lans", default="256,1024,4094")
+    parser.add_argument("--vendors", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    generator = NetworkConfigGenerator()
+    validator = BatchValidator()
+    vendors = args.vendors.split(",") if args.vendors else generator.get_supported_vendors()
+    sizes = [int(n) for n in args.lans.split(",")]
+    sites = {lans: sample_site(lans=lans, first_vlan=1) for lans in sizes}
+    for vendor in vendors:
+        # El más grande: la tabla va del menor al mayor (sin appliances virtuales)
+        model = [name for name, caps in MODEL_CAPABILITIES[vendor].items() if not caps["virtual"]][-1]
+        has_plan = "plan" in generator.VENDOR_CLASSES[vendor].SUPPORTED_OUTPUTS
+        print(f"{vendor} ({model})")
+        for lans in sizes:
+            site = vendor_params(sites[lans], vendor, model)
+            validate_ms, (is_valid, errors, _) = _best(lambda: validator.validate(site), args.repeat)
+            text_ms, result = _best(lambda: generator.render(site), args.repeat)
+            line = (f"  LAN {lans:5d}  validación: {validate_ms:7.1f} ms ({validate_ms * 1000 / lans:5.1f} µs/VLAN)  "
+                    f"texto: {text_ms:7.1f} ms ({text_ms * 1000 / lans:5.1f} µs/VLAN, "
+                    f"{len(result['config'].encode('utf-8')) / 1024:7.1f} KiB)")
+            if has_plan:
+                plan_ms, _ = _best(lambda: generator.render(site, output="plan", serialized_payloads=True),
+                                   args.repeat)
+                line += f"  plan: {plan_ms:7.1f} ms ({plan_ms * 1000 / lans:5.1f} µs/VLAN)"
+            print(line)
+            if not is_valid:
+                print(f"        límite: {errors[0]}")
+
+
+if __name__ == "__main__":
+    main()
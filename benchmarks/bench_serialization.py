@@ -0,0 +1,102 @@
+"""Mide la fracción del tiempo de /api/generate que se va en serialización.
+
+Uso:
+    python benchmarks/bench_serialization.py [--iterations 300]
+
+Escenarios por vendor (política advanced, 2 WAN, 4 LAN):
+  antes : backend stdlib, payloads indentados y respuesta re-serializada
+          completa (equivalente a jsonify)
+  texto : backend activo, output=text con la capa de serialización
+  plan  : backend activo, output=plan compacto con payloads RawJSON
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import serialization  # noqa: E402
+import vendors.base  # noqa: E402
+from config_generator import NetworkConfigGenerator  # noqa: E402
+from sample_site import sample_site  # noqa: E402
+
+VENDORS = {"meraki": "MX68", "velocloud": "Edge 620", "cato": "Socket X1600", "bigleaf": "Bigleaf Edge 200"}
+
+
+class _Timer:
+    """Envuelve serialization.dumps para acumular el tiempo que consume"""
+
+    def __init__(self):
+        self.elapsed = 0.0
+        self._original = serialization.dumps
+
+    def __enter__(self):
+        def timed(obj, pretty=False):
+            start = time.perf_counter()
+            try:
+                return self._original(obj, pretty)
+            finally:
+                self.elapsed += time.perf_counter() - start
+        serialization.dumps = timed
+        vendors.base.dumps = timed
+        return self
+
+    def __exit__(self, *exc):
+        serialization.dumps = self._original
+        vendors.base.dumps = self._original
+
+
+def _site(vendor, model):
+    site = sample_site(vendor, model, lans=4)
+    site["policy_template"] = "advanced"
+    # DHCP solo en la primera LAN: Bigleaf admite un único scope
+    for lan in site["lan_interfaces"][1:]:
+        lan["dhcp_enabled"] = False
+    return site
+
+
+def _run(generator, site, scenario, iterations):
+    assert generator.generate(site)["success"]
+    with _Timer() as timer:
+        start = time.perf_counter()
+        extra = 0.0
+        for _ in range(iterations):
+            if scenario == "antes":
+                result = generator.generate(site, output="text", pretty=True)
+                t0 = time.perf_counter()
+                json.dumps(result).encode("utf-8")
+                extra += time.perf_counter() - t0
+            elif scenario == "texto":
+                result = generator.generate(site, output="text", serialized_payloads=True)
+                serialization.dumps_document(result)
+            else:
+                result = generator.generate(site, output="plan", serialized_payloads=True)
+                serialization.dumps_document(result)
+        total = time.perf_counter() - start
+    return total, timer.elapsed + extra
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    generator = NetworkConfigGenerator()
+    active = serialization.BACKEND
+    print(f"backend activo: {active}")
+    print(f"{'vendor':<10} {'escenario':<7} {'ms/req':>8} {'serial.':>8}")
+    for vendor, model in VENDORS.items():
+        site = _site(vendor, model)
+        for scenario in ("antes", "texto", "plan"):
+            serialization.set_backend("json" if scenario == "antes" else active)
+            total, ser = _run(generator, site, scenario, args.iterations)
+            per_req = total / args.iterations * 1000
+            print(f"{vendor:<10} {scenario:<7} {per_req:8.3f} {ser / total * 100:7.1f}%")
+    serialization.set_backend(active)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""API REST de FortiOS simulada (cmdb) para probar fortios_executor sin un equipo.
+
+Uso:
+    python benchmarks/mock_fortigate.py [--port 8080] [--token mock-token] [--latency-ms 0] [--jitter-ms 0]
+
+Guarda en memoria lo que recibe con la semántica del equipo: POST crea una
+entrada (error -5 si la mkey ya existe), PUT a /tabla/mkey la modifica (404
+si no existe), PUT a una tabla sin entradas la reemplaza y GET la devuelve.
+La mkey de un POST es la primera clave del payload, como en los planes que
+genera fortios_rest. Las entradas quedan en el orden en que llegan, como
+en el equipo. --jitter-ms suma a cada respuesta una demora al azar entre 0
+y ese valor, así los pedidos en paralelo terminan en cualquier orden.
+HTTP/1.1 con keep-alive; cuenta conexiones y pedidos.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+CMDB_PREFIX = "/api/v2/cmdb/"
+
+
+class MockFortiGate:
+    """Servidor en un hilo; start() retorna la URL base"""
+
+    def __init__(self, token: str = "mock-token", latency_ms: float = 0.0, port: int = 0,
+                 jitter_ms: float = 0.0):
+        self.token = token
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        # Ruta cmdb ('system/interface') -> {mkey: objeto}; objects, las tablas sin entradas
+        self.entries: dict = {}
+        self.objects: dict = {}
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _handler(self))
+        self.server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, table: str, mkey=None):
+        """Objeto guardado (table es la ruta cmdb, p. ej. 'system/interface')"""
+        with self._lock:
+            if mkey is None:
+                return self.objects.get(table)
+            return self.entries.get(table, {}).get(str(mkey))
+
+    def keys(self, table: str) -> list:
+        """mkeys de una tabla en el orden en que quedaron en el equipo"""
+        with self._lock:
+            return list(self.entries.get(table, {}))
+
+    def handle(self, method: str, path: str, body: Optional[dict]):
+        """(estado HTTP, respuesta) de un pedido ya autenticado"""
+        if not path.startswith(CMDB_PREFIX):
+            return 404, {"status": "error", "http_status": 404}
+        parts = path[len(CMDB_PREFIX):].strip("/").split("/")
+        if len(parts) < 2:
+            return 404, {"status": "error", "http_status": 404}
+        table = "/".join(parts[:2])
+        mkey = unquote(parts[2]) if len(parts) > 2 else None
+        with self._lock:
+            self.requests += 1
+            stored = self.entries.get(table)
+            if method == "GET":
+                if mkey is None and table in self.objects:
+                    return 200, {"status": "success", "http_status": 200, "results": self.objects[table]}
+                if stored is None or (mkey is not None and mkey not in stored):
+                    return 404, {"status": "error", "http_status": 404}
+                results = [stored[mkey]] if mkey is not None else list(stored.values())
+                return 200, {"status": "success", "http_status": 200, "results": results}
+            if not isinstance(body, dict):
+                return 400, {"status": "error", "http_status": 400, "cli_error": "payload inválido"}
+            if method == "POST":
+                _, value = next(iter(body.items()))
+                entries = self.entries.setdefault(table, {})
+                if str(value) in entries:
+                    return 500, {"status": "error", "http_status": 500, "error": -5}
+                entries[str(value)] = body
+                return 200, {"status": "success", "http_status": 200, "mkey": value}
+            if method == "PUT" and mkey is None:
+                self.objects[table] = body
+                return 200, {"status": "success", "http_status": 200}
+            if method == "PUT":
+                if stored is None or mkey not in stored:
+                    return 404, {"status": "error", "http_status": 404}
+                stored[mkey] = {**stored[mkey], **body}
+                return 200, {"status": "success", "http_status": 200, "mkey": mkey}
+        return 405, {"status": "error", "http_status": 405}
+
+
+def _handler(mock: MockFortiGate):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Encabezados y cuerpo van en escrituras separadas: con Nagle cada
+        # respuesta en keep-alive esperaría el ACK retrasado del cliente
+        disable_nagle_algorithm = True
+
+        def setup(self):
+            super().setup()
+            with mock._lock:
+                mock.connections += 1
+
+        def log_message(self, format, *args):
+            pass
+
+        def _respond(self, status: int, payload: dict):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _dispatch(self, method: str):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            if self.headers.get("Authorization") != f"Bearer {mock.token}":
+                self._respond(401, {"status": "error", "http_status": 401})
+                return
+            try:
+                body = json.loads(raw) if raw else None
+            except ValueError:
+                self._respond(400, {"status": "error", "http_status": 400, "cli_error": "JSON inválido"})
+                return
+            delay = mock.latency + (random.uniform(0, mock.jitter) if mock.jitter else 0)
+            if delay:
+                time.sleep(delay)
+            self._respond(*mock.handle(method, urlsplit(self.path).path, body))
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PUT(self):
+            self._dispatch("PUT")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--token", default="mock-token")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    mock = MockFortiGate(args.token, args.latency_ms, args.port, args.jitter_ms)
+    print(f"FortiGate simulado en {mock.start()} (token {args.token})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
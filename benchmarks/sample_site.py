@@ -0,0 +1,57 @@
+"""Sitio de ejemplo compartido por los benchmarks.
+
+    from sample_site import sample_site
+
+    site = sample_site("fortinet", "FortiGate 600F", lans=500)
+
+sample_site() retorna una copia nueva cada vez: cada benchmark la modifica
+a gusto sin afectar a los demás. Las LAN de lan() no se superponen hasta
+65536 (10.x.y.0/24 con su rango DHCP).
+"""
+import copy
+from typing import Optional
+
+SAMPLE_SITE = {
+    "site_info": {"name": "SITE-001", "customer": "Customer", "location": "Location",
+                  "timezone": "America/Costa_Rica"},
+    "device": {"vendor": "", "model": "", "firmware_version": "7.4.2"},
+    "wan_interfaces": [
+        {"interface_name": "wan1", "ip_address": "200.1.1.2", "subnet_mask": "255.255.255.252",
+         "gateway": "200.1.1.1", "bandwidth_mbps": 100, "isp_name": "ISP-1", "priority": "primary"},
+        {"interface_name": "wan2", "ip_address": "201.1.1.2", "subnet_mask": "255.255.255.252",
+         "gateway": "201.1.1.1", "bandwidth_mbps": 50, "isp_name": "ISP-2", "priority": "secondary"},
+    ],
+    "lan_interfaces": [
+        {"interface_name": "lan", "ip_address": "192.168.1.1", "subnet_mask": "255.255.255.0",
+         "vlan_id": 10, "vlan_name": "DATA", "dhcp_enabled": True,
+         "dhcp_range_start": "192.168.1.100", "dhcp_range_end": "192.168.1.200"},
+    ],
+    "services": {"dns_servers": ["8.8.8.8", "8.8.4.4"], "ntp_servers": ["pool.ntp.org"]},
+    "policy_template": "basic",
+}
+
+
+def lan(i: int, first_vlan: int = 2) -> dict:
+    """LAN número i: 10.<i / 256>.<i % 256>.1/24 con DHCP, VLAN first_vlan + i"""
+    prefix = f"10.{i // 256}.{i % 256}"
+    return {"interface_name": f"lan{i}", "ip_address": f"{prefix}.1", "subnet_mask": "255.255.255.0",
+            "vlan_id": first_vlan + i, "vlan_name": f"VLAN{first_vlan + i}", "dhcp_enabled": True,
+            "dhcp_range_start": f"{prefix}.100", "dhcp_range_end": f"{prefix}.200"}
+
+
+def sample_site(vendor: Optional[str] = None, model: Optional[str] = None,
+                lans: Optional[int] = None, first_vlan: int = 2) -> dict:
+    """
+    Copia de SAMPLE_SITE
+
+    vendor y model reemplazan los de device; con lans, las LAN del sitio son
+    lan(0) .. lan(lans - 1).
+    """
+    site = copy.deepcopy(SAMPLE_SITE)
+    if vendor is not None:
+        site["device"]["vendor"] = vendor
+    if model is not None:
+        site["device"]["model"] = model
+    if lans is not None:
+        site["lan_interfaces"] = [lan(i, first_vlan) for i in range(lans)]
+    return site
@@ -0,0 +1,45 @@
+"""Catálogo de vendors, modelos, políticas y zonas horarias.
+
+Los datos solo cambian con cada despliegue, así que el payload se construye y
+serializa una vez. Su versión es el hash del contenido y se usa como ETag
+fuerte, de modo que los clientes revalidan con un 304 sin cuerpo.
+"""
+import hashlib
+
+from serialization import dumps
+from validators import ConfigValidator
+from vendors.base import VendorConfig
+from vendors.capabilities import MODEL_CAPABILITIES
+from vendors.registry import vendor_registry
+
+
+def build_catalog() -> dict:
+    """Construye el catálogo completo a partir del registro de vendors"""
+    vendors = []
+    for name in vendor_registry.names():
+        vendors.append({'name': name, **vendor_registry.describe(name),
+                        'capabilities': MODEL_CAPABILITIES.get(name, {})})
+
+    return {
+        'vendors': vendors,
+        'policy_templates': list(ConfigValidator.VALID_POLICIES),
+        'timezones': [
+            {'name': tz, 'offset': offset}
+            for tz, offset in VendorConfig.TIMEZONE_OFFSETS.items()
+        ]
+    }
+
+
+class Catalog:
+    """Catálogo precomputado y serializado con su versión"""
+
+    def __init__(self):
+        self.refresh()
+
+    def refresh(self):
+        """Recalcula el catálogo (p. ej. tras registrar un vendor externo)"""
+        payload = build_catalog()
+        digest = hashlib.sha256(dumps(payload)).hexdigest()[:16]
+        self.version = digest
+        self.payload = {'version': digest, **payload}
+        self.body = dumps(self.payload)
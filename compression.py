@@ -0,0 +1,139 @@
+"""Compresión negociada (brotli/gzip) para respuestas y assets estáticos.
+
+Las respuestas en memoria se comprimen enteras (compressed); las que se
+generan por trozos se comprimen al vuelo (streamed_response).
+
+brotli es opcional: si no está instalado solo se negocia gzip.
+"""
+import gzip
+import zlib
+from functools import wraps
+from typing import Dict, Iterable, Iterator, Optional
+
+from flask import Response, current_app, make_response, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+# Preferencia del servidor cuando el cliente acepta varias codificaciones
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """Elige la codificación según Accept-Encoding (respeta q=0)"""
+    if not accept_encoding:
+        return None
+    accepted: Dict[str, float] = {}
+    for item in accept_encoding.split(','):
+        parts = item.strip().split(';')
+        coding = parts[0].strip().lower()
+        q = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    best, best_q = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        q = accepted.get(coding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data: bytes, encoding: str, level: int = DEFAULT_LEVEL) -> bytes:
+    """Comprime data con la codificación indicada"""
+    if encoding == "br":
+        # brotli acepta calidad 0-11; se usa el mismo número que para gzip
+        return brotli.compress(data, quality=max(0, min(level, 11)))
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=max(1, min(level, 9)), mtime=0)
+    raise ValueError(f"Codificación no soportada: {encoding}")
+
+
+def compress_chunks(chunks: Iterable[bytes], encoding: str, level: int = DEFAULT_LEVEL) -> Iterator[bytes]:
+    """Comprime un flujo de trozos sin juntarlos (mismo formato que compress)"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=max(0, min(level, 11)))
+        process, finish = compressor.process, compressor.finish
+    elif encoding == "gzip":
+        # wbits 31: contenedor gzip (encabezado con mtime 0, como compress)
+        compressor = zlib.compressobj(max(1, min(level, 9)), zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+    else:
+        raise ValueError(f"Codificación no soportada: {encoding}")
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
+
+
+def precompress(data: bytes, level: int = 9) -> Dict[str, bytes]:
+    """Genera todas las variantes comprimidas de un asset (incluye 'identity')"""
+    variants = {"identity": data}
+    for encoding in SUPPORTED_ENCODINGS:
+        variants[encoding] = compress(data, encoding, level)
+    return variants
+
+
+def compress_response(response, accept_encoding: Optional[str],
+                      min_size: int = DEFAULT_MIN_SIZE, level: int = DEFAULT_LEVEL):
+    """Comprime una respuesta en memoria si supera min_size y el cliente lo acepta"""
+    response.vary.add("Accept-Encoding")
+    if (response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    encoding = negotiate(accept_encoding)
+    if encoding is None:
+        return response
+    response.set_data(compress(data, encoding, level))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def compressed(view):
+    """
+    Decorador para vistas cuya respuesta se comprime de forma negociada
+
+    Umbral y nivel se leen de app.config: COMPRESS_MIN_SIZE y COMPRESS_LEVEL.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        return compress_response(
+            response,
+            request.headers.get("Accept-Encoding"),
+            min_size=current_app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE),
+            level=current_app.config.get("COMPRESS_LEVEL", DEFAULT_LEVEL),
+        )
+    return wrapper
+
+
+def streamed_response(chunks: Iterable[bytes], mimetype: str, accept_encoding: Optional[str],
+                      level: int = DEFAULT_LEVEL) -> Response:
+    """
+    Respuesta en streaming, comprimida al vuelo si el cliente lo acepta
+
+    No hay umbral de tamaño: el largo no se conoce hasta terminar.
+    """
+    encoding = negotiate(accept_encoding)
+    if encoding is not None:
+        chunks = compress_chunks(chunks, encoding, level)
+    response = Response(chunks, mimetype=mimetype)
+    response.vary.add("Accept-Encoding")
+    if encoding is not None:
+        response.headers["Content-Encoding"] = encoding
+    return response
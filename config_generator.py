@@ -1,48 +1,139 @@
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from validators import ConfigValidator
-from vendors.fortinet import FortinetConfig
-from vendors.meraki import MerakiConfig
-from vendors.velocloud import VelocloudConfig
-from vendors.bigleaf import BigleafConfig
-from vendors.cato import CatoConfig
+from site_schema import structural_errors
+from vendors.base import VendorConfig
+from vendors.registry import vendor_registry
 
 class NetworkConfigGenerator:
     """Motor principal para generación de configuraciones"""
     
-    VENDOR_CLASSES = {
-        'fortinet': FortinetConfig,
-        'meraki': MerakiConfig,
-        'velocloud': VelocloudConfig,
-        'bigleaf': BigleafConfig,
-        'cato': CatoConfig
-    }
+    # Registro perezoso: el módulo de cada vendor se importa en su primer uso
+    VENDOR_CLASSES = vendor_registry
     
-    def __init__(self):
+    # text: configuración legible; plan: operaciones de API; both: ambas
+    OUTPUTS = ["text", "plan", "both"]
+    
+    def __init__(self, artifact_store=None, ipam=None, fleet=None):
         self.validator = ConfigValidator()
+        # Opcional: ArtifactStore donde se archiva cada configuración de texto
+        self.artifact_store = artifact_store
+        # Opcional: Ipam para autocompletar el direccionamiento de las LAN
+        self.ipam = ipam
+        # Opcional: FleetRegistry para revisar subredes contra el resto de la flota
+        self.fleet = fleet
     
-    def generate(self, params: dict) -> dict:
+    def generate(self, params: dict, output: str = "text", pretty: Optional[bool] = None,
+                 serialized_payloads: bool = False, analyze: bool = False,
+                 allocate: bool = False, stream: bool = False) -> dict:
         """
         Genera configuración completa para un dispositivo
         
         Args:
             params: Diccionario con parámetros de configuración
+            output: 'text', 'plan' o 'both' (ver OUTPUTS)
+            pretty: indentar los payloads JSON; por defecto solo en 'text'
+            serialized_payloads: entregar los payloads del plan como RawJSON
+                (bytes ya serializados, para serialization.dumps_document)
+            analyze: agregar 'analysis' con reglas sombreadas, redundantes y
+                combinables (ver rule_analyzer)
+            allocate: asignar desde el IPAM la subred y el rango DHCP de las
+                LAN sin IP (o con ip_address 'auto')
+            stream: no armar el texto; 'config' queda en None y 'chunks'
+                lo recorre por secciones en bytes (VendorConfig.iter_config)
             
         Returns:
             dict con success, errors, warnings, config, vendor, site_name
+            (y plan cuando output es 'plan' o 'both'; artifact_id si hay
+            artifact_store y se generó texto; allocations si allocate)
         """
+        # Paso 0: Completar direccionamiento LAN desde el IPAM. Las LAN
+        # necesitan su IP para validarse, así que se asigna antes y, si el
+        # sitio no se genera, se vuelve a las asignaciones previas
+        allocations = previous_allocations = None
+        if allocate:
+            from ipam import IpamError
+            # Un documento mal formado se rechaza antes de reservar subredes
+            errors = structural_errors(params)
+            if not errors:
+                try:
+                    if self.ipam is None:
+                        raise IpamError("El IPAM no está habilitado")
+                    site_info = params.get('site_info') or {}
+                    if site_info.get('customer') and site_info.get('name'):
+                        previous_allocations = self.ipam.site_allocations(site_info['customer'],
+                                                                          site_info['name'])
+                    params, allocations = self.ipam.fill_site(params)
+                except IpamError as e:
+                    errors = [str(e)]
+            if errors:
+                return {
+                    'success': False,
+                    'errors': errors,
+                    'warnings': [],
+                    'config': None,
+                    'vendor': None,
+                    'site_name': self._site_name(params)
+                }
+        
         # Paso 1: Validar inputs
         is_valid, errors, warnings = self.validator.validate_all(params)
+        if is_valid and self.fleet is not None:
+            fleet_errors, fleet_warnings = self.fleet.check(params)
+            errors.extend(fleet_errors)
+            warnings.extend(fleet_warnings)
+            is_valid = not fleet_errors
         
         if not is_valid:
+            self._restore_allocations(params, previous_allocations)
             return {
                 'success': False,
                 'errors': errors,
                 'warnings': warnings,
                 'config': None,
                 'vendor': None,
-                'site_name': params.get('site_info', {}).get('name', 'Unknown')
+                'site_name': self._site_name(params)
             }
         
+        # Pasos 2 a 4: vendor, modelo y configuración
+        result, vendor_config = self._render(params, warnings, output, pretty, serialized_payloads, analyze, stream)
+        if vendor_config is None:
+            self._restore_allocations(params, previous_allocations)
+            return result
+        try:
+            if allocations is not None:
+                result['allocations'] = allocations
+            if self.fleet is not None:
+                self.fleet.register(params)
+            if self.artifact_store is not None and vendor_config.render_text:
+                result['artifact_id'] = self.artifact_store.put(
+                    vendor_config.config_sections, result['vendor'], result['site_name'])
+            return result
+        except Exception as e:
+            self._restore_allocations(params, previous_allocations)
+            return self._render_error(params, result['vendor'], warnings, e)
+    
+    def _restore_allocations(self, params: dict, previous: Optional[List[dict]]):
+        """Deshace lo asignado por fill_site para un sitio que no se generó"""
+        if previous is not None:
+            site_info = params['site_info']
+            self.ipam.restore_site(site_info['customer'], site_info['name'], previous)
+    
+    def render(self, params: dict, output: str = "text", pretty: Optional[bool] = None,
+               serialized_payloads: bool = False, analyze: bool = False,
+               warnings: Optional[list] = None, stream: bool = False) -> dict:
+        """
+        Genera la configuración de un sitio ya validado, sin efectos laterales
+        
+        Igual que generate pero sin validar, sin IPAM, sin registrar el sitio
+        en la flota y sin archivar el artefacto. warnings son las advertencias
+        previas (p. ej. de la validación) a las que se suman las del vendor.
+        """
+        return self._render(params, list(warnings or []), output, pretty, serialized_payloads, analyze, stream)[0]
+    
+    def _render(self, params: dict, warnings: list, output: str, pretty: Optional[bool],
+                serialized_payloads: bool, analyze: bool,
+                stream: bool = False) -> Tuple[dict, Optional[VendorConfig]]:
+        """(resultado, VendorConfig usado); el VendorConfig es None si falló"""
         # Paso 2: Seleccionar vendor
         vendor_name = params['device']['vendor'].lower()
         vendor_class = self.VENDOR_CLASSES.get(vendor_name)
@@ -54,10 +145,24 @@ class NetworkConfigGenerator:
                 'warnings': [],
                 'config': None,
                 'vendor': vendor_name,
-                'site_name': params.get('site_info', {}).get('name', 'Unknown')
-            }
+                'site_name': self._site_name(params)
+            }, None
+        
+        wants_plan = output in ('plan', 'both')
+        if wants_plan and 'plan' not in vendor_class.SUPPORTED_OUTPUTS:
+            return {
+                'success': False,
+                'errors': [f"Formato de salida '{output}' no soportado para {vendor_name}. Opciones: {', '.join(vendor_class.SUPPORTED_OUTPUTS)}"],
+                'warnings': warnings,
+                'config': None,
+                'vendor': vendor_name,
+                'site_name': self._site_name(params)
+            }, None
         
         vendor_config = vendor_class()
+        vendor_config.render_text = output != 'plan'
+        vendor_config.render_plan = wants_plan
+        vendor_config.pretty = output == 'text' if pretty is None else pretty
         
         # Paso 3: Validar modelo
         model = params['device'].get('model', '')
@@ -71,35 +176,48 @@ class NetworkConfigGenerator:
             vendor_config.apply_lan_config(params.get('lan_interfaces', []))
             vendor_config.apply_policies(params.get('policy_template', 'basic'))
             
-            config_output = vendor_config.export_config()
-            
-            return {
+            result = {
                 'success': True,
                 'errors': [],
                 'warnings': warnings,
-                'config': config_output,
+                'config': vendor_config.export_config() if vendor_config.render_text and not stream else None,
                 'vendor': vendor_name,
-                'site_name': params.get('site_info', {}).get('name', 'Unknown'),
-                'output_format': vendor_config.OUTPUT_FORMAT
+                'site_name': self._site_name(params),
+                'output_format': 'plan' if output == 'plan' else vendor_config.OUTPUT_FORMAT
             }
+            if stream and vendor_config.render_text:
+                result['chunks'] = vendor_config.iter_config()
+            if wants_plan:
+                result['plan'] = vendor_config.export_plan(serialized=serialized_payloads)
+            if analyze:
+                from rule_analyzer import analyze_site
+                config_text = "\n".join(vendor_config.config_sections) if vendor_name == 'fortinet' else None
+                result['analysis'] = analyze_site(vendor_name, params, config_text)
+            return result, vendor_config
             
         except Exception as e:
-            return {
-                'success': False,
-                'errors': [f"Error generando configuración: {str(e)}"],
-                'warnings': warnings,
-                'config': None,
-                'vendor': vendor_name,
-                'site_name': params.get('site_info', {}).get('name', 'Unknown')
-            }
+            return self._render_error(params, vendor_name, warnings, e), None
+    
+    def _render_error(self, params: dict, vendor_name: str, warnings: list, error: Exception) -> dict:
+        return {
+            'success': False,
+            'errors': [f"Error generando configuración: {str(error)}"],
+            'warnings': warnings,
+            'config': None,
+            'vendor': vendor_name,
+            'site_name': self._site_name(params)
+        }
+    
+    @staticmethod
+    def _site_name(params) -> str:
+        """Nombre del sitio para la respuesta, también con documentos mal formados"""
+        site_info = params.get('site_info') if isinstance(params, dict) else None
+        return site_info.get('name', 'Unknown') if isinstance(site_info, dict) else 'Unknown'
     
     def get_supported_vendors(self) -> list:
         """Retorna lista de vendors soportados"""
-        return list(self.VENDOR_CLASSES.keys())
+        return self.VENDOR_CLASSES.names()
     
     def get_supported_models(self, vendor: str) -> list:
         """Retorna lista de modelos soportados para un vendor"""
-        vendor_class = self.VENDOR_CLASSES.get(vendor.lower())
-        if vendor_class:
-            return vendor_class.SUPPORTED_MODELS
-        return []
+        return self.VENDOR_CLASSES.models(vendor.lower())
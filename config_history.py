@@ -0,0 +1,420 @@
+"""Historial de revisiones de configuración por sitio con compresión delta.
+
+Las revisiones se guardan por (cliente, sitio), como en ipam y fleet: dos
+clientes pueden tener un sitio con el mismo nombre.
+
+Cada revisión se guarda como delta por líneas contra la revisión anterior,
+comprimido con zlib usando un diccionario precargado (zdict) entrenado con
+texto típico de los vendors (bloques de políticas, interfaces, JSON de API).
+Cada SNAPSHOT_INTERVAL revisiones se guarda una copia completa, de modo que
+leer cualquier revisión aplica como máximo SNAPSHOT_INTERVAL - 1 deltas
+(menos si una revisión cercana está en el caché de lectura).
+
+Los diccionarios se guardan en la base con su id y nunca se modifican: cada
+revisión registra con qué diccionario se comprimió.
+
+El delta sale de un patience diff (matching_blocks): anclas en las líneas
+únicas de ambas revisiones, casi lineal aunque la configuración repita
+miles de veces next / end / set. add() corre dentro de /api/generate, así
+que su costo no puede crecer con el cuadrado de las líneas.
+
+Formato del delta (bytes, antes de comprimir), una instrucción por línea:
+    = <inicio> <cantidad>\\n      copiar líneas de la revisión base
+    + <bytes>\\n<contenido>       insertar contenido literal
+"""
+import bisect
+import copy
+import difflib
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SNAPSHOT_INTERVAL = 20
+DICTIONARY_SIZE = 32 * 1024  # máximo útil para zlib (ventana de 32 KB)
+# Tope del trabajo del diff, en múltiplos de las líneas de ambas revisiones
+DIFF_WORK_FACTOR = 8
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dictionaries (
+    id INTEGER PRIMARY KEY,
+    data BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    customer TEXT NOT NULL,
+    site TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    dictionary_id INTEGER NOT NULL REFERENCES dictionaries(id),
+    data BLOB NOT NULL,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    vendor TEXT,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (customer, site, revision)
+);
+"""
+
+# Sitio representativo para entrenar el diccionario por defecto
+_TRAINING_SITE = {
+    "site_info": {"name": "SITE-001", "customer": "Customer", "location": "Location",
+                  "timezone": "America/Costa_Rica"},
+    "device": {"vendor": "", "model": "", "firmware_version": "7.4.2"},
+    "wan_interfaces": [
+        {"interface_name": "wan1", "ip_address": "200.1.1.2", "subnet_mask": "255.255.255.252",
+         "gateway": "200.1.1.1", "bandwidth_mbps": 100, "isp_name": "ISP-1", "priority": "primary"},
+        {"interface_name": "wan2", "ip_address": "201.1.1.2", "subnet_mask": "255.255.255.252",
+         "gateway": "201.1.1.1", "bandwidth_mbps": 50, "isp_name": "ISP-2", "priority": "secondary"},
+    ],
+    "lan_interfaces": [
+        {"interface_name": "lan", "ip_address": "192.168.1.1", "subnet_mask": "255.255.255.0",
+         "vlan_id": 10, "vlan_name": "DATA", "dhcp_enabled": True,
+         "dhcp_range_start": "192.168.1.100", "dhcp_range_end": "192.168.1.200"},
+    ],
+    "services": {"dns_servers": ["8.8.8.8", "8.8.4.4"], "ntp_servers": ["pool.ntp.org"]},
+    "policy_template": "basic",
+}
+
+
+def default_training_samples() -> List[str]:
+    """Configuraciones de ejemplo de cada vendor y plantilla de políticas"""
+    from config_generator import NetworkConfigGenerator
+    from validators import ConfigValidator
+
+    generator = NetworkConfigGenerator()
+    samples = []
+    for vendor in generator.get_supported_vendors():
+        models = generator.get_supported_models(vendor)
+        for policy in ConfigValidator.VALID_POLICIES:
+            site = copy.deepcopy(_TRAINING_SITE)
+            site["device"].update(vendor=vendor, model=models[0] if models else "")
+            site["policy_template"] = policy
+            result = generator.generate(site)
+            if result["success"] and result["config"]:
+                samples.append(result["config"])
+    return samples
+
+
+def train_dictionary(samples: Iterable[str], size: int = DICTIONARY_SIZE) -> bytes:
+    """
+    Construye un zdict con las líneas más repetidas de las muestras
+
+    Se priorizan las líneas por frecuencia × largo; las más valiosas quedan
+    al final del diccionario, que es donde zlib las referencia más barato.
+    """
+    counts: Counter = Counter()
+    for sample in samples:
+        counts.update(line for line in sample.encode("utf-8").splitlines(keepends=True)
+                      if len(line.strip()) > 3)
+    ranked = sorted(counts.items(), key=lambda item: item[1] * len(item[0]), reverse=True)
+    chosen, total = [], 0
+    for line, _ in ranked:
+        if total + len(line) > size:
+            continue
+        chosen.append(line)
+        total += len(line)
+    return b"".join(reversed(chosen))
+
+
+def _unique_anchors(base: List[bytes], alo: int, ahi: int,
+                    target: List[bytes], blo: int, bhi: int) -> List[Tuple[int, int]]:
+    """
+    Líneas que aparecen una sola vez en cada lado, en la secuencia creciente
+    más larga (patience diff): son los puntos fijos seguros entre ambas
+    """
+    counts: Dict[bytes, List[int]] = {}
+    for i in range(alo, ahi):
+        entry = counts.get(base[i])
+        if entry is None:
+            counts[base[i]] = [1, i, 0, 0]
+        else:
+            entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(target[j])
+        if entry is not None:
+            entry[2] += 1
+            entry[3] = j
+    pairs = sorted((i, j) for a_count, i, b_count, j in counts.values() if a_count == 1 and b_count == 1)
+    # Secuencia creciente más larga en j (patience sorting)
+    tails: List[int] = []
+    tail_index: List[int] = []
+    previous = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_index.append(k)
+        else:
+            tails[pos] = j
+            tail_index[pos] = k
+        previous[k] = tail_index[pos - 1] if pos else -1
+    chain = []
+    k = tail_index[-1] if tail_index else -1
+    while k >= 0:
+        chain.append(pairs[k])
+        k = previous[k]
+    return chain[::-1]
+
+
+def matching_blocks(base: List[bytes], target: List[bytes]) -> List[Tuple[int, int, int]]:
+    """
+    Bloques (i, j, n) iguales entre base y target, ordenados
+
+    Patience diff: se recortan prefijo y sufijo comunes, se anclan las
+    líneas únicas en ambos lados y se repite entre anclas. Las líneas que
+    se repiten mucho en las configuraciones (next, end, set ...) no generan
+    comparaciones cruzadas, así que el costo es casi lineal. Si el trabajo
+    pasa DIFF_WORK_FACTOR veces el tamaño de la entrada, las regiones que
+    faltan quedan como reemplazo (el delta sale más grande, no más lento).
+    """
+    blocks = []
+    budget = DIFF_WORK_FACTOR * (len(base) + len(target))
+    regions = [(0, len(base), 0, len(target))]
+    while regions:
+        alo, ahi, blo, bhi = regions.pop()
+        size = 0
+        while alo + size < ahi and blo + size < bhi and base[alo + size] == target[blo + size]:
+            size += 1
+        if size:
+            blocks.append((alo, blo, size))
+            alo, blo = alo + size, blo + size
+        size = 0
+        while alo < ahi - size and blo < bhi - size and base[ahi - 1 - size] == target[bhi - 1 - size]:
+            size += 1
+        if size:
+            blocks.append((ahi - size, bhi - size, size))
+            ahi, bhi = ahi - size, bhi - size
+        if alo == ahi or blo == bhi or budget <= 0:
+            continue
+        budget -= (ahi - alo) + (bhi - blo)
+        i, j = alo, blo
+        for anchor_i, anchor_j in _unique_anchors(base, alo, ahi, target, blo, bhi):
+            regions.append((i, anchor_i, j, anchor_j))
+            blocks.append((anchor_i, anchor_j, 1))
+            i, j = anchor_i + 1, anchor_j + 1
+        if i > alo:
+            regions.append((i, ahi, j, bhi))
+    blocks.sort()
+    return blocks
+
+
+def encode_delta(base: List[bytes], target: List[bytes]) -> bytes:
+    """Delta por líneas de base a target (listas de líneas con su salto de línea)"""
+    out = []
+    copy_start = copy_count = 0
+    j = 0
+    for block_i, block_j, size in matching_blocks(base, target) + [(len(base), len(target), 0)]:
+        # Bloques contiguos en ambos lados van en una sola copia
+        if copy_count and (block_j > j or block_i != copy_start + copy_count or not size):
+            out.append(b"= %d %d\n" % (copy_start, copy_count))
+            copy_count = 0
+        if block_j > j:
+            chunk = b"".join(target[j:block_j])
+            out.append(b"+ %d\n" % len(chunk))
+            out.append(chunk)
+        if size:
+            if not copy_count:
+                copy_start = block_i
+            copy_count += size
+        j = block_j + size
+    return b"".join(out)
+
+
+def apply_delta(base: List[bytes], delta: bytes) -> bytes:
+    """Reconstruye el contenido a partir de la base y un delta de encode_delta"""
+    out = []
+    pos = 0
+    while pos < len(delta):
+        end = delta.index(b"\n", pos)
+        header = delta[pos:end].split(b" ")
+        pos = end + 1
+        if header[0] == b"=":
+            start, count = int(header[1]), int(header[2])
+            out.extend(base[start:start + count])
+        else:
+            length = int(header[1])
+            out.append(delta[pos:pos + length])
+            pos += length
+    return b"".join(out)
+
+
+class ConfigHistory:
+    """Revisiones de configuración por sitio en SQLite"""
+
+    def __init__(self, path: str, snapshot_interval: int = SNAPSHOT_INTERVAL,
+                 training_samples: Optional[Iterable[str]] = None, cache_size: int = 64):
+        self.snapshot_interval = max(1, snapshot_interval)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._dictionaries: Dict[int, bytes] = {}
+        # (customer, site, revision) -> contenido reconstruido
+        self._cache: "OrderedDict[Tuple[str, str, int], bytes]" = OrderedDict()
+        self.cache_size = cache_size
+
+        row = self._conn.execute("SELECT MAX(id) FROM dictionaries").fetchone()
+        if row[0] is None:
+            samples = default_training_samples() if training_samples is None else training_samples
+            self.dictionary_id = self.add_dictionary(train_dictionary(samples))
+        else:
+            self.dictionary_id = row[0]
+
+    # --- Diccionarios ---
+
+    def add_dictionary(self, data: bytes) -> int:
+        """Registra un diccionario nuevo y lo usa para las próximas revisiones"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO dictionaries (data, created_at) VALUES (?, ?)", (data, time.time()))
+        self.dictionary_id = cursor.lastrowid
+        self._dictionaries[self.dictionary_id] = data
+        return self.dictionary_id
+
+    def _dictionary(self, dictionary_id: int) -> bytes:
+        data = self._dictionaries.get(dictionary_id)
+        if data is None:
+            data = self._conn.execute(
+                "SELECT data FROM dictionaries WHERE id = ?", (dictionary_id,)).fetchone()[0]
+            self._dictionaries[dictionary_id] = data
+        return data
+
+    def _compress(self, data: bytes, dictionary_id: int) -> bytes:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY,
+                                      self._dictionary(dictionary_id))
+        return compressor.compress(data) + compressor.flush()
+
+    def _decompress(self, data: bytes, dictionary_id: int) -> bytes:
+        decompressor = zlib.decompressobj(-15, self._dictionary(dictionary_id))
+        return decompressor.decompress(data) + decompressor.flush()
+
+    # --- Escritura ---
+
+    def add(self, customer: str, site: str, content: str, vendor: Optional[str] = None) -> int:
+        """Guarda una revisión nueva del sitio y retorna su número (desde 1)"""
+        data = content.encode("utf-8")
+        with self._lock:
+            previous, last_full = self._conn.execute(
+                "SELECT MAX(revision), MAX(CASE WHEN kind = 'full' THEN revision END) "
+                "FROM revisions WHERE customer = ? AND site = ?", (customer, site)).fetchone()
+            previous = previous or 0
+            revision = previous + 1
+            if previous and revision - last_full < self.snapshot_interval:
+                base = self._read(customer, site, previous)
+                kind, payload = "delta", encode_delta(base.splitlines(keepends=True),
+                                                      data.splitlines(keepends=True))
+            else:
+                kind, payload = "full", data
+            with self._conn:
+                self._conn.execute(
+                    "INSERT INTO revisions (customer, site, revision, kind, dictionary_id, data, "
+                    "sha256, size, vendor, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (customer, site, revision, kind, self.dictionary_id,
+                     self._compress(payload, self.dictionary_id),
+                     hashlib.sha256(data).hexdigest(), len(data), vendor, time.time()))
+            self._remember(customer, site, revision, data)
+        return revision
+
+    # --- Lectura ---
+
+    def _remember(self, customer: str, site: str, revision: int, data: bytes):
+        self._cache[(customer, site, revision)] = data
+        self._cache.move_to_end((customer, site, revision))
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _read(self, customer: str, site: str, revision: int) -> bytes:
+        """Reconstruye una revisión desde el snapshot más cercano (o el caché)"""
+        cached = self._cache.get((customer, site, revision))
+        if cached is not None:
+            self._cache.move_to_end((customer, site, revision))
+            return cached
+        snapshot = self._conn.execute(
+            "SELECT MAX(revision) FROM revisions "
+            "WHERE customer = ? AND site = ? AND revision <= ? AND kind = 'full'",
+            (customer, site, revision)).fetchone()[0]
+        if snapshot is None:
+            raise KeyError(f"{customer}/{site}@{revision}")
+        # Partir de la revisión en caché más cercana dentro del mismo tramo, si la hay
+        start = snapshot
+        content = None
+        for candidate in range(revision - 1, snapshot - 1, -1):
+            content = self._cache.get((customer, site, candidate))
+            if content is not None:
+                start = candidate + 1
+                break
+        rows = self._conn.execute(
+            "SELECT revision, kind, dictionary_id, data FROM revisions "
+            "WHERE customer = ? AND site = ? AND revision BETWEEN ? AND ? ORDER BY revision",
+            (customer, site, start, revision)).fetchall()
+        if not rows or rows[-1][0] != revision:
+            raise KeyError(f"{customer}/{site}@{revision}")
+        for number, kind, dictionary_id, data in rows:
+            payload = self._decompress(data, dictionary_id)
+            if kind == "full":
+                content = payload
+            else:
+                content = apply_delta(content.splitlines(keepends=True), payload)
+        self._remember(customer, site, revision, content)
+        return content
+
+    def get(self, customer: str, site: str, revision: Optional[int] = None) -> Optional[str]:
+        """Contenido de una revisión (la última si revision es None)"""
+        with self._lock:
+            if revision is None:
+                revision = self._conn.execute(
+                    "SELECT MAX(revision) FROM revisions WHERE customer = ? AND site = ?",
+                    (customer, site)).fetchone()[0]
+                if revision is None:
+                    return None
+            try:
+                return self._read(customer, site, revision).decode("utf-8")
+            except KeyError:
+                return None
+
+    def revisions(self, customer: str, site: str) -> List[dict]:
+        """Metadatos de las revisiones de un sitio"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT revision, kind, sha256, size, LENGTH(data), vendor, created_at "
+                "FROM revisions WHERE customer = ? AND site = ? ORDER BY revision", (customer, site)).fetchall()
+        return [
+            {'revision': revision, 'kind': kind, 'sha256': sha256, 'size': size,
+             'stored_bytes': stored, 'vendor': vendor, 'created_at': created_at}
+            for revision, kind, sha256, size, stored, vendor, created_at in rows
+        ]
+
+    def diff(self, customer: str, site: str, from_revision: int, to_revision: int, context: int = 3) -> Optional[str]:
+        """Diff unificado entre dos revisiones cualesquiera del sitio"""
+        with self._lock:
+            try:
+                # Leer primero la menor: la otra suele reutilizarla desde el caché
+                low, high = sorted((from_revision, to_revision))
+                contents = {low: self._read(customer, site, low), high: self._read(customer, site, high)}
+            except KeyError:
+                return None
+        old = contents[from_revision].decode("utf-8").splitlines(keepends=True)
+        new = contents[to_revision].decode("utf-8").splitlines(keepends=True)
+        return "".join(difflib.unified_diff(old, new, f"{customer}/{site}@{from_revision}",
+                                            f"{customer}/{site}@{to_revision}", n=context))
+
+    def stats(self) -> dict:
+        """Tamaño original vs. almacenado de todo el historial"""
+        with self._lock:
+            sites, revisions, size, stored = self._conn.execute(
+                "SELECT (SELECT COUNT(*) FROM (SELECT DISTINCT customer, site FROM revisions)), "
+                "COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM revisions").fetchone()
+        return {
+            'sites': sites,
+            'revisions': revisions,
+            'logical_bytes': size,
+            'stored_bytes': stored,
+            'ratio': round(size / stored, 1) if stored else 0.0,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
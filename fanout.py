@@ -0,0 +1,230 @@
+"""Un mismo sitio generado para varios vendors a la vez (comparativas de preventa).
+
+El sitio se valida una sola vez: la validación no depende del vendor más
+allá de device.vendor/model, que se reemplazan por cada destino. Lo único
+que depende del destino son los límites del modelo (WAN, VLAN, scopes DHCP
+y throughput): esos se revisan para cada (vendor, modelo) con los
+requisitos del sitio calculados una vez, y un destino que no alcanza se
+reporta con sus errores en su resumen sin generarse. En sitios
+grandes se usa BatchValidator, que con cientos de LAN es varias veces más
+rápido que ConfigValidator y da el mismo resultado. Después
+cada vendor se renderiza en un proceso del pool (ProcessPoolExecutor, como
+los trabajos en lote), así la latencia total se acerca a la del vendor más
+lento y no a la suma. Los sitios chicos se renderizan en el mismo proceso:
+generarlos toma menos que enviarlos a un worker. Con un solo CPU tampoco se
+usa el pool, porque los workers solo se turnarían.
+
+Por vendor se reporta la configuración, el plan (como RawJSON, ya
+serializado en el worker), advertencias, tamaño de la salida y cantidad de
+llamadas de API del plan.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+from typing import Dict, List, Optional
+
+from batch_validation import BatchValidator
+from serialization import RawJSON, dumps
+from site_schema import structural_errors
+from vendors.capabilities import recommend, site_requirements
+from vendors.registry import vendor_registry
+
+# Con hasta este número de interfaces (WAN + LAN) el sitio se genera en línea:
+# enviar el sitio y recibir las salidas cuesta ~3 ms, más que generar los
+# cinco vendors de un sitio de ese tamaño
+INLINE_MAX_INTERFACES = 128
+
+# Desde este número de interfaces se valida con BatchValidator (por debajo
+# pesa más su costo fijo, ~5 ms, que lo que ahorra)
+BATCH_VALIDATION_MIN_INTERFACES = 64
+
+# Generador por proceso worker (se crea en el primer vendor que procesa)
+_worker_generator = None
+
+
+def vendor_params(params: dict, vendor: str, model: str) -> dict:
+    """Copia superficial del sitio con device apuntando a otro vendor y modelo"""
+    return {**params, 'device': {**(params.get('device') or {}), 'vendor': vendor, 'model': model}}
+
+
+def _render_vendor(params: dict, output: str, generator=None, warnings: Optional[List[str]] = None) -> dict:
+    """Genera un vendor y resume el resultado (en el worker o en línea)"""
+    global _worker_generator
+    if generator is None:
+        if _worker_generator is None:
+            from config_generator import NetworkConfigGenerator
+            _worker_generator = NetworkConfigGenerator()
+        generator = _worker_generator
+    vendor = params['device']['vendor']
+    # Los vendors sin salida 'plan' (CLI) se comparan con su texto
+    if output != 'text' and 'plan' not in generator.VENDOR_CLASSES[vendor].SUPPORTED_OUTPUTS:
+        output = 'text'
+    start = time.perf_counter()
+    try:
+        result = generator.render(params, output=output, warnings=warnings)
+    except Exception as e:
+        result = {'success': False, 'errors': [f"Error interno: {e}"], 'warnings': list(warnings or []),
+                  'config': None}
+    plan = result.get('plan')
+    plan_bytes = dumps(plan) if plan is not None else None
+    config = result.get('config')
+    return {
+        'vendor': vendor,
+        'model': params['device']['model'],
+        'success': result['success'],
+        'errors': result['errors'],
+        'warnings': result['warnings'],
+        'output_format': result.get('output_format'),
+        'config': config,
+        'plan': RawJSON(plan_bytes) if plan_bytes is not None else None,
+        'config_bytes': len(config.encode('utf-8')) if config is not None else 0,
+        'plan_bytes': len(plan_bytes) if plan_bytes is not None else 0,
+        'api_calls': len(plan) if plan is not None else None,
+        'render_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+
+
+def _rejected_vendor(params: dict, errors: List[str], warnings: List[str]) -> dict:
+    """Resumen de un destino que no se genera (el modelo no soporta el sitio)"""
+    return {
+        'vendor': params['device']['vendor'],
+        'model': params['device']['model'],
+        'success': False,
+        'errors': errors,
+        'warnings': warnings,
+        'output_format': None,
+        'config': None,
+        'plan': None,
+        'config_bytes': 0,
+        'plan_bytes': 0,
+        'api_calls': None,
+        'render_ms': 0.0,
+    }
+
+
+class FanoutRenderer:
+    """Valida un sitio una vez y lo genera para varios vendors en paralelo"""
+
+    OUTPUTS = ('text', 'plan', 'both')
+
+    def __init__(self, generator=None, max_workers: Optional[int] = None,
+                 inline_max_interfaces: int = INLINE_MAX_INTERFACES):
+        if generator is None:
+            from config_generator import NetworkConfigGenerator
+            generator = NetworkConfigGenerator()
+        self.generator = generator
+        self.validator = BatchValidator()
+        self.max_workers = max_workers or min(len(vendor_registry), os.cpu_count() or 1)
+        self.inline_max_interfaces = inline_max_interfaces
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Pool de procesos, creado en el primer sitio que lo necesita"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+    def _targets(self, params: dict, vendors: Optional[List[str]],
+                 models: Optional[Dict[str, str]]) -> List[tuple]:
+        """(vendor, modelo) de cada destino; ValueError si un vendor o modelo no existe"""
+        names = vendor_registry.names()
+        if vendors is None:
+            vendors = names
+        if not isinstance(vendors, list) or not vendors:
+            raise ValueError("vendors debe ser una lista con al menos un vendor")
+        models = models or {}
+        if not isinstance(models, dict):
+            raise ValueError("models debe ser un objeto {vendor: modelo}")
+        device = params.get('device') if isinstance(params.get('device'), dict) else {}
+        site_vendor = str(device.get('vendor') or '').lower()
+        requirements = site_requirements(params)
+        targets = []
+        for vendor in dict.fromkeys(str(v).lower() for v in vendors):
+            if vendor not in vendor_registry:
+                raise ValueError(f"Vendor inválido '{vendor}'. Opciones: {', '.join(names)}")
+            # Modelo: el pedido, el del sitio si es del mismo vendor, el recomendado
+            # para el sitio o, si ninguno alcanza, el primero del catálogo
+            model = models.get(vendor)
+            if model is None and vendor == site_vendor:
+                model = device.get('model')
+            if model is None:
+                model = recommend(vendor, requirements)['recommended'] or vendor_registry.models(vendor)[0]
+            targets.append((vendor, model))
+        return targets
+
+    def render(self, params: dict, vendors: Optional[List[str]] = None,
+               models: Optional[Dict[str, str]] = None, output: str = 'both') -> dict:
+        """
+        Genera el sitio para cada vendor de vendors (por defecto todos)
+
+        Un sitio mal formado se retorna con los errores del esquema, sin
+        generarse para ningún vendor. models fija el modelo por vendor. Retorna success/errors/warnings de
+        la validación común y, en 'vendors', un resumen por vendor en el
+        orden pedido; los errores y advertencias de los límites de cada
+        modelo van en su resumen.
+        """
+        if output not in self.OUTPUTS:
+            raise ValueError(f"output '{output}' no es válido. Opciones: {', '.join(self.OUTPUTS)}")
+        if not isinstance(params, dict):
+            params = {}
+        start = time.perf_counter()
+        # La forma se revisa antes de armar los destinos: un device o una
+        # lista de interfaces con otro tipo se reporta como error del sitio
+        errors = structural_errors(params)
+        if errors:
+            return {
+                'success': False,
+                'errors': errors,
+                'warnings': [],
+                'site_name': self.generator._site_name(params),
+                'vendors': [],
+                'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+            }
+        targets = self._targets(params, vendors, models)
+        variants = [vendor_params(params, vendor, model) for vendor, model in targets]
+
+        # Una sola validación: solo device cambia entre variantes, y lo que
+        # depende del modelo se revisa después por destino
+        interfaces = len(params.get('wan_interfaces') or []) + len(params.get('lan_interfaces') or [])
+        if interfaces >= BATCH_VALIDATION_MIN_INTERFACES:
+            is_valid, errors, warnings = self.validator.validate(variants[0], capabilities=False)
+        else:
+            is_valid, errors, warnings = self.generator.validator.validate_all(variants[0], capabilities=False)
+        result = {
+            'success': is_valid,
+            'errors': errors,
+            'warnings': warnings,
+            'site_name': self.generator._site_name(params),
+            'vendors': [],
+        }
+        if is_valid:
+            requirements = site_requirements(params)
+            checks = [self.generator.validator.validate_capabilities(variant['device'], requirements)
+                      for variant in variants]
+            pending = [(idx, variant, cap_warnings)
+                       for idx, (variant, (cap_errors, cap_warnings)) in enumerate(zip(variants, checks))
+                       if not cap_errors]
+            summaries = [_rejected_vendor(variant, cap_errors, cap_warnings) if cap_errors else None
+                         for variant, (cap_errors, cap_warnings) in zip(variants, checks)]
+            if interfaces <= self.inline_max_interfaces or len(pending) <= 1 or self.max_workers == 1:
+                for idx, variant, vendor_warnings in pending:
+                    summaries[idx] = _render_vendor(variant, output, self.generator, vendor_warnings)
+            else:
+                pool = self._pool()
+                futures = [(idx, pool.submit(_render_vendor, variant, output, None, vendor_warnings))
+                           for idx, variant, vendor_warnings in pending]
+                for idx, future in futures:
+                    summaries[idx] = future.result()
+            result['vendors'] = summaries
+            result['success'] = all(summary['success'] for summary in summaries)
+        result['elapsed_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return result
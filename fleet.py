@@ -0,0 +1,292 @@
+"""Detección de subredes superpuestas entre sitios de un mismo cliente.
+
+ConfigValidator revisa duplicados dentro de un sitio; este módulo revisa la
+flota: las LAN de Cato (rangos nativos) y de Velocloud (overlay) deben ser
+únicas entre todos los sitios del cliente.
+
+Las redes LAN y WAN de cada sitio se cargan en un SubnetIndex ordenado por
+dirección de inicio. Como son bloques CIDR, dos redes se superponen solo si
+una contiene a la otra: las contenidas en un bloque son un tramo contiguo
+del orden (bisect) y las que lo contienen son a lo sumo una por largo de
+prefijo (búsqueda directa). Cada consulta cuesta O(log n + 32 + k) y
+revisar toda la flota O(n log n + k), con k pares superpuestos.
+
+Severidad de un par superpuesto:
+    error        alguna de las redes es LAN y uno de los sitios es de un
+                 vendor que exige LAN únicas (UNIQUE_LAN_VENDORS), o dos WAN
+                 tienen la misma IP
+    advertencia  el resto (p. ej. LAN repetidas detrás de NAT o sitios en el
+                 mismo segmento del ISP)
+"""
+import bisect
+import ipaddress
+import itertools
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Vendors cuyo overlay/rangos nativos no admiten LAN repetidas entre sitios
+UNIQUE_LAN_VENDORS = ('cato', 'velocloud')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS networks (
+    customer TEXT NOT NULL,
+    site TEXT NOT NULL,
+    vendor TEXT,
+    kind TEXT NOT NULL,
+    path TEXT NOT NULL,
+    ip_address TEXT NOT NULL,
+    network INTEGER NOT NULL,
+    prefix INTEGER NOT NULL,
+    PRIMARY KEY (customer, site, path)
+);
+"""
+
+
+def site_networks(params: dict) -> List[dict]:
+    """Redes LAN y WAN de un sitio (las IP o máscaras inválidas se omiten)"""
+    site_info = params.get('site_info') or {}
+    vendor = ((params.get('device') or {}).get('vendor') or '').lower() or None
+    networks = []
+    for kind, key in (('wan', 'wan_interfaces'), ('lan', 'lan_interfaces')):
+        for idx, iface in enumerate(params.get(key) or []):
+            if not isinstance(iface, dict) or not iface.get('ip_address') or not iface.get('subnet_mask'):
+                continue
+            try:
+                net = ipaddress.IPv4Network(f"{iface['ip_address']}/{iface['subnet_mask']}", strict=False)
+            except ValueError:
+                continue
+            networks.append({
+                'site': site_info.get('name'),
+                'vendor': vendor,
+                'kind': kind,
+                'path': f"{key}[{idx}]",
+                'ip_address': iface['ip_address'],
+                'network': int(net.network_address),
+                'prefix': net.prefixlen,
+            })
+    return networks
+
+
+def cidr(entry: dict) -> str:
+    return f"{ipaddress.IPv4Address(entry['network'])}/{entry['prefix']}"
+
+
+def overlap_severity(a: dict, b: dict) -> str:
+    """'error' o 'warning' para dos redes superpuestas (ver docstring del módulo)"""
+    if 'lan' in (a['kind'], b['kind']) and (a['vendor'] in UNIQUE_LAN_VENDORS
+                                           or b['vendor'] in UNIQUE_LAN_VENDORS):
+        return 'error'
+    if a['kind'] == b['kind'] == 'wan' and a['ip_address'] == b['ip_address']:
+        return 'error'
+    return 'warning'
+
+
+def describe_overlap(a: dict, b: dict, prefix_a: str = "", prefix_b: str = "") -> str:
+    return (f"{prefix_a}{a['path']} {cidr(a)} del sitio {a['site']} se superpone con "
+            f"{prefix_b}{b['path']} {cidr(b)} del sitio {b['site']}")
+
+
+class SubnetIndex:
+    """Redes CIDR ordenadas por inicio, con altas y bajas por sitio"""
+
+    def __init__(self, entries: Iterable[dict] = ()):
+        self._seq = itertools.count()
+        # Claves (inicio, secuencia) ordenadas y sus entradas en paralelo
+        self._keys: List[Tuple[int, int]] = []
+        self._entries: List[dict] = []
+        # (inicio, prefijo) -> claves, para encontrar los bloques contenedores
+        self._blocks: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        self._by_site: Dict[str, List[Tuple[int, int]]] = {}
+        entries = sorted(entries, key=lambda e: e['network'])
+        for entry in entries:
+            key = (entry['network'], next(self._seq))
+            self._keys.append(key)
+            self._entries.append(entry)
+            self._register(key, entry)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _register(self, key: Tuple[int, int], entry: dict):
+        self._blocks.setdefault((entry['network'], entry['prefix']), []).append(key)
+        self._by_site.setdefault(entry['site'], []).append(key)
+
+    def add(self, entry: dict):
+        key = (entry['network'], next(self._seq))
+        position = bisect.bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._entries.insert(position, entry)
+        self._register(key, entry)
+
+    def remove_site(self, site: str) -> int:
+        """Quita todas las redes de un sitio; retorna cuántas"""
+        keys = self._by_site.pop(site, [])
+        for key in keys:
+            position = bisect.bisect_left(self._keys, key)
+            entry = self._entries[position]
+            del self._keys[position], self._entries[position]
+            block = self._blocks[(entry['network'], entry['prefix'])]
+            block.remove(key)
+            if not block:
+                del self._blocks[(entry['network'], entry['prefix'])]
+        return len(keys)
+
+    def overlapping(self, network: int, prefix: int) -> List[dict]:
+        """Redes que se superponen con network/prefix"""
+        size = 1 << (32 - prefix)
+        # Contenidas (o con el mismo inicio): inicio dentro del bloque
+        start = bisect.bisect_left(self._keys, (network, -1))
+        end = bisect.bisect_left(self._keys, (network + size, -1))
+        found = self._entries[start:end]
+        # Contenedoras con inicio anterior: un candidato por prefijo más corto
+        for shorter in range(prefix - 1, -1, -1):
+            block = network & ~((1 << (32 - shorter)) - 1) & 0xFFFFFFFF
+            if block == network:
+                continue
+            for key in self._blocks.get((block, shorter), ()):
+                found.append(self._entries[bisect.bisect_left(self._keys, key)])
+        return found
+
+    def overlapping_pairs(self) -> Iterable[Tuple[dict, dict]]:
+        """Cada par de redes superpuestas de sitios distintos, una sola vez"""
+        for position, entry in enumerate(self._entries):
+            start = position + 1
+            end = bisect.bisect_left(self._keys, (entry['network'] + (1 << (32 - entry['prefix'])), -1))
+            for other in self._entries[start:end]:
+                if other['site'] != entry['site']:
+                    yield entry, other
+
+
+class FleetValidator:
+    """Revisa superposiciones entre una lista de sitios"""
+
+    def validate(self, sites: List[dict]) -> Tuple[bool, List[str], List[str]]:
+        errors: List[str] = []
+        warnings: List[str] = []
+        entries = []
+        seen: Dict[str, int] = {}
+        for idx, params in enumerate(sites):
+            params = params if isinstance(params, dict) else {}
+            # Sitios sin nombre se distinguen por su posición en la lista
+            name = (params.get('site_info') or {}).get('name') or f"#{idx}"
+            if name in seen:
+                errors.append(f"sites[{idx}].site_info.name '{name}' está repetido (sites[{seen[name]}])")
+            seen.setdefault(name, idx)
+            for entry in site_networks(params):
+                entry['site'] = name
+                entry['index'] = idx
+                entries.append(entry)
+
+        for a, b in SubnetIndex(entries).overlapping_pairs():
+            a, b = sorted((a, b), key=lambda e: e['index'])
+            message = describe_overlap(a, b, f"sites[{a['index']}].", f"sites[{b['index']}].")
+            (errors if overlap_severity(a, b) == 'error' else warnings).append(message)
+        return len(errors) == 0, errors, warnings
+
+
+class FleetRegistry:
+    """Redes de los sitios generados, por cliente, en SQLite"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._indexes: Dict[str, SubnetIndex] = {}
+
+    def _index(self, customer: str) -> SubnetIndex:
+        """Índice del cliente, cargado desde la base en el primer uso"""
+        index = self._indexes.get(customer)
+        if index is None:
+            rows = self._conn.execute(
+                "SELECT site, vendor, kind, path, ip_address, network, prefix FROM networks "
+                "WHERE customer = ?", (customer,)).fetchall()
+            index = SubnetIndex(
+                {'site': site, 'vendor': vendor, 'kind': kind, 'path': path,
+                 'ip_address': ip_address, 'network': network, 'prefix': prefix}
+                for site, vendor, kind, path, ip_address, network, prefix in rows)
+            self._indexes[customer] = index
+        return index
+
+    @staticmethod
+    def _customer(params: dict) -> Optional[str]:
+        return (params.get('site_info') or {}).get('customer') or None
+
+    def check(self, params: dict) -> Tuple[List[str], List[str]]:
+        """
+        Superposiciones de un sitio contra el resto de la flota registrada
+
+        Las redes que el propio sitio registró antes no cuentan (regenerar un
+        sitio no choca consigo mismo). Retorna (errores, advertencias).
+        """
+        customer = self._customer(params)
+        errors: List[str] = []
+        warnings: List[str] = []
+        if customer is None:
+            return errors, warnings
+        with self._lock:
+            index = self._index(customer)
+            for entry in site_networks(params):
+                for other in index.overlapping(entry['network'], entry['prefix']):
+                    if other['site'] == entry['site']:
+                        continue
+                    message = describe_overlap(entry, other)
+                    (errors if overlap_severity(entry, other) == 'error' else warnings).append(message)
+        return errors, warnings
+
+    def register(self, params: dict) -> int:
+        """Reemplaza las redes registradas del sitio; retorna cuántas quedaron"""
+        customer = self._customer(params)
+        site = (params.get('site_info') or {}).get('name')
+        if customer is None or not site:
+            return 0
+        networks = site_networks(params)
+        with self._lock:
+            index = self._index(customer)
+            with self._conn:
+                self._conn.execute("DELETE FROM networks WHERE customer = ? AND site = ?", (customer, site))
+                self._conn.executemany(
+                    "INSERT INTO networks (customer, site, vendor, kind, path, ip_address, network, prefix) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(customer, site, e['vendor'], e['kind'], e['path'], e['ip_address'],
+                      e['network'], e['prefix']) for e in networks])
+            index.remove_site(site)
+            for entry in networks:
+                index.add(entry)
+        return len(networks)
+
+    def remove(self, customer: str, site: str) -> int:
+        """Da de baja un sitio de la flota"""
+        with self._lock:
+            index = self._index(customer)
+            with self._conn:
+                self._conn.execute("DELETE FROM networks WHERE customer = ? AND site = ?", (customer, site))
+            return index.remove_site(site)
+
+    def sites(self, customer: str) -> List[dict]:
+        """Sitios registrados del cliente en orden de registro"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT site, vendor, kind, path, ip_address, network, prefix FROM networks "
+                "WHERE customer = ? ORDER BY rowid", (customer,)).fetchall()
+        sites: Dict[str, dict] = {}
+        for site, vendor, kind, path, ip_address, network, prefix in rows:
+            sites.setdefault(site, {'site': site, 'vendor': vendor, 'networks': []})['networks'].append(
+                {'kind': kind, 'path': path, 'ip_address': ip_address,
+                 'cidr': f"{ipaddress.IPv4Address(network)}/{prefix}"})
+        return list(sites.values())
+
+    def overlaps(self, customer: str) -> Tuple[List[str], List[str]]:
+        """Superposiciones entre todos los sitios registrados del cliente"""
+        errors: List[str] = []
+        warnings: List[str] = []
+        with self._lock:
+            for a, b in self._index(customer).overlapping_pairs():
+                message = describe_overlap(a, b)
+                (errors if overlap_severity(a, b) == 'error' else warnings).append(message)
+        return errors, warnings
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,136 @@
+"""Aplica la salida 'plan' de FortiGate (payloads cmdb) contra la API REST de FortiOS.
+
+Todas las llamadas van por una sola requests.Session: las conexiones
+HTTPS quedan abiertas entre llamadas (keep-alive), así que el handshake TLS
+se paga una vez por conexión y no una vez por objeto. Frente a pegar el CLI
+por SSH, cada objeto se valida y se confirma por separado y el resultado de
+cada uno queda en el reporte.
+
+Las operaciones con los mismos depends_on (las entradas de una tabla) no
+dependen entre sí y se envían en paralelo, hasta max_workers a la vez; en
+las tablas de políticas cada entrada depende de la anterior, así que se
+envían de a una y quedan en el equipo en el orden del plan. Los
+grupos se aplican en el orden del plan y el primero que falla detiene el
+resto. Un POST a un objeto que ya existe (error -5 de FortiOS) se repite
+como PUT a su mkey (la primera clave del payload), así el plan se puede
+volver a aplicar sobre un equipo ya configurado.
+
+    executor = FortiOSExecutor("https://192.0.2.1", token)
+    report = executor.apply(result['plan'])
+"""
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from typing import List, Optional
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from serialization import RawJSON, dumps
+from vendors.fortios_rest import mkey_value
+
+# Código de error de FortiOS para "el objeto ya existe"
+ERROR_ENTRY_EXISTS = -5
+
+
+class FortiOSExecutor:
+    """Cliente de la API REST de FortiOS que aplica planes cmdb"""
+
+    def __init__(self, base_url: str, token: str, verify=True, timeout: float = 30.0,
+                 max_workers: int = 4, vdom: Optional[str] = None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_workers = max(1, max_workers)
+        self.params = {'vdom': vdom} if vdom else None
+        self.session = requests.Session()
+        self.session.verify = verify
+        self.session.headers.update({'Authorization': f"Bearer {token}", 'Content-Type': 'application/json'})
+        # Una conexión por worker, reutilizada en todo el plan
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, method: str, target: str, body: bytes) -> requests.Response:
+        return self.session.request(method, self.base_url + target, data=body, params=self.params,
+                                    timeout=self.timeout)
+
+    def _send(self, op: dict) -> dict:
+        """Aplica una operación; retorna su resultado para el reporte"""
+        payload = op['payload']
+        body = payload.data if isinstance(payload, RawJSON) else dumps(payload, False)
+        method, target = op['method'], op['target']
+        try:
+            response = self._request(method, target, body)
+            if method == 'POST' and _entry_exists(response):
+                if isinstance(payload, RawJSON):
+                    payload = json.loads(payload.data)
+                _, mkey = mkey_value(payload)
+                method, target = 'PUT', f"{target}/{quote(str(mkey), safe='')}"
+                response = self._request(method, target, body)
+        except requests.RequestException as e:
+            return {'id': op['id'], 'method': method, 'target': target, 'status': None, 'error': str(e)}
+        result = {'id': op['id'], 'method': method, 'target': target, 'status': response.status_code}
+        if not response.ok:
+            result['error'] = _error_text(response)
+        return result
+
+    def apply(self, plan: List[dict]) -> dict:
+        """
+        Aplica el plan en orden de dependencias
+
+        Retorna success, applied (operaciones confirmadas), updated (POST que
+        pasaron a PUT), skipped (no enviadas por un error previo), errors y
+        elapsed_ms.
+        """
+        start = time.perf_counter()
+        results, skipped = [], 0
+        groups = [list(ops) for _, ops in groupby(plan, key=lambda op: tuple(op['depends_on']))]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for position, ops in enumerate(groups):
+                if len(ops) == 1 or self.max_workers == 1:
+                    group_results = [self._send(op) for op in ops]
+                else:
+                    group_results = list(pool.map(self._send, ops))
+                results.extend(group_results)
+                if any('error' in result for result in group_results):
+                    skipped = sum(len(rest) for rest in groups[position + 1:])
+                    break
+        errors = [result for result in results if 'error' in result]
+        return {
+            'success': not errors and not skipped,
+            'applied': len(results) - len(errors),
+            'updated': sum(1 for result, op in zip(results, plan) if result['method'] != op['method']),
+            'skipped': skipped,
+            'errors': errors,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
+
+
+def _entry_exists(response: requests.Response) -> bool:
+    if response.ok:
+        return False
+    try:
+        return response.json().get('error') == ERROR_ENTRY_EXISTS
+    except ValueError:
+        return False
+
+
+def _error_text(response: requests.Response) -> str:
+    """Mensaje de error de FortiOS (cli_error o código) o el estado HTTP"""
+    try:
+        body = response.json()
+    except ValueError:
+        return f"HTTP {response.status_code}"
+    detail = body.get('cli_error') or body.get('error')
+    return f"HTTP {response.status_code}: {detail}" if detail is not None else f"HTTP {response.status_code}"
@@ -0,0 +1,569 @@
+"""IPAM de la flota: subredes LAN y pools DHCP por sitio y VLAN.
+
+Cada cliente registra una o más superredes (p. ej. 10.0.0.0/8) y el
+asignador reparte subredes por (sitio, VLAN) con un buddy allocator: por
+cada largo de prefijo se guarda el conjunto de bloques libres alineados.
+Asignar un /24 toma el bloque libre más chico que alcance (best fit) y lo
+parte a la mitad hasta llegar al tamaño pedido; liberar vuelve a unir cada
+bloque con su "buddy" si también está libre. Ambas operaciones cuestan
+O(32 log n), sin recorrer las asignaciones existentes.
+
+Las asignaciones se persisten en SQLite; el índice de bloques libres vive
+en memoria y se reconstruye por cliente en su primer uso reservando las
+asignaciones guardadas. Asignar de nuevo la misma (sitio, VLAN) retorna la
+subred existente, así que regenerar un sitio no cambia su direccionamiento.
+
+Varios procesos (workers de la app) pueden compartir la base: cada
+escritura corre en una transacción BEGIN IMMEDIATE, que toma el lock de
+escritura de SQLite antes de leer, y si otro proceso confirmó cambios desde
+la última vez (PRAGMA data_version) el índice en memoria se reconstruye
+antes de decidir. UNIQUE(customer, pool, network) es el respaldo: si aun
+así choca, se reconstruye el índice y se reintenta.
+"""
+import contextlib
+import heapq
+import ipaddress
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PREFIX = 24
+MAX_PREFIX = 30  # una LAN necesita al menos gateway + un host
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pools (
+    customer TEXT NOT NULL,
+    cidr TEXT NOT NULL,
+    network INTEGER NOT NULL,
+    prefix INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (customer, cidr)
+);
+CREATE TABLE IF NOT EXISTS allocations (
+    customer TEXT NOT NULL,
+    site TEXT NOT NULL,
+    vlan TEXT NOT NULL,
+    network INTEGER NOT NULL,
+    prefix INTEGER NOT NULL,
+    pool TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (customer, site, vlan)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS allocations_network ON allocations (customer, pool, network);
+"""
+
+# Reintentos de una escritura que chocó con la de otro proceso
+WRITE_RETRIES = 3
+
+
+class IpamError(ValueError):
+    """Pedido de asignación inválido o imposible de satisfacer"""
+
+
+def prefix_for_hosts(hosts: int) -> int:
+    """Prefijo más largo cuya subred tiene al menos `hosts` direcciones usables + gateway"""
+    if not isinstance(hosts, int) or hosts < 1:
+        raise IpamError("hosts debe ser un entero positivo")
+    prefix = MAX_PREFIX
+    while prefix > 0 and (1 << (32 - prefix)) - 3 < hosts:
+        prefix -= 1
+    return prefix
+
+
+def lan_addressing(network: int, prefix: int) -> dict:
+    """
+    Direccionamiento de una LAN: gateway en la primera IP usable y pool DHCP
+    desde el primer cuarto de la subred hasta la última IP usable (el primer
+    cuarto queda para IPs estáticas)
+    """
+    size = 1 << (32 - prefix)
+    usable = size - 2
+    broadcast = network + size - 1
+    start = network + 1 + max(1, usable // 4)
+    return {
+        'ip_address': str(ipaddress.IPv4Address(network + 1)),
+        'subnet_mask': str(ipaddress.IPv4Address((0xFFFFFFFF << (32 - prefix)) & 0xFFFFFFFF)),
+        'dhcp_range_start': str(ipaddress.IPv4Address(min(start, broadcast - 1))),
+        'dhcp_range_end': str(ipaddress.IPv4Address(broadcast - 1)),
+    }
+
+
+class BuddyAllocator:
+    """Bloques libres de una superred, agrupados por largo de prefijo"""
+
+    def __init__(self, network: int, prefix: int):
+        self.network = network
+        self.prefix = prefix
+        # prefijo -> inicios de bloques libres; el heap da el de menor dirección
+        # (borrado perezoso: una entrada del heap vale solo si sigue en el set)
+        self._free: Dict[int, set] = {level: set() for level in range(prefix, 33)}
+        self._heaps: Dict[int, List[int]] = {level: [] for level in range(prefix, 33)}
+        self._push(prefix, network)
+
+    def _push(self, level: int, start: int):
+        self._free[level].add(start)
+        heapq.heappush(self._heaps[level], start)
+
+    def _pop_lowest(self, level: int) -> Optional[int]:
+        heap, free = self._heaps[level], self._free[level]
+        while heap:
+            start = heapq.heappop(heap)
+            if start in free:
+                free.discard(start)
+                return start
+        return None
+
+    def allocate(self, prefix: int) -> Optional[int]:
+        """Inicio de un bloque libre del tamaño pedido (None si no hay espacio)"""
+        if prefix < self.prefix:
+            return None
+        for level in range(prefix, self.prefix - 1, -1):
+            start = self._pop_lowest(level)
+            if start is not None:
+                break
+        else:
+            return None
+        # Partir el bloque: la mitad superior de cada división queda libre
+        while level < prefix:
+            level += 1
+            self._push(level, start + (1 << (32 - level)))
+        return start
+
+    def reserve(self, start: int, prefix: int) -> bool:
+        """Marca como usado un bloque específico; False si no está libre completo"""
+        if prefix < self.prefix or not self.contains(start, prefix):
+            return False
+        for level in range(prefix, self.prefix - 1, -1):
+            block = start & ~((1 << (32 - level)) - 1)
+            if block in self._free[level]:
+                break
+        else:
+            return False
+        self._free[level].discard(block)
+        while level < prefix:
+            level += 1
+            half = 1 << (32 - level)
+            if start & half:
+                self._push(level, block)
+                block += half
+            else:
+                self._push(level, block + half)
+        return True
+
+    def release(self, start: int, prefix: int):
+        """Devuelve un bloque y lo une con su buddy mientras ambos estén libres"""
+        level = prefix
+        while level > self.prefix:
+            buddy = start ^ (1 << (32 - level))
+            if buddy not in self._free[level]:
+                break
+            self._free[level].discard(buddy)
+            start = min(start, buddy)
+            level -= 1
+        self._push(level, start)
+
+    def contains(self, start: int, prefix: int) -> bool:
+        return prefix >= self.prefix and (start >> (32 - self.prefix)) == (self.network >> (32 - self.prefix))
+
+    def free_addresses(self) -> int:
+        return sum(len(starts) << (32 - level) for level, starts in self._free.items())
+
+
+class Ipam:
+    """Superredes y asignaciones por cliente en SQLite"""
+
+    def __init__(self, path: str):
+        # Sin transacciones implícitas: las de escritura las abre _write
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        # cliente -> [(cidr, allocator)] en orden de registro
+        self._pools: Dict[str, List[Tuple[str, BuddyAllocator]]] = {}
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    # --- Índice en memoria ---
+
+    def _sync(self):
+        """Descarta el índice si otro proceso escribió en la base desde la última lectura"""
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._pools.clear()
+            self._data_version = version
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Transacción de escritura con el lock de la base tomado desde el inicio"""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._sync()
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _write(self, customer: str, operation):
+        """
+        Ejecuta operation() en una transacción de escritura (con self._lock tomado)
+
+        Si choca con una asignación que el índice no conocía, se reconstruye
+        el índice del cliente y se reintenta.
+        """
+        for attempt in range(WRITE_RETRIES):
+            try:
+                with self._transaction():
+                    return operation()
+            except sqlite3.IntegrityError:
+                self._pools.pop(customer, None)
+                if attempt == WRITE_RETRIES - 1:
+                    raise IpamError("La asignación chocó con la de otro proceso; reintentar")
+            except sqlite3.Error:
+                # El rollback dejó al índice adelantado respecto de la base
+                self._pools.pop(customer, None)
+                raise
+
+    def _customer_pools(self, customer: str) -> List[Tuple[str, BuddyAllocator]]:
+        """Allocators del cliente, reconstruidos desde la base en el primer uso"""
+        self._sync()
+        pools = self._pools.get(customer)
+        if pools is None:
+            rows = self._conn.execute(
+                "SELECT cidr, network, prefix FROM pools WHERE customer = ? ORDER BY created_at, cidr",
+                (customer,)).fetchall()
+            pools = [(cidr, BuddyAllocator(network, prefix)) for cidr, network, prefix in rows]
+            by_cidr = dict(pools)
+            for pool, network, prefix in self._conn.execute(
+                    "SELECT pool, network, prefix FROM allocations WHERE customer = ?", (customer,)):
+                by_cidr[pool].reserve(network, prefix)
+            self._pools[customer] = pools
+        return pools
+
+    # --- Superredes ---
+
+    def add_pool(self, customer: str, cidr: str) -> dict:
+        """Registra una superred del cliente (no puede solaparse con las existentes)"""
+        try:
+            net = ipaddress.IPv4Network(cidr)
+        except ValueError as e:
+            raise IpamError(f"Superred inválida '{cidr}': {e}")
+        if net.prefixlen > MAX_PREFIX:
+            raise IpamError(f"La superred {net} es demasiado chica (máximo /{MAX_PREFIX})")
+
+        def add():
+            pools = self._customer_pools(customer)
+            for existing, _ in pools:
+                if net.overlaps(ipaddress.IPv4Network(existing)):
+                    raise IpamError(f"La superred {net} se solapa con {existing}")
+            self._conn.execute(
+                "INSERT INTO pools (customer, cidr, network, prefix, created_at) VALUES (?, ?, ?, ?, ?)",
+                (customer, str(net), int(net.network_address), net.prefixlen, time.time()))
+            pools.append((str(net), BuddyAllocator(int(net.network_address), net.prefixlen)))
+
+        with self._lock:
+            self._write(customer, add)
+        return {'customer': customer, 'cidr': str(net)}
+
+    def pools(self, customer: str) -> List[dict]:
+        """Superredes del cliente con su uso"""
+        with self._lock:
+            pools = self._customer_pools(customer)
+            counts = dict(self._conn.execute(
+                "SELECT pool, COUNT(*) FROM allocations WHERE customer = ? GROUP BY pool",
+                (customer,)).fetchall())
+            result = []
+            for cidr, allocator in pools:
+                total = 1 << (32 - allocator.prefix)
+                free = allocator.free_addresses()
+                result.append({
+                    'cidr': cidr,
+                    'allocations': counts.get(cidr, 0),
+                    'total_addresses': total,
+                    'free_addresses': free,
+                    'utilization': round((total - free) / total, 4),
+                })
+            return result
+
+    # --- Asignaciones ---
+
+    @staticmethod
+    def _request_prefix(prefix_length: Optional[int] = None, hosts: Optional[int] = None) -> int:
+        if prefix_length is None:
+            return DEFAULT_PREFIX if hosts is None else prefix_for_hosts(hosts)
+        if not isinstance(prefix_length, int) or not 1 <= prefix_length <= MAX_PREFIX:
+            raise IpamError(f"prefix_length debe estar entre 1 y {MAX_PREFIX}")
+        return prefix_length
+
+    @staticmethod
+    def _allocation(customer: str, site: str, vlan: str, network: int, prefix: int, pool: str) -> dict:
+        allocation = {
+            'customer': customer,
+            'site': site,
+            'vlan': vlan,
+            'cidr': f"{ipaddress.IPv4Address(network)}/{prefix}",
+            'pool': pool,
+        }
+        allocation.update(lan_addressing(network, prefix))
+        return allocation
+
+    def _existing(self, customer: str, site: str, vlan: str) -> Optional[dict]:
+        row = self._conn.execute(
+            "SELECT network, prefix, pool FROM allocations WHERE customer = ? AND site = ? AND vlan = ?",
+            (customer, site, vlan)).fetchone()
+        return self._allocation(customer, site, vlan, *row) if row else None
+
+    def allocate_many(self, customer: str, requests: Iterable[dict]) -> List[dict]:
+        """
+        Asigna subredes para varios (sitio, VLAN) en una sola transacción
+
+        Cada pedido es {'site', 'vlan', 'prefix_length'?, 'hosts'?} (por defecto
+        /24). Un (sitio, VLAN) ya asignado retorna su subred sin cambios. Si un
+        pedido falla no se guarda ninguno.
+        """
+        requests = list(requests)
+        with self._lock:
+            return self._write(customer, lambda: self._allocate_many(customer, requests))
+
+    def _allocate_many(self, customer: str, requests: List[dict]) -> List[dict]:
+        pools = self._customer_pools(customer)
+        if not pools:
+            raise IpamError(f"El cliente '{customer}' no tiene superredes registradas")
+        results, rows, taken = [], [], []
+        pending: Dict[Tuple[str, str], dict] = {}
+        try:
+            for req in requests:
+                site, vlan = str(req['site']), str(req['vlan'])
+                existing = pending.get((site, vlan)) or self._existing(customer, site, vlan)
+                if existing is not None:
+                    results.append(existing)
+                    continue
+                prefix = self._request_prefix(req.get('prefix_length'), req.get('hosts'))
+                for cidr, allocator in pools:
+                    network = allocator.allocate(prefix)
+                    if network is not None:
+                        break
+                else:
+                    raise IpamError(f"No hay espacio para un /{prefix} en las superredes de '{customer}'")
+                taken.append((allocator, network, prefix))
+                allocation = self._allocation(customer, site, vlan, network, prefix, cidr)
+                pending[(site, vlan)] = allocation
+                results.append(allocation)
+                rows.append((customer, site, vlan, network, prefix, cidr, time.time()))
+            self._conn.executemany(
+                "INSERT INTO allocations (customer, site, vlan, network, prefix, pool, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        except (KeyError, IpamError, sqlite3.Error) as e:
+            for allocator, network, prefix in reversed(taken):
+                allocator.release(network, prefix)
+            if isinstance(e, KeyError):
+                raise IpamError(f"Cada pedido requiere 'site' y 'vlan' (falta {e})")
+            raise
+        return results
+
+    def allocate(self, customer: str, site: str, vlan, prefix_length: Optional[int] = None,
+                 hosts: Optional[int] = None) -> dict:
+        """Subred para un (sitio, VLAN); la misma si ya estaba asignada"""
+        return self.allocate_many(customer, [{'site': site, 'vlan': vlan, 'prefix_length': prefix_length,
+                                              'hosts': hosts}])[0]
+
+    def reserve(self, customer: str, site: str, vlan, cidr: str) -> Optional[dict]:
+        """
+        Registra una subred elegida a mano para que el asignador la evite
+
+        Si la (sitio, VLAN) tenía otra subred, esa se libera, solo cuando la
+        nueva quedó registrada: si falla, la LAN conserva la anterior.
+        Retorna None si la subred no cae en ninguna superred del cliente;
+        lanza IpamError si choca con la asignación de otra LAN.
+        """
+        try:
+            net = ipaddress.IPv4Network(cidr, strict=False)
+        except ValueError as e:
+            raise IpamError(f"Subred inválida '{cidr}': {e}")
+        with self._lock:
+            return self._write(customer, lambda: self._reserve(customer, site, str(vlan), net))
+
+    def _reserve(self, customer: str, site: str, vlan: str, net: ipaddress.IPv4Network) -> Optional[dict]:
+        network, prefix = int(net.network_address), net.prefixlen
+        pools = self._customer_pools(customer)
+        previous = self._conn.execute(
+            "SELECT network, prefix, pool FROM allocations WHERE customer = ? AND site = ? AND vlan = ?",
+            (customer, site, vlan)).fetchone()
+        if previous is not None and previous[:2] == (network, prefix):
+            return self._allocation(customer, site, vlan, *previous)
+
+        for pool, allocator in pools:
+            if allocator.contains(network, prefix):
+                break
+        else:
+            return None
+        # La anterior se libera primero en el índice (la nueva puede
+        # contenerla) y se vuelve a tomar si la nueva no se puede reservar
+        previous_allocator = dict(pools)[previous[2]] if previous is not None else None
+        if previous_allocator is not None:
+            previous_allocator.release(previous[0], previous[1])
+        if not allocator.reserve(network, prefix):
+            if previous_allocator is not None:
+                previous_allocator.reserve(previous[0], previous[1])
+            owner = self._conn.execute(
+                "SELECT site, vlan, network, prefix FROM allocations WHERE customer = ? AND pool = ? "
+                "AND network < ? AND network + (1 << (32 - prefix)) > ? LIMIT 1",
+                (customer, pool, network + (1 << (32 - prefix)), network)).fetchone()
+            detail = (f" ({owner[0]} VLAN {owner[1]}: {ipaddress.IPv4Address(owner[2])}/{owner[3]})"
+                      if owner else "")
+            raise IpamError(f"La subred {net} ya está asignada{detail}")
+        try:
+            # Baja de la anterior y alta de la nueva en una sola transacción
+            self._conn.execute("DELETE FROM allocations WHERE customer = ? AND site = ? AND vlan = ?",
+                               (customer, site, vlan))
+            self._conn.execute(
+                "INSERT INTO allocations (customer, site, vlan, network, prefix, pool, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", (customer, site, vlan, network, prefix, pool, time.time()))
+        except sqlite3.Error:
+            allocator.release(network, prefix)
+            if previous_allocator is not None:
+                previous_allocator.reserve(previous[0], previous[1])
+            raise
+        return self._allocation(customer, site, vlan, network, prefix, pool)
+
+    def site_allocations(self, customer: str, site: str) -> List[dict]:
+        """Asignaciones de un sitio"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT vlan, network, prefix, pool FROM allocations WHERE customer = ? AND site = ? "
+                "ORDER BY network", (customer, site)).fetchall()
+        return [self._allocation(customer, site, vlan, network, prefix, pool)
+                for vlan, network, prefix, pool in rows]
+
+    def release(self, customer: str, site: str, vlan=None) -> int:
+        """Libera las subredes del sitio (o solo la de una VLAN); retorna cuántas"""
+        vlans = None if vlan is None else [str(vlan)]
+        with self._lock:
+            return self._write(customer, lambda: self._release(customer, site, vlans))
+
+    def _release(self, customer: str, site: str, vlans: Optional[List[str]] = None,
+                 keep: Optional[set] = None) -> int:
+        """Libera las VLAN dadas del sitio (todas si vlans es None), salvo las de keep"""
+        pools = dict(self._customer_pools(customer))
+        rows = self._conn.execute(
+            "SELECT vlan, network, prefix, pool FROM allocations WHERE customer = ? AND site = ?",
+            (customer, site)).fetchall()
+        rows = [row for row in rows
+                if (vlans is None or row[0] in vlans) and (keep is None or row[0] not in keep)]
+        self._conn.executemany("DELETE FROM allocations WHERE customer = ? AND site = ? AND vlan = ?",
+                               [(customer, site, row[0]) for row in rows])
+        for _, network, prefix, pool in rows:
+            pools[pool].release(network, prefix)
+        return len(rows)
+
+    def restore_site(self, customer: str, site: str, allocations: List[dict]):
+        """
+        Deja al sitio con las asignaciones dadas (las de site_allocations)
+
+        Deshace un fill_site cuando el sitio no se llega a generar: libera
+        lo que se asignó y vuelve a tomar las subredes previas que sigan
+        libres, en una sola transacción.
+        """
+        with self._lock:
+            self._write(customer, lambda: self._restore_site(customer, site, allocations))
+
+    def _restore_site(self, customer: str, site: str, allocations: List[dict]):
+        pools = dict(self._customer_pools(customer))
+        current = self._conn.execute(
+            "SELECT network, prefix, pool FROM allocations WHERE customer = ? AND site = ?",
+            (customer, site)).fetchall()
+        for network, prefix, pool in current:
+            pools[pool].release(network, prefix)
+        rows = []
+        for allocation in allocations:
+            allocator = pools.get(allocation['pool'])
+            net = ipaddress.IPv4Network(allocation['cidr'])
+            network, prefix = int(net.network_address), net.prefixlen
+            if allocator is not None and allocator.reserve(network, prefix):
+                rows.append((customer, site, allocation['vlan'], network, prefix, allocation['pool'],
+                             time.time()))
+        self._conn.execute("DELETE FROM allocations WHERE customer = ? AND site = ?", (customer, site))
+        self._conn.executemany(
+            "INSERT INTO allocations (customer, site, vlan, network, prefix, pool, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+
+    # --- Autocompletado de sitios ---
+
+    @staticmethod
+    def needs_allocation(lan: dict) -> bool:
+        """Una LAN se autocompleta si no trae IP o la IP es 'auto'"""
+        ip = lan.get('ip_address')
+        return not ip or str(ip).lower() == 'auto'
+
+    @staticmethod
+    def vlan_key(lan: dict, idx: int) -> str:
+        """Clave estable de la LAN dentro del sitio: vlan_id, o el nombre de interfaz"""
+        if lan.get('vlan_id') is not None:
+            return str(lan['vlan_id'])
+        return lan.get('interface_name') or f"lan{idx}"
+
+    def fill_site(self, params: dict) -> Tuple[dict, List[dict]]:
+        """
+        Completa IP, máscara y rango DHCP de las LAN sin direccionamiento
+
+        Las LAN con IP elegida a mano dentro de una superred del cliente se
+        reservan, de modo que otro sitio no pueda recibir la misma subred.
+        Las asignaciones de LAN que ya no están en el sitio se liberan.
+        Retorna (params completados, asignaciones); params no se modifica.
+        Si una LAN falla, el sitio queda con las asignaciones que tenía.
+        """
+        site_info = params.get('site_info') or {}
+        customer, site = site_info.get('customer'), site_info.get('name')
+        if not customer or not site:
+            raise IpamError("site_info.customer y site_info.name son requeridos para asignar direcciones")
+        previous = self.site_allocations(customer, site)
+        try:
+            return self._fill_site(params, customer, site)
+        except IpamError:
+            self.restore_site(customer, site, previous)
+            raise
+
+    def _fill_site(self, params: dict, customer: str, site: str) -> Tuple[dict, List[dict]]:
+
+        lans = [dict(lan) if isinstance(lan, dict) else lan for lan in params.get('lan_interfaces') or []]
+        requests, targets, allocations = [], [], []
+        for idx, lan in enumerate(lans):
+            if not isinstance(lan, dict):
+                continue
+            if self.needs_allocation(lan):
+                requests.append({'site': site, 'vlan': self.vlan_key(lan, idx),
+                                 'prefix_length': lan.get('prefix_length'), 'hosts': lan.get('hosts')})
+                targets.append(lan)
+            elif lan.get('subnet_mask'):
+                try:
+                    cidr = f"{lan['ip_address']}/{lan['subnet_mask']}"
+                    ipaddress.IPv4Network(cidr, strict=False)
+                except ValueError:
+                    continue  # el validador reporta la IP o máscara inválida
+                reserved = self.reserve(customer, site, self.vlan_key(lan, idx), cidr)
+                if reserved is not None:
+                    allocations.append(reserved)
+
+        if requests:
+            for lan, allocation in zip(targets, self.allocate_many(customer, requests)):
+                lan.pop('prefix_length', None)
+                lan.pop('hosts', None)
+                lan['ip_address'] = allocation['ip_address']
+                lan['subnet_mask'] = allocation['subnet_mask']
+                if lan.get('dhcp_enabled'):
+                    lan['dhcp_range_start'] = allocation['dhcp_range_start']
+                    lan['dhcp_range_end'] = allocation['dhcp_range_end']
+                allocations.append(allocation)
+
+        # Las LAN que ya no están en el sitio (o dejaron la superred) devuelven su subred
+        keep = {allocation['vlan'] for allocation in allocations}
+        with self._lock:
+            self._write(customer, lambda: self._release(customer, site, keep=keep))
+
+        filled = dict(params)
+        filled['lan_interfaces'] = lans
+        return filled, allocations
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
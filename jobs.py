@@ -0,0 +1,385 @@
+"""Cola de trabajos asíncronos para generaciones grandes (lotes de sitios).
+
+Un trabajo es una lista de sitios que se generan en procesos locales
+(ProcessPoolExecutor). El estado vive en SQLite para sobrevivir reinicios y
+para que varios procesos de la app compartan la misma base.
+
+Cada ítem se toma con un UPDATE condicionado a status = 'pending': si otro
+proceso lo tomó antes, el UPDATE no cambia filas y se pasa al siguiente.
+El ítem tomado queda con el dueño (owner, uno por JobManager) y un lease que
+el scheduler renueva mientras lo ejecuta. Un ítem 'running' con el lease
+vencido es de un proceso que murió: cualquier scheduler lo devuelve a
+'pending'. No se recupera nada al importar la app, así un worker que
+arranca no le quita los ítems a otro que sigue vivo.
+
+Scheduling: como máximo `concurrency` ítems en ejecución. Cada vez que se
+libera un lugar se elige el siguiente cliente en round-robin entre los que
+tienen trabajo pendiente, y dentro del cliente el trabajo más antiguo; así
+un rollout enorme no bloquea a los demás clientes.
+
+Timeout: cada trabajo tiene un plazo total desde que empieza. Al vencer, los
+ítems sin terminar se marcan 'timeout' (un proceso ya ocupado no se puede
+interrumpir; su resultado se descarta al terminar).
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from serialization import RawJSON, dumps
+
+# Estados de un trabajo: queued -> running -> completed | cancelled | timeout
+FINAL_STATES = ('completed', 'cancelled', 'timeout')
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_TIMEOUT = 3600
+# Segundos que un ítem sigue siendo del proceso que lo tomó sin renovarlo
+LEASE_SECONDS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    customer TEXT NOT NULL,
+    status TEXT NOT NULL,
+    output TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    timeout_seconds REAL NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    params BLOB NOT NULL,
+    result BLOB,
+    owner TEXT,
+    lease_until REAL,
+    PRIMARY KEY (job_id, idx)
+);
+CREATE INDEX IF NOT EXISTS job_items_status ON job_items(job_id, status);
+"""
+
+# Generador por proceso worker (se crea en el primer ítem que procesa)
+_worker_generator = None
+
+
+def _run_item(params: bytes, output: str, artifacts_dir: Optional[str] = None) -> Tuple[bool, bytes]:
+    """Ejecuta una generación en el proceso worker: (success, resultado serializado)"""
+    global _worker_generator
+    if _worker_generator is None:
+        from config_generator import NetworkConfigGenerator
+        store = None
+        if artifacts_dir:
+            from artifact_store import ArtifactStore
+            store = ArtifactStore(artifacts_dir)
+        _worker_generator = NetworkConfigGenerator(artifact_store=store)
+    params = json.loads(params)
+    try:
+        result = _worker_generator.generate(params, output=output)
+    except Exception as e:
+        result = {'success': False, 'errors': [f"Error interno: {e}"], 'warnings': [],
+                  'config': None, 'vendor': None,
+                  'site_name': (params.get('site_info') or {}).get('name', 'Unknown')}
+    return bool(result['success']), dumps(result)
+
+
+class JobStore:
+    """Persistencia de trabajos e ítems en SQLite"""
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+        # Bases creadas antes del lease
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(job_items)")}
+        for column, kind in (('owner', 'TEXT'), ('lease_until', 'REAL')):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE job_items ADD COLUMN {column} {kind}")
+        self._lock = threading.Lock()
+
+    def execute(self, sql: str, args: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def transaction(self, statements: List[Tuple[str, tuple]]) -> List[int]:
+        """Ejecuta las sentencias en una transacción; retorna las filas que cambió cada una"""
+        with self._lock:
+            # IMMEDIATE: toma el lock de escritura de la base antes de leer
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                counts = [self._conn.execute(sql, args).rowcount for sql, args in statements]
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return counts
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """Recibe trabajos, los agenda entre clientes y los ejecuta en procesos locales"""
+
+    def __init__(self, db_path: str, concurrency: int = DEFAULT_CONCURRENCY,
+                 default_timeout: float = DEFAULT_TIMEOUT, outputs: Tuple[str, ...] = ('text',),
+                 artifacts_dir: Optional[str] = None):
+        self.store = JobStore(db_path)
+        self.artifacts_dir = artifacts_dir
+        self.concurrency = max(1, concurrency)
+        self.default_timeout = default_timeout
+        self.outputs = outputs
+        self.lease_seconds = LEASE_SECONDS
+        # Dueño de los ítems que toma este proceso
+        self.owner = uuid.uuid4().hex
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Lo usan el scheduler, los callbacks de los futures y cancel()
+        self._running: Dict[Tuple[str, int], Future] = {}
+        self._running_lock = threading.Lock()
+        self._last_customer: Optional[str] = None
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    # --- Ciclo de vida ---
+
+    def _renew_leases(self):
+        """Extiende el lease de los ítems propios y recupera los de procesos muertos"""
+        now = time.time()
+        self.store.transaction([
+            ("UPDATE job_items SET lease_until = ? WHERE owner = ? AND status = 'running'",
+             (now + self.lease_seconds, self.owner)),
+            ("UPDATE job_items SET status = 'pending', owner = NULL, lease_until = NULL "
+             "WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)", (now,)),
+        ])
+
+    def start(self):
+        """Inicia el scheduler (idempotente; los procesos se crean al primer uso)"""
+        if self._thread is not None:
+            return
+        self._executor = ProcessPoolExecutor(max_workers=self.concurrency)
+        self._thread = threading.Thread(target=self._loop, name='job-scheduler', daemon=True)
+        self._thread.start()
+
+    def shutdown(self, wait: bool = True):
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+        self.store.close()
+
+    # --- API pública ---
+
+    def submit(self, sites: List[dict], customer: Optional[str] = None,
+               output: str = 'text', timeout: Optional[float] = None) -> str:
+        """Crea un trabajo con una lista de sitios y retorna su id"""
+        if not isinstance(sites, list) or not sites:
+            raise ValueError("Se requiere una lista 'sites' con al menos un sitio")
+        if output not in self.outputs:
+            raise ValueError(f"output '{output}' no es válido. Opciones: {', '.join(self.outputs)}")
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout debe ser mayor a 0")
+        if customer is None:
+            # Sin cliente explícito se agrupa por el customer del primer sitio
+            customer = ((sites[0] or {}).get('site_info') or {}).get('customer') or 'default'
+
+        job_id = uuid.uuid4().hex
+        statements = [(
+            "INSERT INTO jobs (id, customer, status, output, total, timeout_seconds, created_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+            (job_id, str(customer), output, len(sites),
+             timeout if timeout is not None else self.default_timeout, time.time())
+        )]
+        statements.extend(
+            ("INSERT INTO job_items (job_id, idx, status, params) VALUES (?, ?, 'pending', ?)",
+             (job_id, idx, dumps(site)))
+            for idx, site in enumerate(sites)
+        )
+        self.store.transaction(statements)
+        self._wakeup.set()
+        return job_id
+
+    def status(self, job_id: str) -> Optional[dict]:
+        """Estado y progreso de un trabajo (None si no existe)"""
+        rows = self.store.execute(
+            "SELECT id, customer, status, output, total, timeout_seconds, created_at, "
+            "started_at, finished_at, error FROM jobs WHERE id = ?", (job_id,))
+        if not rows:
+            return None
+        (job_id, customer, status, output, total, timeout_seconds,
+         created_at, started_at, finished_at, error) = rows[0]
+        counts = dict(self.store.execute(
+            "SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)))
+        done = total - counts.get('pending', 0) - counts.get('running', 0)
+        return {
+            'job_id': job_id,
+            'customer': customer,
+            'status': status,
+            'output': output,
+            'total': total,
+            'progress': {
+                'done': done,
+                'percent': round(done * 100 / total, 1) if total else 100.0,
+                **{state: counts.get(state, 0)
+                   for state in ('pending', 'running', 'succeeded', 'failed', 'cancelled', 'timeout')}
+            },
+            'timeout_seconds': timeout_seconds,
+            'created_at': created_at,
+            'started_at': started_at,
+            'finished_at': finished_at,
+            'error': error
+        }
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 50) -> Optional[dict]:
+        """Página de resultados; cada result se entrega como RawJSON (ya serializado)"""
+        if self.status(job_id) is None:
+            return None
+        offset = max(0, offset)
+        limit = max(1, min(limit, 500))
+        total = self.store.execute("SELECT total FROM jobs WHERE id = ?", (job_id,))[0][0]
+        rows = self.store.execute(
+            "SELECT idx, status, result FROM job_items WHERE job_id = ? "
+            "ORDER BY idx LIMIT ? OFFSET ?", (job_id, limit, offset))
+        items = [
+            {'index': idx, 'status': status, 'result': RawJSON(result) if result is not None else None}
+            for idx, status, result in rows
+        ]
+        next_offset = offset + len(items)
+        return {
+            'job_id': job_id,
+            'offset': offset,
+            'limit': limit,
+            'total': total,
+            'next_offset': next_offset if next_offset < total else None,
+            'items': items
+        }
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancela un trabajo: los ítems pendientes no se ejecutan"""
+        status = self.status(job_id)
+        if status is None or status['status'] in FINAL_STATES:
+            return status
+        self._finish(job_id, 'cancelled', item_status='cancelled')
+        with self._running_lock:
+            futures = [future for key, future in self._running.items() if key[0] == job_id]
+        for future in futures:
+            future.cancel()
+        self._wakeup.set()
+        return self.status(job_id)
+
+    # --- Scheduler ---
+
+    def _loop(self):
+        while not self._stopping:
+            self._renew_leases()
+            self._expire()
+            while self._running_count() < self.concurrency and self._dispatch_next():
+                pass
+            self._wakeup.wait(timeout=1.0)
+            self._wakeup.clear()
+
+    def _running_count(self) -> int:
+        with self._running_lock:
+            return len(self._running)
+
+    def _dispatch_next(self) -> bool:
+        """Envía el siguiente ítem al pool respetando el round-robin por cliente"""
+        customers = [row[0] for row in self.store.execute(
+            "SELECT DISTINCT j.customer FROM jobs j WHERE j.status IN ('queued', 'running') "
+            "AND EXISTS (SELECT 1 FROM job_items i WHERE i.job_id = j.id AND i.status = 'pending') "
+            "ORDER BY j.customer")]
+        if not customers:
+            return False
+        customer = next((c for c in customers if self._last_customer is None or c > self._last_customer),
+                        customers[0])
+        rows = self.store.execute(
+            "SELECT i.job_id, i.idx, i.params, j.output FROM jobs j "
+            "JOIN job_items i ON i.job_id = j.id "
+            "WHERE j.customer = ? AND j.status IN ('queued', 'running') AND i.status = 'pending' "
+            "ORDER BY j.created_at, i.idx LIMIT 1", (customer,))
+        if not rows:
+            return False
+        job_id, idx, params, output = rows[0]
+        now = time.time()
+        claimed, _ = self.store.transaction([
+            ("UPDATE job_items SET status = 'running', owner = ?, lease_until = ? "
+             "WHERE job_id = ? AND idx = ? AND status = 'pending'",
+             (self.owner, now + self.lease_seconds, job_id, idx)),
+            # El plazo del trabajo corre desde el primer ítem despachado
+            ("UPDATE jobs SET status = 'running', started_at = COALESCE(started_at, ?) "
+             "WHERE id = ? AND status IN ('queued', 'running')", (now, job_id)),
+        ])
+        self._last_customer = customer
+        if not claimed:
+            # Otro proceso lo tomó entre la consulta y el UPDATE: probar con el siguiente
+            return True
+
+        future = self._executor.submit(_run_item, params, output, self.artifacts_dir)
+        with self._running_lock:
+            self._running[(job_id, idx)] = future
+        # Fuera del lock: si el future ya terminó, el callback corre en este mismo hilo
+        future.add_done_callback(lambda f, key=(job_id, idx): self._on_done(key, f))
+        return True
+
+    def _on_done(self, key: Tuple[str, int], future: Future):
+        with self._running_lock:
+            self._running.pop(key, None)
+        job_id, idx = key
+        if future.cancelled():
+            item_status, result = 'cancelled', None
+        else:
+            error = future.exception()
+            if error is None:
+                success, result = future.result()
+                item_status = 'succeeded' if success else 'failed'
+            else:
+                # El proceso worker murió (p. ej. BrokenProcessPool)
+                item_status = 'failed'
+                result = dumps({'success': False, 'errors': [f"Error del worker: {error}"]})
+        # Solo se registra si el ítem sigue en curso y sigue siendo de este proceso
+        # (no cancelado, vencido ni recuperado por otro mientras tanto)
+        self.store.transaction([(
+            "UPDATE job_items SET status = ?, result = ?, owner = NULL, lease_until = NULL "
+            "WHERE job_id = ? AND idx = ? AND status = 'running' AND owner = ?",
+            (item_status, result, job_id, idx, self.owner)
+        )])
+        remaining = self.store.execute(
+            "SELECT COUNT(*) FROM job_items WHERE job_id = ? AND status IN ('pending', 'running')",
+            (job_id,))[0][0]
+        if remaining == 0:
+            self.store.transaction([(
+                "UPDATE jobs SET status = 'completed', finished_at = ? WHERE id = ? AND status = 'running'",
+                (time.time(), job_id)
+            )])
+        self._wakeup.set()
+
+    def _expire(self):
+        """Marca como vencidos los trabajos que superaron su plazo"""
+        now = time.time()
+        for (job_id,) in self.store.execute(
+                "SELECT j.id FROM jobs j WHERE j.status = 'running' AND j.started_at + j.timeout_seconds < ? "
+                "AND EXISTS (SELECT 1 FROM job_items i WHERE i.job_id = j.id "
+                "AND i.status IN ('pending', 'running'))", (now,)):
+            self._finish(job_id, 'timeout', item_status='timeout',
+                         error='El trabajo superó su tiempo máximo de ejecución')
+
+    def _finish(self, job_id: str, status: str, item_status: str, error: Optional[str] = None):
+        self.store.transaction([
+            ("UPDATE job_items SET status = ? WHERE job_id = ? AND status IN ('pending', 'running')",
+             (item_status, job_id)),
+            ("UPDATE jobs SET status = ?, finished_at = ?, error = ? "
+             "WHERE id = ? AND status IN ('queued', 'running')",
+             (status, time.time(), error, job_id)),
+        ])
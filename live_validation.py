@@ -0,0 +1,558 @@
+"""Validación incremental para sesiones de edición en vivo.
+
+La sesión guarda el documento del sitio ya parseado y los mensajes de cada
+unidad de validación (site_info, device, cada WAN, cada LAN, ...). Cada
+cambio llega como operaciones estilo JSON Patch; solo se re-ejecutan las
+unidades cuyos datos cambiaron y se devuelve la diferencia de errores y
+advertencias. Los mensajes son exactamente los de ConfigValidator.
+
+La forma del documento (site_schema) también se guarda por sección y por
+entrada de lista: cada operación revisa solo el subárbol que tocó, así el
+costo no crece con la cantidad de VLAN. Mientras el documento esté mal
+formado solo se reportan esos errores, como en validate_all, y las
+unidades no se ejecutan; cuando vuelve a estar bien formado se recalculan
+todas.
+"""
+import bisect
+import copy
+import queue
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from site_schema import SITE_SCHEMA, SUBTREE_CHECKS, structural_errors, subtree_errors
+from validators import ConfigValidator
+from vendors.capabilities import wan_bandwidth
+
+# Unidades de una sola ejecución: (método, ((clave de primer nivel, valor por defecto), ...))
+_SECTIONS = {
+    'site_info': ('_validate_site_info', (('site_info', {}),)),
+    'device': ('_validate_device', (('device', {}),)),
+    'services': ('_validate_services', (('services', {}),)),
+    'policy_template': ('_validate_policy_template', (('policy_template', 'basic'),)),
+    'custom_policy': ('_validate_custom_policy', (('policy_template', 'basic'), ('custom_policy', None))),
+    'sdwan': ('_validate_sdwan', (('sdwan', None),)),
+    # Los requisitos del sitio (WAN, VLAN, scopes DHCP, ancho de banda) se
+    # llevan con contadores por entrada; ver _requirements
+    'capabilities': ('validate_capabilities', (('device', {}), ('wan_interfaces', []), ('lan_interfaces', []),
+                                               ('policy_template', 'basic'))),
+}
+# Clave de primer nivel -> unidades que la leen
+_UNITS_BY_KEY: Dict[str, List[str]] = {}
+for _unit, (_, _args) in _SECTIONS.items():
+    for _key, _ in _args:
+        _UNITS_BY_KEY.setdefault(_key, []).append(_unit)
+_LISTS = ('wan_interfaces', 'lan_interfaces')
+_ORDER = ('site_info', 'device', 'wan_interfaces', 'lan_interfaces', 'services', 'policy_template',
+          'custom_policy', 'sdwan', 'capabilities')
+# Secciones en el orden del esquema (el de los errores de forma)
+_SCHEMA_KEYS = tuple(SITE_SCHEMA.get('properties', {}))
+
+
+class PatchError(ValueError):
+    """Operación de patch inválida"""
+
+
+def _parse_pointer(path: str) -> List[str]:
+    if path == '':
+        return []
+    if not path.startswith('/'):
+        raise PatchError(f"path '{path}' debe comenzar con '/'")
+    return [p.replace('~1', '/').replace('~0', '~') for p in path[1:].split('/')]
+
+
+def _apply_op(doc: dict, op: dict) -> List[str]:
+    """Aplica una operación add/replace/remove sobre doc y retorna su path"""
+    kind = op.get('op')
+    if kind not in ('add', 'replace', 'remove'):
+        raise PatchError(f"op '{kind}' no soportada (add, replace, remove)")
+    parts = _parse_pointer(op.get('path', ''))
+    if not parts:
+        raise PatchError("No se puede reemplazar el documento completo en una sesión")
+
+    try:
+        parent = doc
+        for part in parts[:-1]:
+            if isinstance(parent, list):
+                if int(part) < 0:
+                    raise IndexError(f"índice {part} fuera de rango")
+                parent = parent[int(part)]
+            else:
+                parent = parent[part]
+        last = parts[-1]
+
+        if isinstance(parent, list):
+            # Índices de JSON Patch: sin negativos; add admite el final ('-' o len)
+            index = len(parent) if kind == 'add' and last == '-' else int(last)
+            if not 0 <= index <= len(parent) - (kind != 'add'):
+                raise IndexError(f"índice {index} fuera de rango")
+            if kind == 'add':
+                parent.insert(index, op.get('value'))
+                parts[-1] = str(index)
+            elif kind == 'replace':
+                parent[index] = op.get('value')
+            else:
+                del parent[index]
+        elif kind == 'remove':
+            del parent[last]
+        else:
+            parent[last] = op.get('value')
+    except (IndexError, KeyError, ValueError, TypeError, AttributeError) as e:
+        raise PatchError(f"path '{op.get('path')}' no es aplicable: {e}")
+    return parts
+
+
+class ValidationSession:
+    """Estado de validación de un documento que se edita en vivo"""
+
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex
+        self.lock = threading.Lock()
+        self.last_used = time.monotonic()
+        self.subscribers: List[queue.Queue] = []
+        self._validator = ConfigValidator()
+        self._units: Dict[tuple, Tuple[List[str], List[str]]] = {}
+        # Mensajes previos de las unidades tocadas por el patch en curso
+        self._changed: Dict[tuple, Tuple[List[str], List[str]]] = {}
+        # Por lista: valor duplicable -> posiciones ordenadas, y posición -> valor
+        self._dup_index: Dict[str, Dict[object, List[int]]] = {}
+        self._dup_values: Dict[str, Dict[int, object]] = {}
+        # Posiciones de WAN marcadas como primary
+        self._primaries: set = set()
+        # Aporte de cada entrada a los requisitos del sitio y sus totales
+        self._requirement_rows: Dict[str, list] = {section: [] for section in _LISTS}
+        self._requirement_counts = {'wan_interfaces': 0, 'vlans': 0, 'dhcp_scopes': 0}
+        self._error_count = 0
+        # Errores de forma del documento; con alguno las unidades quedan desactualizadas
+        self._structural: List[str] = []
+        self._stale = False
+        # Errores de forma por sección y, en las listas, solo de las entradas
+        # que tienen alguno (posición -> mensajes)
+        self._shape: Dict[str, List[str]] = {}
+        self._entry_shape: Dict[str, Dict[int, List[str]]] = {}
+        self._shape_count = 0
+        # Sin esquema compilado (o sin documento objeto) se revisa completo
+        self._shape_by_path = True
+        self._load(copy.deepcopy(params or {}))
+
+    # --- Estado completo ---
+
+    def _load(self, params: dict):
+        self.doc = params
+        self._units.clear()
+        self._error_count = 0
+        self._shape_by_path = SUBTREE_CHECKS and isinstance(params, dict)
+        self._shape.clear()
+        self._entry_shape.clear()
+        self._shape_count = 0
+        if self._shape_by_path:
+            for key in params:
+                self._check_section_shape(key)
+        self._structural = self._structural_messages()
+        self._stale = bool(self._structural)
+        if not self._stale:
+            self._run_all()
+
+    def _run_all(self):
+        for section in _LISTS:
+            self._rebuild_list(section)
+        for name in _SECTIONS:
+            self._run_section(name)
+
+    def snapshot(self) -> dict:
+        """Errores y advertencias completos, en el orden de validate_all"""
+        if self._structural:
+            return {'valid': False, 'errors': list(self._structural), 'warnings': []}
+        errors, warnings = [], []
+        for key in self._ordered_keys():
+            unit_errors, unit_warnings = self._units[key]
+            errors.extend(unit_errors)
+            warnings.extend(unit_warnings)
+        return {'valid': not errors, 'errors': errors, 'warnings': warnings}
+
+    def _ordered_keys(self):
+        for section in _ORDER:
+            if section in _LISTS:
+                for idx in range(len(self._entries(section))):
+                    yield (section, idx)
+            yield (section,)
+
+    # --- Forma del documento ---
+
+    def _structural_messages(self) -> List[str]:
+        """Errores de forma en el orden de structural_errors"""
+        if not self._shape_by_path:
+            return structural_errors(self.doc)
+        if not self._shape_count:
+            return []
+        messages = []
+        for key in _SCHEMA_KEYS:
+            messages.extend(self._shape.get(key, ()))
+            entries = self._entry_shape.get(key)
+            if entries:
+                for idx in sorted(entries):
+                    messages.extend(entries[idx])
+        return messages
+
+    def _set_shape(self, key: str, errors: List[str]):
+        self._shape_count += len(errors) - len(self._shape.pop(key, ()))
+        if errors:
+            self._shape[key] = errors
+
+    def _set_entry_shape(self, section: str, idx: int, errors: List[str]):
+        entries = self._entry_shape.setdefault(section, {})
+        self._shape_count += len(errors) - len(entries.pop(idx, ()))
+        if errors:
+            entries[idx] = errors
+
+    def _check_section_shape(self, key: str):
+        """Revisa una sección completa (y cada entrada si es una de las listas)"""
+        for idx in list(self._entry_shape.get(key, ())):
+            self._set_entry_shape(key, idx, [])
+        if key not in self.doc:
+            self._set_shape(key, [])
+            return
+        value = self.doc[key]
+        if key in _LISTS and isinstance(value, list):
+            self._set_shape(key, [])
+            for idx, entry in enumerate(value):
+                self._set_entry_shape(key, idx, subtree_errors(entry, (key, idx)))
+        else:
+            self._set_shape(key, subtree_errors(value, (key,)))
+
+    def _shift_entry_shape(self, section: str, idx: int, delta: int):
+        """
+        Corre las entradas con errores desde idx (se insertó o quitó una)
+
+        Los mensajes llevan la posición, así que esas entradas se revisan de
+        nuevo; las entradas sin errores siguen sin errores.
+        """
+        entries = self._entry_shape.get(section, {})
+        moved = sorted(position for position in entries if position >= idx)
+        for position in moved:
+            self._set_entry_shape(section, position, [])
+        values = self.doc[section]
+        for position in moved:
+            new = position + delta
+            if 0 <= new < len(values):
+                self._set_entry_shape(section, new, subtree_errors(values[new], (section, new)))
+
+    def _update_shape(self, parts: List[str], kind: str):
+        """Revisa la forma del subárbol que tocó una operación"""
+        key = parts[0]
+        value = self.doc.get(key)
+        if len(parts) == 1 or key not in _LISTS or not isinstance(value, list):
+            self._check_section_shape(key)
+            return
+        idx = int(parts[1])
+        if len(parts) == 2 and kind == 'add':
+            self._shift_entry_shape(key, idx, 1)
+        elif len(parts) == 2 and kind == 'remove':
+            self._set_entry_shape(key, idx, [])
+            self._shift_entry_shape(key, idx + 1, -1)
+            return
+        self._set_entry_shape(key, idx, subtree_errors(value[idx], (key, idx)))
+
+    # --- Unidades ---
+
+    def _set_unit(self, key: tuple, errors: List[str], warnings: List[str]):
+        previous = self._units.get(key, ([], []))
+        self._error_count += len(errors) - len(previous[0])
+        self._units[key] = (errors, warnings)
+        self._changed.setdefault(key, previous)
+
+    def _capture(self, method: str, *args) -> Tuple[List[str], List[str]]:
+        self._validator.errors = []
+        self._validator.warnings = []
+        getattr(self._validator, method)(*args)
+        return self._validator.errors, self._validator.warnings
+
+    def _run_section(self, name: str):
+        method, args = _SECTIONS[name]
+        if name == 'capabilities':
+            self._set_unit((name,), *self._validator.validate_capabilities(self.doc.get('device', {}),
+                                                                           self._requirements()))
+            return
+        values = [self.doc.get(key, default) for key, default in args]
+        self._set_unit((name,), *self._capture(method, *values))
+
+    # --- Requisitos del sitio (como vendors.capabilities.site_requirements) ---
+
+    @staticmethod
+    def _requirement_row(section: str, entry) -> tuple:
+        """(cuenta como WAN, Mbps) de una WAN; (tiene VLAN, tiene DHCP) de una LAN"""
+        if not isinstance(entry, dict):
+            return (0, None) if section == 'wan_interfaces' else (0, 0)
+        if section == 'wan_interfaces':
+            return 1, wan_bandwidth(entry)
+        return int(entry.get('vlan_id') is not None), int(bool(entry.get('dhcp_enabled')))
+
+    def _count_row(self, section: str, row: tuple, sign: int):
+        counts = self._requirement_counts
+        if section == 'wan_interfaces':
+            counts['wan_interfaces'] += sign * row[0]
+        else:
+            counts['vlans'] += sign * row[0]
+            counts['dhcp_scopes'] += sign * row[1]
+
+    def _rebuild_requirements(self, section: str):
+        for row in self._requirement_rows[section]:
+            self._count_row(section, row, -1)
+        rows = [self._requirement_row(section, entry) for entry in self._entries(section)]
+        for row in rows:
+            self._count_row(section, row, 1)
+        self._requirement_rows[section] = rows
+
+    def _update_requirements(self, section: str, idx: int):
+        rows = self._requirement_rows[section]
+        self._count_row(section, rows[idx], -1)
+        rows[idx] = self._requirement_row(section, self._entries(section)[idx])
+        self._count_row(section, rows[idx], 1)
+
+    def _requirements(self) -> dict:
+        policy = self.doc.get('policy_template', 'basic')
+        # El ancho de banda se suma en el orden de las WAN (pocas), como
+        # site_requirements, para dar el mismo número con decimales
+        bandwidth = 0
+        for _, rate in self._requirement_rows['wan_interfaces']:
+            if rate is not None:
+                bandwidth += rate
+        return {
+            **self._requirement_counts,
+            'bandwidth_mbps': bandwidth,
+            'policy_template': policy if isinstance(policy, str) else 'basic',
+        }
+
+    def _entries(self, section: str) -> list:
+        entries = self.doc.get(section, [])
+        return entries if isinstance(entries, list) else []
+
+    def _rebuild_list(self, section: str):
+        """Recalcula todas las entradas de una lista (y sus índices de duplicados)"""
+        for key in [k for k in self._units if k[0] == section and len(k) == 2]:
+            self._set_unit(key, [], [])
+            del self._units[key]
+        index: Dict[object, List[int]] = {}
+        values: Dict[int, object] = {}
+        for idx, entry in enumerate(self._entries(section)):
+            value = self._dup_value(section, entry)
+            if value is not None:
+                index.setdefault(value, []).append(idx)
+                values[idx] = value
+        self._dup_index[section] = index
+        self._dup_values[section] = values
+        self._rebuild_requirements(section)
+        if section == 'wan_interfaces':
+            self._primaries = {
+                idx for idx, wan in enumerate(self._entries(section))
+                if isinstance(wan, dict) and wan.get('priority') == 'primary'
+            }
+        for idx in range(len(self._entries(section))):
+            self._run_entry(section, idx)
+        self._run_list_unit(section)
+
+    def _dup_value(self, section: str, entry: dict):
+        """Valor que participa en la detección de duplicados (o None)"""
+        if not isinstance(entry, dict):
+            return None
+        if section == 'wan_interfaces':
+            ip = entry.get('ip_address')
+            return ip if ip and self._validator._is_valid_ip(ip) else None
+        vlan = entry.get('vlan_id')
+        return vlan if self._validator._is_valid_vlan(vlan) else None
+
+    def _run_entry(self, section: str, idx: int):
+        entry = self._entries(section)[idx]
+        if not isinstance(entry, dict):
+            entry = {}
+        value = self._dup_values[section].get(idx)
+        duplicate = value is not None and self._dup_index[section][value][0] != idx
+        if section == 'wan_interfaces':
+            result = self._capture('_validate_wan_entry', idx, entry, duplicate)
+        else:
+            result = self._capture('_validate_lan_entry', idx, entry, duplicate)
+        self._set_unit((section, idx), *result)
+
+    def _run_list_unit(self, section: str):
+        """Mensajes que dependen de la lista completa (vacía, sin primary)"""
+        entries = self._entries(section)
+        errors, warnings = [], []
+        if section == 'wan_interfaces':
+            if not entries:
+                errors.append("Al menos una interfaz WAN es requerida")
+            else:
+                errors, warnings = self._capture('_validate_wan_primary', len(entries), bool(self._primaries))
+        elif not entries:
+            warnings.append("No hay interfaces LAN configuradas")
+        self._set_unit((section,), errors, warnings)
+
+    def _update_entry(self, section: str, idx: int, field: Optional[str]):
+        """
+        Re-ejecuta una entrada y las que comparten su valor duplicable
+
+        field es el campo editado (None si se reemplazó la entrada completa).
+        """
+        entries = self._entries(section)
+        self._update_requirements(section, idx)
+        if section == 'wan_interfaces' and field in (None, 'priority'):
+            if isinstance(entries[idx], dict) and entries[idx].get('priority') == 'primary':
+                self._primaries.add(idx)
+            else:
+                self._primaries.discard(idx)
+            self._run_list_unit(section)
+        index = self._dup_index[section]
+        values = self._dup_values[section]
+        affected = {idx}
+        # Quitar el valor anterior del índice: la nueva primera aparición puede dejar de ser duplicado
+        old = values.pop(idx, None)
+        if old is not None:
+            positions = index[old]
+            positions.remove(idx)
+            affected.update(positions[:1])
+            if not positions:
+                del index[old]
+        value = self._dup_value(section, entries[idx])
+        if value is not None:
+            positions = index.setdefault(value, [])
+            bisect.insort(positions, idx)
+            values[idx] = value
+            # La anterior primera aparición no cambia; la siguiente puede volverse duplicado
+            affected.update(positions[:2])
+        for position in sorted(affected):
+            self._run_entry(section, position)
+
+    # --- Patches ---
+
+    def apply_patch(self, operations: List[dict]) -> dict:
+        """
+        Aplica operaciones JSON Patch y retorna el delta de mensajes
+
+        Si una operación no es aplicable se detiene ahí; el delta incluye las
+        operaciones previas y la clave 'error'.
+        """
+        if not isinstance(operations, list):
+            raise PatchError("Se espera una lista de operaciones")
+        self.last_used = time.monotonic()
+        self._changed = {}
+        previous_structural = self._structural
+
+        error = None
+        for op in operations:
+            try:
+                parts = _apply_op(self.doc, op)
+            except PatchError as e:
+                # Las operaciones previas ya se aplicaron: se informa su delta igual
+                error = str(e)
+                break
+            if self._shape_by_path:
+                self._update_shape(parts, op['op'])
+            self._structural = self._structural_messages()
+            if self._structural:
+                self._stale = True
+                continue
+            if self._stale:
+                self._stale = False
+                self._run_all()
+                continue
+            section = parts[0]
+            if section in _LISTS:
+                if len(parts) >= 3:
+                    self._update_entry(section, int(parts[1]), parts[2])
+                elif len(parts) == 2 and op['op'] == 'replace':
+                    self._update_entry(section, int(parts[1]), None)
+                else:
+                    # Se agregó/quitó una entrada o se reemplazó la lista: cambian índices
+                    self._rebuild_list(section)
+            # Las listas además alimentan unidades de sitio completo (capabilities),
+            # que leen los contadores ya actualizados
+            for unit in _UNITS_BY_KEY.get(section, ()):
+                self._run_section(unit)
+
+        delta = self._delta(previous_structural)
+        if error:
+            delta['error'] = error
+        for subscriber in list(self.subscribers):
+            subscriber.put(delta)
+        return delta
+
+    def _unit_messages(self, previous: bool) -> Tuple[Counter, Counter]:
+        """Mensajes de todas las unidades; con previous, como estaban antes del patch"""
+        errors, warnings = Counter(), Counter()
+        keys = set(self._units) | set(self._changed) if previous else self._units
+        for key in keys:
+            if previous and key in self._changed:
+                unit_errors, unit_warnings = self._changed[key]
+            else:
+                unit_errors, unit_warnings = self._units[key]
+            errors.update(unit_errors)
+            warnings.update(unit_warnings)
+        return errors, warnings
+
+    def _delta(self, previous_structural: List[str]) -> dict:
+        if previous_structural or self._structural:
+            # Antes o después se mostraban los errores de forma: se comparan los mensajes completos
+            if previous_structural:
+                old_errors, old_warnings = Counter(previous_structural), Counter()
+            else:
+                old_errors, old_warnings = self._unit_messages(previous=True)
+            if self._structural:
+                new_errors, new_warnings = Counter(self._structural), Counter()
+            else:
+                new_errors, new_warnings = self._unit_messages(previous=False)
+            added_errors, removed_errors = new_errors - old_errors, old_errors - new_errors
+            added_warnings, removed_warnings = new_warnings - old_warnings, old_warnings - new_warnings
+        else:
+            added_errors, removed_errors = Counter(), Counter()
+            added_warnings, removed_warnings = Counter(), Counter()
+            for key, (old_errors, old_warnings) in self._changed.items():
+                new_errors, new_warnings = self._units.get(key, ([], []))
+                added_errors.update(Counter(new_errors) - Counter(old_errors))
+                removed_errors.update(Counter(old_errors) - Counter(new_errors))
+                added_warnings.update(Counter(new_warnings) - Counter(old_warnings))
+                removed_warnings.update(Counter(old_warnings) - Counter(new_warnings))
+            # Un mensaje que solo cambió de unidad no es un cambio para el cliente
+            common = added_errors & removed_errors
+            added_errors, removed_errors = added_errors - common, removed_errors - common
+            common = added_warnings & removed_warnings
+            added_warnings, removed_warnings = added_warnings - common, removed_warnings - common
+        return {
+            'valid': not self._structural and self._error_count == 0,
+            'errors': {'added': list(added_errors.elements()), 'removed': list(removed_errors.elements())},
+            'warnings': {'added': list(added_warnings.elements()), 'removed': list(removed_warnings.elements())}
+        }
+
+
+class SessionStore:
+    """Sesiones de validación en memoria con expiración por inactividad"""
+
+    def __init__(self, ttl_seconds: int = 1800, max_sessions: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, ValidationSession] = {}
+        self._lock = threading.Lock()
+
+    def create(self, params: dict) -> ValidationSession:
+        session = ValidationSession(params)
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                oldest = min(self._sessions.values(), key=lambda s: s.last_used)
+                self._sessions.pop(oldest.id, None)
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[ValidationSession]:
+        with self._lock:
+            self._expire()
+            return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self):
+        limit = time.monotonic() - self.ttl_seconds
+        for session_id in [sid for sid, s in self._sessions.items() if s.last_used < limit]:
+            del self._sessions[session_id]
@@ -0,0 +1,169 @@
+"""Plantillas de configuración de Meraki para flotas de sitios MX.
+
+En modo por red cada sitio recibe todas sus llamadas de Dashboard API:
+ajustes de la red, uplinks, VLAN, firewall, filtrado de contenido, IPS,
+malware y QoS. Las secciones de política (TEMPLATE_SECTIONS) suelen ser
+iguales en todos los sitios de un mismo nivel, así que el planificador las
+agrupa: los sitios con exactamente los mismos payloads en esas secciones
+comparten una plantilla, que se crea y configura una sola vez. Cada sitio
+queda con sus ajustes de red, el bind a su plantilla y los overrides propios
+(uplinks, límites de ancho de banda y subredes de las VLAN).
+
+Las plantillas son redes para la API: sus secciones usan el id de la
+plantilla en lugar de networkId. Como en customPerformanceClassId, el id se
+resuelve con la respuesta de la operación que la crea:
+
+    /networks/{configTemplateId:EngIA-standard-1}/appliance/contentFiltering
+
+El reporte compara las llamadas del modo por red con las del modo con
+plantillas para la flota dada.
+"""
+from typing import Dict, List, Tuple
+
+from batch_validation import BatchValidator
+from serialization import dumps
+
+NETWORK_PREFIX = "/networks/{networkId}"
+
+# Secciones que van en la plantilla (el resto queda por sitio)
+TEMPLATE_SECTIONS = (
+    "/appliance/firewall/l3FirewallRules",
+    "/appliance/contentFiltering",
+    "/appliance/security/intrusion",
+    "/appliance/security/malware",
+    "/appliance/trafficShaping/rules",
+    "/appliance/trafficShaping/customPerformanceClasses",
+    "/appliance/trafficShaping/uplinkSelection",
+)
+
+DEFAULT_PREFIX = "EngIA"
+
+
+def is_template_section(op: dict) -> bool:
+    target = op['target']
+    return target.startswith(NETWORK_PREFIX) and target[len(NETWORK_PREFIX):] in TEMPLATE_SECTIONS
+
+
+def _renumber(ops: List[dict], ids: Dict[int, int], first_id: int, depends_on: List[int]) -> List[dict]:
+    """Copia ops con ids desde first_id; sus dependencias se traducen con ids"""
+    renumbered = []
+    for offset, op in enumerate(ops):
+        ids[op['id']] = first_id + offset
+        extra = [ids[dep] for dep in op['depends_on'] if dep in ids and ids[dep] not in depends_on]
+        renumbered.append({**op, 'id': first_id + offset, 'depends_on': depends_on + extra})
+    return renumbered
+
+
+class TemplatePlanner:
+    """Agrupa una flota de sitios Meraki en plantillas y planes por sitio"""
+
+    def __init__(self, generator=None, prefix: str = DEFAULT_PREFIX):
+        if generator is None:
+            from config_generator import NetworkConfigGenerator
+            generator = NetworkConfigGenerator()
+        self.generator = generator
+        self.validator = BatchValidator()
+        self.prefix = prefix
+
+    def _template_operations(self, name: str, site: dict, shared: List[dict]) -> List[dict]:
+        """Crear la plantilla y cargar sus secciones"""
+        target = f"/networks/{{configTemplateId:{name}}}"
+        create = {
+            'id': 1,
+            'method': "POST",
+            'target': "/organizations/{organizationId}/configTemplates",
+            'description': f"Create configuration template {name}",
+            'depends_on': [],
+            'payload': {"name": name, "timeZone": (site.get('site_info') or {}).get('timezone', 'America/Los_Angeles')},
+        }
+        # La operación 1 del sitio (ajustes de la red) pasa a ser la creación
+        ops = _renumber(shared, {1: 1}, 2, [1])
+        for op in ops:
+            op['target'] = target + op['target'][len(NETWORK_PREFIX):]
+        return [create] + ops
+
+    def _site_operations(self, overrides: List[dict], template: str) -> List[dict]:
+        """Ajustes de la red, bind a la plantilla y overrides del sitio"""
+        settings, overrides = overrides[0], overrides[1:]
+        bind = {
+            'id': 2,
+            'method': "POST",
+            'target': f"{NETWORK_PREFIX}/bind",
+            'description': f"Bind network to template {template}",
+            'depends_on': [1],
+            'payload': {"configTemplateId": f"{{configTemplateId:{template}}}", "autoBind": False},
+        }
+        # Los overrides van después del bind: al enlazar, la red toma los valores de la plantilla
+        return [{**settings, 'depends_on': []}, bind] + _renumber(overrides, {settings['id']: 2}, 3, [2])
+
+    def plan(self, sites: List[dict]) -> dict:
+        """
+        Plantillas, plan por sitio y reporte de llamadas de una flota
+
+        Los sitios inválidos o de otro vendor se reportan en errors y no
+        cuentan en el reporte.
+        """
+        errors: List[str] = []
+        templates: Dict[Tuple, dict] = {}
+        site_plans: List[dict] = []
+        per_network_calls = 0
+        validations = self.validator.validate_many(sites)
+        for idx, (params, (is_valid, site_errors, warnings)) in enumerate(zip(sites, validations)):
+            name = self.generator._site_name(params)
+            vendor = str(((params.get('device') if isinstance(params, dict) else None) or {}).get('vendor', '')).lower()
+            if is_valid and vendor != 'meraki':
+                site_errors = ["las plantillas de configuración son solo para sitios Meraki"]
+                is_valid = False
+            if is_valid:
+                result = self.generator.render(params, output='plan', warnings=warnings)
+                is_valid, site_errors = result['success'], result['errors']
+            if not is_valid:
+                errors.append(f"sites[{idx}] ({name}): {'; '.join(site_errors)}")
+                continue
+
+            plan = result['plan']
+            per_network_calls += len(plan)
+            shared = [op for op in plan if is_template_section(op)]
+            overrides = [op for op in plan if not is_template_section(op)]
+            key = tuple((op['method'], op['target'], dumps(op['payload'], False)) for op in shared)
+            template = templates.get(key)
+            if template is None:
+                policy = params.get('policy_template', 'basic')
+                count = sum(1 for t in templates.values() if t['policy_template'] == policy) + 1
+                template_name = f"{self.prefix}-{policy}-{count}"
+                template = templates[key] = {
+                    'name': template_name,
+                    'policy_template': policy,
+                    'sites': [],
+                    'operations': self._template_operations(template_name, params, shared),
+                }
+            template['sites'].append(name)
+            site_plans.append({
+                'site_name': name,
+                'template': template['name'],
+                'warnings': result['warnings'],
+                'operations': self._site_operations(overrides, template['name']),
+            })
+
+        template_calls = (sum(len(t['operations']) for t in templates.values())
+                          + sum(len(site['operations']) for site in site_plans))
+        return {
+            'success': not errors,
+            'errors': errors,
+            'templates': list(templates.values()),
+            'sites': site_plans,
+            'report': report(len(site_plans), len(templates), per_network_calls, template_calls),
+        }
+
+
+def report(sites: int, templates: int, per_network_calls: int, template_calls: int) -> dict:
+    """Llamadas de API con y sin plantillas"""
+    saved = per_network_calls - template_calls
+    return {
+        'sites': sites,
+        'templates': templates,
+        'per_network_calls': per_network_calls,
+        'template_calls': template_calls,
+        'saved_calls': saved,
+        'reduction_pct': round(100 * saved / per_network_calls, 1) if per_network_calls else 0.0,
+    }
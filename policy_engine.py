@@ -0,0 +1,434 @@
+"""Motor de políticas personalizadas (policy_template = "custom").
+
+El modelo vive en params['custom_policy']:
+
+    {
+      "addresses": [{"name": "WEB", "subnet": "10.0.0.10/32"},
+                    {"name": "SERVERS", "members": ["WEB", "10.0.1.0/24"]}],
+      "services":  [{"name": "HTTPS", "protocol": "tcp", "ports": "443"}],
+      "zones":     [{"name": "dmz", "interfaces": ["VLAN30"]}],
+      "rules": [
+        {"name": "LAN-to-Web", "action": "allow", "src_zone": "lan", "dst_zone": "wan",
+         "source": ["any"], "destination": ["SERVERS"], "service": ["HTTPS", "udp/53"],
+         "log": true, "nat": true}
+      ]
+    }
+
+En las reglas las direcciones pueden ser nombres, CIDR/IP en línea o "any";
+los servicios, nombres, "tcp/443", "udp/1000-2000", "icmp" o "any".
+
+compile_policy() resuelve e interna los objetos: cada red o servicio se
+guarda una sola vez (por valor, no por nombre), los grupos con los mismos
+miembros se unifican y los nombres duplicados pasan a ser alias. Los
+objetos creados desde valores en línea ("10.0.0.0/24", "tcp/443") toman el
+valor como nombre ("10.0.0.0/24", "TCP-443"); si el modelo ya usa ese
+nombre para otro objeto, se agrega un sufijo ("TCP-443-2"). Todo se
+resuelve con diccionarios, en tiempo lineal respecto del tamaño del modelo;
+los vendors solo emiten los objetos que alguna regla usa.
+"""
+import ipaddress
+from typing import Dict, List, Optional, Tuple
+
+ANY = "any"
+VALID_ACTIONS = ("allow", "deny")
+VALID_PROTOCOLS = ("tcp", "udp", "icmp")
+
+# Zonas disponibles aunque el modelo no las declare
+DEFAULT_ZONES = {
+    "lan": {"interfaces": ["lan"], "internet": False},
+    "wan": {"interfaces": ["virtual-wan-link"], "internet": True},
+    "any": {"interfaces": ["any"], "internet": False},
+}
+
+
+class CompiledPolicy:
+    """Política resuelta: objetos internados y reglas que los referencian por nombre"""
+
+    def __init__(self):
+        self.errors: List[str] = []
+        # nombre canónico -> red (direcciones) o lista de miembros (grupos)
+        self.addresses: Dict[str, ipaddress.IPv4Network] = {}
+        self.groups: Dict[str, List[str]] = {}
+        # nombre canónico -> (protocolo, ((desde, hasta), ...))
+        self.services: Dict[str, Tuple[str, Tuple[Tuple[int, int], ...]]] = {}
+        self.zones: Dict[str, dict] = {name: dict(zone) for name, zone in DEFAULT_ZONES.items()}
+        self.rules: List[dict] = []
+        self._cidrs: Dict[str, List[str]] = {}
+
+    # --- Objetos usados por las reglas (para emitir solo esos) ---
+
+    def used_objects(self) -> Tuple[List[str], List[str], List[str]]:
+        """(direcciones, grupos, servicios) referenciados, en orden de definición"""
+        addresses, groups, services = set(), set(), set()
+
+        def visit(name: str):
+            if name in groups or name in addresses:
+                return
+            if name in self.groups:
+                groups.add(name)
+                for member in self.groups[name]:
+                    visit(member)
+            elif name in self.addresses:
+                addresses.add(name)
+
+        for rule in self.rules:
+            for name in rule["source"] + rule["destination"]:
+                visit(name)
+            services.update(rule["service"])
+        return ([n for n in self.addresses if n in addresses],
+                [n for n in self.groups if n in groups],
+                [n for n in self.services if n in services])
+
+    # --- Expansión para vendors sin objetos de grupo ---
+
+    def cidrs(self, refs: List[str]) -> List[str]:
+        """CIDRs únicos de una lista de referencias ([] significa any)"""
+        result: Dict[str, None] = {}
+        for ref in refs:
+            for cidr in self._expand(ref):
+                result[cidr] = None
+        return list(result)
+
+    def _expand(self, name: str) -> List[str]:
+        cached = self._cidrs.get(name)
+        if cached is None:
+            if name in self.addresses:
+                cached = [str(self.addresses[name])]
+            else:
+                cached = self.cidrs(self.groups[name])
+            self._cidrs[name] = cached
+        return cached
+
+    def ports_by_protocol(self, refs: List[str]) -> Dict[str, Tuple[Tuple[int, int], ...]]:
+        """Rangos de puertos unidos por protocolo ({} significa any)"""
+        by_protocol: Dict[str, list] = {}
+        for name in refs:
+            protocol, ranges = self.services[name]
+            by_protocol.setdefault(protocol, []).extend(ranges)
+        return {protocol: merge_ranges(ranges) for protocol, ranges in by_protocol.items()}
+
+    def is_internet_zone(self, zone: str) -> bool:
+        return bool(self.zones.get(zone, {}).get("internet"))
+
+
+def _parse_ports(value, prefix: str, errors: List[str]) -> Optional[Tuple[Tuple[int, int], ...]]:
+    """'443', '80,443', '1000-2000' o lista -> rangos ordenados y sin solapes"""
+    items = value if isinstance(value, list) else str(value).split(",")
+    ranges = []
+    for item in items:
+        text = str(item).strip()
+        low, _, high = text.partition("-")
+        try:
+            low_port = int(low)
+            high_port = int(high) if high else low_port
+        except ValueError:
+            errors.append(f"{prefix}.ports '{text}' no es válido")
+            return None
+        if not 1 <= low_port <= high_port <= 65535:
+            errors.append(f"{prefix}.ports '{text}' debe estar entre 1 y 65535")
+            return None
+        ranges.append((low_port, high_port))
+    return merge_ranges(ranges)
+
+
+def merge_ranges(ranges) -> Tuple[Tuple[int, int], ...]:
+    """Ordena y une rangos de puertos contiguos o solapados"""
+    merged: List[Tuple[int, int]] = []
+    for low_port, high_port in sorted(ranges):
+        if merged and low_port <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high_port))
+        else:
+            merged.append((low_port, high_port))
+    return tuple(merged)
+
+
+def format_ports(ranges: Tuple[Tuple[int, int], ...], separator: str = ",") -> str:
+    return separator.join(str(low) if low == high else f"{low}-{high}" for low, high in ranges)
+
+
+def _free_name(base: str, *taken) -> str:
+    """base, o base-2, base-3... si algún objeto del modelo ya usa ese nombre"""
+    name, suffix = base, 2
+    while any(name in names for names in taken):
+        name, suffix = f"{base}-{suffix}", suffix + 1
+    return name
+
+
+class _Compiler:
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.policy = CompiledPolicy()
+        self.errors = self.policy.errors
+        # nombre declarado -> nombre canónico
+        self.address_alias: Dict[str, str] = {}
+        self.service_alias: Dict[str, str] = {}
+        # valor -> nombre canónico (internado)
+        self.by_network: Dict[ipaddress.IPv4Network, str] = {}
+        self.by_members: Dict[Tuple[str, ...], str] = {}
+        self.by_service: Dict[tuple, str] = {}
+
+    def compile(self) -> CompiledPolicy:
+        spec = self.spec
+        if not isinstance(spec, dict):
+            self.errors.append("custom_policy debe ser un objeto")
+            return self.policy
+        self._zones(self._list(spec, "zones"))
+        self._addresses(self._list(spec, "addresses"))
+        self._services(self._list(spec, "services"))
+        rules = self._list(spec, "rules")
+        if not rules:
+            self.errors.append("custom_policy.rules requiere al menos una regla")
+        for idx, rule in enumerate(rules):
+            self._rule(idx, rule)
+        return self.policy
+
+    def _list(self, spec: dict, key: str) -> list:
+        value = spec.get(key) or []
+        if not isinstance(value, list):
+            self.errors.append(f"custom_policy.{key} debe ser una lista")
+            return []
+        return value
+
+    # --- Zonas ---
+
+    def _zones(self, zones: list):
+        for idx, zone in enumerate(zones):
+            prefix = f"custom_policy.zones[{idx}]"
+            if not isinstance(zone, dict) or not zone.get("name"):
+                self.errors.append(f"{prefix}.name es requerido")
+                continue
+            interfaces = zone.get("interfaces")
+            if not isinstance(interfaces, list) or not interfaces:
+                self.errors.append(f"{prefix}.interfaces requiere al menos una interfaz")
+                continue
+            self.policy.zones[zone["name"]] = {
+                "interfaces": [str(i) for i in interfaces],
+                "internet": bool(zone.get("internet", False)),
+            }
+
+    # --- Direcciones ---
+
+    def _intern_network(self, network: ipaddress.IPv4Network, name: Optional[str] = None) -> str:
+        canonical = self.by_network.get(network)
+        if canonical is None:
+            canonical = name or _free_name(str(network), self.policy.addresses, self.policy.groups,
+                                           self.address_alias)
+            self.by_network[network] = canonical
+            self.policy.addresses[canonical] = network
+        return canonical
+
+    def _parse_network(self, value) -> Optional[ipaddress.IPv4Network]:
+        try:
+            network = ipaddress.ip_network(str(value), strict=False)
+        except ValueError:
+            return None
+        return network if network.version == 4 else None
+
+    def _addresses(self, addresses: list):
+        groups = []
+        for idx, address in enumerate(addresses):
+            prefix = f"custom_policy.addresses[{idx}]"
+            if not isinstance(address, dict) or not address.get("name"):
+                self.errors.append(f"{prefix}.name es requerido")
+                continue
+            name = str(address["name"])
+            if name == ANY or name in self.address_alias:
+                self.errors.append(f"{prefix}.name '{name}' está duplicado")
+                continue
+            named_network = self._parse_network(name)
+            if named_network is not None and ("members" in address
+                                              or named_network != self._parse_network(address.get("subnet"))):
+                self.errors.append(f"{prefix}.name '{name}' es un CIDR y no coincide con el objeto")
+                continue
+            if "members" in address:
+                self.address_alias[name] = name  # se resuelve después de leer todos
+                groups.append((prefix, name, address["members"]))
+                continue
+            network = self._parse_network(address.get("subnet"))
+            if network is None:
+                self.errors.append(f"{prefix}.subnet '{address.get('subnet')}' no es válida")
+                continue
+            self.address_alias[name] = self._intern_network(network, name)
+
+        # Grupos: se resuelven en orden de dependencia (detecta ciclos)
+        pending = {name: (prefix, members) for prefix, name, members in groups}
+        state: Dict[str, int] = {}
+
+        def resolve(name: str) -> Optional[str]:
+            if state.get(name) == 2:
+                return self.address_alias[name]
+            prefix, members = pending[name]
+            if state.get(name) == 1:
+                self.errors.append(f"{prefix}.members tiene una referencia circular a '{name}'")
+                return None
+            state[name] = 1
+            if not isinstance(members, list) or not members:
+                self.errors.append(f"{prefix}.members requiere al menos un miembro")
+                resolved = None
+            else:
+                refs = []
+                for member in members:
+                    if member in pending:
+                        ref = resolve(member)
+                    else:
+                        ref = self._address_ref(member, f"{prefix}.members")
+                    if ref is None or ref == ANY:
+                        if ref == ANY:
+                            self.errors.append(f"{prefix}.members no puede incluir 'any'")
+                        refs = None
+                        break
+                    refs.append(ref)
+                resolved = self._intern_group(name, refs) if refs else None
+            state[name] = 2
+            if resolved is None:
+                self.address_alias.pop(name, None)
+            else:
+                self.address_alias[name] = resolved
+            return resolved
+
+        for name in pending:
+            if state.get(name) != 2:
+                resolve(name)
+
+    def _intern_group(self, name: str, refs: List[str]) -> str:
+        members = tuple(dict.fromkeys(refs))
+        if len(members) == 1:
+            return members[0]
+        key = tuple(sorted(members))
+        canonical = self.by_members.get(key)
+        if canonical is None:
+            canonical = name
+            self.by_members[key] = canonical
+            self.policy.groups[canonical] = list(members)
+        return canonical
+
+    def _address_ref(self, value, prefix: str) -> Optional[str]:
+        """Nombre canónico de una referencia (nombre, CIDR en línea o 'any')"""
+        if not isinstance(value, str):
+            self.errors.append(f"{prefix} '{value}' debe ser un texto")
+            return None
+        if value == ANY:
+            return ANY
+        canonical = self.address_alias.get(value)
+        if canonical is not None:
+            return canonical
+        network = self._parse_network(value)
+        if network is None:
+            self.errors.append(f"{prefix} '{value}' no es una dirección definida ni un CIDR válido")
+            return None
+        return self._intern_network(network)
+
+    # --- Servicios ---
+
+    def _intern_service(self, protocol: str, ports: Tuple[Tuple[int, int], ...],
+                        name: Optional[str] = None) -> str:
+        key = (protocol, ports)
+        canonical = self.by_service.get(key)
+        if canonical is None:
+            canonical = name or _free_name(
+                protocol.upper() if not ports else f"{protocol.upper()}-{format_ports(ports, '_')}",
+                self.policy.services, self.service_alias)
+            self.by_service[key] = canonical
+            self.policy.services[canonical] = key
+        return canonical
+
+    def _service_value(self, protocol, ports, prefix: str) -> Optional[tuple]:
+        protocol = str(protocol or "").lower()
+        if protocol not in VALID_PROTOCOLS:
+            self.errors.append(f"{prefix}.protocol '{protocol}' no es válido. Opciones: {', '.join(VALID_PROTOCOLS)}")
+            return None
+        if protocol == "icmp":
+            return protocol, ()
+        if ports in (None, "", []):
+            self.errors.append(f"{prefix}.ports es requerido para {protocol}")
+            return None
+        parsed = _parse_ports(ports, prefix, self.errors)
+        return (protocol, parsed) if parsed is not None else None
+
+    def _services(self, services: list):
+        for idx, service in enumerate(services):
+            prefix = f"custom_policy.services[{idx}]"
+            if not isinstance(service, dict) or not service.get("name"):
+                self.errors.append(f"{prefix}.name es requerido")
+                continue
+            name = str(service["name"])
+            if name == ANY or name in self.service_alias:
+                self.errors.append(f"{prefix}.name '{name}' está duplicado")
+                continue
+            value = self._service_value(service.get("protocol"), service.get("ports"), prefix)
+            if value is not None:
+                self.service_alias[name] = self._intern_service(*value, name=name)
+
+    def _service_ref(self, value, prefix: str) -> Optional[str]:
+        if not isinstance(value, str):
+            self.errors.append(f"{prefix} '{value}' debe ser un texto")
+            return None
+        if value == ANY:
+            return ANY
+        canonical = self.service_alias.get(value)
+        if canonical is not None:
+            return canonical
+        protocol, _, ports = str(value).partition("/")
+        if protocol.lower() not in VALID_PROTOCOLS:
+            self.errors.append(f"{prefix} '{value}' no es un servicio definido ni protocolo/puertos válido")
+            return None
+        parsed = self._service_value(protocol, ports or None, prefix)
+        return self._intern_service(*parsed) if parsed is not None else None
+
+    # --- Reglas ---
+
+    def _refs(self, rule: dict, key: str, prefix: str, resolver) -> Optional[List[str]]:
+        values = rule.get(key, [ANY])
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not values:
+            self.errors.append(f"{prefix}.{key} requiere al menos un valor")
+            return None
+        refs: Dict[str, None] = {}
+        for value in values:
+            ref = resolver(value, f"{prefix}.{key}")
+            if ref is None:
+                return None
+            refs[ref] = None
+        # 'any' absorbe al resto; se representa como lista vacía
+        return [] if ANY in refs else list(refs)
+
+    def _rule(self, idx: int, rule):
+        prefix = f"custom_policy.rules[{idx}]"
+        if not isinstance(rule, dict):
+            self.errors.append(f"{prefix} debe ser un objeto")
+            return
+        action = rule.get("action")
+        if action not in VALID_ACTIONS:
+            self.errors.append(f"{prefix}.action '{action}' no es válido. Opciones: {', '.join(VALID_ACTIONS)}")
+            return
+        zones = []
+        for key, default in (("src_zone", "lan"), ("dst_zone", "wan")):
+            zone = rule.get(key, default)
+            if zone not in self.policy.zones:
+                self.errors.append(f"{prefix}.{key} '{zone}' no está definida")
+                return
+            zones.append(zone)
+        source = self._refs(rule, "source", prefix, self._address_ref)
+        destination = self._refs(rule, "destination", prefix, self._address_ref)
+        service = self._refs(rule, "service", prefix, self._service_ref)
+        if source is None or destination is None or service is None:
+            return
+        self.policy.rules.append({
+            "id": len(self.policy.rules) + 1,
+            "name": str(rule.get("name") or f"Custom-{idx + 1}"),
+            "action": action,
+            "src_zone": zones[0],
+            "dst_zone": zones[1],
+            "source": source,
+            "destination": destination,
+            "service": service,
+            "log": bool(rule.get("log", True)),
+            "nat": bool(rule.get("nat", action == "allow" and self.policy.is_internet_zone(zones[1]))),
+            "comment": str(rule.get("comment", "")),
+        })
+
+
+def compile_policy(spec: dict) -> CompiledPolicy:
+    """Resuelve e interna un custom_policy; los errores quedan en .errors"""
+    return _Compiler(spec).compile()
@@ -0,0 +1,646 @@
+"""Análisis de reglas de firewall: sombreadas, redundantes y combinables.
+
+Trabaja sobre reglas normalizadas (interfaces, rangos de IP origen/destino
+como intervalos enteros y puertos por protocolo). Hay dos fuentes:
+
+  - from_fortinet_config(): los bloques `config firewall address/addrgrp/
+    service custom/policy` de la configuración FortiGate generada (incluye
+    el orden de LAN-to-WAN-Allow y Deny-All de las plantillas).
+  - from_compiled_policy(): un custom_policy ya compilado (policy_engine),
+    para los vendors que no emiten CLI.
+
+Definiciones (por orden de evaluación, primera coincidencia gana):
+  - shadowed: una regla anterior con otra acción la cubre por completo;
+    nunca coincide y su intención no se cumple.
+  - redundant: una regla anterior con la misma acción la cubre, o una
+    posterior con la misma acción la cubre sin reglas en conflicto entre
+    ambas; se puede quitar sin cambiar el comportamiento.
+  - mergeable: misma acción, interfaces y servicios, y mismo destino (u
+    origen); se unen en una regla si ninguna regla intermedia con otra
+    acción se superpone.
+
+Cada dimensión de las reglas va en su índice: origen, destino y puertos
+(intervalos ordenados por inicio, con árbol de máximos del fin) e
+interfaces de entrada y salida (interfaz -> reglas). Una consulta "qué
+reglas contienen / se superponen con esta" usa la dimensión que da menos
+candidatos: se recorren todas con un tope que se cuadruplica hasta que una
+termina debajo del tope, así se paga O(log n) por candidato de la más
+selectiva y no de la peor. Con origen "any" (lo habitual) decide el
+destino, los puertos o las interfaces; el análisis queda en O(n log n) más
+los pares que de verdad se superponen en todas las dimensiones.
+
+Uso:
+    python rule_analyzer.py sitio.json [--format text|json]
+    python rule_analyzer.py respuesta_generate.json
+    python rule_analyzer.py --fortinet-config fortigate.conf
+"""
+import argparse
+import bisect
+import ipaddress
+import json
+import shlex
+import sys
+from typing import Dict, List, Optional, Tuple
+
+ADDRESS_SPACE = ((0, 2 ** 32 - 1),)
+ANY_INTERFACE = "any"
+
+# Servicios predefinidos de FortiOS más comunes (protocolo -> rangos)
+FORTINET_SERVICES = {
+    "ALL": None,
+    "HTTP": {"tcp": ((80, 80),)},
+    "HTTPS": {"tcp": ((443, 443),)},
+    "DNS": {"tcp": ((53, 53),), "udp": ((53, 53),)},
+    "SSH": {"tcp": ((22, 22),)},
+    "NTP": {"udp": ((123, 123),)},
+    "PING": {"icmp": ((0, 0),)},
+    "ALL_ICMP": {"icmp": ((0, 0),)},
+    "ALL_TCP": {"tcp": ((1, 65535),)},
+    "ALL_UDP": {"udp": ((1, 65535),)},
+}
+
+
+def _merge(ranges) -> Tuple[Tuple[int, int], ...]:
+    merged: List[Tuple[int, int]] = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return tuple(merged)
+
+
+def _covers(outer: Tuple[Tuple[int, int], ...], inner: Tuple[Tuple[int, int], ...]) -> bool:
+    """True si la unión de outer contiene cada rango de inner (ambos unidos y ordenados)"""
+    i = 0
+    for low, high in inner:
+        while i < len(outer) and outer[i][1] < low:
+            i += 1
+        if i == len(outer) or outer[i][0] > low or outer[i][1] < high:
+            return False
+    return True
+
+
+def _overlaps(a: Tuple[Tuple[int, int], ...], b: Tuple[Tuple[int, int], ...]) -> bool:
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][1] < b[j][0]:
+            i += 1
+        elif b[j][1] < a[i][0]:
+            j += 1
+        else:
+            return True
+    return False
+
+
+def _network_range(network: ipaddress.IPv4Network) -> Tuple[int, int]:
+    return int(network.network_address), int(network.broadcast_address)
+
+
+def _range_cidrs(ranges: Tuple[Tuple[int, int], ...]) -> List[str]:
+    if ranges == ADDRESS_SPACE:
+        return ["any"]
+    cidrs = []
+    for low, high in ranges:
+        cidrs.extend(str(net) for net in ipaddress.summarize_address_range(
+            ipaddress.IPv4Address(low), ipaddress.IPv4Address(high)))
+    return cidrs
+
+
+class Rule:
+    """Regla normalizada; services None significa cualquier servicio"""
+
+    __slots__ = ("position", "name", "action", "src_intf", "dst_intf", "source",
+                 "destination", "services", "opaque", "labels")
+
+    def __init__(self, position: int, name: str, action: str, src_intf, dst_intf,
+                 source, destination, services: Optional[Dict[str, tuple]],
+                 opaque: bool = False, labels: Optional[dict] = None):
+        self.position = position
+        self.name = name
+        self.action = action
+        self.src_intf = frozenset(src_intf)
+        self.dst_intf = frozenset(dst_intf)
+        self.source = _merge(source)
+        self.destination = _merge(destination)
+        self.services = None if services is None else {p: _merge(r) for p, r in services.items()}
+        # Referencias que no se pudieron resolver: la regla no se da por cubierta
+        self.opaque = opaque
+        # Campos de salida propios de la fuente (zonas o interfaces)
+        self.labels = labels or {}
+
+    @staticmethod
+    def _intf_covers(outer: frozenset, inner: frozenset) -> bool:
+        return ANY_INTERFACE in outer or (ANY_INTERFACE not in inner and inner <= outer)
+
+    @staticmethod
+    def _intf_overlaps(a: frozenset, b: frozenset) -> bool:
+        return ANY_INTERFACE in a or ANY_INTERFACE in b or bool(a & b)
+
+    def _services_cover(self, other: "Rule") -> bool:
+        if self.services is None:
+            return True
+        if other.services is None:
+            return False
+        return all(p in self.services and _covers(self.services[p], r) for p, r in other.services.items())
+
+    def _services_overlap(self, other: "Rule") -> bool:
+        if self.services is None or other.services is None:
+            return True
+        return any(p in self.services and _overlaps(self.services[p], r) for p, r in other.services.items())
+
+    def covers(self, other: "Rule") -> bool:
+        return (not self.opaque and not other.opaque
+                and self._intf_covers(self.src_intf, other.src_intf)
+                and self._intf_covers(self.dst_intf, other.dst_intf)
+                and _covers(self.source, other.source)
+                and _covers(self.destination, other.destination)
+                and self._services_cover(other))
+
+    def overlaps(self, other: "Rule") -> bool:
+        if self.opaque or other.opaque:
+            return True
+        return (self._intf_overlaps(self.src_intf, other.src_intf)
+                and self._intf_overlaps(self.dst_intf, other.dst_intf)
+                and _overlaps(self.source, other.source)
+                and _overlaps(self.destination, other.destination)
+                and self._services_overlap(other))
+
+    def to_dict(self) -> dict:
+        if self.services is None:
+            services = ["any"]
+        else:
+            services = []
+            for protocol, ranges in self.services.items():
+                if protocol == "icmp":
+                    services.append("icmp")
+                else:
+                    ports = ",".join(str(lo) if lo == hi else f"{lo}-{hi}" for lo, hi in ranges)
+                    services.append(f"{protocol}/{ports}")
+        return {
+            "name": self.name,
+            "action": self.action,
+            **self.labels,
+            "source": _range_cidrs(self.source),
+            "destination": _range_cidrs(self.destination),
+            "service": services,
+        }
+
+
+class IntervalIndex:
+    """
+    Intervalos [lo, hi] con dueño (posición de la regla)
+
+    Ordenados por lo, con un árbol de máximos sobre hi: las consultas
+    recorren solo las ramas que pueden tener resultados. Con limit la
+    consulta se corta y retorna None en cuanto junta más de limit dueños.
+    """
+
+    def __init__(self, entries: List[Tuple[int, int, int]]):
+        entries = sorted(entries)
+        self._los = [lo for lo, _, _ in entries]
+        self._owners = [owner for _, _, owner in entries]
+        size = 1
+        while size < max(1, len(entries)):
+            size *= 2
+        self._size = size
+        self._tree = [-1] * (2 * size)
+        for i, (_, hi, _) in enumerate(entries):
+            self._tree[size + i] = hi
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = max(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def _collect(self, count: int, min_hi: int, out: set, limit: Optional[int]) -> bool:
+        """Agrega los dueños de las primeras count entradas con hi >= min_hi; False si pasa limit"""
+        size, tree, owners = self._size, self._tree, self._owners
+        stack = [(1, 0, size)]
+        while stack:
+            node, start, end = stack.pop()
+            if start >= count or tree[node] < min_hi:
+                continue
+            if node >= size:
+                out.add(owners[node - size])
+                if limit is not None and len(out) > limit:
+                    return False
+                continue
+            middle = (start + end) // 2
+            stack.append((2 * node + 1, middle, end))
+            stack.append((2 * node, start, middle))
+        return True
+
+    def containing(self, lo: int, hi: int, limit: Optional[int] = None) -> Optional[set]:
+        """Dueños de algún intervalo que contiene [lo, hi]"""
+        out: set = set()
+        return out if self._collect(bisect.bisect_right(self._los, lo), hi, out, limit) else None
+
+    def overlapping(self, ranges, limit: Optional[int] = None) -> Optional[set]:
+        """Dueños de algún intervalo que se superpone con alguno de ranges"""
+        out: set = set()
+        for lo, hi in ranges:
+            if not self._collect(bisect.bisect_right(self._los, hi), lo, out, limit):
+                return None
+        return out
+
+
+class InterfaceIndex:
+    """Interfaz -> reglas que la usan, y reglas con 'any'"""
+
+    def __init__(self, interfaces: List[frozenset]):
+        self._by_name: Dict[str, set] = {}
+        self._any: set = set()
+        for owner, names in enumerate(interfaces):
+            if ANY_INTERFACE in names:
+                self._any.add(owner)
+            else:
+                for name in names:
+                    self._by_name.setdefault(name, set()).add(owner)
+
+    def _union(self, names, limit: Optional[int]) -> Optional[set]:
+        groups = [self._by_name.get(name, ()) for name in names]
+        if limit is not None and len(self._any) + sum(len(group) for group in groups) > limit:
+            return None
+        return self._any.union(*groups)
+
+    def containing(self, names: frozenset, limit: Optional[int] = None) -> Optional[set]:
+        """Reglas cuyas interfaces cubren names (ver Rule._intf_covers)"""
+        if ANY_INTERFACE in names:
+            return set(self._any) if limit is None or len(self._any) <= limit else None
+        # Alcanza con una interfaz: quien cubre el conjunto la tiene
+        return self._union([next(iter(names))], limit)
+
+    def overlapping(self, names: frozenset, limit: Optional[int] = None) -> Optional[set]:
+        return self._union(names, limit)
+
+
+class RuleIndex:
+    """
+    Índices por dimensión de una lista de reglas
+
+    containing() y overlapping() retornan un superconjunto de las reglas
+    que cubren / se superponen con la dada, tomado de la dimensión más
+    selectiva; el que llama filtra con Rule.covers / Rule.overlaps.
+    """
+
+    PORTS = 65536
+
+    def __init__(self, rules: List[Rule]):
+        self._count = len(rules)
+        self._source = IntervalIndex([(lo, hi, i) for i, rule in enumerate(rules) for lo, hi in rule.source])
+        self._destination = IntervalIndex([(lo, hi, i) for i, rule in enumerate(rules)
+                                           for lo, hi in rule.destination])
+        # Puertos de todos los protocolos en un solo eje (un tramo de PORTS por
+        # protocolo); 'cualquier servicio' ocupa el eje completo
+        protocols: Dict[str, int] = {}
+        for rule in rules:
+            for protocol in rule.services or ():
+                protocols.setdefault(protocol, len(protocols) * self.PORTS)
+        self._protocols = protocols
+        self._all_ports = (0, max(1, len(protocols)) * self.PORTS - 1)
+        self._services = IntervalIndex([(lo, hi, i) for i, rule in enumerate(rules)
+                                        for lo, hi in self._port_ranges(rule.services)])
+        self._src_intf = InterfaceIndex([rule.src_intf for rule in rules])
+        self._dst_intf = InterfaceIndex([rule.dst_intf for rule in rules])
+
+    def _port_ranges(self, services: Optional[Dict[str, tuple]]) -> List[Tuple[int, int]]:
+        if services is None:
+            return [self._all_ports]
+        return [(self._protocols[protocol] + lo, self._protocols[protocol] + hi)
+                for protocol, ranges in services.items() for lo, hi in ranges]
+
+    def _smallest(self, queries: list) -> set:
+        """Resultado de la consulta con menos candidatos (tope creciente)"""
+        limit = 32
+        while queries and limit < self._count:
+            for query in queries:
+                found = query(limit)
+                if found is not None:
+                    return found
+            limit *= 4
+        return set(range(self._count))
+
+    def containing(self, rule: Rule) -> set:
+        queries = []
+        # Un conjunto vacío de interfaces lo cubre cualquiera: no acota
+        if rule.src_intf:
+            queries.append(lambda limit: self._src_intf.containing(rule.src_intf, limit))
+        if rule.dst_intf:
+            queries.append(lambda limit: self._dst_intf.containing(rule.dst_intf, limit))
+        # Un rango del origen (o destino) alcanza: quien cubre la unión cubre cada rango
+        if rule.source:
+            queries.append(lambda limit: self._source.containing(*rule.source[0], limit))
+        if rule.destination:
+            queries.append(lambda limit: self._destination.containing(*rule.destination[0], limit))
+        ports = self._port_ranges(rule.services)
+        if ports:
+            queries.append(lambda limit: self._services.containing(*ports[0], limit))
+        return self._smallest(queries)
+
+    def overlapping(self, rule: Rule) -> set:
+        queries = [lambda limit: self._source.overlapping(rule.source, limit),
+                   lambda limit: self._destination.overlapping(rule.destination, limit)]
+        if rule.services != {}:
+            ports = self._port_ranges(rule.services)
+            queries.append(lambda limit: self._services.overlapping(ports, limit))
+        if ANY_INTERFACE not in rule.src_intf:
+            queries.append(lambda limit: self._src_intf.overlapping(rule.src_intf, limit))
+        if ANY_INTERFACE not in rule.dst_intf:
+            queries.append(lambda limit: self._dst_intf.overlapping(rule.dst_intf, limit))
+        return self._smallest(queries)
+
+
+def analyze(rules: List[Rule]) -> dict:
+    """Hallazgos y conjunto compactado sugerido para una lista ordenada de reglas"""
+    rules = sorted(rules, key=lambda r: r.position)
+    index = RuleIndex(rules)
+    opaque = [i for i, rule in enumerate(rules) if rule.opaque]
+    findings = []
+    dead = set()
+
+    def overlapping_between(rule: Rule, first: int, last: int) -> List[int]:
+        """Reglas entre first y last (exclusivo) que se superponen con rule"""
+        # Una regla opaca se superpone con todas, aunque sus rangos no lo digan
+        candidates = index.overlapping(rule).union(opaque)
+        return sorted(i for i in candidates if first < i < last and rules[i].overlaps(rule))
+
+    # Reglas cubiertas por una anterior (sombreadas o redundantes)
+    for i, rule in enumerate(rules):
+        if rule.opaque or not rule.source:
+            continue
+        covering = sorted(j for j in index.containing(rule) if j < i and rules[j].covers(rule))
+        if not covering:
+            continue
+        by = rules[covering[0]]
+        dead.add(i)
+        kind = "shadowed" if by.action != rule.action else "redundant"
+        findings.append({
+            "type": kind,
+            "rule": rule.name,
+            "position": rule.position,
+            "by": [by.name],
+            "message": (f"La regla '{rule.name}' nunca coincide: '{by.name}' la cubre con acción {by.action}"
+                        if kind == "shadowed" else
+                        f"La regla '{rule.name}' es redundante: '{by.name}' ya la cubre con la misma acción")
+        })
+
+    # Redundancia hacia abajo: una posterior con la misma acción la cubre sin conflictos entre medio
+    for i, rule in enumerate(rules):
+        if i in dead or rule.opaque or not rule.source:
+            continue
+        for j in sorted(c for c in index.containing(rule) if c > i and c not in dead):
+            later = rules[j]
+            if later.action != rule.action or not later.covers(rule):
+                continue
+            conflicts = [k for k in overlapping_between(rule, i, j) if rules[k].action != rule.action]
+            if not conflicts:
+                dead.add(i)
+                findings.append({
+                    "type": "redundant",
+                    "rule": rule.name,
+                    "position": rule.position,
+                    "by": [later.name],
+                    "message": f"La regla '{rule.name}' es redundante: '{later.name}' la cubre más abajo sin reglas en conflicto entre ambas"
+                })
+                break
+
+    # Combinables: misma acción/interfaces/servicios y mismo destino (se unen orígenes) u origen
+    alive = [i for i in range(len(rules)) if i not in dead]
+    merged_into: Dict[int, int] = {}
+    merged_rules: Dict[int, Rule] = {}
+    # Una regla combinada solo crece en una dimensión (si no, el producto cubriría de más)
+    merged_dimension: Dict[int, str] = {}
+    groups: Dict[tuple, int] = {}
+    for i in alive:
+        rule = rules[i]
+        if rule.opaque:
+            continue
+        services = None if rule.services is None else tuple(sorted(rule.services.items()))
+        base = (rule.action, rule.src_intf, rule.dst_intf, services)
+        keys = (base + ("dst", rule.destination), base + ("src", rule.source))
+        for key in keys:
+            target = groups.get(key)
+            if target is None or merged_dimension.get(target, key[4]) != key[4]:
+                continue
+            current = merged_rules.get(target, rules[target])
+            conflicts = [k for k in overlapping_between(rule, target, i)
+                         if k not in dead and rules[k].action != rule.action]
+            if conflicts:
+                continue
+            merged = Rule(current.position, current.name, current.action,
+                          current.src_intf, current.dst_intf,
+                          current.source + rule.source, current.destination + rule.destination,
+                          current.services, labels=current.labels)
+            merged_rules[target] = merged
+            merged_into[i] = target
+            merged_dimension[target] = key[4]
+            findings.append({
+                "type": "mergeable",
+                "rule": rule.name,
+                "position": rule.position,
+                "by": [rules[target].name],
+                "message": f"La regla '{rule.name}' se puede combinar con '{rules[target].name}'"
+            })
+            break
+        if i not in merged_into:
+            for key in keys:
+                groups.setdefault(key, i)
+
+    compacted = [merged_rules.get(i, rules[i]).to_dict() for i in alive if i not in merged_into]
+    return {
+        "rules": len(rules),
+        "findings": findings,
+        "summary": {
+            kind: sum(1 for f in findings if f["type"] == kind)
+            for kind in ("shadowed", "redundant", "mergeable")
+        },
+        "compacted_rules": compacted,
+        "compacted_count": len(compacted)
+    }
+
+
+# --- Fuentes ---
+
+def from_compiled_policy(policy) -> List[Rule]:
+    """Reglas de un CompiledPolicy (policy_engine)"""
+    def ranges(refs):
+        if not refs:
+            return ADDRESS_SPACE
+        return tuple(_network_range(ipaddress.ip_network(cidr)) for cidr in policy.cidrs(refs))
+
+    rules = []
+    for rule in policy.rules:
+        ports = policy.ports_by_protocol(rule["service"])
+        services = None if not rule["service"] else {p: (r or ((0, 0),)) for p, r in ports.items()}
+        rules.append(Rule(
+            rule["id"], rule["name"], rule["action"],
+            policy.zones[rule["src_zone"]]["interfaces"], policy.zones[rule["dst_zone"]]["interfaces"],
+            ranges(rule["source"]), ranges(rule["destination"]), services,
+            labels={"src_zone": rule["src_zone"], "dst_zone": rule["dst_zone"]}
+        ))
+    return rules
+
+
+def _parse_fortinet_tables(text: str) -> Dict[str, Dict[str, Dict[str, List[str]]]]:
+    """Tablas 'config ...' de primer nivel -> edit -> set -> valores"""
+    tables: Dict[str, Dict[str, Dict[str, List[str]]]] = {}
+    stack: List[str] = []
+    table = entry = None
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            words = shlex.split(line)
+        except ValueError:
+            continue
+        keyword = words[0]
+        if keyword == "config":
+            stack.append(" ".join(words[1:]))
+            if len(stack) == 1:
+                table = tables.setdefault(stack[0], {})
+        elif keyword == "end":
+            if stack:
+                stack.pop()
+            if not stack:
+                table = entry = None
+        elif keyword == "edit" and len(stack) == 1 and len(words) > 1:
+            entry = table.setdefault(words[1], {})
+        elif keyword == "next" and len(stack) == 1:
+            entry = None
+        elif keyword == "set" and len(stack) == 1 and entry is not None and len(words) > 1:
+            entry[words[1]] = words[2:]
+    return tables
+
+
+def from_fortinet_config(text: str) -> List[Rule]:
+    """Reglas de `config firewall policy` resolviendo direcciones, grupos y servicios"""
+    tables = _parse_fortinet_tables(text)
+    addresses = {"all": ADDRESS_SPACE}
+    for name, settings in tables.get("firewall address", {}).items():
+        subnet = settings.get("subnet")
+        if subnet and len(subnet) == 2:
+            network = ipaddress.ip_network(f"{subnet[0]}/{subnet[1]}", strict=False)
+            addresses[name] = (_network_range(network),)
+    groups = {name: settings.get("member", []) for name, settings in tables.get("firewall addrgrp", {}).items()}
+
+    services: Dict[str, Optional[dict]] = dict(FORTINET_SERVICES)
+    for name, settings in tables.get("firewall service custom", {}).items():
+        value: Dict[str, list] = {}
+        if settings.get("protocol", [""])[0].upper() == "ICMP":
+            value["icmp"] = [(0, 0)]
+        for protocol in ("tcp", "udp"):
+            for item in settings.get(f"{protocol}-portrange", []):
+                low, _, high = item.split(":")[0].partition("-")
+                value.setdefault(protocol, []).append((int(low), int(high or low)))
+        services[name] = value
+
+    def resolve(name: str, seen=()) -> Optional[tuple]:
+        if name in addresses:
+            return addresses[name]
+        if name in groups and name not in seen:
+            parts = []
+            for member in groups[name]:
+                resolved = resolve(member, seen + (name,))
+                if resolved is None:
+                    return None
+                parts.extend(resolved)
+            return _merge(parts)
+        return None
+
+    rules = []
+    for position, (edit, settings) in enumerate(tables.get("firewall policy", {}).items()):
+        opaque = False
+        spaces = []
+        for key in ("srcaddr", "dstaddr"):
+            parts = []
+            for name in settings.get(key, ["all"]):
+                resolved = resolve(name)
+                if resolved is None:
+                    opaque = True
+                    resolved = ADDRESS_SPACE
+                parts.extend(resolved)
+            spaces.append(parts)
+        service_value: Optional[Dict[str, list]] = {}
+        for name in settings.get("service", ["ALL"]):
+            if name not in services:
+                opaque = True
+                service_value = None
+                break
+            if services[name] is None:
+                service_value = None
+                break
+            for protocol, ranges in services[name].items():
+                service_value.setdefault(protocol, []).extend(ranges)
+        action = "allow" if settings.get("action", ["deny"])[0] == "accept" else "deny"
+        src_intf = settings.get("srcintf", [ANY_INTERFACE])
+        dst_intf = settings.get("dstintf", [ANY_INTERFACE])
+        rules.append(Rule(
+            position, settings.get("name", [edit])[0], action, src_intf, dst_intf,
+            spaces[0], spaces[1], service_value, opaque=opaque,
+            labels={"srcintf": src_intf, "dstintf": dst_intf}
+        ))
+    return rules
+
+
+def analyze_site(vendor: str, params: dict, config: Optional[str]) -> dict:
+    """Analiza las reglas que se generaron para un sitio"""
+    if vendor == "fortinet" and config:
+        return analyze(from_fortinet_config(config))
+    if params.get("policy_template") == "custom":
+        from policy_engine import compile_policy
+        return analyze(from_compiled_policy(compile_policy(params.get("custom_policy") or {})))
+    # Plantillas fijas de vendors por API: no hay reglas que compactar
+    return analyze([])
+
+
+def _read_text(path: str) -> str:
+    with open(path, "rb") as fh:
+        data = fh.read()
+    # Los ejemplos del repositorio están en UTF-16 (con BOM)
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16")
+    return data.decode("utf-8-sig")
+
+
+def _print_text(report: dict):
+    print(f"Reglas: {report['rules']}  ->  compactadas: {report['compacted_count']}")
+    summary = report["summary"]
+    print(f"Sombreadas: {summary['shadowed']}  Redundantes: {summary['redundant']}  "
+          f"Combinables: {summary['mergeable']}")
+    for finding in report["findings"]:
+        print(f"  [{finding['type']}] {finding['message']}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Analiza reglas de firewall generadas")
+    parser.add_argument("params", nargs="?",
+                        help="JSON de parámetros del sitio (o respuesta guardada de /api/generate)")
+    parser.add_argument("--fortinet-config", help="Configuración FortiGate ya generada")
+    parser.add_argument("--format", choices=("text", "json"), default="text")
+    args = parser.parse_args(argv)
+
+    if args.fortinet_config:
+        report = analyze(from_fortinet_config(_read_text(args.fortinet_config)))
+    elif args.params:
+        from config_generator import NetworkConfigGenerator
+        params = json.loads(_read_text(args.params))
+        if "config" in params and "vendor" in params:
+            # Respuesta ya guardada de /api/generate
+            report = analyze_site(params["vendor"], {}, params["config"])
+        else:
+            result = NetworkConfigGenerator().generate(params, analyze=True)
+            if not result["success"]:
+                print("\n".join(result["errors"]), file=sys.stderr)
+                return 1
+            report = result["analysis"]
+    else:
+        parser.error("se requiere un JSON de parámetros o --fortinet-config")
+
+    if args.format == "json":
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        _print_text(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Capa única de serialización JSON para vendors y respuestas de la API.
+
+Usa orjson cuando está instalado y cae a la librería estándar si no. Ambos
+backends producen el mismo formato (UTF-8 sin escapar, mismas separaciones).
+Los payloads ya serializados se envuelven en RawJSON para insertar sus bytes
+tal cual en la respuesta, sin volver a serializarlos.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+
+class RawJSON:
+    """Fragmento JSON ya serializado que se inserta sin re-serializar"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __repr__(self) -> str:
+        return f"RawJSON({self.data[:40]!r}...)"
+
+
+def set_backend(name: str):
+    """Fuerza un backend ('orjson' o 'json'); útil para benchmarks"""
+    global BACKEND
+    if name not in ("orjson", "json"):
+        raise ValueError(f"Backend de serialización desconocido: {name}")
+    if name == "orjson" and orjson is None:
+        raise ValueError("orjson no está instalado")
+    BACKEND = name
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """Serializa obj a bytes UTF-8 (indentado a 2 espacios si pretty)"""
+    if BACKEND == "orjson":
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode("utf-8")
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_str(obj: Any, pretty: bool = False) -> str:
+    """Igual que dumps pero retorna str (para secciones de texto)"""
+    return dumps(obj, pretty).decode("utf-8")
+
+
+def dumps_document(obj: Any) -> bytes:
+    """
+    Serializa una respuesta compacta que puede contener fragmentos RawJSON
+
+    Solo recorre dicts y listas; cualquier otro valor (incluido el texto de
+    configuración) se serializa de una vez con el backend activo.
+    """
+    out = []
+    _encode(obj, out)
+    return b"".join(out)
+
+
+def _encode(obj: Any, out: list):
+    if isinstance(obj, RawJSON):
+        out.append(obj.data)
+    elif isinstance(obj, dict):
+        out.append(b"{")
+        first = True
+        for key, value in obj.items():
+            if not first:
+                out.append(b",")
+            first = False
+            out.append(dumps(str(key)))
+            out.append(b":")
+            _encode(value, out)
+        out.append(b"}")
+    elif isinstance(obj, (list, tuple)):
+        out.append(b"[")
+        for idx, value in enumerate(obj):
+            if idx:
+                out.append(b",")
+            _encode(value, out)
+        out.append(b"]")
+    else:
+        out.append(dumps(obj))
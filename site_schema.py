@@ -0,0 +1,275 @@
+"""Validación estructural del documento del sitio con JSON Schema.
+
+El esquema (schemas/site.schema.json) describe solo tipos y forma: qué
+secciones son objetos, qué campos son listas o texto. Los valores (IPs,
+máscaras, VLAN, vendors) los revisa ConfigValidator, que asume esa forma;
+por eso esta pasada corre antes y un documento mal formado se rechaza sin
+llegar a las validaciones semánticas ni al vendor.
+
+El esquema se carga y se compila una sola vez al importar el módulo: si
+solo usa las palabras clave de COMPILED_KEYWORDS, se traduce a un árbol de
+funciones que revisan cada nodo con isinstance (unas 30x más rápido que
+recorrerlo con jsonschema en cada documento). Un esquema con otras palabras
+clave se valida con jsonschema; ambos caminos dan los mismos mensajes y en
+el mismo orden. jsonschema se importa solo para ese caso y para
+check_schema() (los tests verifican el esquema contra su metaesquema): con
+el esquema compilado el import en frío no lo paga.
+
+subtree_errors revisa solo un nodo del documento (una sección o una
+entrada de una lista) con la parte del esquema que le corresponde; los
+mensajes son los mismos que daría la revisión del documento completo. Lo
+usan las sesiones de edición en vivo para no recorrer todo el sitio en
+cada cambio.
+
+Los mensajes usan el mismo formato de ruta que ConfigValidator
+(wan_interfaces[0].gateway) y un nodo del esquema puede fijar el suyo con
+"x-error-message" ({path} se reemplaza por la ruta).
+"""
+import json
+import os
+from typing import Callable, Iterable, List, Optional, Tuple
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schemas', 'site.schema.json')
+
+_TYPE_NAMES = {
+    'object': 'un objeto',
+    'array': 'una lista',
+    'string': 'texto',
+    'number': 'un número',
+    'integer': 'un entero',
+    'boolean': 'true o false',
+}
+
+
+def _load_schema() -> dict:
+    with open(SCHEMA_PATH, encoding='utf-8') as fh:
+        return json.load(fh)
+
+
+def check_schema(schema: Optional[dict] = None):
+    """Verifica el esquema contra el metaesquema de JSON Schema (SchemaError si no cumple)"""
+    from jsonschema import Draft202012Validator
+    Draft202012Validator.check_schema(SITE_SCHEMA if schema is None else schema)
+
+
+# Palabras clave que entiende el compilador (las demás son anotaciones)
+COMPILED_KEYWORDS = ('type', 'properties', 'items', '$ref')
+_ANNOTATIONS = ('$schema', '$defs', 'title', 'description', 'x-error-message')
+
+# Tipos JSON -> clases de Python. Misma semántica que jsonschema: bool no
+# cuenta como número y un float sin decimales cuenta como entero.
+_PY_TYPES = {
+    'object': (dict,),
+    'array': (list,),
+    'string': (str,),
+    'number': (int, float),
+    'integer': (int,),
+    'boolean': (bool,),
+    'null': (type(None),),
+}
+
+
+def _type_classes(expected: List[str]) -> Optional[tuple]:
+    """Clases para isinstance si alcanzan para el 'type' (sin números ni enteros)"""
+    classes = tuple(cls for name in expected for cls in _PY_TYPES[name])
+    return None if int in classes else classes
+
+
+def _type_check(expected: List[str]) -> Callable[[object], bool]:
+    """Predicado de un 'type' de JSON Schema; sin números es un solo isinstance"""
+    classes = _type_classes(expected)
+    if classes is not None:
+        return lambda value: isinstance(value, classes)
+    classes = tuple(cls for name in expected for cls in _PY_TYPES[name])
+    integral_float = 'integer' in expected and 'number' not in expected
+    if integral_float:
+        classes += (float,)
+    rejects_bool = 'boolean' not in expected
+
+    def check(value):
+        if not isinstance(value, classes) or (rejects_bool and isinstance(value, bool)):
+            return False
+        return not (integral_float and isinstance(value, float)) or value.is_integer()
+
+    return check
+
+
+# check(valor, ruta, errores): agrega a errores los mensajes del nodo
+_Check = Callable[[object, Tuple, List[str]], None]
+
+
+class _Stop(Exception):
+    """Corta el recorrido del esquema compilado en el primer error"""
+
+
+class _FirstError(list):
+    def append(self, message):
+        super().append(message)
+        raise _Stop
+
+
+def error_path(path: Iterable) -> str:
+    """Ruta de un error en el formato de ConfigValidator: lan_interfaces[1].vlan_name"""
+    text = ''
+    for part in path:
+        if isinstance(part, int):
+            text += f"[{part}]"
+        else:
+            text += f".{part}" if text else str(part)
+    return text
+
+
+def _type_message(node: dict, path: Iterable) -> str:
+    text = error_path(path)
+    custom = node.get('x-error-message')
+    if custom:
+        return custom.format(path=text)
+    expected = node['type'] if isinstance(node['type'], list) else [node['type']]
+    names = [_TYPE_NAMES[t] for t in expected if t in _TYPE_NAMES]
+    return f"{text or 'El documento'} debe ser {' o '.join(names)}"
+
+
+def format_error(error) -> str:
+    """Mensaje de un jsonschema.ValidationError"""
+    schema = error.schema if isinstance(error.schema, dict) else {}
+    if error.validator == 'type':
+        return _type_message(schema, error.absolute_path)
+    path = error_path(error.absolute_path)
+    if schema.get('x-error-message'):
+        return schema['x-error-message'].format(path=path)
+    return f"{path or 'El documento'}: {error.message}"
+
+
+def _compilable(node, root: dict) -> bool:
+    if not isinstance(node, dict):
+        return False
+    if any(key not in COMPILED_KEYWORDS and key not in _ANNOTATIONS for key in node):
+        return False
+    ref = node.get('$ref')
+    if ref is not None and (not ref.startswith('#/$defs/') or ref[8:] not in root.get('$defs', {})):
+        return False
+    children = list(node.get('properties', {}).values()) + list(node.get('$defs', {}).values())
+    if 'items' in node:
+        children.append(node['items'])
+    return all(_compilable(child, root) for child in children)
+
+
+def _compile(node: dict, root: dict, defs: dict) -> _Check:
+    """Traduce un nodo del esquema a una función de chequeo"""
+    ref = node.get('$ref')
+    if ref is not None:
+        name = ref[8:]
+        if name not in defs:
+            # Se registra antes de compilar para admitir referencias recursivas
+            defs[name] = None
+            defs[name] = _compile(root['$defs'][name], root, defs)
+        return lambda value, path, errors: defs[name](value, path, errors)
+
+    type_check = None
+    if 'type' in node:
+        type_check = _type_check(node['type'] if isinstance(node['type'], list) else [node['type']])
+    # Las propiedades hoja cuyo 'type' se resuelve con isinstance se revisan en
+    # el lugar; el resto llama a la función compilada del hijo
+    properties = []
+    for key, child in node.get('properties', {}).items():
+        leaf = None
+        if 'type' in child and set(child) <= {'type', 'x-error-message', 'title', 'description'}:
+            leaf = _type_classes(child['type'] if isinstance(child['type'], list) else [child['type']])
+        properties.append((key, leaf, None if leaf else _compile(child, root, defs), child))
+    properties = tuple(properties)
+    items = _compile(node['items'], root, defs) if 'items' in node else None
+
+    def check(value, path, errors):
+        if type_check is not None and not type_check(value):
+            errors.append(_type_message(node, path))
+            return
+        if properties and isinstance(value, dict):
+            for key, leaf, child, child_node in properties:
+                if key not in value:
+                    continue
+                if leaf is None:
+                    child(value[key], path + (key,), errors)
+                elif not isinstance(value[key], leaf):
+                    errors.append(_type_message(child_node, path + (key,)))
+        if items is not None and isinstance(value, list):
+            for idx, item in enumerate(value):
+                items(item, path + (idx,), errors)
+
+    return check
+
+
+def _compile_schema(schema: dict) -> Optional[_Check]:
+    """Función de chequeo del esquema, o None si usa palabras clave no compiladas"""
+    if not _compilable(schema, schema):
+        return None
+    return _compile(schema, schema, {})
+
+
+SITE_SCHEMA = _load_schema()
+_compiled = _compile_schema(SITE_SCHEMA)
+# Validador de jsonschema, solo si el esquema no se pudo compilar
+_validator = None
+# subtree_errors solo funciona con el esquema compilado
+SUBTREE_CHECKS = _compiled is not None
+
+
+# Chequeos compilados por ruta del esquema (los índices de lista como None)
+_subtree_checks: dict = {}
+_subtree_defs: dict = {}
+
+
+def _subtree_check(path: Tuple) -> Optional[_Check]:
+    key = tuple(None if isinstance(part, int) else part for part in path)
+    if key not in _subtree_checks:
+        node = SITE_SCHEMA
+        for part in key:
+            while '$ref' in node:
+                node = SITE_SCHEMA['$defs'][node['$ref'][8:]]
+            node = node.get('items') if part is None else node.get('properties', {}).get(part)
+            if node is None:
+                break
+        _subtree_checks[key] = _compile(node, SITE_SCHEMA, _subtree_defs) if node is not None else None
+    return _subtree_checks[key]
+
+
+def subtree_errors(value, path: Tuple) -> Optional[List[str]]:
+    """
+    Errores de forma de value ubicado en path del documento
+
+    path usa claves e índices (('lan_interfaces', 3)). Un nodo que el
+    esquema no describe no tiene errores. Retorna None si el esquema no se
+    pudo compilar: entonces solo se puede revisar el documento completo.
+    """
+    if not SUBTREE_CHECKS:
+        return None
+    check = _subtree_check(tuple(path))
+    errors: List[str] = []
+    if check is not None:
+        check(value, tuple(path), errors)
+    return errors
+
+
+def structural_errors(params, fail_fast: bool = False) -> List[str]:
+    """
+    Errores de forma del documento, en el orden del esquema
+
+    Con fail_fast se detiene en el primero (pre-filtrado de lotes); si no,
+    los reporta todos (UI).
+    """
+    if _compiled is not None:
+        errors = _FirstError() if fail_fast else []
+        try:
+            _compiled(params, (), errors)
+        except _Stop:
+            pass
+        return list(errors)
+    global _validator
+    if _validator is None:
+        from jsonschema import Draft202012Validator
+        _validator = Draft202012Validator(SITE_SCHEMA)
+    errors = []
+    for error in _validator.iter_errors(params):
+        errors.append(format_error(error))
+        if fail_fast:
+            break
+    return errors
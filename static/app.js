@@ -0,0 +1,338 @@
+// Datos por vendor (se cargan desde el catálogo en un solo request)
+const vendorData = {};
+
+async function loadCatalog() {
+    // URL con hash de contenido: el navegador la cachea hasta el próximo despliegue
+    const url = document.body.dataset.catalogUrl || '/api/catalog';
+    try {
+        const response = await fetch(url);
+        const catalog = await response.json();
+        const vendorSelect = document.getElementById('vendor');
+        const selected = vendorSelect.value;
+
+        vendorSelect.innerHTML = '';
+        catalog.vendors.forEach(vendor => {
+            vendorData[vendor.name] = {
+                models: vendor.models,
+                firmwares: vendor.firmware_versions,
+                limits: vendor.limits
+            };
+            const option = document.createElement('option');
+            option.value = vendor.name;
+            option.textContent = vendor.label;
+            vendorSelect.appendChild(option);
+        });
+        if (vendorData[selected]) {
+            vendorSelect.value = selected;
+        }
+        loadModels();
+    } catch (error) {
+        showAlert('Error cargando catálogo: ' + error.message, 'error');
+    }
+}
+
+function loadModels() {
+    const vendor = document.getElementById('vendor').value;
+    const modelSelect = document.getElementById('model');
+    const firmwareSelect = document.getElementById('firmware_version');
+
+    modelSelect.innerHTML = '';
+    firmwareSelect.innerHTML = '';
+
+    // Cargar modelos
+    vendorData[vendor].models.forEach(model => {
+        const option = document.createElement('option');
+        option.value = model;
+        option.textContent = model;
+        modelSelect.appendChild(option);
+    });
+
+    // Cargar firmwares
+    vendorData[vendor].firmwares.forEach(fw => {
+        const option = document.createElement('option');
+        option.value = fw;
+        option.textContent = fw;
+        firmwareSelect.appendChild(option);
+    });
+}
+
+function getFormData() {
+    const data = {
+        site_info: {
+            name: document.getElementById('site_name').value,
+            customer: document.getElementById('customer').value,
+            location: document.getElementById('location').value,
+            timezone: document.getElementById('timezone').value
+        },
+        device: {
+            vendor: document.getElementById('vendor').value,
+            model: document.getElementById('model').value,
+            firmware_version: document.getElementById('firmware_version').value
+        },
+        wan_interfaces: [],
+        lan_interfaces: [],
+        services: {
+            dns_servers: [
+                document.getElementById('dns1').value,
+                document.getElementById('dns2').value
+            ].filter(Boolean),
+            ntp_servers: [document.getElementById('ntp').value].filter(Boolean)
+        },
+        policy_template: document.getElementById('policy_template').value
+    };
+
+    // WAN Interfaces (1-4)
+    for (let i = 1; i <= 4; i++) {
+        const ipInput = document.getElementById(`wan${i}_ip`);
+        if (ipInput && ipInput.value) {
+            data.wan_interfaces.push({
+                interface_name: `wan${i}`,
+                ip_address: ipInput.value,
+                subnet_mask: document.getElementById(`wan${i}_mask`).value,
+                gateway: document.getElementById(`wan${i}_gw`).value,
+                bandwidth_mbps: parseInt(document.getElementById(`wan${i}_bw`).value) || (i === 1 ? 100 : 50),
+                isp_name: document.getElementById(`wan${i}_isp`).value || `WAN-${i}`,
+                priority: i === 1 ? 'primary' : 'secondary'
+            });
+        }
+    }
+
+    // LAN Interfaces (1-4)
+    for (let i = 1; i <= 4; i++) {
+        const ipInput = document.getElementById(`lan${i}_ip`);
+        if (ipInput && ipInput.value) {
+            const dhcpEnabledCheck = document.getElementById(`lan${i}_dhcp_enabled`);
+            const dhcpStartInput = document.getElementById(`lan${i}_dhcp_start`);
+            const dhcpEndInput = document.getElementById(`lan${i}_dhcp_end`);
+
+            data.lan_interfaces.push({
+                interface_name: i === 1 ? 'lan' : `lan${i}`,
+                ip_address: ipInput.value,
+                subnet_mask: document.getElementById(`lan${i}_mask`).value,
+                vlan_id: parseInt(document.getElementById(`lan${i}_vlan`).value) || null,
+                vlan_name: document.getElementById(`lan${i}_vlan_name`).value || (i === 1 ? 'LAN' : `VLAN${i}`),
+                dhcp_enabled: dhcpEnabledCheck ? dhcpEnabledCheck.checked : false,
+                dhcp_range_start: dhcpStartInput ? dhcpStartInput.value : null,
+                dhcp_range_end: dhcpEndInput ? dhcpEndInput.value : null
+            });
+        }
+    }
+
+    return data;
+}
+
+
+function showAlert(message, type = 'error') {
+    const alertsDiv = document.getElementById('alerts');
+    alertsDiv.innerHTML = `<div class="alert alert-${type}">${message}</div>`;
+    setTimeout(() => alertsDiv.innerHTML = '', 5000);
+}
+
+let visibleWanCount = 1;
+
+function addWanInterface() {
+    if (visibleWanCount < 4) {
+        visibleWanCount++;
+        document.getElementById(`wan${visibleWanCount}_section`).classList.remove('hidden');
+
+        if (visibleWanCount === 4) {
+            document.getElementById('add_wan_btn').style.display = 'none';
+        }
+    }
+}
+
+let visibleLanCount = 1;
+
+function addLanInterface() {
+    if (visibleLanCount < 4) {
+        visibleLanCount++;
+        document.getElementById(`lan${visibleLanCount}_section`).classList.remove('hidden');
+
+        if (visibleLanCount === 4) {
+            document.getElementById('add_lan_btn').style.display = 'none';
+        }
+    }
+}
+
+async function generateConfig() {
+    const data = getFormData();
+
+    try {
+        const response = await fetch('/api/generate', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        });
+
+        const result = await response.json();
+
+        if (result.success) {
+            document.getElementById('output').textContent = result.config;
+            if (result.warnings && result.warnings.length > 0) {
+                showAlert('Advertencias: ' + result.warnings.join(', '), 'warning');
+            } else {
+                showAlert('Configuración generada exitosamente', 'success');
+            }
+        } else {
+            document.getElementById('output').textContent = 'Error: ' + result.errors.join('\n');
+            showAlert('Errores: ' + result.errors.join(', '), 'error');
+        }
+    } catch (error) {
+        showAlert('Error de conexión: ' + error.message, 'error');
+    }
+}
+
+async function downloadConfig() {
+    const data = getFormData();
+
+    try {
+        const response = await fetch('/api/download', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        });
+
+        if (response.ok) {
+            const blob = await response.blob();
+            const url = window.URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+
+            // Obtener extensión sugerida
+            const extensions = {
+                fortinet: '.conf',
+                meraki: '.json',
+                velocloud: '.json',
+                bigleaf: '.json',
+                cato: '.json'
+            };
+            const ext = extensions[data.device.vendor] || '.txt';
+            a.download = `${data.site_info.name.replace(/\s+/g, '_')}_${data.device.vendor}${ext}`;
+
+            a.click();
+            window.URL.revokeObjectURL(url);
+            showAlert('Archivo descargado', 'success');
+        } else {
+            const result = await response.json();
+            showAlert('Error: ' + (result.errors || [result.error]).join(', '), 'error');
+        }
+    } catch (error) {
+        showAlert('Error de conexión: ' + error.message, 'error');
+    }
+}
+
+// --- Validación en vivo ---
+// Se abre una sesión con el documento inicial y luego solo se envían los
+// cambios como JSON Patch; el servidor responde con el delta de mensajes.
+const liveValidation = { sessionId: null, document: null, errors: [], warnings: [], timer: null, pending: false };
+
+function pointerEscape(key) {
+    return String(key).replace(/~/g, '~0').replace(/\//g, '~1');
+}
+
+function diffDocuments(before, after, path = '', ops = []) {
+    const isObject = v => v !== null && typeof v === 'object';
+    if (Array.isArray(before) && Array.isArray(after) && before.length === after.length) {
+        after.forEach((item, i) => diffDocuments(before[i], item, `${path}/${i}`, ops));
+    } else if (isObject(before) && isObject(after) && !Array.isArray(before) && !Array.isArray(after)) {
+        Object.keys(before).forEach(key => {
+            if (!(key in after)) ops.push({ op: 'remove', path: `${path}/${pointerEscape(key)}` });
+        });
+        Object.keys(after).forEach(key => {
+            const child = `${path}/${pointerEscape(key)}`;
+            if (!(key in before)) ops.push({ op: 'add', path: child, value: after[key] });
+            else diffDocuments(before[key], after[key], child, ops);
+        });
+    } else if (JSON.stringify(before) !== JSON.stringify(after)) {
+        // Listas con distinto largo se reemplazan completas
+        ops.push({ op: 'replace', path, value: after });
+    }
+    return ops;
+}
+
+function removeMessages(list, removed) {
+    removed.forEach(message => {
+        const idx = list.indexOf(message);
+        if (idx !== -1) list.splice(idx, 1);
+    });
+}
+
+function renderLiveValidation() {
+    const panel = document.getElementById('live_validation');
+    panel.innerHTML = '';
+    const addAlert = (messages, type) => {
+        if (messages.length === 0) return;
+        const div = document.createElement('div');
+        div.className = `alert alert-${type}`;
+        div.textContent = messages.join(' · ');
+        panel.appendChild(div);
+    };
+    addAlert(liveValidation.errors, 'error');
+    addAlert(liveValidation.warnings, 'warning');
+}
+
+async function syncLiveValidation() {
+    if (liveValidation.pending) {
+        scheduleLiveValidation();
+        return;
+    }
+    const data = getFormData();
+    liveValidation.pending = true;
+    try {
+        if (liveValidation.sessionId === null) {
+            const response = await fetch('/api/validate/sessions', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(data)
+            });
+            const result = await response.json();
+            liveValidation.sessionId = result.session_id;
+            liveValidation.errors = result.errors;
+            liveValidation.warnings = result.warnings;
+        } else {
+            const ops = diffDocuments(liveValidation.document, data);
+            if (ops.length === 0) return;
+            const response = await fetch(`/api/validate/sessions/${liveValidation.sessionId}`, {
+                method: 'PATCH',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(ops)
+            });
+            if (response.status === 404 || response.status === 400) {
+                // Sesión expirada o documento desincronizado: se abre una nueva
+                liveValidation.sessionId = null;
+                scheduleLiveValidation();
+                return;
+            }
+            const delta = await response.json();
+            removeMessages(liveValidation.errors, delta.errors.removed);
+            removeMessages(liveValidation.warnings, delta.warnings.removed);
+            liveValidation.errors.push(...delta.errors.added);
+            liveValidation.warnings.push(...delta.warnings.added);
+        }
+        liveValidation.document = data;
+        renderLiveValidation();
+    } catch (error) {
+        // La validación en vivo es informativa; los errores de red no interrumpen la edición
+    } finally {
+        liveValidation.pending = false;
+    }
+}
+
+function scheduleLiveValidation() {
+    clearTimeout(liveValidation.timer);
+    liveValidation.timer = setTimeout(syncLiveValidation, 200);
+}
+
+document.addEventListener('input', scheduleLiveValidation);
+document.addEventListener('change', scheduleLiveValidation);
+document.addEventListener('click', event => {
+    if (event.target.closest('button')) scheduleLiveValidation();
+});
+
+// Inicializar
+loadCatalog();
+
+// Toggle DHCP fields
+document.getElementById('dhcp_enabled').addEventListener('change', function () {
+    document.getElementById('dhcp_range').style.display = this.checked ? 'grid' : 'none';
+});
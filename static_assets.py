@@ -0,0 +1,93 @@
+"""Assets estáticos precomprimidos con hash de contenido en la URL.
+
+Al iniciar se leen los archivos de static/, se calcula su hash y se guardan
+en memoria sus variantes identity/gzip/brotli. Como la URL cambia con el
+contenido, pueden servirse con caché de larga duración (immutable).
+"""
+import hashlib
+import mimetypes
+import os
+from typing import Dict, Optional
+
+from flask import Response, request
+
+from compression import negotiate, precompress
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE = "no-cache"
+
+
+class StaticAsset:
+    """Un asset con sus variantes comprimidas"""
+
+    __slots__ = ("name", "url_name", "mimetype", "etag", "variants")
+
+    def __init__(self, name: str, data: bytes, mimetype: str, level: int,
+                 digest: Optional[str] = None):
+        if digest is None:
+            digest = hashlib.sha256(data).hexdigest()[:16]
+        stem, ext = os.path.splitext(name)
+        self.name = name
+        self.url_name = f"{stem}.{digest}{ext}"
+        self.mimetype = mimetype
+        self.etag = digest
+        self.variants = precompress(data, level)
+
+
+class StaticAssets:
+    """Colección de assets servidos desde memoria"""
+
+    def __init__(self, directory: str, url_prefix: str = "/assets", level: int = 9):
+        self.url_prefix = url_prefix
+        self.level = level
+        self._by_name: Dict[str, StaticAsset] = {}
+        self._by_url_name: Dict[str, StaticAsset] = {}
+        if os.path.isdir(directory):
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    with open(path, "rb") as fh:
+                        self.add(name, fh.read())
+
+    def add(self, name: str, data: bytes, mimetype: Optional[str] = None,
+            digest: Optional[str] = None) -> StaticAsset:
+        """
+        Registra (o reemplaza) un asset a partir de su contenido
+
+        digest permite usar una versión propia del contenido como hash.
+        """
+        if mimetype is None:
+            mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+            if mimetype.startswith("text/") or mimetype.endswith("javascript"):
+                mimetype += "; charset=utf-8"
+        asset = StaticAsset(name, data, mimetype, self.level, digest)
+        previous = self._by_name.get(name)
+        if previous is not None:
+            self._by_url_name.pop(previous.url_name, None)
+        self._by_name[name] = asset
+        self._by_url_name[asset.url_name] = asset
+        return asset
+
+    def url(self, name: str) -> str:
+        """URL con hash de contenido (para usar desde las plantillas)"""
+        return f"{self.url_prefix}/{self._by_name[name].url_name}"
+
+    def get(self, url_name: str) -> Optional[StaticAsset]:
+        return self._by_url_name.get(url_name)
+
+    def response(self, asset: StaticAsset, cache_control: str = IMMUTABLE_CACHE) -> Response:
+        """Respuesta con la variante negociada, ETag y caché"""
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+        body = asset.variants.get(encoding) if encoding else None
+        if body is None:
+            encoding = None
+            body = asset.variants["identity"]
+
+        response = Response(body, mimetype=asset.mimetype)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        # ETag distinto por representación (gzip y br no son intercambiables)
+        response.set_etag(f"{asset.etag}-{encoding}" if encoding else asset.etag)
+        response.headers["Cache-Control"] = cache_control
+        return response.make_conditional(request)
@@ -0,0 +1,47 @@
+"""Validación en lote: un sitio con problemas no tumba al resto del lote."""
+import pytest
+
+import batch_validation
+from batch_validation import BatchValidator
+from validators import ConfigValidator
+
+
+def _site(name, **wan):
+    return {
+        "site_info": {"name": name, "customer": "Acme"},
+        "device": {"vendor": "fortinet", "model": "FortiGate 60F", "firmware_version": "7.4.2"},
+        "wan_interfaces": [dict({"interface_name": "wan1", "ip_address": "200.1.1.2",
+                                 "subnet_mask": "255.255.255.252", "gateway": "200.1.1.1",
+                                 "priority": "primary"}, **wan)],
+        "lan_interfaces": [{"interface_name": "lan", "ip_address": "192.168.1.1",
+                            "subnet_mask": "255.255.255.0", "vlan_id": 10}],
+    }
+
+
+@pytest.fixture(params=["numpy", "fallback"])
+def validator(request, monkeypatch):
+    if request.param == "fallback":
+        monkeypatch.setattr(batch_validation, "np", None)
+    return BatchValidator()
+
+
+def test_bare_mask_is_reported_as_invalid(validator):
+    results = validator.validate_many([_site("S1", subnet_mask="24"), _site("S2")])
+    assert results[0][0] is False
+    assert "wan_interfaces[0].subnet_mask '24' no es válida" in results[0][1]
+    assert results[1] == (True, [], [])
+    assert results[0] == ConfigValidator().validate_all(_site("S1", subnet_mask="24"))
+
+
+def test_unexpected_error_stays_in_its_site(validator, monkeypatch):
+    original = ConfigValidator._validate_site_info
+
+    def failing(self, site_info):
+        if site_info.get("name") == "S1":
+            raise RuntimeError("falla")
+        original(self, site_info)
+
+    monkeypatch.setattr(ConfigValidator, "_validate_site_info", failing)
+    results = validator.validate_many([_site("S1"), _site("S2")])
+    assert results[0] == (False, ["Error interno al validar el sitio: falla"], [])
+    assert results[1] == (True, [], [])
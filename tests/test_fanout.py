@@ -0,0 +1,42 @@
+"""Fanout: un sitio mal formado se reporta con los errores del esquema."""
+import pytest
+
+from fanout import FanoutRenderer
+
+
+def _site(**overrides):
+    site = {
+        "site_info": {"name": "SITE-01", "customer": "Acme"},
+        "device": {"vendor": "fortinet", "model": "FortiGate 60F", "firmware_version": "7.4.2"},
+        "wan_interfaces": [{"interface_name": "wan1", "ip_address": "200.1.1.2",
+                            "subnet_mask": "255.255.255.252", "gateway": "200.1.1.1",
+                            "priority": "primary"}],
+        "lan_interfaces": [{"interface_name": "lan", "ip_address": "192.168.1.1",
+                            "subnet_mask": "255.255.255.0", "vlan_id": 10}],
+    }
+    site.update(overrides)
+    return site
+
+
+@pytest.fixture(scope="module")
+def fanout():
+    renderer = FanoutRenderer(max_workers=1)
+    yield renderer
+    renderer.shutdown()
+
+
+@pytest.mark.parametrize("overrides, error", [
+    ({"device": "fortinet"}, "device debe ser un objeto"),
+    ({"lan_interfaces": 5}, "lan_interfaces debe ser una lista"),
+])
+def test_malformed_site_returns_schema_errors(fanout, overrides, error):
+    result = fanout.render(_site(**overrides), vendors=["fortinet", "meraki"])
+    assert result["success"] is False
+    assert result["errors"] == [error]
+    assert result["vendors"] == []
+
+
+def test_valid_site_renders_every_vendor(fanout):
+    result = fanout.render(_site(), vendors=["fortinet", "meraki"], output="text")
+    assert result["success"], result["errors"]
+    assert [summary["vendor"] for summary in result["vendors"]] == ["fortinet", "meraki"]
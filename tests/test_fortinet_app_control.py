@@ -0,0 +1,83 @@
+"""FortiGate: las reglas por categoría de aplicación necesitan Application Control en la política."""
+import copy
+
+from config_generator import NetworkConfigGenerator
+from vendors.fortinet import FortinetConfig
+
+SITE = {
+    "site_info": {"name": "SITE-01", "customer": "Acme", "timezone": "UTC"},
+    "device": {"vendor": "fortinet", "model": "FortiGate 60F", "firmware_version": "7.4.2"},
+    "wan_interfaces": [
+        {"interface_name": "wan1", "ip_address": "200.1.1.2", "subnet_mask": "255.255.255.252",
+         "gateway": "200.1.1.1", "bandwidth_mbps": 100, "isp_name": "ISP-1", "priority": "primary"},
+        {"interface_name": "wan2", "ip_address": "201.1.1.2", "subnet_mask": "255.255.255.252",
+         "gateway": "201.1.1.1", "bandwidth_mbps": 50, "isp_name": "ISP-2", "priority": "secondary"},
+    ],
+    "lan_interfaces": [
+        {"interface_name": "lan", "ip_address": "192.168.1.1", "subnet_mask": "255.255.255.0",
+         "vlan_id": 10, "vlan_name": "DATA", "dhcp_enabled": True,
+         "dhcp_range_start": "192.168.1.100", "dhcp_range_end": "192.168.1.200"},
+    ],
+    "services": {"dns_servers": ["8.8.8.8", "8.8.4.4"], "ntp_servers": ["pool.ntp.org"]},
+    "policy_template": "basic",
+}
+
+LIST = FortinetConfig.APP_MONITOR_LIST
+
+
+def _generate(site, output='text'):
+    result = NetworkConfigGenerator().generate(site, output=output)
+    assert result['success'], result['errors']
+    return result
+
+
+def _policy_block(config, name):
+    start = config.index(f'set name "{name}"')
+    return config[start:config.index("    next", start)]
+
+
+def test_sdwan_app_rules_attach_app_control_to_lan_to_wan():
+    config = _generate(copy.deepcopy(SITE))['config']
+    assert "internet-service-app-ctrl-category" in config
+    policy = _policy_block(config, "LAN-to-WAN-Allow")
+    assert "set utm-status enable" in policy
+    assert f'set application-list "{LIST}"' in policy
+    # La lista se define antes de la política que la usa
+    assert config.index(f'edit "{LIST}"') < config.index('set name "LAN-to-WAN-Allow"')
+
+
+def test_shaping_app_categories_attach_app_control_without_sdwan():
+    site = copy.deepcopy(SITE)
+    site["wan_interfaces"] = site["wan_interfaces"][:1]
+    config = _generate(site)['config']
+    assert "config system sdwan" not in config
+    assert "set app-category" in config
+    policy = _policy_block(config, "LAN-to-WAN-Allow")
+    assert "set utm-status enable" in policy
+    assert f'set application-list "{LIST}"' in policy
+
+
+def test_plan_creates_app_list_before_the_policy():
+    plan = _generate(copy.deepcopy(SITE), output='plan')['plan']
+    lists = [op for op in plan if op['target'].endswith('/application/list')
+             and op['payload'].get('name') == LIST]
+    policy = next(op for op in plan if op['target'].endswith('/firewall/policy')
+                  and op['payload'].get('name') == "LAN-to-WAN-Allow")
+    assert lists and lists[0]['id'] < policy['id']
+    assert policy['payload']['application-list'] == LIST
+    assert policy['payload']['utm-status'] == "enable"
+
+
+def test_custom_internet_rules_attach_app_control():
+    site = copy.deepcopy(SITE)
+    site["policy_template"] = "custom"
+    site["custom_policy"] = {"rules": [
+        {"name": "LAN-to-Internet", "action": "allow", "src_zone": "lan", "dst_zone": "wan",
+         "source": ["any"], "destination": ["any"], "service": ["any"]},
+        {"name": "LAN-to-LAN", "action": "allow", "src_zone": "lan", "dst_zone": "lan",
+         "source": ["any"], "destination": ["any"], "service": ["any"]},
+    ]}
+    config = _generate(site)['config']
+    assert f'set application-list "{LIST}"' in _policy_block(config, "LAN-to-Internet")
+    assert "application-list" not in _policy_block(config, "LAN-to-LAN")
+    assert config.index(f'edit "{LIST}"') < config.index('set name "LAN-to-Internet"')
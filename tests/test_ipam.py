@@ -0,0 +1,47 @@
+"""IPAM: asignaciones únicas entre procesos y liberación de LAN quitadas."""
+import sqlite3
+
+import pytest
+
+from ipam import Ipam
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "ipam.db")
+    Ipam(path).add_pool("Acme", "10.0.0.0/16")
+    return path
+
+
+def _site(*vlans):
+    return {"site_info": {"customer": "Acme", "name": "S1"},
+            "lan_interfaces": [{"vlan_id": vlan, "ip_address": "auto"} for vlan in vlans]}
+
+
+def test_two_instances_do_not_share_a_subnet(db_path):
+    # Dos workers con su propio índice en memoria sobre la misma base
+    first, second = Ipam(db_path), Ipam(db_path)
+    first.pools("Acme")
+    second.pools("Acme")
+    a = first.allocate("Acme", "S1", 10)
+    b = second.allocate("Acme", "S2", 10)
+    c = first.allocate("Acme", "S3", 10)
+    assert len({a["cidr"], b["cidr"], c["cidr"]}) == 3
+
+
+def test_network_is_unique_per_pool(db_path):
+    conn = sqlite3.connect(db_path)
+    row = ("Acme", "S1", "10", 167772160, 24, "10.0.0.0/16", 0.0)
+    insert = "INSERT INTO allocations (customer, site, vlan, network, prefix, pool, created_at) " \
+             "VALUES (?, ?, ?, ?, ?, ?, ?)"
+    conn.execute(insert, row)
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute(insert, ("Acme", "S2") + row[2:])
+
+
+def test_removed_lans_release_their_subnet(db_path):
+    ipam = Ipam(db_path)
+    ipam.fill_site(_site(10, 20, 30))
+    ipam.fill_site(_site(10))
+    assert [a["vlan"] for a in ipam.site_allocations("Acme", "S1")] == ["10"]
+    assert ipam.pools("Acme")[0]["allocations"] == 1
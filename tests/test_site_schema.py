@@ -0,0 +1,55 @@
+"""Esquema del documento del sitio: metaesquema, import en frío y paridad con jsonschema."""
+import copy
+import os
+import subprocess
+import sys
+
+import site_schema
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _site():
+    return {
+        "site_info": {"name": "SITE-01", "customer": "Acme"},
+        "device": {"vendor": "fortinet", "model": "FortiGate 60F", "firmware_version": "7.4.2"},
+        "wan_interfaces": [{"interface_name": "wan1", "ip_address": "200.1.1.2",
+                            "subnet_mask": "255.255.255.252", "gateway": "200.1.1.1"}],
+        "lan_interfaces": [{"interface_name": "lan", "ip_address": "192.168.1.1",
+                            "subnet_mask": "255.255.255.0", "vlan_id": 10}],
+        "services": {"dns_servers": ["8.8.8.8"]},
+    }
+
+
+def test_schema_matches_metaschema():
+    site_schema.check_schema()
+
+
+def test_import_does_not_load_jsonschema():
+    statement = "import sys, config_generator; print('jsonschema' in sys.modules)"
+    proc = subprocess.run([sys.executable, '-c', statement], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    assert proc.stdout.strip() == 'False'
+
+
+def test_compiled_checks_match_jsonschema():
+    from jsonschema import Draft202012Validator
+
+    validator = Draft202012Validator(site_schema.SITE_SCHEMA)
+    broken = []
+    for path, value in ((('site_info',), 'x'), (('wan_interfaces',), {}),
+                        (('lan_interfaces', 0, 'vlan_id'), '10'), (('device', 'vendor'), 5),
+                        (('services', 'dns_servers'), '8.8.8.8'), ((), [])):
+        doc = _site()
+        if path:
+            node = doc
+            for part in path[:-1]:
+                node = node[part]
+            node[path[-1]] = value
+        else:
+            doc = value
+        broken.append(doc)
+    broken.append(_site())
+    for doc in broken:
+        expected = [site_schema.format_error(error) for error in validator.iter_errors(copy.deepcopy(doc))]
+        assert site_schema.structural_errors(doc) == expected
@@ -0,0 +1,135 @@
+"""Clases de tráfico de SD-WAN: SLA, reparto del ancho de banda y orden de los enlaces.
+
+El modelo opcional vive en params['sdwan']:
+
+    {
+      "health_check": {"servers": ["8.8.8.8", "1.1.1.1"], "protocol": "ping", "interval_ms": 500},
+      "sla": {"voice": {"latency_ms": 120, "jitter_ms": 20, "packet_loss_pct": 1}}
+    }
+
+Todo es opcional: lo que el sitio no declara toma DEFAULT_HEALTH_CHECK y
+DEFAULT_SLA (umbrales habituales de ITU-T G.114 para voz y de los perfiles
+de video y aplicaciones de negocio de los fabricantes). Cada vendor traduce
+las clases a sus objetos (performance SLA y reglas de servicio en FortiGate,
+clases de desempeño en Meraki, business policies en Velocloud).
+
+Cada WAN puede declarar upload_mbps y download_mbps (circuitos asimétricos
+de cable o DSL); si no, ambos sentidos valen bandwidth_mbps. El modelado
+por clase (CLASS_SHAPING) se calcula sobre esas tasas al SHAPING_HEADROOM
+del circuito, para que la cola se forme en el equipo y no en el módem del
+proveedor (bufferbloat).
+
+Los pesos de los enlaces son proporcionales al ancho de banda y el orden de
+preferencia pone primero las WAN 'primary'; las demás son respaldo.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from vendors.capabilities import declared_rates
+
+# Clases en orden de prioridad
+TRAFFIC_CLASSES = ('voice', 'video', 'business')
+
+SLA_METRICS = ('latency_ms', 'jitter_ms', 'packet_loss_pct')
+
+DEFAULT_SLA: Dict[str, Dict[str, int]] = {
+    'voice': {'latency_ms': 150, 'jitter_ms': 30, 'packet_loss_pct': 1},
+    'video': {'latency_ms': 250, 'jitter_ms': 50, 'packet_loss_pct': 2},
+    'business': {'latency_ms': 400, 'jitter_ms': 100, 'packet_loss_pct': 5},
+}
+
+HEALTH_CHECK_PROTOCOLS = ('ping', 'dns', 'http')
+
+DEFAULT_HEALTH_CHECK = {
+    'servers': ['8.8.8.8', '1.1.1.1'],
+    'protocol': 'ping',
+    'interval_ms': 500,
+}
+
+# Ancho de banda supuesto para una WAN sin bandwidth_mbps (el mismo que usan los vendors)
+DEFAULT_BANDWIDTH_MBPS = 100
+
+# Campos de tasa de una WAN (Mbps)
+WAN_RATE_FIELDS = ('bandwidth_mbps', 'upload_mbps', 'download_mbps')
+
+# Reparto de cada sentido del enlace por clase: porcentaje garantizado y
+# máximo, prioridad de cola y DSCP con que se marca. 'default' es el resto
+# del tráfico; los garantizados suman menos de 100.
+SHAPING_CLASSES = TRAFFIC_CLASSES + ('default',)
+CLASS_SHAPING: Dict[str, dict] = {
+    'voice': {'guaranteed_pct': 10, 'maximum_pct': 30, 'priority': 'high', 'dscp': 46},
+    'video': {'guaranteed_pct': 25, 'maximum_pct': 70, 'priority': 'high', 'dscp': 34},
+    'business': {'guaranteed_pct': 30, 'maximum_pct': 100, 'priority': 'normal', 'dscp': 18},
+    'default': {'guaranteed_pct': 10, 'maximum_pct': 100, 'priority': 'low', 'dscp': 0},
+}
+
+# Fracción del circuito sobre la que se modela
+SHAPING_HEADROOM = 0.95
+
+# Tope por host del tráfico 'default': fracción de la mayor bajada, con un mínimo
+PER_IP_SHARE = 0.25
+PER_IP_MIN_KBPS = 2000
+
+# Peso máximo de un enlace (rango de FortiOS y Velocloud: 1-255)
+MAX_LINK_WEIGHT = 255
+
+
+def sdwan_settings(sdwan: Optional[dict]) -> dict:
+    """health_check y sla del sitio completados con los valores por defecto"""
+    sdwan = sdwan or {}
+    health_check = dict(DEFAULT_HEALTH_CHECK)
+    health_check.update({k: v for k, v in (sdwan.get('health_check') or {}).items() if v is not None})
+    sla = {}
+    overrides = sdwan.get('sla') or {}
+    for name in TRAFFIC_CLASSES:
+        sla[name] = dict(DEFAULT_SLA[name])
+        sla[name].update({k: v for k, v in (overrides.get(name) or {}).items() if v is not None})
+    return {'health_check': health_check, 'sla': sla}
+
+
+def is_primary(wan: dict) -> bool:
+    return wan.get('priority') == 'primary'
+
+
+def wan_rates(wan: dict) -> Tuple[float, float]:
+    """
+    (subida, bajada) en Mbps; cada sentido sin valor propio toma bandwidth_mbps
+
+    Un sentido sin ninguna tasa declarada se modela a DEFAULT_BANDWIDTH_MBPS.
+    """
+    upload, download = declared_rates(wan)
+    return (DEFAULT_BANDWIDTH_MBPS if upload is None else upload,
+            DEFAULT_BANDWIDTH_MBPS if download is None else download)
+
+
+def shaped_kbps(rate_mbps) -> int:
+    """Tasa a la que se modela un sentido del circuito, en kbps"""
+    return max(1, int(rate_mbps * 1000 * SHAPING_HEADROOM))
+
+
+def class_rates(rate_kbps: int) -> Dict[str, Tuple[int, int]]:
+    """(garantizado, máximo) en kbps de cada clase para un sentido modelado a rate_kbps"""
+    return {
+        name: (max(1, rate_kbps * shaping['guaranteed_pct'] // 100),
+               max(1, rate_kbps * shaping['maximum_pct'] // 100))
+        for name, shaping in CLASS_SHAPING.items()
+    }
+
+
+def per_ip_kbps(wans: List[dict], upload: bool = False) -> int:
+    """Tope por host del tráfico 'default' según la mayor bajada (o subida) del sitio"""
+    largest = max((shaped_kbps(wan_rates(wan)[0 if upload else 1]) for wan in wans), default=0)
+    return max(PER_IP_MIN_KBPS, int(largest * PER_IP_SHARE))
+
+
+def link_weights(wans: List[dict]) -> List[int]:
+    """Peso de cada WAN proporcional a su bajada (la mayor recibe MAX_LINK_WEIGHT)"""
+    bandwidths = [wan_rates(wan)[1] for wan in wans]
+    if not bandwidths:
+        return []
+    largest = max(bandwidths)
+    return [max(1, round(MAX_LINK_WEIGHT * bandwidth / largest)) for bandwidth in bandwidths]
+
+
+def steering_order(wans: List[dict]) -> List[int]:
+    """Índices de las WAN en orden de preferencia: primary primero, luego por ancho de banda"""
+    return sorted(range(len(wans)), key=lambda idx: (not is_primary(wans[idx]), -wan_rates(wans[idx])[1], idx))
@@ -1,28 +1,65 @@
 import re
 import ipaddress
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
+from vendors.manifest import VENDOR_MANIFEST
+from vendors.registry import vendor_registry
+from vendors.capabilities import (limit_violations, model_capabilities, recommend,
+                                 site_requirements, throughput_key, throughput_shortfall, vendor_limits)
+from policy_engine import compile_policy
+from traffic_classes import HEALTH_CHECK_PROTOCOLS, SLA_METRICS, TRAFFIC_CLASSES, WAN_RATE_FIELDS
+from site_schema import structural_errors
 
 class ConfigValidator:
     """Validador de parámetros de entrada"""
     
-    VALID_VENDORS = ["fortinet", "velocloud", "meraki", "bigleaf", "cato"]
+    VALID_VENDORS = list(VENDOR_MANIFEST)
     VALID_POLICIES = ["basic", "standard", "advanced", "custom"]
+    # Rangos aceptados para sdwan (umbrales de SLA e intervalo del health-check)
+    SLA_LIMITS = {'latency_ms': (1, 10000), 'jitter_ms': (1, 10000), 'packet_loss_pct': (0, 100)}
+    HEALTH_CHECK_INTERVAL_MS = (100, 60000)
     
     def __init__(self):
         self.errors: List[str] = []
         self.warnings: List[str] = []
     
-    def validate_all(self, params: dict) -> Tuple[bool, List[str], List[str]]:
-        """Valida todos los parámetros"""
-        self.errors = []
+    def validate_all(self, params: dict, fail_fast: bool = False,
+                     capabilities: bool = True) -> Tuple[bool, List[str], List[str]]:
+        """
+        Valida todos los parámetros
+        
+        Primero la forma del documento contra schemas/site.schema.json; si no
+        la cumple se retorna sin correr las validaciones semánticas. Con
+        fail_fast se detiene en el primer error y lo retorna solo, sin
+        advertencias (pre-filtrado de lotes); si no, los reporta todos (UI).
+        capabilities=False omite los límites del modelo, que dependen del
+        destino (ver validate_capabilities).
+        """
+        self.errors = structural_errors(params, fail_fast)
         self.warnings = []
+        if self.errors:
+            return False, self.errors, self.warnings
         
-        self._validate_site_info(params.get('site_info', {}))
-        self._validate_device(params.get('device', {}))
-        self._validate_wan_interfaces(params.get('wan_interfaces', []))
-        self._validate_lan_interfaces(params.get('lan_interfaces', []))
-        self._validate_services(params.get('services', {}))
-        self._validate_policy_template(params.get('policy_template', 'basic'))
+        sections = (
+            lambda: self._validate_site_info(params.get('site_info', {})),
+            lambda: self._validate_device(params.get('device', {})),
+            lambda: self._validate_wan_interfaces(params.get('wan_interfaces', [])),
+            lambda: self._validate_lan_interfaces(params.get('lan_interfaces', [])),
+            lambda: self._validate_services(params.get('services', {})),
+            lambda: self._validate_policy_template(params.get('policy_template', 'basic')),
+            lambda: self._validate_custom_policy(params.get('policy_template', 'basic'), params.get('custom_policy')),
+            lambda: self._validate_sdwan(params.get('sdwan')),
+            lambda: self._validate_model_capabilities(params.get('device', {}), params.get('wan_interfaces', []),
+                                                      params.get('lan_interfaces', []),
+                                                      params.get('policy_template', 'basic')),
+        )
+        if not capabilities:
+            sections = sections[:-1]
+        for section in sections:
+            section()
+            if fail_fast and self.errors:
+                self.errors = self.errors[:1]
+                self.warnings = []
+                break
         
         return len(self.errors) == 0, self.errors, self.warnings
     
@@ -47,8 +84,8 @@ class ConfigValidator:
             return
         
         vendor = device.get('vendor', '').lower()
-        if vendor not in self.VALID_VENDORS:
-            self.errors.append(f"Vendor inválido '{vendor}'. Opciones: {', '.join(self.VALID_VENDORS)}")
+        if vendor not in vendor_registry:
+            self.errors.append(f"Vendor inválido '{vendor}'. Opciones: {', '.join(vendor_registry.names())}")
         
         if not device.get('model'):
             self.errors.append("device.model es requerido")
@@ -66,48 +103,62 @@ class ConfigValidator:
         used_ips = set()
         
         for idx, wan in enumerate(wan_interfaces):
-            prefix = f"wan_interfaces[{idx}]"
-            
-            # Validar IP
             ip = wan.get('ip_address')
-            if not ip:
-                self.errors.append(f"{prefix}.ip_address es requerido")
-            elif not self._is_valid_ip(ip):
-                self.errors.append(f"{prefix}.ip_address '{ip}' no es válida")
-            elif ip in used_ips:
-                self.errors.append(f"{prefix}.ip_address '{ip}' está duplicada")
-            else:
+            duplicate = bool(ip) and ip in used_ips and self._is_valid_ip(ip)
+            self._validate_wan_entry(idx, wan, duplicate)
+            if ip and not duplicate and self._is_valid_ip(ip):
                 used_ips.add(ip)
             
-            # Validar subnet mask
-            mask = wan.get('subnet_mask')
-            if not mask:
-                self.errors.append(f"{prefix}.subnet_mask es requerido")
-            elif not self._is_valid_subnet_mask(mask):
-                self.errors.append(f"{prefix}.subnet_mask '{mask}' no es válida")
-            
-            # Validar gateway
-            gw = wan.get('gateway')
-            if not gw:
-                self.errors.append(f"{prefix}.gateway es requerido")
-            elif not self._is_valid_ip(gw):
-                self.errors.append(f"{prefix}.gateway '{gw}' no es válida")
-            elif ip and mask and gw:
-                if not self._is_in_same_subnet(ip, gw, mask):
-                    self.errors.append(f"{prefix}.gateway '{gw}' no está en la misma subred que la IP")
-            
             # Validar prioridad
             if wan.get('priority') == 'primary':
                 has_primary = True
-            
-            # Validar bandwidth
-            bw = wan.get('bandwidth_mbps')
-            if bw and (not isinstance(bw, (int, float)) or bw <= 0):
-                self.errors.append(f"{prefix}.bandwidth_mbps debe ser un número positivo")
         
-        if not has_primary and len(wan_interfaces) > 1:
+        self._validate_wan_primary(len(wan_interfaces), has_primary)
+    
+    def _validate_wan_primary(self, wan_count: int, has_primary: bool):
+        if not has_primary and wan_count > 1:
             self.warnings.append("No hay interfaz WAN marcada como 'primary'")
     
+    def _validate_wan_entry(self, idx: int, wan: dict, duplicate_ip: bool = False):
+        """Valida una interfaz WAN; duplicate_ip indica que su IP ya apareció antes"""
+        prefix = f"wan_interfaces[{idx}]"
+        
+        # Validar IP
+        ip = wan.get('ip_address')
+        if not ip:
+            self.errors.append(f"{prefix}.ip_address es requerido")
+        elif not self._is_valid_ip(ip):
+            self.errors.append(f"{prefix}.ip_address '{ip}' no es válida")
+        elif duplicate_ip:
+            self.errors.append(f"{prefix}.ip_address '{ip}' está duplicada")
+        
+        # Validar subnet mask
+        mask = wan.get('subnet_mask')
+        if not mask:
+            self.errors.append(f"{prefix}.subnet_mask es requerido")
+        elif not self._is_valid_subnet_mask(mask):
+            self.errors.append(f"{prefix}.subnet_mask '{mask}' no es válida")
+        elif ip:
+            self._validate_host_address(f"{prefix}.ip_address", ip, mask)
+        
+        # Validar gateway
+        gw = wan.get('gateway')
+        if not gw:
+            self.errors.append(f"{prefix}.gateway es requerido")
+        elif not self._is_valid_ip(gw):
+            self.errors.append(f"{prefix}.gateway '{gw}' no es válida")
+        elif ip and mask and gw:
+            if not self._is_in_same_subnet(ip, gw, mask):
+                self.errors.append(f"{prefix}.gateway '{gw}' no está en la misma subred que la IP")
+            elif self._is_valid_subnet_mask(mask):
+                self._validate_host_address(f"{prefix}.gateway", gw, mask)
+        
+        # Validar bandwidth (y las tasas de subida/bajada de circuitos asimétricos)
+        for field in WAN_RATE_FIELDS:
+            bw = wan.get(field)
+            if bw and (not isinstance(bw, (int, float)) or bw <= 0):
+                self.errors.append(f"{prefix}.{field} debe ser un número positivo")
+    
     def _validate_lan_interfaces(self, lan_interfaces: list):
         if not lan_interfaces:
             self.warnings.append("No hay interfaces LAN configuradas")
@@ -116,45 +167,54 @@ class ConfigValidator:
         used_vlans = set()
         
         for idx, lan in enumerate(lan_interfaces):
-            prefix = f"lan_interfaces[{idx}]"
-            
-            # Validar IP
-            ip = lan.get('ip_address')
-            if not ip:
-                self.errors.append(f"{prefix}.ip_address es requerido")
-            elif not self._is_valid_ip(ip):
-                self.errors.append(f"{prefix}.ip_address '{ip}' no es válida")
-            
-            # Validar subnet mask
-            mask = lan.get('subnet_mask')
-            if not mask:
-                self.errors.append(f"{prefix}.subnet_mask es requerido")
-            elif not self._is_valid_subnet_mask(mask):
-                self.errors.append(f"{prefix}.subnet_mask '{mask}' no es válida")
-            
-            # Validar VLAN
             vlan = lan.get('vlan_id')
-            if vlan is not None:
-                if not isinstance(vlan, int) or vlan < 1 or vlan > 4094:
-                    self.errors.append(f"{prefix}.vlan_id debe estar entre 1 y 4094")
-                elif vlan in used_vlans:
-                    self.errors.append(f"{prefix}.vlan_id {vlan} está duplicado")
-                else:
-                    used_vlans.add(vlan)
+            duplicate = self._is_valid_vlan(vlan) and vlan in used_vlans
+            self._validate_lan_entry(idx, lan, duplicate)
+            if self._is_valid_vlan(vlan):
+                used_vlans.add(vlan)
+    
+    def _validate_lan_entry(self, idx: int, lan: dict, duplicate_vlan: bool = False):
+        """Valida una interfaz LAN; duplicate_vlan indica que su VLAN ya apareció antes"""
+        prefix = f"lan_interfaces[{idx}]"
+        
+        # Validar IP
+        ip = lan.get('ip_address')
+        if not ip:
+            self.errors.append(f"{prefix}.ip_address es requerido")
+        elif not self._is_valid_ip(ip):
+            self.errors.append(f"{prefix}.ip_address '{ip}' no es válida")
+        
+        # Validar subnet mask
+        mask = lan.get('subnet_mask')
+        if not mask:
+            self.errors.append(f"{prefix}.subnet_mask es requerido")
+        elif not self._is_valid_subnet_mask(mask):
+            self.errors.append(f"{prefix}.subnet_mask '{mask}' no es válida")
+        elif ip:
+            self._validate_host_address(f"{prefix}.ip_address", ip, mask)
+        
+        # Validar VLAN
+        vlan = lan.get('vlan_id')
+        if vlan is not None:
+            if not self._is_valid_vlan(vlan):
+                self.errors.append(f"{prefix}.vlan_id debe estar entre 1 y 4094")
+            elif duplicate_vlan:
+                self.errors.append(f"{prefix}.vlan_id {vlan} está duplicado")
+        
+        # Validar DHCP
+        if lan.get('dhcp_enabled'):
+            if not lan.get('dhcp_range_start'):
+                self.errors.append(f"{prefix}.dhcp_range_start es requerido cuando DHCP está habilitado")
+            if not lan.get('dhcp_range_end'):
+                self.errors.append(f"{prefix}.dhcp_range_end es requerido cuando DHCP está habilitado")
             
-            # Validar DHCP
-            if lan.get('dhcp_enabled'):
-                if not lan.get('dhcp_range_start'):
-                    self.errors.append(f"{prefix}.dhcp_range_start es requerido cuando DHCP está habilitado")
-                if not lan.get('dhcp_range_end'):
-                    self.errors.append(f"{prefix}.dhcp_range_end es requerido cuando DHCP está habilitado")
-                
-                # Validar que el rango DHCP esté en la misma subred
-                if ip and mask and lan.get('dhcp_range_start') and lan.get('dhcp_range_end'):
-                    if not self._is_in_same_subnet(lan['dhcp_range_start'], ip, mask):
-                        self.errors.append(f"{prefix}.dhcp_range_start no está en la misma subred")
-                    if not self._is_in_same_subnet(lan['dhcp_range_end'], ip, mask):
-                        self.errors.append(f"{prefix}.dhcp_range_end no está en la misma subred")
+            # Validar que el rango DHCP esté en la misma subred
+            if ip and mask and lan.get('dhcp_range_start') and lan.get('dhcp_range_end'):
+                for field in ('dhcp_range_start', 'dhcp_range_end'):
+                    if not self._is_in_same_subnet(lan[field], ip, mask):
+                        self.errors.append(f"{prefix}.{field} no está en la misma subred")
+                    elif self._is_valid_subnet_mask(mask):
+                        self._validate_host_address(f"{prefix}.{field}", lan[field], mask)
     
     def _validate_services(self, services: dict):
         # Validar DNS servers
@@ -171,7 +231,97 @@ class ConfigValidator:
         if policy_template not in self.VALID_POLICIES:
             self.errors.append(f"policy_template '{policy_template}' no es válido. Opciones: {', '.join(self.VALID_POLICIES)}")
     
+    def _validate_custom_policy(self, policy_template: str, custom_policy: dict):
+        if policy_template != 'custom':
+            return
+        if not custom_policy:
+            self.errors.append("custom_policy es requerido cuando policy_template es 'custom'")
+            return
+        self.errors.extend(compile_policy(custom_policy).errors)
+    
+    def _validate_sdwan(self, sdwan: dict):
+        if not sdwan:
+            return
+        health_check = sdwan.get('health_check') or {}
+        servers = health_check.get('servers')
+        if servers is not None:
+            if not servers:
+                self.errors.append("sdwan.health_check.servers debe tener al menos un servidor")
+            for idx, server in enumerate(servers):
+                if not self._is_valid_ip(server) and not self._is_valid_hostname(server):
+                    self.errors.append(f"sdwan.health_check.servers[{idx}] '{server}' no es válido")
+        protocol = health_check.get('protocol')
+        if protocol is not None and protocol not in HEALTH_CHECK_PROTOCOLS:
+            self.errors.append(f"sdwan.health_check.protocol '{protocol}' no es válido. "
+                               f"Opciones: {', '.join(HEALTH_CHECK_PROTOCOLS)}")
+        interval = health_check.get('interval_ms')
+        low, high = self.HEALTH_CHECK_INTERVAL_MS
+        if interval is not None and not low <= interval <= high:
+            self.errors.append(f"sdwan.health_check.interval_ms debe estar entre {low} y {high}")
+        
+        for name, sla in (sdwan.get('sla') or {}).items():
+            if name not in TRAFFIC_CLASSES:
+                self.errors.append(f"sdwan.sla.{name} no es una clase de tráfico. Opciones: {', '.join(TRAFFIC_CLASSES)}")
+                continue
+            for metric in SLA_METRICS:
+                value = (sla or {}).get(metric)
+                low, high = self.SLA_LIMITS[metric]
+                if value is not None and not low <= value <= high:
+                    self.errors.append(f"sdwan.sla.{name}.{metric} debe estar entre {low} y {high}")
+    
+    def _validate_model_capabilities(self, device: dict, wan_interfaces: list, lan_interfaces: list,
+                                     policy_template: str):
+        """
+        Límites del modelo (errores) y throughput insuficiente para el sitio (advertencia)
+        
+        Si el modelo no está en la tabla de capacidades se revisan los límites
+        del vendor: ningún modelo suyo soporta un sitio que los excede.
+        """
+        requirements = site_requirements({'wan_interfaces': wan_interfaces, 'lan_interfaces': lan_interfaces,
+                                          'policy_template': policy_template})
+        self._check_capabilities(device, requirements)
+    
+    def validate_capabilities(self, device: dict, requirements: dict) -> Tuple[List[str], List[str]]:
+        """
+        (errores, advertencias) de los límites de un modelo para un sitio
+        
+        requirements es site_requirements() del sitio: se calcula una vez y
+        se revisa contra cada destino (vendor, modelo).
+        """
+        self.errors, self.warnings = [], []
+        self._check_capabilities(device, requirements)
+        return self.errors, self.warnings
+    
+    def _check_capabilities(self, device: dict, requirements: dict):
+        device = device or {}
+        vendor = str(device.get('vendor', '')).lower()
+        model = device.get('model')
+        policy_template = requirements['policy_template']
+        capabilities = model_capabilities(vendor, model)
+        if capabilities is None:
+            # Modelo fuera de la tabla: al menos que algún modelo del vendor alcance
+            limits = vendor_limits(vendor)
+            if limits is not None:
+                for violation in limit_violations(limits, requirements):
+                    self.errors.append(f"device.vendor '{vendor}' {violation}")
+            return
+        for violation in limit_violations(capabilities, requirements):
+            self.errors.append(f"device.model '{model}' {violation}")
+        
+        throughput = throughput_shortfall(capabilities, requirements)
+        if throughput is not None:
+            kind = "con IPS/AV" if throughput_key(policy_template) == 'threat_throughput_mbps' else "de firewall"
+            message = (f"device.model '{model}' procesa {throughput} Mbps {kind} y las WAN suman "
+                       f"{requirements['bandwidth_mbps']} Mbps")
+            recommended = recommend(vendor, requirements)['recommended']
+            if recommended:
+                message += f"; modelo recomendado: {recommended}"
+            self.warnings.append(message)
+    
     # Helpers
+    def _is_valid_vlan(self, vlan) -> bool:
+        return isinstance(vlan, int) and 1 <= vlan <= 4094
+    
     def _is_valid_ip(self, ip: str) -> bool:
         try:
             ipaddress.ip_address(ip)
@@ -189,6 +339,27 @@ class ConfigValidator:
         except (ValueError, AttributeError):
             return False
     
+    def _reserved_address(self, ip: str, mask: str) -> Optional[str]:
+        """'red' o 'broadcast' si ip es esa dirección de su subred (/31 y /32 no tienen)"""
+        try:
+            network = ipaddress.IPv4Network(f"{ip}/{mask}", strict=False)
+            address = ipaddress.IPv4Address(ip)
+        except ValueError:
+            return None
+        if network.prefixlen >= 31:
+            return None
+        if address == network.network_address:
+            return 'red'
+        if address == network.broadcast_address:
+            return 'broadcast'
+        return None
+    
+    def _validate_host_address(self, field: str, ip: str, mask: str):
+        """Error si un host (interfaz, gateway, rango DHCP) usa la dirección de red o broadcast"""
+        reserved = self._reserved_address(ip, mask)
+        if reserved:
+            self.errors.append(f"{field} '{ip}' es la dirección de {reserved} de la subred")
+    
     def _is_valid_hostname(self, hostname: str) -> bool:
         pattern = r'^[a-zA-Z0-9]([a-zA-Z0-9\-\.]*[a-zA-Z0-9])?$'
         return bool(re.match(pattern, hostname))
@@ -200,5 +371,5 @@ class ConfigValidator:
             mask_parts = [int(x) for x in mask.split('.')]
             mask_int = (mask_parts[0] << 24) + (mask_parts[1] << 16) + (mask_parts[2] << 8) + mask_parts[3]
             return (ip1_int & mask_int) == (ip2_int & mask_int)
-        except ValueError:
+        except (ValueError, IndexError):  # IndexError: máscara con menos de 4 octetos ('24')
             return False
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
-import json
+from typing import Dict, Iterator, List, Optional
+from serialization import RawJSON, dumps
 
 class VendorConfig(ABC):
     """Clase base abstracta para configuración de vendors"""
@@ -8,11 +8,31 @@ class VendorConfig(ABC):
     SUPPORTED_MODELS: List[str] = []
     VENDOR_NAME: str = ""
     OUTPUT_FORMAT: str = "cli"  # cli, json, api
+    SUPPORTED_OUTPUTS: tuple = ("text",)  # text, plan
+    
+    TIMEZONE_OFFSETS: Dict[str, str] = {
+        "America/Costa_Rica": "-06:00",
+        "America/New_York": "-05:00",
+        "America/Chicago": "-06:00",
+        "America/Denver": "-07:00",
+        "America/Los_Angeles": "-08:00",
+        "America/Bogota": "-05:00",
+        "America/Mexico_City": "-06:00",
+        "UTC": "+00:00"
+    }
     
     def __init__(self):
         self.config_sections: List[str] = []
         self.errors: List[str] = []
         self.params: Dict = {}
+        self.operations: List[Dict] = []
+        self.render_text: bool = True
+        # Los vendors cuyo plan es una traducción aparte del texto (FortiGate)
+        # la omiten cuando no se pidió
+        self.render_plan: bool = True
+        self.pretty: bool = True
+        # id(payload) -> (payload, bytes): cada payload se serializa una sola vez
+        self._serialized: Dict[int, tuple] = {}
     
     @abstractmethod
     def generate_base_config(self, params: dict) -> str:
@@ -50,19 +70,70 @@ class VendorConfig(ABC):
         """Exporta la configuración en el formato especificado"""
         return "\n".join(self.config_sections)
     
+    def iter_config(self) -> Iterator[bytes]:
+        """
+        La salida de export_config() por secciones, ya codificada en UTF-8
+        
+        Para respuestas en streaming: el texto completo nunca se arma en memoria.
+        """
+        for position, section in enumerate(self.config_sections):
+            if position:
+                yield b"\n"
+            yield section.encode("utf-8")
+    
+    def add_operation(self, method: str, target: str, payload: dict,
+                      description: str = "", depends_on: Optional[List[int]] = None) -> int:
+        """
+        Registra una operación de API para la salida 'plan'
+        
+        Por defecto cada operación depende de la primera registrada (la que
+        crea o identifica el sitio). Retorna el id de la operación.
+        """
+        op_id = len(self.operations) + 1
+        if depends_on is None:
+            depends_on = [1] if self.operations else []
+        self.operations.append({
+            "id": op_id,
+            "method": method,
+            "target": target,
+            "description": description,
+            "depends_on": depends_on,
+            "payload": payload
+        })
+        return op_id
+    
+    def export_plan(self, serialized: bool = False) -> List[Dict]:
+        """
+        Exporta las operaciones en orden de dependencias
+        
+        Con serialized=True cada payload se entrega como RawJSON, reutilizando
+        los bytes ya generados para la salida de texto.
+        """
+        if not serialized:
+            return self.operations
+        return [
+            {**op, "payload": RawJSON(self._serialize(op["payload"]))}
+            for op in self.operations
+        ]
+    
+    def _serialize(self, payload) -> bytes:
+        """Serializa un payload una única vez por instancia"""
+        cached = self._serialized.get(id(payload))
+        if cached is None:
+            # Se guarda también el objeto para que su id no pueda reutilizarse
+            cached = (payload, dumps(payload, self.pretty))
+            self._serialized[id(payload)] = cached
+        return cached[1]
+    
+    def _format_payload(self, payload) -> str:
+        """Serializa un payload para la salida de texto (vacío si no se renderiza)"""
+        if not self.render_text:
+            return ""
+        return self._serialize(payload).decode("utf-8")
+    
     def get_timezone_offset(self, timezone: str) -> str:
         """Convierte timezone string a offset"""
-        timezone_map = {
-            "America/Costa_Rica": "-06:00",
-            "America/New_York": "-05:00",
-            "America/Chicago": "-06:00",
-            "America/Denver": "-07:00",
-            "America/Los_Angeles": "-08:00",
-            "America/Bogota": "-05:00",
-            "America/Mexico_City": "-06:00",
-            "UTC": "+00:00"
-        }
-        return timezone_map.get(timezone, "+00:00")
+        return self.TIMEZONE_OFFSETS.get(timezone, "+00:00")
 
     def _cidr_from_mask(self, mask: str) -> int:
         """Convierte subnet mask a notación CIDR"""
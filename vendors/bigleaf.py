@@ -1,15 +1,14 @@
 from .base import VendorConfig
-import json
+from .manifest import VENDOR_MANIFEST
+from traffic_classes import wan_rates
 
 class BigleafConfig(VendorConfig):
     """Generador de configuración para Bigleaf Networks"""
     
     VENDOR_NAME = "bigleaf"
     OUTPUT_FORMAT = "json"
-    SUPPORTED_MODELS = [
-        "Bigleaf Edge 100", "Bigleaf Edge 200", "Bigleaf Edge 500",
-        "Bigleaf Edge 1000", "Bigleaf Edge 2500"
-    ]
+    SUPPORTED_OUTPUTS = ("text", "plan")
+    SUPPORTED_MODELS = VENDOR_MANIFEST['bigleaf']['models']
     
     def __init__(self):
         super().__init__()
@@ -25,6 +24,8 @@ class BigleafConfig(VendorConfig):
             "timezone": site.get('timezone', 'America/Los_Angeles'),
             "notes": f"Configured via automation"
         }
+        # Bigleaf se configura desde Cloud Portal: las operaciones usan method PORTAL
+        self.add_operation("PORTAL", "site", site_config, "Site Information")
         
         config = f'''# ============================================
 # Bigleaf Networks Configuration
@@ -36,7 +37,7 @@ class BigleafConfig(VendorConfig):
 # Below is the configuration checklist and API calls
 
 # --- Site Information ---
-{json.dumps(site_config, indent=2)}
+{self._format_payload(site_config)}
 '''
         self.config_sections.append(config)
         return config
@@ -47,6 +48,7 @@ class BigleafConfig(VendorConfig):
         
         circuits = []
         for idx, wan in enumerate(wan_params):
+            upload, download = wan_rates(wan)
             circuit = {
                 "circuit_name": wan.get('isp_name', f'Circuit {idx + 1}'),
                 "circuit_type": "primary" if wan.get('priority') == 'primary' else "backup",
@@ -57,15 +59,17 @@ class BigleafConfig(VendorConfig):
                     "gateway": wan['gateway']
                 },
                 "bandwidth": {
-                    "download_mbps": wan.get('bandwidth_mbps', 100),
-                    "upload_mbps": wan.get('bandwidth_mbps', 100)
+                    "download_mbps": download,
+                    "upload_mbps": upload
                 },
                 "isp_name": wan.get('isp_name', '')
             }
             circuits.append(circuit)
+        circuit_config = {"circuits": circuits}
+        self.add_operation("PORTAL", "circuits", circuit_config, "Circuit Configuration")
         
         config += f'''# Circuit Configuration
-{json.dumps({"circuits": circuits}, indent=2)}
+{self._format_payload(circuit_config)}
 '''
         
         self.config_sections.append(config)
@@ -86,8 +90,10 @@ class BigleafConfig(VendorConfig):
                 "end": lan_params[0].get('dhcp_range_end', '192.168.1.200')
             }
         
+        self.add_operation("PORTAL", "lan", lan_config, "LAN Settings")
+        
         config += f'''# LAN Settings
-{json.dumps(lan_config, indent=2)}
+{self._format_payload(lan_config)}
 
 # Note: Bigleaf does not support VLANs directly
 # Configure VLANs on upstream switch if needed
@@ -107,8 +113,9 @@ class BigleafConfig(VendorConfig):
             "cloud_app_optimization": True,
             "optimization_mode": policy_set  # basic, standard, advanced
         }
+        self.add_operation("PORTAL", "traffic_policies", policies, "Traffic Policies")
         
-        config += f'''{json.dumps(policies, indent=2)}
+        config += f'''{self._format_payload(policies)}
 
 # Application-specific policies (configured in Bigleaf Portal)
 # - Real-time apps (VoIP, Video): Always prioritized
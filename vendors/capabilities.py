@@ -0,0 +1,236 @@
+"""Capacidades por modelo y dimensionamiento por ancho de banda.
+
+Igual que el manifiesto, es un módulo de datos: se importa sin cargar
+ningún módulo de vendor. Por modelo:
+
+    max_wan_interfaces        interfaces WAN utilizables a la vez
+    max_vlans                 VLAN / segmentos LAN con vlan_id
+    max_dhcp_scopes           LAN con servidor DHCP
+    firewall_throughput_mbps  firewall stateful (políticas basic/standard/custom)
+    vpn_throughput_mbps       IPsec / overlay
+    threat_throughput_mbps    con IPS/AV activos (política advanced)
+    max_sessions              sesiones concurrentes
+    virtual                   appliance virtual (no se recomienda para un sitio físico)
+
+Los valores son los de las hojas de datos públicas de cada fabricante
+(Mbps; cada uno mide con su propio perfil de tráfico) y None significa que
+el fabricante no publica ese límite. En Cato la inspección ocurre en el PoP,
+por eso threat_throughput_mbps es igual al de firewall; Bigleaf no hace
+IPS/AV en el equipo y sus VLAN se configuran en el switch (max_vlans None).
+Los modelos de cada vendor van del menor al mayor. Para un modelo que no
+está en la tabla se aplican los límites del vendor (VENDOR_LIMITS, los de
+su modelo más grande).
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+def _model(wan, vlans, dhcp, firewall, vpn, threat, sessions, virtual=False) -> dict:
+    return {
+        'max_wan_interfaces': wan,
+        'max_vlans': vlans,
+        'max_dhcp_scopes': dhcp,
+        'firewall_throughput_mbps': firewall,
+        'vpn_throughput_mbps': vpn,
+        'threat_throughput_mbps': threat,
+        'max_sessions': sessions,
+        'virtual': virtual,
+    }
+
+
+MODEL_CAPABILITIES: Dict[str, Dict[str, dict]] = {
+    'fortinet': {
+        "FortiGate 40F": _model(2, 256, 64, 5000, 4400, 600, 700_000),
+        "FortiGate 60F": _model(2, 256, 128, 10000, 6500, 700, 700_000),
+        "FortiGate 70F": _model(2, 256, 128, 10000, 6200, 800, 1_500_000),
+        "FortiGate 80F": _model(3, 512, 128, 10000, 6500, 900, 1_500_000),
+        "FortiGate 100F": _model(4, 1024, 256, 20000, 11500, 1000, 1_500_000),
+        "FortiGate 200F": _model(8, 1024, 256, 27000, 13000, 3000, 3_000_000),
+        "FortiGate 400F": _model(8, 4094, 512, 79500, 55000, 9000, 7_000_000),
+        "FortiGate 600F": _model(8, 4094, 1024, 139000, 55000, 10500, 8_000_000),
+    },
+    'meraki': {
+        "MX64": _model(2, 50, 50, 250, 100, 200, None),
+        "MX64W": _model(2, 50, 50, 250, 100, 200, None),
+        "MX67": _model(2, 50, 50, 450, 200, 300, None),
+        "MX67W": _model(2, 50, 50, 450, 200, 300, None),
+        "MX67C": _model(2, 50, 50, 450, 200, 300, None),
+        "MX68": _model(2, 50, 50, 450, 200, 300, None),
+        "MX68W": _model(2, 50, 50, 450, 200, 300, None),
+        "MX68CW": _model(2, 50, 50, 450, 200, 300, None),
+        "MX84": _model(2, 128, 128, 500, 250, 320, None),
+        "MX100": _model(2, 128, 128, 750, 500, 650, None),
+        "MX75": _model(2, 128, 128, 1000, 500, 750, None),
+        "MX85": _model(2, 128, 128, 1000, 500, 750, None),
+        "MX95": _model(2, 256, 256, 2000, 800, 1000, None),
+        "MX105": _model(2, 256, 256, 3000, 1000, 1500, None),
+        "MX250": _model(2, 512, 512, 4000, 1000, 2000, None),
+        "MX450": _model(2, 512, 512, 6000, 2000, 5000, None),
+    },
+    'velocloud': {
+        "Edge 510": _model(2, 32, 32, 200, 200, 100, 225_000),
+        "Edge 520": _model(2, 32, 32, 200, 200, 100, 225_000),
+        "Edge 610": _model(3, 64, 64, 350, 350, 175, 225_000),
+        "Edge 540": _model(4, 64, 64, 1000, 1000, 500, 460_000),
+        "Edge 620": _model(4, 128, 128, 750, 750, 375, 460_000),
+        "Edge 710": _model(4, 128, 128, 1000, 1000, 500, 460_000),
+        "Edge 640": _model(6, 256, 256, 1500, 1500, 750, 750_000),
+        "Edge 720": _model(6, 256, 256, 2000, 2000, 1000, 750_000),
+        "Edge 840": _model(8, 512, 512, 2000, 2000, 1000, 1_900_000),
+        "Edge 740": _model(8, 512, 512, 3000, 3000, 1500, 1_900_000),
+        "Edge 860": _model(8, 512, 512, 5000, 5000, 2500, 1_900_000),
+        "Edge 1000": _model(8, 1024, 1024, 5000, 5000, 2500, 1_900_000),
+        "Edge 3400": _model(16, 1024, 1024, 5000, 5000, 2500, 2_000_000),
+        "Edge 3800": _model(16, 2048, 2048, 10000, 10000, 5000, 2_000_000),
+    },
+    'bigleaf': {
+        "Bigleaf Edge 100": _model(2, None, 1, 100, 100, 100, None),
+        "Bigleaf Edge 200": _model(2, None, 1, 200, 200, 200, None),
+        "Bigleaf Edge 500": _model(3, None, 1, 500, 500, 500, None),
+        "Bigleaf Edge 1000": _model(4, None, 1, 1000, 1000, 1000, None),
+        "Bigleaf Edge 2500": _model(4, None, 1, 2500, 2500, 2500, None),
+    },
+    'cato': {
+        "Socket X1500": _model(3, 64, 64, 500, 500, 500, None),
+        "Socket X1600": _model(4, 256, 256, 1000, 1000, 1000, None),
+        "Socket X1700": _model(8, 1024, 1024, 3000, 3000, 3000, None),
+        "vSocket (AWS)": _model(1, 16, 16, 500, 500, 500, None, virtual=True),
+        "vSocket (Azure)": _model(1, 16, 16, 500, 500, 500, None, virtual=True),
+        "vSocket (GCP)": _model(1, 16, 16, 500, 500, 500, None, virtual=True),
+    },
+}
+
+# Límites duros: límite -> requisito del sitio y cómo se nombra en los mensajes
+_LIMIT_CHECKS = (
+    ('max_wan_interfaces', 'wan_interfaces', "interfaces WAN"),
+    ('max_vlans', 'vlans', "VLAN"),
+    ('max_dhcp_scopes', 'dhcp_scopes', "scopes DHCP"),
+)
+
+
+def _vendor_limits(models: Dict[str, dict]) -> dict:
+    """El mayor valor de cada límite entre los modelos (None si alguno no publica límite)"""
+    limits = {}
+    for key, _, _ in _LIMIT_CHECKS:
+        values = [capabilities[key] for capabilities in models.values()]
+        limits[key] = None if None in values else max(values)
+    return limits
+
+
+# Lo máximo que soporta cada vendor con su modelo más grande: se aplica
+# cuando el modelo del sitio no está en MODEL_CAPABILITIES
+VENDOR_LIMITS: Dict[str, dict] = {vendor: _vendor_limits(models) for vendor, models in MODEL_CAPABILITIES.items()}
+
+# Plantilla de políticas -> capacidad de throughput que la limita
+THROUGHPUT_BY_POLICY = {
+    'advanced': 'threat_throughput_mbps',
+}
+DEFAULT_THROUGHPUT = 'firewall_throughput_mbps'
+
+
+def is_positive(value) -> bool:
+    """Tasa declarada válida: número (no bool) mayor que cero"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0
+
+
+def model_capabilities(vendor: str, model: str) -> Optional[dict]:
+    """Capacidades del modelo, o None si no está en la tabla"""
+    return MODEL_CAPABILITIES.get(vendor, {}).get(model)
+
+
+def vendor_limits(vendor: str) -> Optional[dict]:
+    """Límites del modelo más grande del vendor, o None si el vendor no está en la tabla"""
+    return VENDOR_LIMITS.get(vendor)
+
+
+def throughput_key(policy_template: str) -> str:
+    return THROUGHPUT_BY_POLICY.get(policy_template, DEFAULT_THROUGHPUT)
+
+
+def declared_rates(wan: dict) -> Tuple[Optional[float], Optional[float]]:
+    """(subida, bajada) declaradas en Mbps; cada sentido sin tasa propia toma bandwidth_mbps (None si tampoco hay)"""
+    bandwidth = wan.get('bandwidth_mbps') if is_positive(wan.get('bandwidth_mbps')) else None
+    upload, download = wan.get('upload_mbps'), wan.get('download_mbps')
+    return (upload if is_positive(upload) else bandwidth,
+            download if is_positive(download) else bandwidth)
+
+
+def wan_bandwidth(wan: dict):
+    """Mbps que una WAN suma al sitio (None si no declara ninguno)"""
+    # En circuitos asimétricos cuenta el sentido más cargado
+    rates = [value for value in declared_rates(wan) if value is not None]
+    return max(rates) if rates else None
+
+
+def site_requirements(params: dict) -> dict:
+    """Lo que el sitio le pide al equipo: WAN, VLAN, scopes DHCP y ancho de banda sumado"""
+    wans = [w for w in params.get('wan_interfaces') or [] if isinstance(w, dict)]
+    lans = [l for l in params.get('lan_interfaces') or [] if isinstance(l, dict)]
+    policy = params.get('policy_template', 'basic')
+    bandwidth = 0
+    for wan in wans:
+        rate = wan_bandwidth(wan)
+        if rate is not None:
+            bandwidth += rate
+    return {
+        'wan_interfaces': len(wans),
+        'vlans': sum(1 for lan in lans if lan.get('vlan_id') is not None),
+        'dhcp_scopes': sum(1 for lan in lans if lan.get('dhcp_enabled')),
+        'bandwidth_mbps': bandwidth,
+        'policy_template': policy if isinstance(policy, str) else 'basic',
+    }
+
+
+def limit_violations(capabilities: dict, requirements: dict) -> List[str]:
+    """Límites duros del modelo que el sitio excede (texto sin prefijo)"""
+    violations = []
+    for limit_key, requirement_key, label in _LIMIT_CHECKS:
+        limit = capabilities.get(limit_key)
+        if limit is not None and requirements[requirement_key] > limit:
+            violations.append(f"soporta hasta {limit} {label} y el sitio tiene {requirements[requirement_key]}")
+    return violations
+
+
+def throughput_shortfall(capabilities: dict, requirements: dict) -> Optional[int]:
+    """Throughput del modelo para la política si no alcanza el ancho de banda sumado"""
+    throughput = capabilities.get(throughput_key(requirements['policy_template']))
+    if throughput is not None and requirements['bandwidth_mbps'] > throughput:
+        return throughput
+    return None
+
+
+def recommend(vendor: str, requirements: dict, sessions: Optional[int] = None) -> dict:
+    """
+    Modelo más chico del vendor que cubre el sitio
+
+    Se descartan los appliances virtuales. Retorna 'recommended' (None si
+    ningún modelo alcanza) y 'candidates' con el throughput que aplica a la
+    política, la utilización esperada y por qué no alcanza cada modelo.
+    """
+    key = throughput_key(requirements['policy_template'])
+    candidates = []
+    for model, capabilities in MODEL_CAPABILITIES.get(vendor, {}).items():
+        if capabilities['virtual']:
+            continue
+        reasons = limit_violations(capabilities, requirements)
+        throughput = capabilities.get(key)
+        if throughput_shortfall(capabilities, requirements) is not None:
+            reasons.append(f"{throughput} Mbps no alcanzan para {requirements['bandwidth_mbps']} Mbps")
+        if sessions is not None and capabilities['max_sessions'] is not None and sessions > capabilities['max_sessions']:
+            reasons.append(f"soporta hasta {capabilities['max_sessions']} sesiones")
+        candidates.append({
+            'model': model,
+            'throughput_mbps': throughput,
+            'utilization': round(requirements['bandwidth_mbps'] / throughput, 3) if throughput else None,
+            'fits': not reasons,
+            'reasons': reasons,
+        })
+    fitting = [c for c in candidates if c['fits']]
+    # El más chico: menor throughput para la política (empate: orden de la tabla)
+    best = min(fitting, key=lambda c: c['throughput_mbps'] or 0) if fitting else None
+    return {
+        'vendor': vendor,
+        'throughput': key,
+        'requirements': requirements,
+        'recommended': best['model'] if best else None,
+        'candidates': candidates,
+    }
@@ -1,15 +1,15 @@
 from .base import VendorConfig
-import json
+from .manifest import VENDOR_MANIFEST
+from policy_engine import compile_policy
+from traffic_classes import wan_rates
 
 class CatoConfig(VendorConfig):
     """Generador de configuración para CATO Networks"""
     
     VENDOR_NAME = "cato"
     OUTPUT_FORMAT = "json"
-    SUPPORTED_MODELS = [
-        "Socket X1500", "Socket X1600", "Socket X1700",
-        "vSocket (AWS)", "vSocket (Azure)", "vSocket (GCP)"
-    ]
+    SUPPORTED_OUTPUTS = ("text", "plan")
+    SUPPORTED_MODELS = VENDOR_MANIFEST['cato']['models']
     
     def __init__(self):
         super().__init__()
@@ -34,7 +34,7 @@ class CatoConfig(VendorConfig):
                 }
             }
         }
-        self.api_mutations.append(site_mutation)
+        self._add_mutation(site_mutation)
         
         config = f'''# ============================================
 # CATO Networks Configuration
@@ -48,7 +48,7 @@ class CatoConfig(VendorConfig):
 
 # --- Create Site ---
 # GraphQL Mutation: addSite
-{json.dumps(site_mutation, indent=2)}
+{self._format_payload(site_mutation)}
 '''
         self.config_sections.append(config)
         return config
@@ -58,6 +58,7 @@ class CatoConfig(VendorConfig):
         
         interfaces = []
         for idx, wan in enumerate(wan_params):
+            upload, download = wan_rates(wan)
             interface = {
                 "mutation": "updateSocketInterface",
                 "input": {
@@ -65,8 +66,8 @@ class CatoConfig(VendorConfig):
                     "name": wan.get('isp_name', f'WAN-{idx + 1}'),
                     "destType": "CATO",
                     "bandwidth": {
-                        "upstreamBandwidth": wan.get('bandwidth_mbps', 100),
-                        "downstreamBandwidth": wan.get('bandwidth_mbps', 100),
+                        "upstreamBandwidth": upload,
+                        "downstreamBandwidth": download,
                         "upstreamBandwidthPriority": 1 if wan.get('priority') == 'primary' else 2
                     },
                     "staticConfiguration": {
@@ -77,9 +78,9 @@ class CatoConfig(VendorConfig):
                 }
             }
             interfaces.append(interface)
-            self.api_mutations.append(interface)
+            self._add_mutation(interface)
         
-        config += f'''{json.dumps({"interfaces": interfaces}, indent=2)}
+        config += f'''{self._format_payload({"interfaces": interfaces})}
 '''
         self.config_sections.append(config)
         return config
@@ -105,20 +106,21 @@ class CatoConfig(VendorConfig):
                 }
             }
             native_ranges.append(native_range)
-            self.api_mutations.append(native_range)
+            self._add_mutation(native_range)
         
-        config += f'''{json.dumps({"nativeRanges": native_ranges}, indent=2)}
+        config += f'''{self._format_payload({"nativeRanges": native_ranges})}
 '''
         self.config_sections.append(config)
         return config
     
     def apply_policies(self, policy_set: str) -> str:
         policies = {
-            'basic': self._basic_policies(),
-            'standard': self._standard_policies(),
-            'advanced': self._advanced_policies()
+            'basic': self._basic_policies,
+            'standard': self._standard_policies,
+            'advanced': self._advanced_policies,
+            'custom': self._custom_policies
         }
-        config = policies.get(policy_set, policies['basic'])
+        config = policies.get(policy_set, policies['basic'])()
         self.config_sections.append(config)
         return config
     
@@ -137,12 +139,59 @@ class CatoConfig(VendorConfig):
                 }
             }
         }
-        self.api_mutations.append(wan_firewall)
+        self._add_mutation(wan_firewall)
         
         return f'''\n# --- WAN Firewall (Basic) ---
-{json.dumps(wan_firewall, indent=2)}
+{self._format_payload(wan_firewall)}
 '''
     
+    def _custom_policies(self) -> str:
+        """
+        Reglas de params['custom_policy'] como mutaciones de firewall
+        
+        Las reglas hacia una zona de internet van al Internet Firewall; el
+        resto (tráfico entre sitios/zonas) al WAN Firewall.
+        """
+        policy = compile_policy(self.params.get('custom_policy') or {})
+        config = "\n# --- Custom Firewall Policies ---\n"
+        
+        for rule in policy.rules:
+            custom = []
+            for protocol, ranges in policy.ports_by_protocol(rule['service']).items():
+                entry = {"protocol": protocol.upper()}
+                single = [str(low) for low, high in ranges if low == high]
+                if single:
+                    entry["port"] = single
+                spans = [{"from": low, "to": high} for low, high in ranges if low != high]
+                if spans:
+                    entry["portRange"] = spans
+                custom.append(entry)
+            
+            internet = policy.is_internet_zone(rule['dst_zone'])
+            rule_input = {
+                "name": rule['name'],
+                "enabled": True,
+                "source": {"subnet": policy.cidrs(rule['source']) or "ANY"},
+                "destination": {"subnet": policy.cidrs(rule['destination']) or "ANY"},
+                "service": {"custom": custom} if custom else {"protocol": "ANY"},
+                "action": "ALLOW" if rule['action'] == 'allow' else "BLOCK",
+                "tracking": {
+                    "event": {"enabled": rule['log']}
+                },
+                "at": {"position": "LAST_IN_POLICY"}
+            }
+            if rule['comment']:
+                rule_input["description"] = rule['comment']
+            mutation = {
+                "mutation": "addInternetFirewallRule" if internet else "addWanFirewallRule",
+                "input": rule_input
+            }
+            self._add_mutation(mutation)
+            config += f'''{self._format_payload(mutation)}
+'''
+        
+        return config
+    
     def _standard_policies(self) -> str:
         base = self._basic_policies()
         
@@ -162,10 +211,10 @@ class CatoConfig(VendorConfig):
                 }
             }
         }
-        self.api_mutations.append(internet_firewall)
+        self._add_mutation(internet_firewall)
         
         return base + f'''\n# --- Internet Firewall (Standard) ---
-{json.dumps(internet_firewall, indent=2)}
+{self._format_payload(internet_firewall)}
 '''
     
     def _advanced_policies(self) -> str:
@@ -183,12 +232,17 @@ class CatoConfig(VendorConfig):
                 }
             }
         }
-        self.api_mutations.append(ips_policy)
+        self._add_mutation(ips_policy)
         
         return base + f'''\n# --- IPS Policy (Advanced) ---
-{json.dumps(ips_policy, indent=2)}
+{self._format_payload(ips_policy)}
 '''
     
+    def _add_mutation(self, mutation: dict) -> int:
+        """Registra una mutación GraphQL y su operación en el plan"""
+        self.api_mutations.append(mutation)
+        return self.add_operation("mutation", mutation["mutation"], mutation["input"])
+    
     def _cidr_from_mask(self, mask: str) -> int:
         return sum([bin(int(x)).count('1') for x in mask.split('.')])
     
@@ -1,15 +1,19 @@
 from .base import VendorConfig
+from .fortios_cli import CliConfig, parse
+from .fortios_rest import ORDERED_TABLES, cmdb_requests
+from .manifest import VENDOR_MANIFEST
+from policy_engine import compile_policy, format_ports
+from traffic_classes import (CLASS_SHAPING, SHAPING_CLASSES, TRAFFIC_CLASSES, class_rates, is_primary,
+                             link_weights, per_ip_kbps, sdwan_settings, shaped_kbps, steering_order, wan_rates)
 
 class FortinetConfig(VendorConfig):
     """Generador de configuración para FortiGate"""
     
     VENDOR_NAME = "fortinet"
     OUTPUT_FORMAT = "cli"
-    SUPPORTED_MODELS = [
-        "FortiGate 40F", "FortiGate 60F", "FortiGate 70F",
-        "FortiGate 80F", "FortiGate 100F", "FortiGate 200F",
-        "FortiGate 400F", "FortiGate 600F"
-    ]
+    # plan: payloads de la API REST de FortiOS (cmdb), ver fortios_rest
+    SUPPORTED_OUTPUTS = ("text", "plan")
+    SUPPORTED_MODELS = VENDOR_MANIFEST['fortinet']['models']
     
     TIMEZONE_CODES = {
         "America/Costa_Rica": "12",
@@ -20,8 +24,30 @@ class FortinetConfig(VendorConfig):
         "UTC": "80"
     }
     
+    # Categorías de Application Control (FortiGuard) de cada clase de tráfico:
+    # 3 VoIP, 5 Video/Audio, 28 Collaboration, 29 Business, 30 Cloud.IT
+    APP_CATEGORIES = {
+        'voice': "3",
+        'video': "5",
+        'business': "28 29 30",
+    }
+    SDWAN_HEALTH_CHECK = "SLA_Monitor"
+    # Prioridad de cola de los shapers compartidos
+    SHAPER_PRIORITIES = {'high': "high", 'normal': "medium", 'low': "low"}
+    PER_IP_SHAPER = "per-ip-default"
+    # Lista de Application Control solo de monitoreo: FortiOS identifica la
+    # categoría de una aplicación solo en el tráfico de una política con un
+    # perfil de Application Control
+    APP_MONITOR_LIST = "sdwan-app-monitor"
+    APP_INSPECTION_PROFILE = "certificate-inspection"
+    
     def __init__(self):
         super().__init__()
+        # Tablas CLI del sitio (sistema, interfaces, rutas, SD-WAN, shaping,
+        # DHCP); se emiten como una sola sección al terminar las LAN
+        self.cli = CliConfig()
+        # Hay reglas que usan categorías de aplicación (SD-WAN o shaping)
+        self.uses_app_categories = False
     
     def generate_base_config(self, params: dict) -> str:
         self.params = params
@@ -41,116 +67,162 @@ class FortinetConfig(VendorConfig):
 # Generated automatically - Review before applying
 
 # ============================================
-
-# --- System Global Settings ---
-config system global
-    set hostname "{site.get('name', 'FortiGate')}"
-    set timezone {tz_code}
-    set admin-sport 8443
-    set admin-ssh-port 22
-    set admintimeout 30
-end
-
-# --- DNS Configuration ---
-config system dns
-    set primary {dns_primary}
-    set secondary {dns_secondary}
-end
-
-# --- NTP Configuration ---
-config system ntp
-    set ntpsync enable
-    set server-mode disable
-    config ntpserver
-        edit 1
-            set server {ntp_server}
-        next
-    end
-end
-
-# --- SNMP Configuration ---
-config system snmp sysinfo
-    set status enable
-    set description "{site.get('customer', '')} - {site.get('name', '')}"
-    set location "{site.get('location', '')}"
-end
 '''
+        self.cli.table("system global", "System Global Settings").settings.update({
+            "hostname": f'"{site.get("name", "FortiGate")}"',
+            "timezone": tz_code,
+            "admin-sport": 8443,
+            "admin-ssh-port": 22,
+            "admintimeout": 30,
+        })
+        self.cli.table("system dns", "DNS Configuration").settings.update({
+            "primary": dns_primary,
+            "secondary": dns_secondary,
+        })
+        ntp = self.cli.table("system ntp", "NTP Configuration")
+        ntp.settings.update({"ntpsync": "enable", "server-mode": "disable"})
+        ntp.table("ntpserver").edit(1, {"server": ntp_server})
+        self.cli.table("system snmp sysinfo", "SNMP Configuration").settings.update({
+            "status": "enable",
+            "description": f'"{site.get("customer", "")} - {site.get("name", "")}"',
+            "location": f'"{site.get("location", "")}"',
+        })
         self.config_sections.append(config)
         return config
     
     def apply_wan_config(self, wan_params: list) -> str:
-        config = "\n# --- WAN Interface Configuration ---\n"
+        interfaces = self.cli.table("system interface", "Interfaces")
+        routes = self.cli.table("router static", "Static Routes")
         
         for idx, wan in enumerate(wan_params):
             iface = wan.get('interface_name', f'wan{idx + 1}')
             priority = 10 if wan.get('priority') == 'primary' else 20
+            upload, download = wan_rates(wan)
             
-            config += f'''
-config system interface
-    edit "{iface}"
-        set mode static
-        set ip {wan['ip_address']} {wan['subnet_mask']}
-        set allowaccess ping https ssh snmp
-        set alias "{wan.get('isp_name', f'WAN-{idx + 1}')}"
-        set role wan
-        set estimated-upstream-bandwidth {wan.get('bandwidth_mbps', 100) * 1000}
-        set estimated-downstream-bandwidth {wan.get('bandwidth_mbps', 100) * 1000}
-    next
-end
-
-config router static
-    edit {idx + 1}
-        set gateway {wan['gateway']}
-        set device "{iface}"
-        set priority {priority}
-        set comment "{wan.get('isp_name', f'Route via WAN-{idx + 1}')}"
-    next
-end
-'''
+            interfaces.edit(f'"{iface}"', {
+                "mode": "static",
+                "ip": f"{wan['ip_address']} {wan['subnet_mask']}",
+                "allowaccess": "ping https ssh snmp",
+                "alias": f'"{wan.get("isp_name", f"WAN-{idx + 1}")}"',
+                "role": "wan",
+                "estimated-upstream-bandwidth": int(upload * 1000),
+                "estimated-downstream-bandwidth": int(download * 1000),
+                "outbandwidth": shaped_kbps(upload),
+                "inbandwidth": shaped_kbps(download),
+            })
+            routes.edit(idx + 1, {
+                "gateway": wan['gateway'],
+                "device": f'"{iface}"',
+                "priority": priority,
+                "comment": f'"{wan.get("isp_name", f"Route via WAN-{idx + 1}")}"',
+            })
         
         # SD-WAN si hay múltiples WANs
         if len(wan_params) > 1:
-            config += self._generate_sdwan_config(wan_params)
+            self._generate_sdwan_config(wan_params)
+        self._generate_shaping_config(wan_params)
+        return ""
+    
+    def _generate_sdwan_config(self, wan_params: list):
+        """
+        Miembros con peso proporcional al ancho de banda, un health-check con
+        un SLA por clase de tráfico y reglas de servicio que llevan cada clase
+        por el primer enlace (primary primero) que cumple su SLA
+        """
+        settings = sdwan_settings(self.params.get('sdwan'))
+        health_check = settings['health_check']
+        weights = link_weights(wan_params)
+        members = " ".join(str(idx + 1) for idx in steering_order(wan_params))
         
-        self.config_sections.append(config)
-        return config
+        sdwan = self.cli.table("system sdwan", "SD-WAN Configuration")
+        sdwan.set("status", "enable").set("load-balance-mode", "weight-based")
+        sdwan.table("zone").edit('"virtual-wan-link"')
+        member_table = sdwan.table("members")
+        for idx, wan in enumerate(wan_params):
+            member_table.edit(idx + 1, {
+                "interface": f'"{wan.get("interface_name", f"wan{idx + 1}")}"',
+                "gateway": wan['gateway'],
+                "weight": weights[idx],
+                "priority": 10 if is_primary(wan) else 20,
+            })
+        
+        check = sdwan.table("health-check").edit(f'"{self.SDWAN_HEALTH_CHECK}"', {
+            "server": " ".join(f'"{server}"' for server in health_check['servers']),
+            "protocol": health_check['protocol'],
+            "interval": health_check['interval_ms'],
+            "failtime": 5,
+            "recoverytime": 5,
+            "members": " ".join(str(idx + 1) for idx in range(len(wan_params))),
+        })
+        sla_table = check.table("sla")
+        services = sdwan.table("service")
+        for sla_id, name in enumerate(TRAFFIC_CLASSES, 1):
+            sla = settings['sla'][name]
+            sla_table.edit(sla_id, {
+                "link-cost-factor": "latency jitter packet-loss",
+                "latency-threshold": sla['latency_ms'],
+                "jitter-threshold": sla['jitter_ms'],
+                "packetloss-threshold": sla['packet_loss_pct'],
+            })
+            rule = services.edit(sla_id, {
+                "name": f'"{name}"',
+                "mode": "sla",
+                "src": '"all"',
+                "internet-service": "enable",
+                "internet-service-app-ctrl-category": self.APP_CATEGORIES[name],
+                "priority-members": members,
+            })
+            rule.table("sla").edit(f'"{self.SDWAN_HEALTH_CHECK}"', {"id": sla_id})
+        self.uses_app_categories = True
     
-    def _generate_sdwan_config(self, wan_params: list) -> str:
-        members = ""
+    def _generate_shaping_config(self, wan_params: list):
+        """
+        Shapers compartidos por clase y sentido de cada WAN (garantizado y
+        máximo escalados a su subida y bajada), un shaper por IP para el
+        tráfico sin clase y las políticas de shaping que los asignan
+        """
+        shapers = self.cli.table("firewall shaper traffic-shaper", "Traffic Shaping")
+        per_ip = self.cli.table("firewall shaper per-ip-shaper")
+        policies = self.cli.table("firewall shaping-policy")
+        policy_id = 0
         for idx, wan in enumerate(wan_params):
             iface = wan.get('interface_name', f'wan{idx + 1}')
-            members += f'''
-        edit {idx + 1}
-            set interface "{iface}"
-            set gateway {wan['gateway']}
-        next
-'''
-        
-        return f'''
-# --- SD-WAN Configuration ---
-config system sdwan
-    set status enable
-    config zone
-        edit "virtual-wan-link"
-        next
-    end
-    config members
-{members}    end
-    config health-check
-        edit "Default_DNS"
-            set server "8.8.8.8"
-            set protocol dns
-            set interval 1000
-            set failtime 5
-            set recoverytime 5
-            set members 0
-        next
-    end
-end
-'''
+            upload, download = wan_rates(wan)
+            directions = (('up', class_rates(shaped_kbps(upload))), ('down', class_rates(shaped_kbps(download))))
+            for direction, rates in directions:
+                for name in SHAPING_CLASSES:
+                    guaranteed, maximum = rates[name]
+                    shaping = CLASS_SHAPING[name]
+                    shaper = shapers.edit(f'"{name}-{iface}-{direction}"', {
+                        "guaranteed-bandwidth": guaranteed,
+                        "maximum-bandwidth": maximum,
+                        "priority": self.SHAPER_PRIORITIES[shaping['priority']],
+                    })
+                    if shaping['dscp']:
+                        shaper.set("diffserv", "enable").set("diffservcode", f"{shaping['dscp']:06b}")
+            
+            # La subida es el sentido original (LAN -> WAN) y la bajada, el de respuesta
+            for name in SHAPING_CLASSES:
+                policy_id += 1
+                policy = policies.edit(policy_id, {
+                    "name": f'"{name}-{iface}"',
+                    "service": '"ALL"',
+                    "dstintf": f'"{iface}"',
+                    "srcaddr": '"all"',
+                    "dstaddr": '"all"',
+                })
+                if name in self.APP_CATEGORIES:
+                    policy.set("app-category", self.APP_CATEGORIES[name])
+                    self.uses_app_categories = True
+                else:
+                    policy.set("per-ip-shaper", f'"{self.PER_IP_SHAPER}"')
+                policy.set("traffic-shaper", f'"{name}-{iface}-up"')
+                policy.set("traffic-shaper-reverse", f'"{name}-{iface}-down"')
+        per_ip.edit(f'"{self.PER_IP_SHAPER}"', {"max-bandwidth": per_ip_kbps(wan_params)})
     
     def apply_lan_config(self, lan_params: list) -> str:
-        config = "\n# --- LAN Interface Configuration ---\n"
+        interfaces = self.cli.table("system interface", "Interfaces")
+        dhcp = self.cli.table("system dhcp server", "DHCP Servers")
         dhcp_id = 1
         
         for lan in lan_params:
@@ -159,71 +231,109 @@ end
             
             if vlan_id and vlan_id > 1:
                 # Configurar como VLAN interface
-                config += f'''
-config system interface
-    edit "{lan.get('vlan_name', f'VLAN{vlan_id}')}"
-        set vdom "root"
-        set vlanid {vlan_id}
-        set interface "lan"
-        set ip {lan['ip_address']} {lan['subnet_mask']}
-        set allowaccess ping https ssh
-        set role lan
-        set device-identification enable
-    next
-end
-'''
                 iface = lan.get('vlan_name', f'VLAN{vlan_id}')
+                interfaces.edit(f'"{iface}"', {
+                    "vdom": '"root"',
+                    "vlanid": vlan_id,
+                    "interface": '"lan"',
+                    "ip": f"{lan['ip_address']} {lan['subnet_mask']}",
+                    "allowaccess": "ping https ssh",
+                    "role": "lan",
+                    "device-identification": "enable",
+                })
             else:
-                config += f'''
-config system interface
-    edit "{iface}"
-        set mode static
-        set ip {lan['ip_address']} {lan['subnet_mask']}
-        set allowaccess ping https ssh
-        set role lan
-        set device-identification enable
-    next
-end
-'''
+                interfaces.edit(f'"{iface}"', {
+                    "mode": "static",
+                    "ip": f"{lan['ip_address']} {lan['subnet_mask']}",
+                    "allowaccess": "ping https ssh",
+                    "role": "lan",
+                    "device-identification": "enable",
+                })
             
             # DHCP Server
             if lan.get('dhcp_enabled'):
                 dns_servers = self.params.get('services', {}).get('dns_servers', ['8.8.8.8', '8.8.4.4'])
                 dns1 = dns_servers[0] if dns_servers else '8.8.8.8'
                 
-                config += f'''
-config system dhcp server
-    edit {dhcp_id}
-        set interface "{iface}"
-        set default-gateway {lan.get('ip_address', '192.168.1.1')}
-        set dns-server1 {dns1}
-        set lease-time 86400
-        config ip-range
-            edit 1
-                set start-ip {lan.get('dhcp_range_start', '')}
-                set end-ip {lan.get('dhcp_range_end', '')}
-            next
-        end
-    next
-end
-'''
+                server = dhcp.edit(dhcp_id, {
+                    "interface": f'"{iface}"',
+                    "default-gateway": lan.get('ip_address', '192.168.1.1'),
+                    "dns-server1": dns1,
+                    "lease-time": 86400,
+                })
+                server.table("ip-range").edit(1, {
+                    "start-ip": lan.get('dhcp_range_start', ''),
+                    "end-ip": lan.get('dhcp_range_end', ''),
+                })
                 dhcp_id += 1
         
+        # Sistema, interfaces, rutas, SD-WAN, shaping y DHCP: un bloque por tabla
+        config = self.cli.render() if self.render_text else ""
         self.config_sections.append(config)
         return config
     
     def apply_policies(self, policy_set: str) -> str:
         policies = {
-            'basic': self._basic_policies(),
-            'standard': self._standard_policies(),
-            'advanced': self._advanced_policies()
+            'basic': self._basic_policies,
+            'standard': self._standard_policies,
+            'advanced': self._advanced_policies,
+            'custom': self._custom_policies
         }
-        config = policies.get(policy_set, policies['basic'])
+        config = policies.get(policy_set, policies['basic'])()
         self.config_sections.append(config)
+        if self.render_plan:
+            # Plan REST: las tablas del sitio y después las de la plantilla
+            self._add_cmdb_operations(self.cli)
+            self._add_cmdb_operations(parse(config))
         return config
     
+    def _add_cmdb_operations(self, cli: CliConfig):
+        """
+        Operaciones cmdb de cada tabla, en orden
+        
+        Las de una tabla dependen de la última de la tabla anterior: dentro de
+        una tabla se pueden aplicar en paralelo, entre tablas en orden. En las
+        tablas de políticas (ORDERED_TABLES) cada entrada depende de la
+        anterior, para que queden en el equipo en el orden del CLI.
+        """
+        previous = [self.operations[-1]["id"]] if self.operations else []
+        for table, requests in cmdb_requests(cli):
+            ordered = table in ORDERED_TABLES
+            for method, target, payload, description in requests:
+                last = self.add_operation(method, target, payload, description, depends_on=previous)
+                if ordered:
+                    previous = [last]
+            previous = [last]
+    
+    def _app_monitor_list(self) -> str:
+        """Lista de Application Control que las políticas hacia Internet necesitan, si hay categorías"""
+        if not self.uses_app_categories:
+            return ""
+        return f'''
+# --- Application Control (detección para SD-WAN y shaping) ---
+config application list
+    edit "{self.APP_MONITOR_LIST}"
+        set comment "Monitor only: application categories for SD-WAN rules and shaping"
+        config entries
+            edit 1
+                set action pass
+                set log enable
+            next
+        end
+    next
+end
+'''
+    
+    def _app_control_settings(self, indent: str = "        ") -> str:
+        """set de una política hacia Internet para que sus aplicaciones se identifiquen"""
+        if not self.uses_app_categories:
+            return ""
+        return (f"{indent}set utm-status enable\n"
+                f'{indent}set ssl-ssh-profile "{self.APP_INSPECTION_PROFILE}"\n'
+                f'{indent}set application-list "{self.APP_MONITOR_LIST}"\n')
+    
     def _basic_policies(self) -> str:
-        return '''
+        return f'''
 # --- Basic Firewall Policies ---
 config firewall address
     edit "RFC1918_10"
@@ -242,7 +352,7 @@ config firewall addrgrp
         set member "RFC1918_10" "RFC1918_172" "RFC1918_192"
     next
 end
-
+{self._app_monitor_list()}
 config firewall policy
     edit 1
         set name "LAN-to-WAN-Allow"
@@ -254,7 +364,7 @@ config firewall policy
         set schedule "always"
         set service "ALL"
         set nat enable
-        set logtraffic all
+{self._app_control_settings()}        set logtraffic all
     next
     edit 100
         set name "Deny-All"
@@ -270,6 +380,72 @@ config firewall policy
 end
 '''
     
+    def _custom_policies(self) -> str:
+        """Políticas de params['custom_policy'] (solo los objetos que usan las reglas)"""
+        policy = compile_policy(self.params.get('custom_policy') or {})
+        addresses, groups, services = policy.used_objects()
+        lines = ["", "# --- Custom Firewall Policies ---"]
+        
+        if addresses:
+            lines.append("config firewall address")
+            for name in addresses:
+                network = policy.addresses[name]
+                lines += [f'    edit "{name}"',
+                          f"        set subnet {network.network_address} {network.netmask}",
+                          "    next"]
+            lines += ["end", ""]
+        
+        if groups:
+            lines.append("config firewall addrgrp")
+            for name in groups:
+                members = " ".join(f'"{member}"' for member in policy.groups[name])
+                lines += [f'    edit "{name}"', f"        set member {members}", "    next"]
+            lines += ["end", ""]
+        
+        if services:
+            lines.append("config firewall service custom")
+            for name in services:
+                protocol, ranges = policy.services[name]
+                lines.append(f'    edit "{name}"')
+                if protocol == 'icmp':
+                    lines.append("        set protocol ICMP")
+                else:
+                    lines.append(f"        set {protocol}-portrange {format_ports(ranges, ' ')}")
+                lines.append("    next")
+            lines += ["end", ""]
+        
+        app_monitor = self._app_monitor_list()
+        if app_monitor:
+            lines.append(app_monitor.strip("\n"))
+            lines.append("")
+        
+        def quoted(names, default):
+            return " ".join(f'"{name}"' for name in names) if names else f'"{default}"'
+        
+        lines.append("config firewall policy")
+        for rule in policy.rules:
+            lines += [
+                f"    edit {rule['id']}",
+                f'        set name "{rule["name"]}"',
+                f"        set srcintf {quoted(policy.zones[rule['src_zone']]['interfaces'], 'any')}",
+                f"        set dstintf {quoted(policy.zones[rule['dst_zone']]['interfaces'], 'any')}",
+                f"        set srcaddr {quoted(rule['source'], 'all')}",
+                f"        set dstaddr {quoted(rule['destination'], 'all')}",
+                f"        set action {'accept' if rule['action'] == 'allow' else 'deny'}",
+                '        set schedule "always"',
+                f"        set service {quoted(rule['service'], 'ALL')}",
+            ]
+            if rule['nat'] and rule['action'] == 'allow':
+                lines.append("        set nat enable")
+            if rule['action'] == 'allow' and policy.is_internet_zone(rule['dst_zone']):
+                lines += self._app_control_settings().splitlines()
+            lines.append(f"        set logtraffic {'all' if rule['log'] else 'disable'}")
+            if rule['comment']:
+                lines.append(f'        set comments "{rule["comment"]}"')
+            lines.append("    next")
+        lines += ["end", ""]
+        return "\n".join(lines)
+    
     def _standard_policies(self) -> str:
         return self._basic_policies() + '''
 # --- Web Filter Profile ---
@@ -0,0 +1,167 @@
+"""Constructor de configuración CLI de FortiOS por tablas.
+
+Cada `config <tabla>` se abre una sola vez: las entradas `edit` que se
+agregan a una tabla ya existente se suman a ese bloque (y un `set` repetido
+reemplaza al anterior, como en el equipo), así que 200 VLAN quedan en un
+solo `config system interface`. Las tablas se emiten en el orden en que se
+crearon, de modo que las referencias (interfaces antes que rutas, shapers
+antes que políticas) se respetan si se cargan en ese orden.
+
+render() recorre el árbol una vez y une las líneas al final: el costo es
+lineal en el tamaño de la configuración.
+
+    cli = CliConfig()
+    wan = cli.table("system interface", "Interfaces").edit('"wan1"')
+    wan.set("ip", "100.64.0.2 255.255.255.252").set("role", "wan")
+    cli.render()
+
+Claves de edit y valores de set son tokens CLI ya formateados ('"wan1"',
+'10.0.0.1 255.255.255.0', 'enable'; los números van tal cual). parse() hace
+el camino inverso para las plantillas escritas como texto.
+"""
+from typing import Dict, List, Optional
+
+INDENT = "    "
+# Prefijos por profundidad: sangría de los set y de config/edit
+_SET = [INDENT * depth + "set " for depth in range(12)]
+_PAD = [INDENT * depth for depth in range(12)]
+
+
+class CliNode:
+    """Bloque `config` o entrada `edit`: sus set, sus edit y sus subtablas"""
+
+    __slots__ = ('settings', 'entries', 'tables')
+
+    def __init__(self, settings: Optional[dict] = None):
+        self.settings: Dict[str, object] = settings if settings is not None else {}
+        # Se crean al primer edit/config: la mayoría de las entradas solo tiene set
+        self.entries: Optional[Dict[str, "CliNode"]] = None
+        self.tables: Optional[Dict[str, "CliNode"]] = None
+
+    def set(self, name: str, value) -> "CliNode":
+        self.settings[name] = value
+        return self
+
+    def edit(self, key, settings: Optional[dict] = None) -> "CliNode":
+        """
+        Entrada `edit key` (la misma si ya existe)
+
+        settings se agrega a sus set: es la forma rápida de cargar una entrada
+        completa en una llamada.
+        """
+        if self.entries is None:
+            self.entries = {}
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = CliNode(dict(settings) if settings else None)
+        elif settings:
+            entry.settings.update(settings)
+        return entry
+
+    def table(self, path: str) -> "CliNode":
+        """Subtabla `config path` (la misma si ya existe)"""
+        if self.tables is None:
+            self.tables = {}
+        node = self.tables.get(path)
+        if node is None:
+            node = self.tables[path] = CliNode()
+        return node
+
+    def is_empty(self) -> bool:
+        return not (self.settings or self.entries or self.tables)
+
+    def _render(self, lines: List[str], depth: int):
+        if self.settings:
+            prefix = _SET[depth]
+            lines.append(prefix + ("\n" + prefix).join([f"{name} {value}" for name, value in self.settings.items()]))
+        pad = _PAD[depth]
+        if self.tables:
+            for path, node in self.tables.items():
+                lines.append(f"{pad}config {path}")
+                node._render(lines, depth + 1)
+                lines.append(pad + "end")
+        if self.entries:
+            inner = _SET[depth + 1]
+            sep = "\n" + inner
+            for key, entry in self.entries.items():
+                if entry.entries is None and entry.tables is None:
+                    # Entrada hoja (la gran mayoría): edit, sus set y next en una línea
+                    body = sep.join([f"{name} {value}" for name, value in entry.settings.items()])
+                    lines.append(f"{pad}edit {key}\n{inner}{body}\n{pad}next" if body else f"{pad}edit {key}\n{pad}next")
+                else:
+                    lines.append(f"{pad}edit {key}")
+                    entry._render(lines, depth + 1)
+                    lines.append(pad + "next")
+
+
+class CliConfig:
+    """Tablas de primer nivel en orden de creación, con un comentario opcional cada una"""
+
+    def __init__(self):
+        self.tables: Dict[str, CliNode] = {}
+        self.comments: Dict[str, str] = {}
+
+    def table(self, path: str, comment: Optional[str] = None) -> CliNode:
+        node = self.tables.get(path)
+        if node is None:
+            node = self.tables[path] = CliNode()
+            if comment:
+                self.comments[path] = comment
+        return node
+
+    def __bool__(self) -> bool:
+        return any(not node.is_empty() for node in self.tables.values())
+
+    def render(self) -> str:
+        """Configuración completa (las tablas vacías se omiten)"""
+        lines: List[str] = []
+        for path, node in self.tables.items():
+            if node.is_empty():
+                continue
+            if path in self.comments:
+                lines.append(f"# --- {self.comments[path]} ---")
+            lines.append(f"config {path}")
+            node._render(lines, 1)
+            lines.append("end")
+            lines.append("")
+        return "\n".join(lines)
+
+
+def parse(text: str) -> CliConfig:
+    """
+    Lee configuración CLI (la de render() o una plantilla de texto)
+
+    Un comentario '# --- X ---' justo antes de una tabla queda como su
+    comentario. Las claves numéricas de edit quedan como int, igual que las
+    que usa el generador. ValueError si los bloques no cierran.
+    """
+    cli = CliConfig()
+    stack: List[CliNode] = []
+    comment = None
+    for number, raw in enumerate(text.splitlines(), 1):
+        line = raw.strip()
+        if not line:
+            continue
+        if line.startswith("#"):
+            if line.startswith("# ---") and line.endswith("---"):
+                comment = line.strip("#- ")
+            continue
+        keyword, _, rest = line.partition(" ")
+        rest = rest.strip()
+        if keyword == "config":
+            node = stack[-1].table(rest) if stack else cli.table(rest, comment)
+            stack.append(node)
+            comment = None
+        elif keyword in ("edit", "set") and stack:
+            if keyword == "edit":
+                stack.append(stack[-1].edit(int(rest) if rest.isdigit() else rest))
+            else:
+                name, _, value = rest.partition(" ")
+                stack[-1].set(name, value.strip())
+        elif keyword in ("end", "next") and stack:
+            stack.pop()
+        else:
+            raise ValueError(f"Línea {number}: '{line}' fuera de un bloque config")
+    if stack:
+        raise ValueError("Bloque config sin cerrar al final del texto")
+    return cli
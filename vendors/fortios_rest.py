@@ -0,0 +1,145 @@
+"""Tablas CLI de FortiOS como operaciones de la API REST (cmdb).
+
+Cada tabla de primer nivel de un CliConfig se traduce a:
+
+    PUT  /api/v2/cmdb/<ruta>   la tabla completa si no tiene edit (system global, system sdwan)
+    POST /api/v2/cmdb/<ruta>   una por entrada edit (system interface, firewall policy)
+
+La ruta sale del nombre de la tabla: la última palabra es el nombre y las
+anteriores van unidas por punto ('system dhcp server' -> system.dhcp/server).
+Las operaciones quedan agrupadas por tabla en el orden en que se crearon las
+tablas, que es el de sus referencias (interfaces antes que rutas, shapers
+antes que políticas). La primera clave de cada payload de POST es la mkey de
+la tabla (name, policyid, seq-num o id): con ella un POST a un objeto que ya
+existe se puede repetir como PUT.
+
+En las tablas de ORDERED_TABLES el orden de las entradas es el orden de
+evaluación: FortiOS agrega cada entrada nueva al final de la lista, así que
+esas entradas se crean de a una, en el orden del CLI.
+
+Los valores pasan de tokens CLI a JSON: números como int (salvo
+STRING_VALUES), las comillas se quitan, las listas de objetos por nombre
+(srcaddr, member...) quedan como [{"name": ...}] y las numéricas
+(priority-members, app-category...) como [{"seq-num": ...}] o [{"id": ...}];
+las subtablas se anidan en el objeto.
+"""
+import shlex
+from typing import Dict, Iterator, List, Tuple
+
+from .fortios_cli import CliConfig, CliNode
+
+CMDB_PREFIX = "/api/v2/cmdb/"
+
+# mkey de las tablas con claves numéricas (el resto usa 'id') y de las
+# tablas con claves entre comillas (el resto usa 'name')
+NUMERIC_MKEYS = {'firewall policy': 'policyid', 'router static': 'seq-num', 'members': 'seq-num'}
+QUOTED_MKEYS = {'sla': 'health-check'}
+
+# Tablas cuyas entradas se evalúan en orden (políticas)
+ORDERED_TABLES = frozenset((
+    'firewall policy', 'firewall shaping-policy', 'firewall local-in-policy',
+    'firewall proxy-policy', 'firewall security-policy', 'router policy',
+))
+
+# Atributos que referencian objetos por nombre (siempre listas en la API)
+NAME_LISTS = frozenset(('srcintf', 'dstintf', 'srcaddr', 'dstaddr', 'src', 'dst', 'service', 'member'))
+# Atributos con listas de números -> clave de cada elemento
+NUMBER_LISTS = {
+    'priority-members': 'seq-num',
+    'members': 'seq-num',
+    'app-category': 'id',
+    'internet-service-app-ctrl-category': 'id',
+}
+
+# Atributos cuyo valor pueden ser solo dígitos pero la API espera texto
+# (código DSCP en binario, zona horaria, rangos de puertos)
+STRING_VALUES = frozenset(('diffservcode', 'timezone', 'tcp-portrange', 'udp-portrange', 'sctp-portrange'))
+
+# (método, target, payload, descripción)
+CmdbRequest = Tuple[str, str, dict, str]
+
+
+def cmdb_path(table: str) -> str:
+    """'firewall shaper traffic-shaper' -> /api/v2/cmdb/firewall.shaper/traffic-shaper"""
+    *path, name = table.split()
+    return f"{CMDB_PREFIX}{'.'.join(path)}/{name}" if path else f"{CMDB_PREFIX}{name}"
+
+
+def _tokens(value: str) -> List[str]:
+    # shlex solo cuando hay comillas: la mayoría de los valores no las tiene
+    if '"' not in value and "'" not in value:
+        return value.split()
+    if value.count('"') == 2 and value[0] == value[-1] == '"':
+        return [value[1:-1]]
+    return shlex.split(value)
+
+
+def _scalar(token: str):
+    return int(token) if token.isdigit() else token
+
+
+def cmdb_value(name: str, value):
+    """Valor de un set en el formato de la API"""
+    if not isinstance(value, str):
+        return value
+    if name in NAME_LISTS:
+        return [{'name': token} for token in _tokens(value)]
+    if name in NUMBER_LISTS:
+        key = NUMBER_LISTS[name]
+        return [{key: _scalar(token)} for token in _tokens(value)]
+    if value.isdigit():
+        return value if name in STRING_VALUES else int(value)
+    tokens = _tokens(value)
+    return tokens[0] if len(tokens) == 1 else " ".join(tokens)
+
+
+def _entry_key(key):
+    if isinstance(key, str) and len(key) > 1 and key[0] == key[-1] == '"':
+        return key[1:-1]
+    return key
+
+
+def cmdb_object(node: CliNode) -> dict:
+    """set y subtablas de un bloque como objeto (las subtablas con edit como listas)"""
+    payload = {name: cmdb_value(name, value) for name, value in node.settings.items()}
+    if node.tables:
+        for path, child in node.tables.items():
+            payload[path] = cmdb_entries(path, child) if child.entries else cmdb_object(child)
+    return payload
+
+
+def _mkey(table: str, key) -> str:
+    if isinstance(key, int):
+        return NUMERIC_MKEYS.get(table, 'id')
+    return QUOTED_MKEYS.get(table, 'name')
+
+
+def cmdb_entry(table: str, key, entry: CliNode) -> dict:
+    """Entrada edit como objeto, con su mkey como primera clave"""
+    payload = {_mkey(table, key): _entry_key(key)}
+    payload.update(cmdb_object(entry))
+    return payload
+
+
+def cmdb_entries(table: str, node: CliNode) -> List[dict]:
+    return [cmdb_entry(table, key, entry) for key, entry in node.entries.items()]
+
+
+def cmdb_requests(cli: CliConfig) -> Iterator[Tuple[str, List[CmdbRequest]]]:
+    """(tabla, pedidos) de cada tabla no vacía, en orden de creación"""
+    for path, node in cli.tables.items():
+        if node.is_empty():
+            continue
+        target = cmdb_path(path)
+        description = cli.comments.get(path, path)
+        if node.entries:
+            requests = [("POST", target, cmdb_entry(path, key, entry), f"{description}: {_entry_key(key)}")
+                        for key, entry in node.entries.items()]
+        else:
+            requests = [("PUT", target, cmdb_object(node), description)]
+        yield path, requests
+
+
+def mkey_value(payload: Dict) -> Tuple[str, object]:
+    """(mkey, valor) de un payload de POST: su primera clave"""
+    return next(iter(payload.items()))
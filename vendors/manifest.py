@@ -0,0 +1,76 @@
+"""Manifiesto estático de vendors incluidos.
+
+Solo contiene datos: se puede importar sin cargar ningún módulo de vendor,
+por lo que sirve para listar vendors y modelos sin pagar su costo de import.
+En 'limits', None significa que el vendor no impone un límite propio.
+"""
+
+VENDOR_MANIFEST = {
+    'fortinet': {
+        'label': "Fortinet",
+        'module': 'vendors.fortinet',
+        'class': 'FortinetConfig',
+        'output_format': 'cli',
+        'firmware_versions': ["7.4.2 (Latest Stable)", "7.2.7 (LTS)", "7.0.13 (Legacy Stable)"],
+        'limits': {"max_wan_interfaces": None, "max_lan_interfaces": None, "vlans": True},
+        'models': [
+            "FortiGate 40F", "FortiGate 60F", "FortiGate 70F",
+            "FortiGate 80F", "FortiGate 100F", "FortiGate 200F",
+            "FortiGate 400F", "FortiGate 600F"
+        ]
+    },
+    'meraki': {
+        'label': "Meraki",
+        'module': 'vendors.meraki',
+        'class': 'MerakiConfig',
+        'output_format': 'json',
+        'firmware_versions': ["MX 18.2 (Stable)", "MX 17.x (Previous)", "MX 16.x (Legacy)"],
+        'limits': {"max_wan_interfaces": 2, "max_lan_interfaces": None, "vlans": True},
+        'models': [
+            "MX64", "MX64W", "MX67", "MX67W", "MX67C",
+            "MX68", "MX68W", "MX68CW",
+            "MX75", "MX84", "MX85",
+            "MX95", "MX100", "MX105",
+            "MX250", "MX450"
+        ]
+    },
+    'velocloud': {
+        'label': "Velocloud (VMware SD-WAN)",
+        'module': 'vendors.velocloud',
+        'class': 'VelocloudConfig',
+        'output_format': 'json',
+        'firmware_versions': ["5.2.0 (New)", "5.1.0 (Stable)", "4.5.2 (Recommended)"],
+        'limits': {"max_wan_interfaces": None, "max_lan_interfaces": None, "vlans": True},
+        'models': [
+            "Edge 510", "Edge 520", "Edge 540",
+            "Edge 610", "Edge 620", "Edge 640",
+            "Edge 710", "Edge 720", "Edge 740",
+            "Edge 840", "Edge 860",
+            "Edge 1000", "Edge 3400", "Edge 3800"
+        ]
+    },
+    'bigleaf': {
+        'label': "Bigleaf",
+        'module': 'vendors.bigleaf',
+        'class': 'BigleafConfig',
+        'output_format': 'json',
+        'firmware_versions': ["2.3.x (Current)", "2.2.x", "1.9.y"],
+        'limits': {"max_wan_interfaces": None, "max_lan_interfaces": 1, "vlans": False},
+        'models': [
+            "Bigleaf Edge 100", "Bigleaf Edge 200", "Bigleaf Edge 500",
+            "Bigleaf Edge 1000", "Bigleaf Edge 2500"
+        ]
+    },
+    'cato': {
+        'label': "CATO Networks",
+        'module': 'vendors.cato',
+        'class': 'CatoConfig',
+        'output_format': 'json',
+        'firmware_versions': ["v5.2 (Latest)", "v5.1", "v5.0 (Stable)"],
+        'limits': {"max_wan_interfaces": None, "max_lan_interfaces": None, "vlans": True},
+        'models': [
+            "Socket X1500", "Socket X1600", "Socket X1700",
+            "vSocket (AWS)", "vSocket (Azure)", "vSocket (GCP)"
+        ]
+    }
+}
@@ -1,18 +1,27 @@
+from typing import List, Optional
 from .base import VendorConfig
-import json
+from .manifest import VENDOR_MANIFEST
+from serialization import dumps_str
+from policy_engine import compile_policy, format_ports
+from traffic_classes import CLASS_SHAPING, is_primary, per_ip_kbps, sdwan_settings, shaped_kbps, wan_rates
 
 class MerakiConfig(VendorConfig):
     """Generador de configuración para Cisco Meraki MX"""
     
     VENDOR_NAME = "meraki"
     OUTPUT_FORMAT = "json"
-    SUPPORTED_MODELS = [
-        "MX64", "MX64W", "MX67", "MX67W", "MX67C",
-        "MX68", "MX68W", "MX68CW",
-        "MX75", "MX84", "MX85",
-        "MX95", "MX100", "MX105",
-        "MX250", "MX450"
-    ]
+    SUPPORTED_OUTPUTS = ("text", "plan")
+    SUPPORTED_MODELS = VENDOR_MANIFEST['meraki']['models']
+    
+    # Categorías L7 de Dashboard por clase de tráfico. Meraki agrupa voz y
+    # videoconferencia en una sola categoría, así que ambas clases comparten
+    # la regla (con el DSCP y la prioridad de voz).
+    APP_CATEGORIES = {
+        'voice': {"id": "meraki:layer7/category/11", "name": "VoIP & video conferencing"},
+        'business': {"id": "meraki:layer7/category/14", "name": "Productivity"},
+    }
+    # Clase de desempeño para la preferencia de uplink de VoIP/video en Auto VPN
+    PERFORMANCE_CLASS = "SLA-Voice-Video"
     
     def __init__(self):
         super().__init__()
@@ -29,11 +38,11 @@ class MerakiConfig(VendorConfig):
             "notes": f"Customer: {site.get('customer', '')}\nLocation: {site.get('location', '')}"
         }
         
-        self.api_calls.append({
-            "endpoint": "PUT /networks/{networkId}",
-            "description": "Update network settings",
-            "payload": network_settings
-        })
+        self._add_api_call(
+            "PUT /networks/{networkId}",
+            "Update network settings",
+            network_settings
+        )
         
         config = f'''# ============================================
 # Meraki MX Configuration
@@ -46,7 +55,7 @@ class MerakiConfig(VendorConfig):
 
 # --- Network Settings ---
 # PUT /networks/networkId
-{json.dumps(network_settings, indent=2)}
+{self._format_payload(network_settings)}
 '''
         self.config_sections.append(config)
         return config
@@ -74,49 +83,145 @@ class MerakiConfig(VendorConfig):
                 "vlan": wan.get('vlan_id', None)
             }
         
-        self.api_calls.append({
-            "endpoint": "PUT /networks/{networkId}/appliance/uplinks/settings",
-            "description": "Configure WAN uplinks",
-            "payload": {"interfaces": uplink_config}
-        })
+        uplinks = {"interfaces": uplink_config}
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/uplinks/settings",
+            "Configure WAN uplinks",
+            uplinks
+        )
         
         config += f'''# PUT /networks/networkId/appliance/uplinks/settings
-{json.dumps({"interfaces": uplink_config}, indent=2)}
+{self._format_payload(uplinks)}
 '''
         
-        # Load balancing if dual WAN
+        # Límites de cada uplink: el shaper de Meraki trabaja sobre estos valores
+        uplinks_used = wan_params[:2]
+        bandwidth = {"bandwidthLimits": {}}
+        for idx, wan in enumerate(uplinks_used):
+            upload, download = wan_rates(wan)
+            bandwidth["bandwidthLimits"][f"wan{idx + 1}"] = {
+                "limitUp": shaped_kbps(upload),
+                "limitDown": shaped_kbps(download)
+            }
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/trafficShaping/uplinkBandwidth",
+            "Configure uplink bandwidth limits",
+            bandwidth
+        )
+        
+        config += f'''\n# PUT /networks/networkId/appliance/trafficShaping/uplinkBandwidth
+{self._format_payload(bandwidth)}
+'''
+        config += self._traffic_shaping_rules(uplinks_used)
+        
+        # Selección de uplink si hay dos WAN
         if len(wan_params) > 1:
-            traffic_shaping = {
-                "defaultRulesEnabled": True,
-                "rules": []
+            config += self._uplink_selection(uplinks_used)
+        
+        self.config_sections.append(config)
+        return config
+    
+    def _traffic_shaping_rules(self, wans: list) -> str:
+        """Reglas por clase (prioridad y DSCP) y tope por cliente del tráfico sin clase"""
+        rules = []
+        for name, category in self.APP_CATEGORIES.items():
+            shaping = CLASS_SHAPING[name]
+            rules.append({
+                "definitions": [{"type": "applicationCategory", "value": category}],
+                # La voz no se limita por cliente; el resto respeta el tope general
+                "perClientBandwidthLimits": {"settings": "ignore" if name == 'voice' else "network default"},
+                "dscpTagValue": shaping['dscp'],
+                "priority": shaping['priority']
+            })
+        shaping_rules = {"defaultRulesEnabled": True, "rules": rules}
+        global_limits = {
+            "globalBandwidthLimits": {
+                "limitUp": per_ip_kbps(wans, upload=True),
+                "limitDown": per_ip_kbps(wans)
             }
-            
-            self.api_calls.append({
-                "endpoint": "PUT /networks/{networkId}/appliance/trafficShaping/uplinkSelection",
-                "description": "Configure uplink selection and failover",
-                "payload": {
-                    "defaultUplink": "wan1",
-                    "activeActiveAutoVpnEnabled": False,
-                    "loadBalancingEnabled": True,
-                    "failoverAndFailback": {
-                        "immediate": {
-                            "enabled": True
-                        }
+        }
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/trafficShaping",
+            "Configure per-client bandwidth limits",
+            global_limits
+        )
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/trafficShaping/rules",
+            "Configure traffic shaping rules",
+            shaping_rules
+        )
+        
+        return f'''\n# --- Traffic Shaping ---
+# PUT /networks/networkId/appliance/trafficShaping
+{self._format_payload(global_limits)}
+
+# PUT /networks/networkId/appliance/trafficShaping/rules
+{self._format_payload(shaping_rules)}
+'''
+    
+    def _uplink_selection(self, wans: list) -> str:
+        """
+        Uplink por defecto, balanceo y preferencia por desempeño para VoIP/video
+        
+        El balanceo reparte en proporción a los límites de uplinkBandwidth y
+        solo se activa si ninguna WAN es de respaldo. La clase de desempeño se
+        crea con el SLA de voz del sitio; customPerformanceClassId se resuelve
+        con la respuesta de esa operación, como {networkId}.
+        """
+        primaries = [idx for idx, wan in enumerate(wans) if is_primary(wan)]
+        default_uplink = f"wan{primaries[0] + 1}" if primaries else "wan1"
+        sla = sdwan_settings(self.params.get('sdwan'))['sla']['voice']
+        performance_class = {
+            "name": self.PERFORMANCE_CLASS,
+            "maxLatency": sla['latency_ms'],
+            "maxJitter": sla['jitter_ms'],
+            "maxLossPercentage": sla['packet_loss_pct']
+        }
+        class_op = self._add_api_call(
+            "POST /networks/{networkId}/appliance/trafficShaping/customPerformanceClasses",
+            "Create performance class for VoIP/video",
+            performance_class
+        )
+        uplink_selection = {
+            "defaultUplink": default_uplink,
+            "activeActiveAutoVpnEnabled": True,
+            "loadBalancingEnabled": len(primaries) != 1,
+            "failoverAndFailback": {
+                "immediate": {
+                    "enabled": True
+                }
+            },
+            "vpnTrafficUplinkPreferences": [
+                {
+                    "trafficFilters": [
+                        {"type": "applicationCategory", "value": {"id": self.APP_CATEGORIES['voice']['id']}}
+                    ],
+                    "preferredUplink": default_uplink,
+                    "failOverCriterion": "poorPerformance",
+                    "performanceClass": {
+                        "type": "custom",
+                        "customPerformanceClassId": f"{{customPerformanceClassId:{self.PERFORMANCE_CLASS}}}"
                     }
                 }
-            })
-            
-            config += '''\n# PUT /networks/{networkId}/appliance/trafficShaping/uplinkSelection
-''' + json.dumps({
-                "defaultUplink": "wan1",
-                "loadBalancingEnabled": True
-            }, indent=2) + "\n"
+            ]
+        }
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/trafficShaping/uplinkSelection",
+            "Configure uplink selection and failover",
+            uplink_selection,
+            depends_on=[1, class_op]
+        )
         
-        self.config_sections.append(config)
-        return config
+        return f'''\n# POST /networks/networkId/appliance/trafficShaping/customPerformanceClasses
+{self._format_payload(performance_class)}
+
+# PUT /networks/networkId/appliance/trafficShaping/uplinkSelection
+{self._format_payload(uplink_selection)}
+'''
     
     def apply_lan_config(self, lan_params: list) -> str:
-        config = "\n# --- LAN/VLAN Configuration ---\n"
+        # Una llamada por VLAN: las partes se juntan al final (lineal con miles de VLAN)
+        parts = ["\n# --- LAN/VLAN Configuration ---\n"]
         vlans = []
         
         for lan in lan_params:
@@ -142,27 +247,29 @@ class MerakiConfig(VendorConfig):
             
             vlans.append(vlan_config)
             
-            self.api_calls.append({
-                "endpoint": f"PUT /networks/networkId/appliance/vlans/{lan.get('vlan_id', 1)}",
-                "description": f"Configure VLAN {lan.get('vlan_id', 1)}",
-                "payload": vlan_config
-            })
+            self._add_api_call(
+                f"PUT /networks/{{networkId}}/appliance/vlans/{lan.get('vlan_id', 1)}",
+                f"Configure VLAN {lan.get('vlan_id', 1)}",
+                vlan_config
+            )
             
-            config += f'''# PUT /networks/networkId/appliance/vlans/{lan.get('vlan_id', 1)}
-{json.dumps(vlan_config, indent=2)}
+            parts.append(f'''# PUT /networks/networkId/appliance/vlans/{lan.get('vlan_id', 1)}
+{self._format_payload(vlan_config)}
 
-'''
+''')
         
+        config = "".join(parts)
         self.config_sections.append(config)
         return config
     
     def apply_policies(self, policy_set: str) -> str:
         policies = {
-            'basic': self._basic_policies(),
-            'standard': self._standard_policies(),
-            'advanced': self._advanced_policies()
+            'basic': self._basic_policies,
+            'standard': self._standard_policies,
+            'advanced': self._advanced_policies,
+            'custom': self._custom_policies
         }
-        config = policies.get(policy_set, policies['basic'])
+        config = policies.get(policy_set, policies['basic'])()
         self.config_sections.append(config)
         return config
     
@@ -182,15 +289,52 @@ class MerakiConfig(VendorConfig):
             ]
         }
         
-        self.api_calls.append({
-            "endpoint": "PUT /networks/{networkId}/appliance/firewall/l3FirewallRules",
-            "description": "Configure L3 firewall rules",
-            "payload": firewall_rules
-        })
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/firewall/l3FirewallRules",
+            "Configure L3 firewall rules",
+            firewall_rules
+        )
         
         return f'''\n# --- Basic Firewall Policies ---
 # PUT /networks/networkId/appliance/firewall/l3FirewallRules
-{json.dumps(firewall_rules, indent=2)}
+{self._format_payload(firewall_rules)}
+'''
+    
+    def _custom_policies(self) -> str:
+        """
+        Reglas L3 desde params['custom_policy']
+        
+        Meraki no tiene objetos ni zonas en l3FirewallRules: los grupos se
+        expanden a CIDRs y cada regla se divide por protocolo.
+        """
+        policy = compile_policy(self.params.get('custom_policy') or {})
+        rules = []
+        for rule in policy.rules:
+            src_cidr = ",".join(policy.cidrs(rule['source'])) or "any"
+            dest_cidr = ",".join(policy.cidrs(rule['destination'])) or "any"
+            ports = policy.ports_by_protocol(rule['service']) or {"any": ()}
+            for protocol, ranges in ports.items():
+                rules.append({
+                    "comment": rule['comment'] or rule['name'],
+                    "policy": rule['action'],
+                    "protocol": protocol,
+                    "srcPort": "any",
+                    "srcCidr": src_cidr,
+                    "destPort": format_ports(ranges) or "any",
+                    "destCidr": dest_cidr,
+                    "syslogEnabled": rule['log']
+                })
+        firewall_rules = {"rules": rules}
+        
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/firewall/l3FirewallRules",
+            "Configure custom L3 firewall rules",
+            firewall_rules
+        )
+        
+        return f'''\n# --- Custom Firewall Policies ---
+# PUT /networks/networkId/appliance/firewall/l3FirewallRules
+{self._format_payload(firewall_rules)}
 '''
     
     def _standard_policies(self) -> str:
@@ -209,15 +353,15 @@ class MerakiConfig(VendorConfig):
             "urlCategoryListSize": "topSites"
         }
         
-        self.api_calls.append({
-            "endpoint": "PUT /networks/{networkId}/appliance/contentFiltering",
-            "description": "Configure content filtering",
-            "payload": content_filtering
-        })
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/contentFiltering",
+            "Configure content filtering",
+            content_filtering
+        )
         
         return base + f'''\n# --- Content Filtering ---
 # PUT /networks/networkId/appliance/contentFiltering
-{json.dumps(content_filtering, indent=2)}
+{self._format_payload(content_filtering)}
 '''
     
     def _advanced_policies(self) -> str:
@@ -228,11 +372,11 @@ class MerakiConfig(VendorConfig):
             "allowedRules": []
         }
         
-        self.api_calls.append({
-            "endpoint": "PUT /networks/{networkId}/appliance/security/intrusion",
-            "description": "Configure IDS/IPS",
-            "payload": threat_protection
-        })
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/security/intrusion",
+            "Configure IDS/IPS",
+            threat_protection
+        )
         
         malware_settings = {
             "mode": "enabled",
@@ -240,20 +384,31 @@ class MerakiConfig(VendorConfig):
             "allowedFiles": []
         }
         
-        self.api_calls.append({
-            "endpoint": "PUT /networks/{networkId}/appliance/security/malware",
-            "description": "Configure AMP",
-            "payload": malware_settings
-        })
+        self._add_api_call(
+            "PUT /networks/{networkId}/appliance/security/malware",
+            "Configure AMP",
+            malware_settings
+        )
         
         return base + f'''\n# --- Advanced Threat Protection ---
 # PUT /networks/networkId/appliance/security/intrusion
-{json.dumps(threat_protection, indent=2)}
+{self._format_payload(threat_protection)}
 
 # PUT /networks/networkId/appliance/security/malware
-{json.dumps(malware_settings, indent=2)}
+{self._format_payload(malware_settings)}
 '''
     
+    def _add_api_call(self, endpoint: str, description: str, payload: dict,
+                      depends_on: Optional[List[int]] = None) -> int:
+        """Registra una llamada a Dashboard API y su operación en el plan"""
+        self.api_calls.append({
+            "endpoint": endpoint,
+            "description": description,
+            "payload": payload
+        })
+        method, path = endpoint.split(' ', 1)
+        return self.add_operation(method, path, payload, description, depends_on)
+    
     def _cidr_from_mask(self, mask: str) -> int:
         """Convierte subnet mask a notación CIDR"""
         return sum([bin(int(x)).count('1') for x in mask.split('.')])
@@ -278,9 +433,8 @@ NETWORK_ID = 'YOUR_NETWORK_ID_HERE'
 dashboard = meraki.DashboardAPI(API_KEY)
 
 '''
+        parts = [script]
         for call in self.api_calls:
-            script += f"\n# {call['description']}\n"
-            script += f"# {call['endpoint']}\n"
-            script += f"# Payload: {json.dumps(call['payload'])}\n"
+            parts.append(f"\n# {call['description']}\n# {call['endpoint']}\n# Payload: {dumps_str(call['payload'])}\n")
         
-        return script
+        return "".join(parts)
@@ -0,0 +1,117 @@
+from collections.abc import Mapping
+from importlib import import_module
+from threading import Lock
+from typing import Dict, List, Optional, Type
+
+from .manifest import VENDOR_MANIFEST
+
+# Grupo de entry points para vendors distribuidos como paquetes externos:
+#   [project.entry-points."engiaconfig.vendors"]
+#   acme = "acme_sdwan.config:AcmeConfig"
+ENTRY_POINT_GROUP = "engiaconfig.vendors"
+
+
+class VendorRegistry(Mapping):
+    """Registro de vendors que importa cada módulo solo en su primer uso.
+
+    Los vendors incluidos se describen en VENDOR_MANIFEST, de modo que listar
+    vendors y modelos no importa ningún módulo de vendor. Los vendors de
+    terceros se descubren por entry points y se cargan de la misma forma.
+    """
+
+    def __init__(self, manifest: Optional[Dict[str, dict]] = None,
+                 entry_point_group: Optional[str] = ENTRY_POINT_GROUP):
+        self._manifest = dict(VENDOR_MANIFEST if manifest is None else manifest)
+        self._entry_point_group = entry_point_group
+        self._entry_points: Optional[Dict[str, object]] = None
+        self._classes: Dict[str, Type] = {}
+        self._lock = Lock()
+
+    def _external(self) -> Dict[str, object]:
+        """Descubre (una sola vez) los vendors publicados por entry points"""
+        if self._entry_points is None:
+            found = {}
+            if self._entry_point_group:
+                # importlib.metadata es costoso de importar; solo se paga aquí
+                from importlib.metadata import entry_points
+                for ep in entry_points(group=self._entry_point_group):
+                    name = ep.name.lower()
+                    if name not in self._manifest:
+                        found[name] = ep
+            self._entry_points = found
+        return self._entry_points
+
+    def __getitem__(self, name: str) -> Type:
+        vendor_class = self._classes.get(name)
+        if vendor_class is not None:
+            return vendor_class
+
+        with self._lock:
+            if name in self._classes:
+                return self._classes[name]
+            if name in self._manifest:
+                entry = self._manifest[name]
+                vendor_class = getattr(import_module(entry['module']), entry['class'])
+            elif name in self._external():
+                vendor_class = self._external()[name].load()
+            else:
+                raise KeyError(name)
+            self._classes[name] = vendor_class
+            return vendor_class
+
+    def __iter__(self):
+        yield from self._manifest
+        yield from self._external()
+
+    def __len__(self) -> int:
+        return len(self._manifest) + len(self._external())
+
+    def __contains__(self, name) -> bool:
+        return name in self._manifest or name in self._external()
+
+    def names(self) -> List[str]:
+        """Retorna los nombres de vendor registrados"""
+        return list(self)
+
+    def models(self, name: str) -> List[str]:
+        """Retorna los modelos soportados sin importar el vendor si es posible"""
+        if name in self._manifest:
+            return list(self._manifest[name]['models'])
+        if name in self._external():
+            return list(self[name].SUPPORTED_MODELS)
+        return []
+
+    def output_format(self, name: str) -> Optional[str]:
+        """Retorna el formato de salida declarado por el vendor"""
+        if name in self._manifest:
+            return self._manifest[name]['output_format']
+        if name in self._external():
+            return self[name].OUTPUT_FORMAT
+        return None
+
+    def describe(self, name: str) -> dict:
+        """Retorna los datos de catálogo del vendor (label, modelos, firmwares, límites)"""
+        entry = self._manifest.get(name)
+        if entry is None:
+            vendor_class = self[name]
+            return {
+                'label': getattr(vendor_class, 'VENDOR_LABEL', name),
+                'output_format': vendor_class.OUTPUT_FORMAT,
+                'models': list(vendor_class.SUPPORTED_MODELS),
+                'firmware_versions': list(getattr(vendor_class, 'FIRMWARE_VERSIONS', [])),
+                'limits': dict(getattr(vendor_class, 'LIMITS', {}))
+            }
+        return {
+            'label': entry['label'],
+            'output_format': entry['output_format'],
+            'models': list(entry['models']),
+            'firmware_versions': list(entry['firmware_versions']),
+            'limits': dict(entry['limits'])
+        }
+
+    def is_loaded(self, name: str) -> bool:
+        """Indica si el módulo del vendor ya fue importado"""
+        return name in self._classes
+
+
+vendor_registry = VendorRegistry()
@@ -1,18 +1,29 @@
+import ipaddress
 from .base import VendorConfig
-import json
+from .manifest import VENDOR_MANIFEST
+from policy_engine import compile_policy
+from traffic_classes import (CLASS_SHAPING, class_rates, is_primary, sdwan_settings, shaped_kbps, steering_order,
+                             wan_rates)
 
 class VelocloudConfig(VendorConfig):
     """Generador de configuración para VMware SD-WAN (Velocloud)"""
     
     VENDOR_NAME = "velocloud"
     OUTPUT_FORMAT = "json"
-    SUPPORTED_MODELS = [
-        "Edge 510", "Edge 520", "Edge 540",
-        "Edge 610", "Edge 620", "Edge 640",
-        "Edge 710", "Edge 720", "Edge 740",
-        "Edge 840", "Edge 860",
-        "Edge 1000", "Edge 3400", "Edge 3800"
-    ]
+    SUPPORTED_OUTPUTS = ("text", "plan")
+    SUPPORTED_MODELS = VENDOR_MANIFEST['velocloud']['models']
+    
+    # Match de cada clase en las business policies: voz por aplicación (130,
+    # apps de voz/video), video y negocio por la marca DSCP de los terminales,
+    # y el streaming (app 50) como tráfico sin clase: prioridad baja sin tope
+    # (maximum_pct 100), usa el enlace libre y cede ante las demás clases
+    CLASS_MATCHES = {
+        'voice': ("VoIP-Priority", {"appid": 130}),
+        'video': ("Video-Priority", {"dscp": 34}),
+        'business': ("Business-Apps", {"dscp": 18}),
+        'default': ("Streaming-Low-Priority", {"appid": 50}),
+    }
+    QOS_TYPES = {'voice': "realtime", 'video': "realtime", 'business': "transactional", 'default': "bulk"}
     
     def __init__(self):
         super().__init__()
@@ -41,6 +52,7 @@ class VelocloudConfig(VendorConfig):
             "haEnabled": False,
             "haState": "UNCONFIGURED"
         }
+        self.add_operation("POST", "/edge/edgeProvision", self.edge_config, "Provision edge")
         
         config = f'''# ============================================
 # VMware SD-WAN (Velocloud) Configuration
@@ -53,7 +65,7 @@ class VelocloudConfig(VendorConfig):
 
 # --- Edge Provisioning ---
 # POST /edge/edgeProvision
-{json.dumps(self.edge_config, indent=2)}
+{self._format_payload(self.edge_config)}
 '''
         self.config_sections.append(config)
         return config
@@ -63,6 +75,7 @@ class VelocloudConfig(VendorConfig):
         
         wan_links = []
         for idx, wan in enumerate(wan_params):
+            upload, download = wan_rates(wan)
             link = {
                 "interface": f"GE{idx + 1}",
                 "internalId": f"WAN{idx + 1}",
@@ -76,17 +89,22 @@ class VelocloudConfig(VendorConfig):
                     "wanDns": self.params.get('services', {}).get('dns_servers', ['8.8.8.8'])
                 },
                 "bwMeasurement": "USER_DEFINED",
-                "uploadMbps": wan.get('bandwidth_mbps', 100),
-                "downloadMbps": wan.get('bandwidth_mbps', 100),
+                "uploadMbps": upload,
+                "downloadMbps": download,
                 "type": "WIRED",
                 "isp": wan.get('isp_name', ''),
                 "enabled": True,
-                "backupOnly": wan.get('priority') != 'primary'
+                "backupOnly": not is_primary(wan)
             }
             wan_links.append(link)
+            link_module = {"links": [link]}
+            self.add_operation(
+                "POST", "/configuration/updateConfigurationModule", link_module,
+                f"WAN Link {idx + 1}"
+            )
             
             config += f'''# POST /configuration/updateConfigurationModule (WAN Link {idx + 1})
-{json.dumps({"links": [link]}, indent=2)}
+{self._format_payload(link_module)}
 
 '''
         
@@ -126,8 +144,9 @@ class VelocloudConfig(VendorConfig):
             routed_interfaces.append(interface)
         
         lan_config = {"routedInterfaces": routed_interfaces}
+        self.add_operation("POST", "/configuration/updateConfigurationModule", lan_config, "LAN")
         config += f'''# POST /configuration/updateConfigurationModule (LAN)
-{json.dumps(lan_config, indent=2)}
+{self._format_payload(lan_config)}
 '''
         
         self.config_sections.append(config)
@@ -135,11 +154,12 @@ class VelocloudConfig(VendorConfig):
     
     def apply_policies(self, policy_set: str) -> str:
         policies = {
-            'basic': self._basic_policies(),
-            'standard': self._standard_policies(),
-            'advanced': self._advanced_policies()
+            'basic': self._basic_policies,
+            'standard': self._standard_policies,
+            'advanced': self._advanced_policies,
+            'custom': self._custom_policies
         }
-        config = policies.get(policy_set, policies['basic'])
+        config = policies.get(policy_set, policies['basic'])()
         self.config_sections.append(config)
         return config
     
@@ -168,43 +188,159 @@ class VelocloudConfig(VendorConfig):
             }
         }
         
+        policy_module = {"rules": [business_policy]}
+        self.add_operation(
+            "POST", "/configuration/updateConfigurationModule", policy_module,
+            "Business Policy"
+        )
+        
         return f'''\n# --- Business Policy (Basic) ---
 # POST /configuration/updateConfigurationModule (Business Policy)
-{json.dumps({"rules": [business_policy]}, indent=2)}
+{self._format_payload(policy_module)}
 '''
     
+    def _custom_policies(self) -> str:
+        """
+        Reglas de params['custom_policy'] como firewall module
+        
+        Una referencia a una sola red va en línea (sip/ssm); varias redes o
+        servicios se publican una vez como object groups y las reglas los
+        referencian por nombre.
+        """
+        policy = compile_policy(self.params.get('custom_policy') or {})
+        protocols = {"tcp": 6, "udp": 17, "icmp": 1}
+        groups = []
+        group_names = {}
+        
+        def object_group(key, name, group_type, data):
+            if key not in group_names:
+                group_names[key] = name
+                group = {"name": name, "type": group_type, "data": data}
+                groups.append(group)
+                self.add_operation("POST", "/enterprise/insertObjectGroup", group, f"Object Group {name}")
+            return group_names[key]
+        
+        def address_match(refs, side):
+            if not refs:
+                return {f"{side}ip": "any", f"{side}sm": "255.255.255.255"}
+            cidrs = policy.cidrs(refs)
+            if len(cidrs) == 1:
+                network = ipaddress.ip_network(cidrs[0])
+                return {f"{side}ip": str(network.network_address), f"{side}sm": str(network.netmask)}
+            data = []
+            for cidr in cidrs:
+                network = ipaddress.ip_network(cidr)
+                data.append({"ip": str(network.network_address), "mask": str(network.netmask), "rule_type": "netmask"})
+            name = object_group(("address",) + tuple(cidrs), "+".join(refs), "address_group", data)
+            return {f"{side}AddressGroup": name}
+        
+        def service_match(refs):
+            ports = policy.ports_by_protocol(refs)
+            if not ports:
+                return {"proto": -1}
+            if len(ports) == 1:
+                protocol, ranges = next(iter(ports.items()))
+                if len(ranges) <= 1:
+                    low, high = ranges[0] if ranges else (-1, -1)
+                    return {"proto": protocols[protocol], "dport_low": low, "dport_high": high}
+            data = [
+                {"proto": protocols[protocol], "port_low": low, "port_high": high}
+                for protocol, ranges in ports.items()
+                for low, high in (ranges or ((-1, -1),))
+            ]
+            key = ("port",) + tuple((d["proto"], d["port_low"], d["port_high"]) for d in data)
+            return {"dPortGroup": object_group(key, "+".join(refs), "port_group", data)}
+        
+        rules = []
+        for rule in policy.rules:
+            match = {}
+            match.update(address_match(rule['source'], "s"))
+            match.update(address_match(rule['destination'], "d"))
+            match.update(service_match(rule['service']))
+            rules.append({
+                "name": rule['name'],
+                "match": match,
+                "action": {"allow": rule['action'] == 'allow', "log": rule['log']}
+            })
+        
+        firewall = {
+            "outbound": rules,
+            "stateful": True,
+            "logging": {"enabled": any(rule['log'] for rule in policy.rules)}
+        }
+        self.add_operation(
+            "POST", "/configuration/updateConfigurationModule", firewall, "Firewall",
+            depends_on=[1] + [op["id"] for op in self.operations if op["target"] == "/enterprise/insertObjectGroup"]
+        )
+        
+        config = "\n# --- Custom Firewall Rules ---\n"
+        if groups:
+            config += f'''# POST /enterprise/insertObjectGroup
+{self._format_payload({"objectGroups": groups})}
+
+'''
+        config += f'''# POST /configuration/updateConfigurationModule (Firewall)
+{self._format_payload(firewall)}
+'''
+        return config
+    
     def _standard_policies(self) -> str:
         base = self._basic_policies()
         
-        qos_rules = [
-            {
-                "name": "VoIP-Priority",
-                "match": {"appid": 130},  # Voice/Video apps
-                "action": {
-                    "QoS": {
-                        "type": "realtime",
-                        "class": "high"
-                    },
-                    "linkSteering": "LOAD_BALANCE"
-                }
-            },
-            {
-                "name": "Streaming-Throttle",
-                "match": {"appid": 50},  # Streaming
-                "action": {
-                    "QoS": {
-                        "type": "bulk",
-                        "class": "low"
-                    }
-                }
-            }
-        ]
+        qos_rules = self._qos_rules(self.params.get('wan_interfaces') or [])
+        
+        qos_module = {"rules": qos_rules}
+        self.add_operation(
+            "POST", "/configuration/updateConfigurationModule", qos_module, "QoS"
+        )
         
         return base + f'''\n# --- QoS Rules (Standard) ---
 # POST /configuration/updateConfigurationModule (QoS)
-{json.dumps({"rules": qos_rules}, indent=2)}
+{self._format_payload(qos_module)}
 '''
     
+    def _qos_rules(self, wans: list) -> list:
+        """
+        Business policies por clase calculadas con los enlaces del sitio
+        
+        El garantizado (bandwidth, kbps) y el tope (bandwidthCapPct) de cada
+        sentido salen de la capacidad sumada de los enlaces activos (los de
+        respaldo solo cuentan si no hay otros). Las clases de tiempo real
+        prefieren el primer enlace activo y usan FEC y jitter buffer cuando la
+        pérdida supera el umbral de su SLA.
+        """
+        active = [wan for wan in wans if is_primary(wan)] or wans
+        upload = sum(wan_rates(wan)[0] for wan in active)
+        download = sum(wan_rates(wan)[1] for wan in active)
+        up_rates = class_rates(shaped_kbps(upload)) if active else {}
+        down_rates = class_rates(shaped_kbps(download)) if active else {}
+        preferred = f"WAN{steering_order(wans)[0] + 1}" if wans else None
+        sla = sdwan_settings(self.params.get('sdwan'))['sla']
+        
+        rules = []
+        for name, (rule_name, match) in self.CLASS_MATCHES.items():
+            shaping = CLASS_SHAPING[name]
+            cap = shaping['maximum_pct'] if shaping['maximum_pct'] < 100 else -1
+            qos = {"type": self.QOS_TYPES[name], "class": shaping['priority']}
+            if active:
+                qos["rxScheduler"] = {"bandwidth": down_rates[name][0], "bandwidthCapPct": cap,
+                                      "priority": shaping['priority']}
+                qos["txScheduler"] = {"bandwidth": up_rates[name][0], "bandwidthCapPct": cap,
+                                      "priority": shaping['priority']}
+            action = {"QoS": qos}
+            if self.QOS_TYPES[name] == "realtime" and preferred:
+                action["linkSteering"] = "PREFERRED"
+                action["wanlink"] = preferred
+                action["errorCorrection"] = {
+                    "enableFec": True,
+                    "lossThresholdPct": sla[name]['packet_loss_pct'],
+                    "enableJitterBuffer": True
+                }
+            else:
+                action["linkSteering"] = "AUTO"
+            rules.append({"name": rule_name, "match": match, "action": action})
+        return rules
+    
     def _advanced_policies(self) -> str:
         base = self._standard_policies()
         
@@ -220,7 +356,11 @@ class VelocloudConfig(VendorConfig):
             "logging": {"enabled": True}
         }
         
+        self.add_operation(
+            "POST", "/configuration/updateConfigurationModule", firewall, "Firewall"
+        )
+        
         return base + f'''\n# --- Firewall Rules (Advanced) ---
 # POST /configuration/updateConfigurationModule (Firewall)
-{json.dumps(firewall, indent=2)}
+{self._format_payload(firewall)}
 '''